@@ -4,6 +4,7 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
+import config
 from modules.database import VideoDatabase
 
 
@@ -56,7 +57,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-db = VideoDatabase()
+db = VideoDatabase(config.API_DB_PATH or None)
 
 
 @app.get("/api/game-weekly-report", response_model=GameWeeklyReportResponse)
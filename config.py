@@ -8,7 +8,7 @@ load_dotenv()
 
 # OpenRouter API配置
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")  # 可指向本地回放服务（scripts/benchmarks/replay_server.py）
 # 推荐使用支持视频的多模态模型。
 # 这里默认改为 OpenRouter 官方支持的 Qwen3 VL 8B 多模态模型。
 # 如需切换模型，可在 .env 中设置 VIDEO_ANALYSIS_MODEL 覆盖，例如：
@@ -18,23 +18,54 @@ VIDEO_ANALYSIS_MODEL = os.getenv(
     "qwen/qwen3-vl-8b-instruct",  # Qwen3-VL-8B-Instruct（支持图像/视频）
 )
 
+# 视频分析并发（modules/analysis_engine.py，步骤3按模型并发请求 OpenRouter，并按每分钟请求数/token 数限流）
+ANALYSIS_CONCURRENCY = int(os.getenv("ANALYSIS_CONCURRENCY", "4"))  # 每个模型同时进行的分析请求数，1 表示逐个分析
+ANALYSIS_RATE_LIMITS = os.getenv("ANALYSIS_RATE_LIMITS", "")  # 按模型限额，格式：模型=每分钟请求数:每分钟token数[:并发数]，逗号分隔，如 qwen/qwen3-vl-8b-instruct=20:400000:4；0 或留空表示不限
+ANALYSIS_EST_TOKENS = int(os.getenv("ANALYSIS_EST_TOKENS", "20000"))  # 每次视频分析预估的 token 数（发送前按此预占每分钟 token 额度，完成后按实际用量修正）
+ANALYSIS_REFRESH_STALE = os.getenv("ANALYSIS_REFRESH_STALE", "all")  # 已有分析何时重新分析（analyses 表按 视频+模型+提示词版本 保存）：all=视频更换或模型/提示词版本不同时（默认），video=仅游戏视频更换时，off=一直使用旧分析
+
+# 关键帧分析模式（modules/keyframes.py：只发送少量代表性画面代替整段视频，延迟与费用更低）
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "video")  # 默认分析模式：video=发送视频URL，keyframes=发送本地视频抽取的关键帧（无本地视频时退回 video）
+ANALYSIS_MODE_BY_MODEL = os.getenv("ANALYSIS_MODE_BY_MODEL", "")  # 按模型指定分析模式，格式：模型=模式，逗号分隔，如 qwen/qwen3-vl-8b-instruct=keyframes,google/gemini-2.5-pro=video
+KEYFRAME_COUNT = int(os.getenv("KEYFRAME_COUNT", "8"))  # 每个视频发送的关键帧数
+KEYFRAME_METHOD = os.getenv("KEYFRAME_METHOD", "scene")  # 选帧方式：scene=按画面切换选取（不足时均匀补齐），uniform=均匀取帧
+KEYFRAME_SCENE_THRESHOLD = float(os.getenv("KEYFRAME_SCENE_THRESHOLD", "0.08"))  # 画面变化阈值（0~1，相邻取样帧灰度缩略图的平均差），低于该值不算切换
+KEYFRAME_MAX_SIDE = int(os.getenv("KEYFRAME_MAX_SIDE", "768"))  # 关键帧长边上限（像素）
+KEYFRAME_JPEG_QUALITY = int(os.getenv("KEYFRAME_JPEG_QUALITY", "80"))  # 关键帧 JPEG 质量
+KEYFRAME_ENCODE_WORKERS = int(os.getenv("KEYFRAME_ENCODE_WORKERS", "4"))  # 每个取帧任务中并行缩放/编码的线程数
+
+# 视频取帧（modules/frame_extractor.py：一次顺序读取 + cv2 缩放编码，每个视频一个任务在进程池中执行）
+FRAME_EXTRACT_WORKERS = int(os.getenv("FRAME_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))  # 取帧进程数（1=在主进程中执行）
+FRAME_MAX_WIDTH = int(os.getenv("FRAME_MAX_WIDTH", "1920"))  # 截图最大宽度（像素）
+FRAME_MAX_HEIGHT = int(os.getenv("FRAME_MAX_HEIGHT", "1080"))  # 截图最大高度（像素）
+FRAME_JPEG_QUALITY = int(os.getenv("FRAME_JPEG_QUALITY", "90"))  # 截图 JPEG 质量
+FRAME_CACHE_DIR = os.getenv("FRAME_CACHE_DIR", "data/frames")  # 视频帧缓存目录（modules/video_frames.py，截图与分析帧共用）
+FRAME_CACHE_QUOTA_MB = float(os.getenv("FRAME_CACHE_QUOTA_MB", "500"))  # 视频帧缓存占用上限（MB），每次运行结束按最近使用时间清理，0 表示不清理
+
+# 近似重复视频复用分析（modules/phash.py：换皮/克隆游戏的视频与已分析视频几乎相同时，不再发起付费分析）
+PHASH_REUSE_MODE = os.getenv("PHASH_REUSE_MODE", "off").lower()  # off=不检测，draft=复用已有分析作为草稿（待人工确认，不写入该游戏、不进入日报），skip=直接复用并写入（可人工驳回）
+PHASH_FRAMES = int(os.getenv("PHASH_FRAMES", "8"))  # 每个视频计算感知哈希的采样帧数
+PHASH_MAX_DISTANCE = int(os.getenv("PHASH_MAX_DISTANCE", "10"))  # 单帧 dHash 最大汉明距离（0~64），不超过即视为同一画面
+PHASH_MIN_MATCH_RATIO = float(os.getenv("PHASH_MIN_MATCH_RATIO", "0.75"))  # 匹配帧比例达到该值视为近似重复视频
+
 # 飞书机器人配置
 FEISHU_WEBHOOK_URL = os.getenv("FEISHU_WEBHOOK_URL", "")
 FEISHU_APP_ID = os.getenv("FEISHU_APP_ID", "")
 FEISHU_APP_SECRET = os.getenv("FEISHU_APP_SECRET", "")
+FEISHU_OPEN_API_BASE_URL = os.getenv("FEISHU_OPEN_API_BASE_URL", "https://open.feishu.cn/open-apis")  # 飞书开放平台接口根地址（获取令牌、上传图片）
 
 # 企业微信机器人配置（群机器人 Webhook）
 WECOM_WEBHOOK_URL = os.getenv("WECOM_WEBHOOK_URL", "")
 WECOM_WEBHOOK_URL_REAL = os.getenv("WECOM_WEBHOOK_URL_REAL", "")
 
 # 抖音搜索API配置
-DOUYIN_API_BASE_URL = "https://api.tikhub.io"
+DOUYIN_API_BASE_URL = os.getenv("DOUYIN_API_BASE_URL", "https://api.tikhub.io")
 DOUYIN_API_TOKEN = os.getenv("DOUYIN_API_TOKEN", "")
 DOUYIN_SEARCH_ENDPOINT = "/api/v1/douyin/search/fetch_general_search_v3"
 
 # YouTube API 配置（TikHub）
 YOUTUBE_API_TOKEN = os.getenv("DOUYIN_API_TOKEN", "")  # 复用抖音 API Token（TikHub 统一使用）
-YOUTUBE_API_BASE_URL = "https://api.tikhub.io"
+YOUTUBE_API_BASE_URL = os.getenv("YOUTUBE_API_BASE_URL", DOUYIN_API_BASE_URL)  # 默认与抖音相同（TikHub）
 
 # 抖音下载API配置（可选，如果使用专门的下载API）
 DOUYIN_DOWNLOAD_ENDPOINT = os.getenv("DOUYIN_DOWNLOAD_ENDPOINT", "")  # 下载API端点，如 "/api/v1/douyin/video/download"
@@ -55,9 +86,83 @@ VIDEO_INFO_DIR = "data/video_info"  # 保存视频URL和ID的目录
 MAX_GAMES_TO_PROCESS = int(os.getenv("MAX_GAMES_TO_PROCESS", "5"))  # 每次处理的最大游戏数量
 
 # API请求配置
-API_REQUEST_DELAY = float(os.getenv("API_REQUEST_DELAY", "1.0"))  # 请求间隔（秒），避免频率过高
+API_REQUEST_DELAY = float(os.getenv("API_REQUEST_DELAY", "1.0"))  # 请求间隔（秒）；未配置 API_RATE_LIMITS 时用于推导 TikHub/RapidAPI 的初始限流速率
 API_MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "3"))  # 最大重试次数（针对502等临时错误）
-API_RETRY_DELAY = float(os.getenv("API_RETRY_DELAY", "2.0"))  # 重试延迟（秒）
+API_RETRY_DELAY = float(os.getenv("API_RETRY_DELAY", "2.0"))  # 重试延迟（秒），5xx/网络错误时按此值指数退避
+
+# API限流配置（modules/rate_limiter.py，按主机共享的自适应令牌桶，遇429/Retry-After自动降速）
+API_RATE_LIMITS = os.getenv("API_RATE_LIMITS", "")  # 格式：主机=每秒请求数:突发容量，逗号分隔，如 api.tikhub.io=2:3,youtube138.p.rapidapi.com=1:1；留空则按 API_REQUEST_DELAY 推导
+API_RATE_MIN_FACTOR = float(os.getenv("API_RATE_MIN_FACTOR", "0.1"))  # 429 后速率最低降到初始速率的倍数
+API_RATE_MAX_FACTOR = float(os.getenv("API_RATE_MAX_FACTOR", "3.0"))  # 连续成功后速率最高升到初始速率的倍数
+RATE_LIMIT_STATE_DIR = os.getenv("RATE_LIMIT_STATE_DIR", "")  # 可选，令牌桶状态文件目录；设置后多个进程共享同一限流状态
+
+# 搜索响应缓存（database.search_response_cache，相同查询在有效期内不再调用搜索API）
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"  # 是否启用搜索响应缓存
+SEARCH_CACHE_TTL_HOURS_DOUYIN = float(os.getenv("SEARCH_CACHE_TTL_HOURS_DOUYIN", "72"))  # 抖音搜索结果有效期（小时）
+SEARCH_CACHE_TTL_HOURS_YOUTUBE = float(os.getenv("SEARCH_CACHE_TTL_HOURS_YOUTUBE", "168"))  # YouTube 搜索结果有效期（小时）
+
+# 搜索无结果缓存（database.search_negative_cache，长尾游戏搜索无结果后按指数退避跳过，节省搜索额度）
+NEGATIVE_CACHE_ENABLED = os.getenv("NEGATIVE_CACHE_ENABLED", "true").lower() == "true"  # 是否启用搜索无结果缓存
+NEGATIVE_CACHE_BASE_HOURS = float(os.getenv("NEGATIVE_CACHE_BASE_HOURS", "24"))  # 首次无结果后的跳过时长（小时），之后每次翻倍
+NEGATIVE_CACHE_MAX_DAYS = float(os.getenv("NEGATIVE_CACHE_MAX_DAYS", "30"))  # 跳过时长上限（天）
+
+# 候选视频排序（modules/video_ranker.py，抖音/YouTube 共用）
+RANKER_WEIGHTS = os.getenv("RANKER_WEIGHTS", "")  # 特征权重，格式：特征=权重，逗号分隔，如 name=10,relevant=5,priority=3,irrelevant=0,duration=5,likes=2,plays=1；留空使用默认值
+
+# 付费API费用管控（modules/cost_governor.py，账本见 database.api_cost_ledger）
+COST_LEDGER_ENABLED = os.getenv("COST_LEDGER_ENABLED", "true").lower() == "true"  # 是否记录付费API调用并启用预算
+COST_BUDGET_PER_RUN_USD = float(os.getenv("COST_BUDGET_PER_RUN_USD", "0"))  # 单次运行预算（美元），0 表示不限
+COST_BUDGET_PER_DAY_USD = float(os.getenv("COST_BUDGET_PER_DAY_USD", "0"))  # 每日预算（美元，按本地自然日），0 表示不限
+API_PRICES = os.getenv("API_PRICES", "")  # 覆盖接口单价（美元/次），格式：计费键=单价，逗号分隔，如 tikhub.douyin_search=0.001,openrouter.chat=0.02
+
+# 视频下载（modules/downloader.py，先写 .part 再重命名，断点续传，大文件分段并行）
+DOWNLOAD_CHUNK_KB = int(os.getenv("DOWNLOAD_CHUNK_KB", "256"))  # 读写缓冲大小（KB）
+DOWNLOAD_MAX_RETRIES = int(os.getenv("DOWNLOAD_MAX_RETRIES", "3"))  # 连接中断后从断点续传的重试次数
+DOWNLOAD_PARALLEL_WORKERS = int(os.getenv("DOWNLOAD_PARALLEL_WORKERS", "4"))  # 大文件分段并行下载的线程数，1 表示不分段
+DOWNLOAD_PARALLEL_MIN_MB = float(os.getenv("DOWNLOAD_PARALLEL_MIN_MB", "8"))  # 文件不小于该大小（MB）且服务器支持 Range 时分段并行下载
+
+# 下载调度（modules/download_scheduler.py，抖音直链、TikHub 直链与 yt-dlp 共用一个有界下载池）
+DOWNLOAD_CONCURRENCY = int(os.getenv("DOWNLOAD_CONCURRENCY", "1"))  # 同时下载的视频数，1 表示逐个下载
+STEP2_GAME_CONCURRENCY = int(os.getenv("STEP2_GAME_CONCURRENCY", "1"))  # 步骤2同时处理（搜索/下载/上传）的游戏数，1 表示逐个游戏处理（下载仍经下载调度器）
+DOWNLOAD_PER_HOST_LIMIT = int(os.getenv("DOWNLOAD_PER_HOST_LIMIT", "2"))  # 每个主机同时进行的下载数上限
+DOWNLOAD_BANDWIDTH_MBPS = float(os.getenv("DOWNLOAD_BANDWIDTH_MBPS", "0"))  # 全部下载合计的带宽上限（MB/s），0 表示不限
+
+# 本地视频存储（modules/video_store.py，按 sha256 去重，data/videos 下的文件名为指向实体文件的硬链接）
+VIDEO_STORE_ENABLED = os.getenv("VIDEO_STORE_ENABLED", "true").lower() == "true"  # 已下载过的 aweme_id / video_id 跳过下载，同内容复用 Google Drive 文件
+VIDEO_STORE_DIR = os.getenv("VIDEO_STORE_DIR", os.path.join(VIDEOS_DIR, "blobs"))  # 实体文件目录（需与 VIDEOS_DIR 在同一文件系统才能硬链接）
+
+# 本地视频磁盘配额（modules/video_cache.py；未上传、未分析、缺截图的视频不会被清理）
+VIDEO_CACHE_QUOTA_MB = float(os.getenv("VIDEO_CACHE_QUOTA_MB", "0"))  # data/videos 占用上限（MB），超出时按最近使用时间清理，0 表示不限制
+VIDEO_CACHE_MAX_AGE_DAYS = float(os.getenv("VIDEO_CACHE_MAX_AGE_DAYS", "0"))  # 超过该天数未使用的视频直接清理，0 表示不按时间清理
+
+# 视频完整性检查（modules/video_probe.py，下载后只读取 MP4 容器头，坏文件隔离后改用付费API或重新搜索）
+VIDEO_PROBE_ENABLED = os.getenv("VIDEO_PROBE_ENABLED", "true").lower() == "true"  # 检查 moov、时长、分辨率，拦截HTML错误页与被截断的文件
+VIDEO_PROBE_MIN_DURATION = float(os.getenv("VIDEO_PROBE_MIN_DURATION", "1"))  # 时长低于该值（秒）视为坏文件
+VIDEO_QUARANTINE_DIR = os.getenv("VIDEO_QUARANTINE_DIR", os.path.join(VIDEOS_DIR, "quarantine"))  # 坏文件隔离目录
+
+# 边下载边上传 Google Drive（modules/gdrive_uploader.py 的 upload_stream，抖音直链下载时使用）
+GDRIVE_STREAM_UPLOAD = os.getenv("GDRIVE_STREAM_UPLOAD", "false").lower() == "true"  # 下载数据直接送入 Drive 可续传上传，不再先落盘再读回
+GDRIVE_STREAM_TEE_LOCAL = os.getenv("GDRIVE_STREAM_TEE_LOCAL", "true").lower() == "true"  # 同时保留本地副本（截图需要本地视频；false 时本地磁盘零占用）
+GDRIVE_STREAM_CHUNK_MB = float(os.getenv("GDRIVE_STREAM_CHUNK_MB", "8"))  # 每个上传分块大小（MB，按 256KB 取整）
+GDRIVE_STREAM_BUFFER_MB = float(os.getenv("GDRIVE_STREAM_BUFFER_MB", "16"))  # 下载与上传之间的缓冲上限（MB），满时暂停下载
+
+# Google Drive 上传管理（modules/gdrive_upload_manager.py：并行上传、按文件大小选择分块、可续传会话写入数据库，重启后断点续传）
+GDRIVE_UPLOAD_CONCURRENCY = int(os.getenv("GDRIVE_UPLOAD_CONCURRENCY", "2"))  # 同时进行的上传数
+GDRIVE_UPLOAD_CHUNK_MB = float(os.getenv("GDRIVE_UPLOAD_CHUNK_MB", "0"))  # 固定分块大小（MB，按 256KB 取整），0 表示按文件大小自动选择（约分4块）
+GDRIVE_UPLOAD_MAX_CHUNK_MB = float(os.getenv("GDRIVE_UPLOAD_MAX_CHUNK_MB", "32"))  # 自动选择时的分块上限（MB，每个上传线程占用一个分块的内存）
+GDRIVE_PERMISSION_BATCH_WINDOW = float(os.getenv("GDRIVE_PERMISSION_BATCH_WINDOW", "0.2"))  # 有其他上传进行中时最多等待的秒数，把设置公开访问合并为一个批量请求
+GDRIVE_DEDUPE_ENABLED = os.getenv("GDRIVE_DEDUPE_ENABLED", "true").lower() == "true"  # 上传前按内容（md5 + 大小）查 Drive 文件索引，相同内容不重复上传（modules/gdrive_index.py）
+
+# HTTP录制（modules/http_cassette.py，录制的请求/响应可由 scripts/benchmarks/replay_server.py 离线回放）
+HTTP_RECORD_DIR = os.getenv("HTTP_RECORD_DIR", "")  # 可选，设置后经 http_client 的非流式请求与响应写入该目录（每条一个JSON，不含请求头与密钥）
+GDRIVE_API_ENDPOINT = os.getenv("GDRIVE_API_ENDPOINT", "")  # 可选，Drive API 地址（如 http://127.0.0.1:8765/drive/v3/）；设置后跳过OAuth使用匿名凭证，仅用于离线回放
+
+# HTTP连接池配置（modules/http_client.py，所有外部请求按主机复用 keep-alive 连接）
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))  # 每个Session缓存的连接池数量
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))  # 每个主机连接池最大连接数（并发下载/分析时需足够大）
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))  # 默认建连超时（秒）
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))  # 默认读取超时（秒），调用方显式传入 timeout 时以调用方为准
+HTTP_CONNECT_RETRIES = int(os.getenv("HTTP_CONNECT_RETRIES", "2"))  # 建连失败自动重试次数
 
 # Google Sheets（游戏排行榜写入）
 GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID", "")  # 目标表格 ID 或完整 URL
@@ -68,4 +173,9 @@ GOOGLE_SHEETS_TOKEN = os.getenv("GOOGLE_SHEETS_TOKEN", "")  # 可选，token 保
 SENSORTOWER_API_TOKEN = os.getenv("SENSORTOWER_API_TOKEN", "")  # SensorTower API Token
 
 # RapidAPI 配置（用于 YouTube 搜索）
-RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY", "")  # RapidAPI Key for YouTube search
\ No newline at end of file
+RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY", "")  # RapidAPI Key for YouTube search
+RAPIDAPI_YOUTUBE_HOST = os.getenv("RAPIDAPI_YOUTUBE_HOST", "youtube138.p.rapidapi.com")  # x-rapidapi-host 请求头
+RAPIDAPI_YOUTUBE_BASE_URL = os.getenv("RAPIDAPI_YOUTUBE_BASE_URL", f"https://{RAPIDAPI_YOUTUBE_HOST}")  # 搜索请求根地址，可指向本地回放服务
+
+# 接口服务配置（api.py）
+API_DB_PATH = os.getenv("API_DB_PATH", "")  # 可选，api.py 使用的数据库路径；不填则使用默认 data/wechatdouyin.db（压测时指向合成库）
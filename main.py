@@ -4,20 +4,31 @@
 """
 import sys
 import os
+import threading
 import time
 import sqlite3
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Optional, List, Dict
 from pathlib import Path
 from modules.rank_extractor import RankExtractor
-from modules.video_searcher import VideoSearcher
+from modules.video_searcher import VideoSearcher, format_retry_time
 from modules.youtube_searcher import YouTubeSearcher
 from modules.video_analyzer import VideoAnalyzer
 from modules.report_generator import ReportGenerator
 from modules.feishu_sender import FeishuSender
+from modules.database import VideoDatabase
+from modules.singleflight import SingleFlight
+from modules import (
+    analysis_engine, cost_governor, download_scheduler, downloader, frame_extractor, gdrive_index, gdrive_upload_manager,
+    http_client, keyframes, phash, prompt_registry, rate_limiter, video_cache, video_frames, video_probe, video_store,
+)
 import config
 
+# 截图位置：视频开头、中间、结尾（0~1）
+SCREENSHOT_POSITIONS = ((0.0, "开头"), (0.5, "中间"), (1.0, "结尾"))
+
 
 class GameAnalysisWorkflow:
     """游戏分析工作流"""
@@ -26,9 +37,14 @@ class GameAnalysisWorkflow:
         self,
         rankings_csv_path: Optional[str] = None,
         force_refresh_analysis: bool = False,
+        refresh_stale_analysis: bool = False,
         skip_screenshots: bool = False,
         platform: Optional[str] = None,
         send_to: Optional[str] = None,
+        download_concurrency: Optional[int] = None,
+        upload_concurrency: Optional[int] = None,
+        analysis_concurrency: Optional[int] = None,
+        game_concurrency: Optional[int] = None,
     ):
         """
         初始化工作流
@@ -36,20 +52,104 @@ class GameAnalysisWorkflow:
         Args:
             rankings_csv_path: CSV文件路径
             force_refresh_analysis: 是否强制刷新分析
+            refresh_stale_analysis: 是否重新分析模型或提示词版本已变化的已有分析（默认即如此；ANALYSIS_REFRESH_STALE 设为 video/off 时用于本次覆盖）
             skip_screenshots: 是否跳过截图
             platform: 平台类型，'dy'表示抖音，'wx'表示微信小游戏，None表示不限制
             send_to: 发送目标，'feishu'/'wecom'/'sheets'/'all'，None表示默认（飞书）
+            download_concurrency: 同时下载的视频数，None表示使用 DOWNLOAD_CONCURRENCY
+            upload_concurrency: 同时上传到Google Drive的视频数，None表示使用 GDRIVE_UPLOAD_CONCURRENCY
+            analysis_concurrency: 每个模型同时进行的视频分析请求数，None表示使用 ANALYSIS_CONCURRENCY
+            game_concurrency: 步骤2同时处理（搜索/下载/上传）的游戏数，None表示使用 STEP2_GAME_CONCURRENCY
         """
         self.rank_extractor = RankExtractor(csv_path=rankings_csv_path, platform=platform) if rankings_csv_path else RankExtractor(platform=platform)
         self.video_searcher = VideoSearcher()  # 用于抖音/微信小游戏
         self.youtube_searcher = YouTubeSearcher()  # 用于 SensorTower 游戏
-        self.video_analyzer = VideoAnalyzer()
+        self.video_analyzer = VideoAnalyzer(refresh_stale="all" if refresh_stale_analysis else None)
         self.report_generator = ReportGenerator()
         self.feishu_sender = FeishuSender()
         # 工作流可选行为
         self.force_refresh_analysis = bool(force_refresh_analysis)
         self.skip_screenshots = bool(skip_screenshots)
         self.send_to = send_to or 'feishu'  # 默认发送到飞书
+        self.game_concurrency = max(1, game_concurrency or config.STEP2_GAME_CONCURRENCY)
+        if download_concurrency:
+            download_scheduler.configure(workers=download_concurrency)
+        if upload_concurrency:
+            gdrive_upload_manager.configure(workers=upload_concurrency)
+        if analysis_concurrency:
+            analysis_engine.configure(concurrency=analysis_concurrency)
+        # 同次运行内合并同一游戏（多榜单/多平台重复出现）的搜索、下载、上传与分析调用
+        self.single_flight = SingleFlight()
+        # single-flight 调用实际由哪个原始游戏名执行：(操作类型, 规范化游戏名) -> 游戏名
+        self._flight_owners: Dict[tuple, str] = {}
+        # 因搜索无结果记录（search_negative_cache）而跳过的搜索次数（步骤2的多个工作线程共同累加）
+        self.negative_cache_skips = 0
+        self._stats_lock = threading.Lock()
+        # 近似重复视频复用得到的草稿（PHASH_REUSE_MODE=draft），未经人工确认，不进入日报与发送：游戏名 -> 复用来源
+        self.pending_drafts: Dict[str, Dict] = {}
+    
+    def _flight(self, kind: str, game_name: str, fn, *args, **kwargs):
+        """
+        按「操作类型 + 规范化游戏名」合并调用，详见 modules/singleflight.py
+
+        数据库按原始游戏名读写：复用了另一种写法（规范化后相同）的调用结果时，把结果也写到本游戏名下
+        """
+        key = VideoDatabase.normalize_game_name(game_name)
+        executed = []
+
+        def run():
+            executed.append(True)
+            self._flight_owners[(kind, key)] = game_name
+            return fn(*args, **kwargs)
+
+        result = self.single_flight.do(kind, key, run)
+        owner = self._flight_owners.get((kind, key))
+        if not executed and owner and owner != game_name:
+            self._share_flight_result(kind, owner, game_name)
+        return result
+
+    def _share_flight_result(self, kind: str, owner: str, game_name: str):
+        """把 owner 名下执行得到的结果（视频或分析）写到 game_name 名下"""
+        if kind == "analysis":
+            db = self.video_analyzer.db if self.video_analyzer.use_database else None
+            analysis = db.get_gameplay_analysis(owner) if db else None
+            if analysis and analysis.get("analysis_id"):
+                db.set_current_analysis(game_name, analysis)
+        elif self.video_searcher.use_database and self.video_searcher.db:
+            self.video_searcher.db.copy_game_video(owner, game_name)
+    
+    def _analyze_video(self, **job) -> Optional[Dict]:
+        """分析视频（同一游戏在多个榜单出现时只分析一次），供分析引擎在工作线程中调用"""
+        return self._flight("analysis", job["game_name"], self.video_analyzer.analyze_video, **job)
+    
+    def _usable_local_video(self, video_path: str, game_name: str, video_id: str = None) -> bool:
+        """
+        本地视频存在（记一次缓存命中）且通过容器头检查；损坏的文件会被隔离并清除数据库中的路径与Drive链接
+        （数据库中已记录的本地视频只在这里记命中，搜索器中对同一路径的检查不再重复记录）
+        """
+        if not video_cache.record_access(video_path):
+            return False
+        return video_probe.check(self.video_searcher.db, video_path, None, video_id, game_name)
+    
+    def _skip_negative_search(self, game_name: str, source: str) -> bool:
+        """该游戏仍在搜索无结果的退避期内时记一次跳过并返回True（不调用搜索）"""
+        negative = self._get_negative_search(game_name, source)
+        if not negative:
+            return False
+        with self._stats_lock:
+            self.negative_cache_skips += 1
+        print(f"  ⚠ 该游戏近期搜索无结果（已 {negative['attempts']} 次），"
+              f"{format_retry_time(negative['next_retry_at'])} 前跳过搜索")
+        return True
+    
+    def _get_negative_search(self, game_name: str, source: str) -> Optional[Dict]:
+        """查询该游戏在对应搜索来源（SensorTower→YouTube，其他→抖音）仍在退避期内的无结果记录"""
+        if not config.NEGATIVE_CACHE_ENABLED:
+            return None
+        if not (self.video_searcher.use_database and self.video_searcher.db):
+            return None
+        provider = YouTubeSearcher.SEARCH_PROVIDER if source == "SensorTower" else VideoSearcher.SEARCH_PROVIDER
+        return self.video_searcher.db.get_negative_search(game_name, provider)
     
     def _extract_and_upload_screenshot(self, video_path: str, game_name: str) -> Optional[List[str]]:
         """
@@ -63,59 +163,14 @@ class GameAnalysisWorkflow:
             所有截图的image_key列表（开头、中间、结尾），如果失败返回None
         """
         try:
-            # 检查是否有视频处理库
-            try:
-                import cv2
-                from PIL import Image
-                VIDEO_PROCESSING_AVAILABLE = True
-            except ImportError:
-                VIDEO_PROCESSING_AVAILABLE = False
-            
-            if not VIDEO_PROCESSING_AVAILABLE:
-                return None
-            
-            # 提取视频开头、中间、结尾三帧作为截图
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
+            if not frame_extractor.FRAME_EXTRACTION_AVAILABLE:
                 return None
             
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            if total_frames == 0:
-                cap.release()
-                return None
-            
-            # 计算三个时间点的帧数：开头、中间、结尾
-            start_frame = 0
-            middle_frame = total_frames // 2
-            end_frame = total_frames - 1
-            
-            frame_indices = [
-                (start_frame, "开头"),
-                (middle_frame, "中间"),
-                (end_frame, "结尾")
-            ]
-            
-            screenshots = []
-            
-            for frame_idx, frame_name in frame_indices:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-                ret, frame = cap.read()
-                
-                if not ret:
-                    continue
-                
-                # 转换BGR到RGB
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                pil_image = Image.fromarray(frame_rgb)
-                
-                # 调整大小（限制最大尺寸为1920x1080）
-                max_width, max_height = 1920, 1080
-                if pil_image.width > max_width or pil_image.height > max_height:
-                    pil_image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-                
-                screenshots.append((pil_image, frame_name))
-            
-            cap.release()
+            # 提取视频开头、中间、结尾三帧作为截图（视频帧服务：步骤3已提前提交的直接从缓存读取）
+            images = video_frames.get_video_frame_service().get_frames(
+                video_path, fractions=[position for position, _ in SCREENSHOT_POSITIONS]
+            )
+            screenshots = [(image["jpeg"], SCREENSHOT_POSITIONS[image["position"]][1]) for image in images]
             
             if not screenshots:
                 return None
@@ -129,9 +184,10 @@ class GameAnalysisWorkflow:
                 import tempfile
                 temp_dir = tempfile.gettempdir()
                 
-                for pil_image, frame_name in screenshots:
+                for jpeg, frame_name in screenshots:
                     screenshot_path = os.path.join(temp_dir, f"{game_name}_screenshot_{frame_name}.jpg")
-                    pil_image.save(screenshot_path, format='JPEG', quality=90)
+                    with open(screenshot_path, "wb") as f:
+                        f.write(jpeg)
                     
                     # 上传到飞书并获取image_key
                     image_key = self._upload_image_to_feishu(feishu_sender, screenshot_path)
@@ -183,12 +239,11 @@ class GameAnalysisWorkflow:
                 return None
             
             # 步骤1：获取访问令牌
-            import requests
-            token_url = 'https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal/'
+            token_url = f'{config.FEISHU_OPEN_API_BASE_URL}/auth/v3/tenant_access_token/internal/'
             token_headers = {'Content-Type': 'application/json'}
             token_data = {'app_id': app_id, 'app_secret': app_secret}
             
-            token_response = requests.post(token_url, json=token_data, headers=token_headers)
+            token_response = http_client.post(token_url, json=token_data, headers=token_headers)
             token_result = token_response.json()
             
             if token_result.get('code') != 0:
@@ -198,7 +253,7 @@ class GameAnalysisWorkflow:
             tenant_access_token = token_result.get('tenant_access_token')
             
             # 步骤2：上传图片
-            upload_url = 'https://open.feishu.cn/open-apis/im/v1/images'
+            upload_url = f'{config.FEISHU_OPEN_API_BASE_URL}/im/v1/images'
             
             # 检测图片MIME类型
             mime_type = 'image/jpeg'
@@ -221,7 +276,7 @@ class GameAnalysisWorkflow:
                         'Authorization': f'Bearer {tenant_access_token}',
                         'Content-Type': multi_form.content_type
                     }
-                    upload_response = requests.post(upload_url, headers=upload_headers, data=multi_form)
+                    upload_response = http_client.post(upload_url, headers=upload_headers, data=multi_form)
             except ImportError:
                 # 如果没有requests_toolbelt，使用标准方式
                 with open(image_path, 'rb') as f:
@@ -232,7 +287,7 @@ class GameAnalysisWorkflow:
                     upload_headers = {
                         'Authorization': f'Bearer {tenant_access_token}'
                     }
-                    upload_response = requests.post(upload_url, headers=upload_headers, files=files)
+                    upload_response = http_client.post(upload_url, headers=upload_headers, files=files)
             
             upload_result = upload_response.json()
             
@@ -656,75 +711,132 @@ class GameAnalysisWorkflow:
         """
         print("【步骤2】搜索并下载视频...")
         video_results = []
+        # 游戏级并发单独配置（STEP2_GAME_CONCURRENCY）：与下载并发无关，默认逐个游戏处理，
+        # 搜索/API 调用与控制台输出不会因为调大 DOWNLOAD_CONCURRENCY 而交错
+        workers = self.game_concurrency
         
-        for idx, game in enumerate(games, 1):
-            # 保留原始 CSV/榜单信息（不要被后续数据库查询覆盖）
-            csv_game = game.copy() if isinstance(game, dict) else {}
-            game_name = game.get('游戏名称', '未知游戏')
-            game_type = game.get('游戏类型')  # 保存原始的游戏类型信息
-            print(f"\n处理游戏 {idx}/{len(games)}: {game_name}")
+        if workers > 1:
+            # 多个游戏同时搜索/下载：下载任务经下载调度器排队（排名靠前的游戏优先），结果保持榜单顺序
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="step2") as executor:
+                futures = [
+                    executor.submit(self._step2_process_game, idx, game, len(games))
+                    for idx, game in enumerate(games, 1)
+                ]
+                for future in futures:
+                    result = future.result()
+                    if result:
+                        video_results.append(result)
+        else:
+            for idx, game in enumerate(games, 1):
+                result = self._step2_process_game(idx, game, len(games))
+                if result:
+                    video_results.append(result)
+        
+        # 保存中间产物
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_file = f"data/step2_videos_{timestamp}.json"
+        try:
+            os.makedirs("data", exist_ok=True)
+            import json
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(video_results, f, ensure_ascii=False, indent=2)
+            print(f"\n✓ 视频搜索完成")
+            print(f"  中间产物已保存到：{output_file}\n")
+        except Exception as e:
+            print(f"\n✓ 视频搜索完成")
+            print(f"  保存中间产物失败：{str(e)}\n")
+        
+        return video_results
+    
+    def _step2_process_game(self, idx: int, game: Dict, total: int) -> Optional[Dict]:
+        """
+        步骤2中处理单个游戏：查库、搜索、下载、上传（该游戏的下载任务以榜单序号为优先级）
+        
+        Args:
+            idx: 游戏在榜单中的序号（从1开始）
+            game: 游戏信息
+            total: 游戏总数
+        
+        Returns:
+            视频信息；没有找到视频返回None
+        """
+        with download_scheduler.job_priority(idx):
+            return self._step2_search_game(idx, game, total)
+    
+    def _step2_search_game(self, idx: int, game: Dict, total: int) -> Optional[Dict]:
+        # 保留原始 CSV/榜单信息（不要被后续数据库查询覆盖）
+        csv_game = game.copy() if isinstance(game, dict) else {}
+        game_name = game.get('游戏名称', '未知游戏')
+        game_type = game.get('游戏类型')  # 保存原始的游戏类型信息
+        print(f"\n处理游戏 {idx}/{total}: {game_name}")
 
-            def _none_if_placeholder(v):
-                if v is None:
-                    return None
-                s = str(v).strip()
-                if not s or s in {"--", "N/A", "None"}:
-                    return None
-                return s
+        def _none_if_placeholder(v):
+            if v is None:
+                return None
+            s = str(v).strip()
+            if not s or s in {"--", "N/A", "None"}:
+                return None
+            return s
 
-            # 先把排行榜字段落库（避免后续只跑step2时数据库缺少公司/来源/监控日期等信息）
-            if self.video_searcher.use_database and self.video_searcher.db:
-                try:
-                    self.video_searcher.db.save_game(
-                        {
-                            "game_name": game_name,
-                            "game_rank": _none_if_placeholder(csv_game.get("排名")),
-                            "game_company": _none_if_placeholder(csv_game.get("开发公司")),
-                            "rank_change": _none_if_placeholder(csv_game.get("排名变化")),
-                            "platform": _none_if_placeholder(csv_game.get("平台")),
-                            "source": _none_if_placeholder(csv_game.get("来源")),
-                            "board_name": _none_if_placeholder(csv_game.get("榜单")),
-                            "monitor_date": _none_if_placeholder(csv_game.get("监控日期")),
-                        }
-                    )
-                except Exception:
-                    pass
-            
-            # 检查数据库中是否已有视频
-            video_info = None
-            video_path = None
-            video_url = None
-            aweme_id = None
-            
-            if self.video_searcher.use_database and self.video_searcher.db:
-                db_game = self.video_searcher.db.get_game(game_name)
-                videos = [db_game] if db_game else []
-                if videos:
-                    video_info = videos[0]
-                    aweme_id = video_info.get("aweme_id")
-                    
-                    if video_info.get("downloaded") == 1 and video_info.get("local_path"):
-                        video_path = video_info.get("local_path")
-                        if os.path.exists(video_path):
-                            print(f"  ✓ 从数据库找到已下载的视频：{video_path}")
-                        else:
-                            video_path = None
-                    
-                    gdrive_url = video_info.get("gdrive_url")
-                    if gdrive_url:
-                        video_url = gdrive_url
-                        print(f"  ✓ 从数据库找到Google Drive URL：{video_url[:50]}...")
-            
-            # 根据来源选择搜索器：SensorTower 使用 YouTube，其他使用抖音
-            source = csv_game.get("来源", "").strip()
-            
-            # 如果数据库中没有，进行搜索和下载
-            if not video_path or not video_url:
-                if not video_path:
+        # 先把排行榜字段落库（避免后续只跑step2时数据库缺少公司/来源/监控日期等信息）
+        if self.video_searcher.use_database and self.video_searcher.db:
+            try:
+                self.video_searcher.db.save_game(
+                    {
+                        "game_name": game_name,
+                        "game_rank": _none_if_placeholder(csv_game.get("排名")),
+                        "game_company": _none_if_placeholder(csv_game.get("开发公司")),
+                        "rank_change": _none_if_placeholder(csv_game.get("排名变化")),
+                        "platform": _none_if_placeholder(csv_game.get("平台")),
+                        "source": _none_if_placeholder(csv_game.get("来源")),
+                        "board_name": _none_if_placeholder(csv_game.get("榜单")),
+                        "monitor_date": _none_if_placeholder(csv_game.get("监控日期")),
+                    }
+                )
+            except Exception:
+                pass
+        
+        # 检查数据库中是否已有视频
+        video_info = None
+        video_path = None
+        video_url = None
+        aweme_id = None
+        
+        if self.video_searcher.use_database and self.video_searcher.db:
+            db_game = self.video_searcher.db.get_game(game_name)
+            videos = [db_game] if db_game else []
+            if videos:
+                video_info = videos[0]
+                aweme_id = video_info.get("aweme_id")
+                
+                if video_info.get("downloaded") == 1 and video_info.get("local_path"):
+                    video_path = video_info.get("local_path")
+                    if self._usable_local_video(video_path, game_name, aweme_id):
+                        print(f"  ✓ 从数据库找到已下载的视频：{video_path}")
+                    else:
+                        video_path = None
+                        # 视频文件损坏被隔离时，数据库中的Google Drive链接也已清除
+                        video_info = self.video_searcher.db.get_game(game_name) or video_info
+                
+                gdrive_url = video_info.get("gdrive_url")
+                if gdrive_url:
+                    video_url = gdrive_url
+                    print(f"  ✓ 从数据库找到Google Drive URL：{video_url[:50]}...")
+        
+        # 根据来源选择搜索器：SensorTower 使用 YouTube，其他使用抖音
+        source = csv_game.get("来源", "").strip()
+        
+        # 如果数据库中没有，进行搜索和下载
+        if not video_path or not video_url:
+            if not video_path:
+                # 近期搜索无结果的长尾游戏，退避期内跳过搜索（不消耗搜索额度）
+                if not self._skip_negative_search(game_name, source):
                     print(f"  数据库中未找到已下载的视频，开始搜索...")
                     if source == "SensorTower":
                         print(f"  使用 YouTube 搜索（来源：SensorTower）")
-                        video_result = self.youtube_searcher.search_and_download(
+                        video_result = self._flight(
+                            "youtube_search_download", game_name,
+                            self.youtube_searcher.search_and_download,
                             game_name=game_name,
                             max_results=1,
                             upload_to_gdrive=True
@@ -737,90 +849,83 @@ class GameAnalysisWorkflow:
                             aweme_id = video_result.get("video_id")
                     else:
                         print(f"  使用抖音搜索（来源：{source or '引力引擎'}）")
-                        video_path = self.video_searcher.search_and_download(
+                        video_path = self._flight(
+                            "search_download", game_name,
+                            self.video_searcher.search_and_download,
                             game_name=game_name,
                             game_type=game_type  # 使用保存的原始游戏类型
                         )
-                
-                # 重新从数据库获取最新信息（仅对抖音搜索）
-                if source != "SensorTower" and self.video_searcher.use_database and self.video_searcher.db:
-                    db_game = self.video_searcher.db.get_game(game_name)
-                    videos = [db_game] if db_game else []
-                    if videos:
-                        video_info = videos[0]
-                        aweme_id = video_info.get("aweme_id")
-                        
-                        if not video_url:
-                            gdrive_url = video_info.get("gdrive_url")
+            
+            # 重新从数据库获取最新信息（仅对抖音搜索）
+            if source != "SensorTower" and self.video_searcher.use_database and self.video_searcher.db:
+                db_game = self.video_searcher.db.get_game(game_name)
+                videos = [db_game] if db_game else []
+                if videos:
+                    video_info = videos[0]
+                    aweme_id = video_info.get("aweme_id")
+                    
+                    if not video_url:
+                        gdrive_url = video_info.get("gdrive_url")
+                        if gdrive_url:
+                            video_url = gdrive_url
+                            print(f"  ✓ 从数据库获取Google Drive URL：{video_url[:50]}...")
+                        elif video_path and os.path.exists(video_path):
+                            print(f"  尝试上传本地视频到Google Drive...")
+                            gdrive_url, gdrive_file_id = self._flight(
+                                "upload", game_name,
+                                self.video_searcher._upload_to_gdrive,
+                                video_path, game_name, aweme_id
+                            )
                             if gdrive_url:
                                 video_url = gdrive_url
-                                print(f"  ✓ 从数据库获取Google Drive URL：{video_url[:50]}...")
-                            elif video_path and os.path.exists(video_path):
-                                print(f"  尝试上传本地视频到Google Drive...")
-                                gdrive_url, gdrive_file_id = self.video_searcher._upload_to_gdrive(
-                                    video_path, game_name, aweme_id
-                                )
-                                if gdrive_url:
-                                    video_url = gdrive_url
-                                    print(f"  ✓ 已上传并获取Google Drive URL：{video_url[:50]}...")
-                
-                # 对于 YouTube 搜索，如果还没有 video_url，尝试上传
-                if source == "SensorTower" and video_path and not video_url and os.path.exists(video_path):
-                    print(f"  尝试上传本地视频到Google Drive...")
-                    gdrive_url = self.youtube_searcher.upload_to_gdrive(video_path, game_name)
-                    if gdrive_url:
-                        video_url = gdrive_url
-                        if video_info:
-                            video_info['gdrive_url'] = gdrive_url
-                        print(f"  ✓ 已上传并获取Google Drive URL：{video_url[:50]}...")
-            
-            # 获取完整的游戏信息（优先使用原始CSV数据，补充数据库中的视频信息）
+                                print(f"  ✓ 已上传并获取Google Drive URL：{video_url[:50]}...")
+            
+            # 对于 YouTube 搜索，如果还没有 video_url，尝试上传
+            if source == "SensorTower" and video_path and not video_url and os.path.exists(video_path):
+                print(f"  尝试上传本地视频到Google Drive...")
+                gdrive_url = self._flight(
+                    "youtube_upload", game_name,
+                    self.youtube_searcher.upload_to_gdrive, video_path, game_name
+                )
+                if gdrive_url:
+                    video_url = gdrive_url
+                    if video_info:
+                        video_info['gdrive_url'] = gdrive_url
+                    print(f"  ✓ 已上传并获取Google Drive URL：{video_url[:50]}...")
+        
+        # 获取完整的游戏信息（优先使用原始CSV数据，补充数据库中的视频信息）
+        if video_info:
+            # 使用原始的game信息（来自CSV），确保包含排名、公司等信息
+            game_info = csv_game.copy() if isinstance(csv_game, dict) else {}
+            # 如果数据库中有视频信息，合并进去
             if video_info:
-                # 使用原始的game信息（来自CSV），确保包含排名、公司等信息
-                game_info = csv_game.copy() if isinstance(csv_game, dict) else {}
-                # 如果数据库中有视频信息，合并进去
-                if video_info:
-                    # 对于 YouTube，使用 video_id；对于抖音，使用 aweme_id
-                    video_id_key = "video_id" if source == "SensorTower" else "aweme_id"
-                    game_info.update({
-                        "aweme_id": video_info.get(video_id_key) or video_info.get("aweme_id"),
-                        "video_id": video_info.get("video_id"),  # YouTube video_id
-                        "gdrive_url": video_info.get("gdrive_url") or video_url,
-                        "local_path": video_info.get("local_path") or video_path,
-                        # 透传抖音原始分享链接（用于报告“点击查看”跳回抖音）
-                        "share_url": video_info.get("share_url"),
-                        "youtube_url": video_info.get("youtube_url"),  # YouTube URL
-                        "original_video_url": video_info.get("original_video_url"),
-                        "video_url": video_info.get("video_url") or video_url,
-                    })
-                
-                video_results.append({
-                    "game_name": game_name,
-                    "game_info": game_info,  # 保存完整的游戏信息（包括开发公司、排名变化等）
-                    "video_info": video_info,
-                    "video_path": video_path,
-                    "video_url": video_url,
-                    "gdrive_url": video_url,  # 明确保存gdrive_url
-                    "share_url": (video_info.get("share_url") if isinstance(video_info, dict) else None),
-                    "original_video_url": (video_info.get("original_video_url") if isinstance(video_info, dict) else None),
-                    "aweme_id": aweme_id
+                # 对于 YouTube，使用 video_id；对于抖音，使用 aweme_id
+                video_id_key = "video_id" if source == "SensorTower" else "aweme_id"
+                game_info.update({
+                    "aweme_id": video_info.get(video_id_key) or video_info.get("aweme_id"),
+                    "video_id": video_info.get("video_id"),  # YouTube video_id
+                    "gdrive_url": video_info.get("gdrive_url") or video_url,
+                    "local_path": video_info.get("local_path") or video_path,
+                    # 透传抖音原始分享链接（用于报告“点击查看”跳回抖音）
+                    "share_url": video_info.get("share_url"),
+                    "youtube_url": video_info.get("youtube_url"),  # YouTube URL
+                    "original_video_url": video_info.get("original_video_url"),
+                    "video_url": video_info.get("video_url") or video_url,
                 })
+            
+            return {
+                "game_name": game_name,
+                "game_info": game_info,  # 保存完整的游戏信息（包括开发公司、排名变化等）
+                "video_info": video_info,
+                "video_path": video_path,
+                "video_url": video_url,
+                "gdrive_url": video_url,  # 明确保存gdrive_url
+                "share_url": (video_info.get("share_url") if isinstance(video_info, dict) else None),
+                "original_video_url": (video_info.get("original_video_url") if isinstance(video_info, dict) else None),
+                "aweme_id": aweme_id
+            }
         
-        # 保存中间产物
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_file = f"data/step2_videos_{timestamp}.json"
-        try:
-            os.makedirs("data", exist_ok=True)
-            import json
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(video_results, f, ensure_ascii=False, indent=2)
-            print(f"\n✓ 视频搜索完成")
-            print(f"  中间产物已保存到：{output_file}\n")
-        except Exception as e:
-            print(f"\n✓ 视频搜索完成")
-            print(f"  保存中间产物失败：{str(e)}\n")
-        
-        return video_results
+        return None
     
     def step3_analyze_videos(self, video_results: List[Dict]) -> List[Dict]:
         """
@@ -834,6 +939,7 @@ class GameAnalysisWorkflow:
         """
         print("【步骤3】分析视频...")
         analyses = []
+        prepared = []
         
         for idx, video_result in enumerate(video_results, 1):
             game_name = video_result.get("game_name", "未知游戏")
@@ -853,14 +959,89 @@ class GameAnalysisWorkflow:
                 print(f"  ✗ 错误：URL不是Google Drive链接，跳过分析")
                 continue
             
-            # 分析视频
-            analysis = self.video_analyzer.analyze_video(
-                video_path=None,
-                game_name=game_name,
-                game_info=csv_game_info if isinstance(csv_game_info, dict) and csv_game_info else video_info,
-                video_url=video_url,
-                force_refresh=bool(getattr(self, "force_refresh_analysis", False)),
+            # 本地视频损坏（HTML错误页/被截断）时上传的也是坏文件，跳过付费分析（已隔离，下次运行重新下载）
+            if video_path and os.path.exists(video_path) and not video_probe.check(
+                self.video_searcher.db, video_path, None, video_result.get("aweme_id"), game_name
+            ):
+                print(f"  ✗ 视频文件损坏，跳过分析")
+                continue
+            
+            prepared.append({
+                "video_result": video_result,
+                "key": VideoDatabase.normalize_game_name(game_name),
+                "job": {
+                    # 本地视频供关键帧分析模式抽帧（视频模式仍使用 Google Drive URL）
+                    "video_path": video_path if video_path and os.path.exists(video_path) else None,
+                    "game_name": game_name,
+                    "game_info": csv_game_info if isinstance(csv_game_info, dict) and csv_game_info else video_info,
+                    "video_url": video_url,
+                    "force_refresh": bool(getattr(self, "force_refresh_analysis", False)),
+                },
+            })
+        
+        # 先把每个本地视频的取帧需求（截图、关键帧分析、近似重复检测的感知哈希）提交给视频帧服务：
+        # 每个视频只解码一次，在取帧进程池中与下面的分析请求同时进行
+        if frame_extractor.FRAME_EXTRACTION_AVAILABLE:
+            frame_service = video_frames.get_video_frame_service()
+            need_screenshots = (not bool(getattr(self, "skip_screenshots", False))
+                                and self.video_searcher.use_database and self.video_searcher.db)
+            submitted = set()
+            for item in prepared:
+                path = item["job"]["video_path"]
+                if not path or path in submitted:
+                    continue
+                specs = []
+                if need_screenshots and not self.video_searcher.db.get_screenshot_key(item["job"]["game_name"]):
+                    specs.append({"fractions": [position for position, _ in SCREENSHOT_POSITIONS]})
+                if self.video_analyzer.analysis_mode == "keyframes" and keyframes.KEYFRAMES_AVAILABLE:
+                    specs.append(keyframes.keyframe_spec())
+                if self.video_analyzer.phash_reuse_mode in ("draft", "skip") and phash.PHASH_AVAILABLE:
+                    specs.append(phash.frame_spec())
+                if specs:
+                    frame_service.prefetch(path, specs)
+                    submitted.add(path)
+        
+        # 并发分析（每个模型最多 ANALYSIS_CONCURRENCY 个请求同时进行）；同一游戏在多个榜单出现时只提交一次，
+        # 其余榜单经 single-flight 复用结果
+        unique = {}
+        for item in prepared:
+            unique.setdefault(item["key"], item)
+        if self.video_analyzer.refresh_stale == "all" and self.video_analyzer.db:
+            stale = self.video_analyzer.db.get_stale_analysis_games(
+                self.video_analyzer.model, prompt_registry.video_analysis_version(self.video_analyzer.analysis_mode)
             )
+            print(f"\n已有分析中模型或提示词版本不同的共 {len(stale)} 个游戏，本次榜单中的将重新分析")
+        engine = analysis_engine.get_analysis_engine()
+        if unique:
+            print(f"\n并发分析 {len(unique)} 个游戏（模型 {self.video_analyzer.model}，模式 {self.video_analyzer.analysis_mode}，"
+                  f"最多 {engine.concurrency_for(self.video_analyzer.model)} 个请求同时进行）...")
+        results = engine.analyze_many(
+            self.video_analyzer, [item["job"] for item in unique.values()], call=self._analyze_video
+        )
+        analyzed = dict(zip(unique.keys(), results))
+        
+        for item in prepared:
+            video_result = item["video_result"]
+            game_name = item["job"]["game_name"]
+            video_url = item["job"]["video_url"]
+            video_path = video_result.get("video_path")
+            csv_game_info = video_result.get("game_info", {}) or {}
+            video_info = video_result.get("video_info", {}) or {}
+            
+            if item["key"] in analyzed:
+                analysis = analyzed.pop(item["key"])
+            else:
+                # 同一游戏的其他榜单：复用 single-flight 记录的结果
+                analysis = self._analyze_video(**item["job"])
+            # 结果会按榜单补充字段，因此复制一份
+            if analysis:
+                analysis = dict(analysis)
+            
+            if analysis and analysis.get("status") == "draft":
+                # 复用近似重复视频分析得到的草稿：待人工确认后才写入该游戏，本次不进入日报与发送
+                self.pending_drafts[game_name] = analysis.get("reused_from") or {}
+                print(f"⚠ {game_name} 的分析为近似重复视频的草稿（待复核），不进入日报")
+                continue
             
             if analysis:
                 # 暂时不需要截图：默认可通过 --skip-screenshots 跳过截图提取/上传
@@ -918,9 +1099,20 @@ class GameAnalysisWorkflow:
         except Exception as e:
             print(f"\n✓ 视频分析完成")
             print(f"  保存中间产物失败：{str(e)}\n")
+        self._print_pending_drafts()
         
         return analyses
     
+    def _print_pending_drafts(self):
+        """列出待复核的草稿分析（复用近似重复视频的分析，确认后才会进入日报）"""
+        if not self.pending_drafts:
+            return
+        print(f"⚠ {len(self.pending_drafts)} 个游戏的分析为近似重复视频的草稿，未进入日报，请复核：")
+        for game_name, source in self.pending_drafts.items():
+            print(f"  - {game_name} ← {source.get('game_name') or source.get('video_key')}"
+                  f"（匹配 {source.get('match_ratio', 0):.0%}，记录 #{source.get('link_id')}）")
+        print("  确认/驳回：python scripts/tools/review_analysis_links.py --accept ID / --reject ID\n")
+    
     def step4_generate_report(self, analyses: List[Dict]) -> str:
         """
         步骤4：生成日报（每个游戏一份，格式与之前一致）；并将新进榜/飙升游戏写入 weekly_report_simple 表（简单内容），玩法仍存 games 表。
@@ -1526,13 +1718,181 @@ class GameAnalysisWorkflow:
     
     def run(self, max_games: int = None, skip_scrape: bool = False, steps: List[int] = None):
         """
-        运行完整工作流或指定步骤
+        运行完整工作流或指定步骤（结束时无论成功与否都输出运行汇总）
         
         Args:
             max_games: 最大处理游戏数量，默认使用配置文件中的值
             skip_scrape: 是否跳过爬取步骤（直接使用现有CSV文件）
             steps: 要执行的步骤列表，如 [0,1,2,3,4,5]，None表示执行所有步骤
         """
+        http_client.reset_connection_stats()
+        downloader.reset_download_stats()
+        video_store.reset_store_stats()
+        video_cache.reset_cache_stats()
+        video_probe.reset_probe_stats()
+        download_scheduler.get_download_scheduler().reset_stats()
+        gdrive_upload_manager.get_upload_manager().reset_stats()
+        gdrive_index.reset_index_stats()
+        analysis_engine.get_analysis_engine().reset_stats()
+        video_frames.get_video_frame_service().reset_stats()
+        phash.reset_phash_stats()
+        cost_governor.get_cost_governor().start_run()
+        self.single_flight.reset()
+        self._flight_owners = {}
+        self.negative_cache_skips = 0
+        self.pending_drafts = {}
+        try:
+            # 运行前后各清理一次本地视频：先腾出下载空间，结束后清掉本次处理完的视频
+            self._enforce_video_quota()
+            self._run_steps(max_games, skip_scrape, steps)
+            self._enforce_video_quota()
+            video_frames.get_video_frame_service().prune()
+        finally:
+            download_scheduler.get_download_scheduler().shutdown()
+            gdrive_upload_manager.get_upload_manager().shutdown()
+            frame_extractor.get_frame_extractor().shutdown()
+            self._print_run_summary()
+    
+    def _enforce_video_quota(self):
+        """本地视频超过 VIDEO_CACHE_QUOTA_MB 时按 LRU 清理已上传、已分析（且已有截图）的视频"""
+        if not (self.video_searcher.use_database and self.video_searcher.db):
+            return
+        result = video_cache.enforce_quota(self.video_searcher.db, need_screenshots=not self.skip_screenshots)
+        if result["evicted_files"]:
+            print(f"✓ 已清理本地视频 {result['evicted_files']} 个，释放 {result['evicted_bytes'] / 1024 / 1024:.1f} MB"
+                  f"（当前占用 {result['used_bytes'] / 1024 / 1024:.1f} MB）")
+    
+    def _print_run_summary(self):
+        """输出运行汇总：外部请求连接复用情况、限流等待、合并的重复调用、付费API花费与剩余预算等"""
+        print()
+        print("【运行汇总】")
+        conn_stats = http_client.get_connection_stats()
+        if conn_stats:
+            total_opened = sum(s["opened"] for s in conn_stats.values())
+            total_requests = sum(s["requests"] for s in conn_stats.values())
+            total_reused = sum(s["reused"] for s in conn_stats.values())
+            print(f"  HTTP连接：请求 {total_requests} 次，新建连接 {total_opened} 个，复用连接 {total_reused} 次")
+            for host, s in conn_stats.items():
+                print(f"    {host}: 请求 {s['requests']}，新建 {s['opened']}，复用 {s['reused']}")
+        else:
+            print("  HTTP连接：本次运行未发起外部请求")
+        for host, s in rate_limiter.get_limiter_stats().items():
+            print(
+                f"  限流 {host}：取令牌 {s['acquired']} 次，累计等待 {s['waited_seconds']:.1f} 秒，"
+                f"429 {s['throttled']} 次，错误退避 {s['errors']} 次"
+            )
+        dl = downloader.get_download_stats()
+        if dl["files"] or dl["failed"]:
+            mbps = dl["bytes"] / dl["seconds"] / 1024 / 1024 if dl["seconds"] > 0 else 0.0
+            print(
+                f"  视频下载：成功 {dl['files']} 个（分段并行 {dl['parallel']} 个），失败 {dl['failed']} 个，"
+                f"下载 {dl['bytes'] / 1024 / 1024:.1f} MB，平均 {mbps:.2f} MB/s，"
+                f"断点续传复用 {dl['resumed_bytes'] / 1024 / 1024:.1f} MB，重试 {dl['retries']} 次"
+            )
+        sched = download_scheduler.get_download_scheduler().get_stats()
+        if sched["jobs"]:
+            avg_wait = sched["wait_seconds"] / sched["jobs"]
+            hosts = "，".join(f"{host or '未知'} {n}" for host, n in sched["by_host"].items())
+            print(
+                f"  下载调度：任务 {sched['jobs']} 个（失败 {sched['failed']}，yt-dlp 子进程 {sched['ytdlp']}），"
+                f"并发 {sched['peak_running']}/{sched['workers']}，平均排队 {avg_wait:.1f} 秒；按主机：{hosts}"
+            )
+        uploads = gdrive_upload_manager.get_upload_manager().get_stats()
+        if uploads["uploads"] or uploads["failed"]:
+            mbps = uploads["bytes"] / uploads["seconds"] / 1024 / 1024 if uploads["seconds"] > 0 else 0.0
+            print(
+                f"  Drive上传：成功 {uploads['uploads']} 个，失败 {uploads['failed']} 个，"
+                f"上传 {uploads['bytes'] / 1024 / 1024:.1f} MB，平均 {mbps:.2f} MB/s，"
+                f"并发 {uploads['peak_running']}/{uploads['workers']}，"
+                f"断点续传 {uploads['resumed']} 个（省下 {uploads['resumed_bytes'] / 1024 / 1024:.1f} MB），"
+                f"设置公开访问 {uploads['permissions']} 个用 {uploads['permission_requests']} 次请求"
+            )
+        index = gdrive_index.get_index_stats()
+        if index["hits"] or index["seeded"] or index["stale"]:
+            print(
+                f"  Drive内容去重：复用相同内容的文件 {index['hits']} 次（省下上传 {index['saved_bytes'] / 1024 / 1024:.1f} MB），"
+                f"从Drive导入索引 {index['seeded']} 个，失效 {index['stale']} 个"
+            )
+        engine = analysis_engine.get_analysis_engine().get_stats()
+        if engine["jobs"]:
+            speedup = engine["busy_seconds"] / engine["wall_seconds"] if engine["wall_seconds"] > 0 else 0.0
+            print(
+                f"  视频分析：请求 {engine['requests']} 次（失败/Mock {engine['failed']}），使用缓存 {engine['cached']} 个，"
+                f"并发 {engine['peak_running']}/{engine['concurrency']}，耗时 {engine['wall_seconds']:.1f} 秒"
+                f"（请求累计 {engine['busy_seconds']:.1f} 秒，{speedup:.1f} 倍），token {engine['tokens']}，"
+                f"限额等待 {engine['throttled']} 次共 {engine['waited_seconds']:.1f} 秒"
+            )
+        frames = video_frames.get_video_frame_service().get_stats()
+        if frames["requests"] or frames["videos_decoded"] or frames["failed"]:
+            print(
+                f"  视频取帧：解码 {frames['videos_decoded']} 个视频（失败 {frames['failed']}）共 {frames['frames_decoded']} 帧，"
+                f"耗时 {frames['decode_seconds']:.1f} 秒，写入缓存 {frames['frames_written']} 张"
+                f"（{frames['bytes_written'] / 1024 / 1024:.1f} MB），直接从缓存读取 {frames['hits']} 张"
+            )
+        dup = phash.get_phash_stats()
+        if dup["queries"]:
+            print(
+                f"  近似重复视频：检测 {dup['queries']} 个，找到 {dup['matches']} 个，"
+                f"直接复用分析 {dup['reused']} 个，提供草稿 {dup['drafts']} 个（待复核）"
+            )
+        if self.pending_drafts:
+            print(f"  未进入日报的草稿分析：{', '.join(self.pending_drafts)}"
+                  f"（复核：python scripts/tools/review_analysis_links.py）")
+        cache = video_cache.get_cache_stats()
+        if cache["hits"] or cache["misses"] or cache["evicted_files"]:
+            quota = f" / 配额 {config.VIDEO_CACHE_QUOTA_MB:.0f} MB" if config.VIDEO_CACHE_QUOTA_MB > 0 else ""
+            print(
+                f"  本地视频缓存：命中 {cache['hits']} 次，未命中 {cache['misses']} 次，"
+                f"清理 {cache['evicted_files']} 个（释放 {cache['evicted_bytes'] / 1024 / 1024:.1f} MB），"
+                f"当前占用 {cache['used_bytes'] / 1024 / 1024:.1f} MB{quota}"
+            )
+        probe = video_probe.get_probe_stats()
+        if probe["probed"]:
+            reasons = "，".join(f"{reason} {n}" for reason, n in probe["reasons"].items())
+            print(
+                f"  视频完整性检查：检查 {probe['probed']} 个，通过 {probe['ok']} 个，"
+                f"隔离 {probe['quarantined']} 个" + (f"（{reasons}）" if reasons else "")
+            )
+        store = video_store.get_store_stats()
+        if any(store.values()):
+            print(
+                f"  本地视频存储：复用已下载视频 {store['hits']} 次，新增 {store['ingested']} 个，"
+                f"内容重复去重 {store['deduped']} 个（省下 {store['saved_bytes'] / 1024 / 1024:.1f} MB），"
+                f"复用Drive文件 {store['drive_reused']} 次"
+            )
+        flight_stats = self.single_flight.get_stats()
+        total_saved = sum(s["saved"] for s in flight_stats.values())
+        if flight_stats:
+            print(f"  重复调用合并：共省下 {total_saved} 次调用")
+            for kind, s in flight_stats.items():
+                print(f"    {kind}: 实际执行 {s['executed']}，合并/复用 {s['saved']}")
+        if config.NEGATIVE_CACHE_ENABLED:
+            print(f"  搜索无结果缓存：跳过 {self.negative_cache_skips} 次搜索")
+        if config.COST_LEDGER_ENABLED:
+            self._print_cost_summary()
+        print()
+    
+    def _print_cost_summary(self):
+        """输出付费API花费与剩余预算（明细见 api_cost_ledger 表）"""
+        try:
+            cost = cost_governor.get_cost_governor().summary()
+        except Exception as e:
+            print(f"  ⚠ 读取费用汇总失败：{str(e)}")
+            return
+        
+        def _budget(remaining, budget):
+            return f"剩余 ${remaining:.4f} / 预算 ${budget:.2f}" if remaining is not None else "不限预算"
+        
+        print(f"  付费API花费（run_id={cost['run_id']}）：本次 ${cost['run_spend']:.4f}（{_budget(cost['run_remaining'], cost['run_budget'])}），"
+              f"今日 ${cost['day_spend']:.4f}（{_budget(cost['day_remaining'], cost['day_budget'])}）")
+        for key, s in sorted(cost["by_key"].items()):
+            print(f"    {key}: {s['calls']} 次，${s['cost']:.4f}")
+        if cost["denied"]:
+            denied = "，".join(f"{k} {n} 次" for k, n in sorted(cost["denied"].items()))
+            print(f"    因预算不足跳过：{denied}")
+    
+    def _run_steps(self, max_games: int = None, skip_scrape: bool = False, steps: List[int] = None):
+        """按步骤执行工作流（参数同 run）"""
         print("=" * 60)
         print("小游戏热榜玩法解析日报工作流")
         print("=" * 60)
@@ -1673,10 +2033,11 @@ class GameAnalysisWorkflow:
                     # 检查是否有已下载的视频
                     if video_info.get("downloaded") == 1 and video_info.get("local_path"):
                         video_path = video_info.get("local_path")
-                        if os.path.exists(video_path):
+                        if self._usable_local_video(video_path, game_name, aweme_id):
                             print(f"  ✓ 从数据库找到已下载的视频：{video_path}")
                         else:
                             video_path = None
+                            video_info = self.video_searcher.db.get_game(game_name) or video_info
                     
                     # 检查是否有Google Drive URL
                     gdrive_url = video_info.get("gdrive_url")
@@ -1686,9 +2047,11 @@ class GameAnalysisWorkflow:
             
             # 步骤2：如果数据库中没有视频，进行搜索和下载
             if not video_path or not video_url:
-                if not video_path:
+                if not video_path and not self._skip_negative_search(game_name, game.get("来源", "").strip()):
                     print(f"  数据库中未找到已下载的视频，开始搜索...")
-                    video_path = self.video_searcher.search_and_download(
+                    video_path = self._flight(
+                        "search_download", game_name,
+                        self.video_searcher.search_and_download,
                         game_name=game_name,
                         game_type=game_type  # 使用保存的原始游戏类型
                     )
@@ -1710,7 +2073,9 @@ class GameAnalysisWorkflow:
                             elif video_path and os.path.exists(video_path):
                                 # 如果还没有gdrive_url，尝试上传
                                 print(f"  尝试上传本地视频到Google Drive...")
-                                gdrive_url, gdrive_file_id = self.video_searcher._upload_to_gdrive(
+                                gdrive_url, gdrive_file_id = self._flight(
+                                    "upload", game_name,
+                                    self.video_searcher._upload_to_gdrive,
                                     video_path, game_name, aweme_id
                                 )
                                 if gdrive_url:
@@ -1853,10 +2218,20 @@ def main():
                         help='自动选择 data/人气榜 下最新的“周榜CSV”（文件名包含 ~），不指定 --rankings-csv 时生效。')
     parser.add_argument('--force-refresh-analysis', action='store_true',
                         help='强制重新分析：忽略数据库中已有的玩法分析缓存（使用最新提示词重新生成并覆盖）')
+    parser.add_argument('--refresh-stale-analysis', action='store_true',
+                        help='只重新分析过期的已有分析：模型或提示词版本与当前不同，或游戏视频已更换（默认行为；ANALYSIS_REFRESH_STALE=video/off 时用于本次覆盖，不像 --force-refresh-analysis 那样全部重做）')
     parser.add_argument('--skip-screenshots', action='store_true',
                         help='跳过截图提取/上传（当前提示词/报告不依赖截图时推荐开启）')
     parser.add_argument('--platform', type=str, choices=['dy', 'wx'], default=None,
                         help='选择平台：dy=抖音小游戏，wx=微信小游戏。默认不限制，选择最新的CSV文件')
+    parser.add_argument('--download-concurrency', type=int, default=None,
+                        help=f'步骤2同时下载的视频数（排名靠前的游戏优先），默认 DOWNLOAD_CONCURRENCY={config.DOWNLOAD_CONCURRENCY}')
+    parser.add_argument('--upload-concurrency', type=int, default=None,
+                        help=f'同时上传到Google Drive的视频数，默认 GDRIVE_UPLOAD_CONCURRENCY={config.GDRIVE_UPLOAD_CONCURRENCY}')
+    parser.add_argument('--analysis-concurrency', type=int, default=None,
+                        help=f'步骤3每个模型同时进行的视频分析请求数（限额见 ANALYSIS_RATE_LIMITS），默认 ANALYSIS_CONCURRENCY={config.ANALYSIS_CONCURRENCY}')
+    parser.add_argument('--game-concurrency', type=int, default=None,
+                        help=f'步骤2同时处理（搜索/下载/上传）的游戏数，默认 STEP2_GAME_CONCURRENCY={config.STEP2_GAME_CONCURRENCY}')
     parser.add_argument('--send-to', type=str, choices=['feishu', 'wecom', 'sheets', 'all'], default='feishu',
                         help='选择发送目标：feishu=飞书，wecom=企业微信，sheets=Google Sheets，all=全部。默认为feishu')
     
@@ -1910,9 +2285,14 @@ def main():
     workflow = GameAnalysisWorkflow(
         rankings_csv_path=rankings_csv_path,
         force_refresh_analysis=bool(args.force_refresh_analysis),
+        refresh_stale_analysis=bool(args.refresh_stale_analysis),
         skip_screenshots=bool(args.skip_screenshots),
         platform=args.platform,
         send_to=args.send_to,
+        download_concurrency=args.download_concurrency,
+        upload_concurrency=args.upload_concurrency,
+        analysis_concurrency=args.analysis_concurrency,
+        game_concurrency=args.game_concurrency,
     )
     
     # 如果只爬取
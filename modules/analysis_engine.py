@@ -0,0 +1,214 @@
+"""
+视频分析并发引擎（asyncio）
+- 每个模型最多 ANALYSIS_CONCURRENCY 个分析请求同时进行（可在 ANALYSIS_RATE_LIMITS 中按模型单独设置），
+  OpenRouter 视频分析单次 30~90 秒，几乎全在等待响应，并发后整步耗时约为串行的 1/K
+- 按模型限制每分钟请求数与每分钟 token 数（滑动 60 秒窗口）：发送前按 ANALYSIS_EST_TOKENS 预占额度，
+  完成后按响应中的实际用量修正
+- 每个分析仍由 VideoAnalyzer.analyze_video 完成（在线程池中执行，HTTP 经 http_client 共享连接池，
+  主机限流、费用账本与录制照常生效），数据库缓存、Mock 回退与预算用尽返回None 的语义不变；
+  命中数据库缓存或未配置API密钥时不占并发名额与限流额度
+- 结果按输入顺序返回
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import config
+
+WINDOW_SECONDS = 60.0
+
+
+def _parse_model_limits(spec: str) -> Dict[str, tuple]:
+    """解析 ANALYSIS_RATE_LIMITS：'模型=每分钟请求数:每分钟token数[:并发数],模型2=...'（0 或留空表示不限）"""
+    limits = {}
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item or "=" not in item:
+            continue
+        model, value = item.split("=", 1)
+        parts = value.split(":")
+        try:
+            rpm = float(parts[0]) if parts[0] else 0.0
+            tpm = float(parts[1]) if len(parts) > 1 and parts[1] else 0.0
+            concurrency = int(parts[2]) if len(parts) > 2 and parts[2] else 0
+        except ValueError:
+            print(f"警告：无法解析分析限流配置：{item}")
+            continue
+        limits[model.strip()] = (rpm, tpm, concurrency)
+    return limits
+
+
+class _ModelGate:
+    """单个模型的并发名额 + 每分钟请求数/token 数滑动窗口（只在事件循环线程中使用）"""
+
+    def __init__(self, model: str, concurrency: int, rpm: float, tpm: float, add_stats: Callable):
+        self.model = model
+        self.concurrency = max(1, concurrency)
+        self.rpm = rpm
+        self.tpm = tpm
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self._window = deque()  # [发送时间, token数]
+        self._add_stats = add_stats
+        self.running = 0
+
+    def _expire(self, now: float):
+        while self._window and now - self._window[0][0] >= WINDOW_SECONDS:
+            self._window.popleft()
+
+    async def reserve(self, tokens: int) -> List:
+        """等待直到每分钟请求数与 token 数都有余量，记入窗口并返回该条记录（完成后用于修正实际用量）"""
+        while True:
+            now = time.monotonic()
+            self._expire(now)
+            wait = 0.0
+            if self.rpm > 0 and len(self._window) >= self.rpm:
+                wait = self._window[0][0] + WINDOW_SECONDS - now
+            used = sum(entry[1] for entry in self._window)
+            if self.tpm > 0 and self._window and used + tokens > self.tpm:
+                wait = max(wait, self._window[0][0] + WINDOW_SECONDS - now)
+            if wait <= 0:
+                entry = [now, tokens]
+                self._window.append(entry)
+                return entry
+            self._add_stats(throttled=1, waited_seconds=wait)
+            await asyncio.sleep(wait)
+
+
+class AnalysisEngine:
+    """视频分析并发引擎：按模型的并发名额与每分钟请求/token 限额"""
+
+    def __init__(self, concurrency: int = None):
+        """
+        Args:
+            concurrency: 每个模型同时进行的分析请求数，默认 ANALYSIS_CONCURRENCY（ANALYSIS_RATE_LIMITS 中的并发数优先）
+        """
+        self.concurrency = max(1, concurrency or config.ANALYSIS_CONCURRENCY)
+        self.limits = _parse_model_limits(config.ANALYSIS_RATE_LIMITS)
+        self._lock = threading.Lock()
+        self._stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict:
+        return {"jobs": 0, "requests": 0, "cached": 0, "failed": 0, "tokens": 0, "throttled": 0,
+                "waited_seconds": 0.0, "busy_seconds": 0.0, "wall_seconds": 0.0, "peak_running": 0}
+
+    def _add_stats(self, **values):
+        with self._lock:
+            for k, v in values.items():
+                self._stats[k] += v
+
+    def concurrency_for(self, model: str) -> int:
+        """该模型同时进行的分析请求数"""
+        _, _, concurrency = self.limits.get(model, (0, 0, 0))
+        return concurrency or self.concurrency
+
+    # ---- 执行 ----
+
+    def analyze_many(self, analyzer, jobs: List[Dict], call: Callable = None) -> List[Optional[Dict]]:
+        """
+        并发分析多个视频
+
+        Args:
+            analyzer: VideoAnalyzer 实例（按其 model 取并发名额与限额）
+            jobs: analyze_video 的关键字参数列表（需含 game_name）
+            call: 实际执行分析的函数，参数同 analyze_video，默认 analyzer.analyze_video（工作流用于套上 single-flight）
+
+        Returns:
+            与 jobs 一一对应的分析结果（单个分析出错时为None）
+        """
+        if not jobs:
+            return []
+        call = call or analyzer.analyze_video
+        # 分析请求最多占用并发数个线程，另留几个线程给缓存查询，避免命中缓存的游戏排在长请求后面
+        workers = self.concurrency_for(analyzer.model) + 4
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="video-analysis") as executor:
+            results = asyncio.run(self._run_all(analyzer, jobs, call, executor))
+        self._add_stats(wall_seconds=time.perf_counter() - started)
+        return results
+
+    async def _run_all(self, analyzer, jobs: List[Dict], call: Callable, executor) -> List[Optional[Dict]]:
+        rpm, tpm, _ = self.limits.get(analyzer.model, (0, 0, 0))
+        gate = _ModelGate(analyzer.model, self.concurrency_for(analyzer.model), rpm, tpm, self._add_stats)
+        return await asyncio.gather(*(self._run_one(analyzer, gate, job, call, executor) for job in jobs))
+
+    async def _run_one(self, analyzer, gate: _ModelGate, job: Dict, call: Callable, executor) -> Optional[Dict]:
+        loop = asyncio.get_running_loop()
+        self._add_stats(jobs=1)
+        needs_request = await loop.run_in_executor(
+            executor, analyzer.needs_request, job.get("game_name"), bool(job.get("force_refresh")), job.get("video_url"),
+            job.get("video_path")
+        )
+        if not needs_request:
+            result = await self._call(loop, executor, call, job)
+            self._add_stats(cached=1)
+            return result
+
+        async with gate.semaphore:
+            entry = await gate.reserve(config.ANALYSIS_EST_TOKENS)
+            with self._lock:
+                gate.running += 1
+                self._stats["requests"] += 1
+                self._stats["peak_running"] = max(self._stats["peak_running"], gate.running)
+            started = time.perf_counter()
+            result = None
+            try:
+                result = await self._call(loop, executor, call, job)
+            finally:
+                used = ((result or {}).get("usage") or {}).get("total_tokens")
+                if used is not None:
+                    entry[1] = int(used)
+                gate.running -= 1
+                self._add_stats(busy_seconds=time.perf_counter() - started, tokens=int(used or 0),
+                                failed=0 if result and result.get("status") != "mock" else 1)
+        return result
+
+    @staticmethod
+    async def _call(loop, executor, call: Callable, job: Dict) -> Optional[Dict]:
+        try:
+            return await loop.run_in_executor(executor, lambda: call(**job))
+        except Exception as e:
+            print(f"分析视频时出错（{job.get('game_name')}）：{str(e)}")
+            return None
+
+    # ---- 统计 ----
+
+    def get_stats(self) -> Dict:
+        """
+        Returns:
+            {"jobs", "requests": 实际发起的分析数, "cached": 命中缓存/未发请求的数量, "failed": 失败或退回Mock的请求数,
+             "tokens": 响应返回的 token 总数, "throttled": 因每分钟限额等待的次数, "waited_seconds": 累计等待时间,
+             "busy_seconds": 各请求耗时之和, "wall_seconds": 实际经过时间, "peak_running": 最大同时请求数, "concurrency"}
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["concurrency"] = self.concurrency
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = self._empty_stats()
+
+
+_engine: Optional[AnalysisEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_analysis_engine() -> AnalysisEngine:
+    """进程内共享的分析引擎（首次调用时按当前配置创建）"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AnalysisEngine()
+        return _engine
+
+
+def configure(concurrency: int = None) -> AnalysisEngine:
+    """按新的并发设置重建共享分析引擎"""
+    global _engine
+    with _engine_lock:
+        _engine = AnalysisEngine(concurrency)
+    return _engine
@@ -0,0 +1,268 @@
+"""
+付费API费用管控模块
+- 记账：经 http_client 发出的计费接口请求（TikHub 搜索/下载、RapidAPI、OpenRouter）自动写入
+  api_cost_ledger 表（run_id、provider、endpoint、units、estimated_cost、latency）
+- 预算：COST_BUDGET_PER_RUN_USD / COST_BUDGET_PER_DAY_USD，调用方在发起付费请求前用 can_spend()
+  判断，超预算时降级（跳过付费备用方案、分析留待下次运行），而不是继续花钱
+- 预占：can_spend() 通过时在锁内按单价预占额度，该线程随后的计费响应记账时结算；请求未发出或
+  未拿到响应时调用方用 release() 释放，避免并发调用同时通过预算检查而超支
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import config
+
+# 各计费接口的单价（美元/次）。OpenRouter 响应带 usage.cost 时按实际费用记账，此处仅为缺省估算；
+# 除最高画质接口（0.005$/次）外均为估算值，实际单价请用 API_PRICES 按账单校准
+DEFAULT_PRICES = {
+    "tikhub.douyin_search": 0.001,
+    "tikhub.douyin_download": 0.001,
+    "tikhub.douyin_high_quality": 0.005,
+    "tikhub.youtube_video_info": 0.001,
+    "rapidapi.youtube_search": 0.0,
+    "openrouter.chat": 0.01,
+}
+
+
+def _parse_prices(spec: str) -> Dict[str, float]:
+    """解析 API_PRICES：'tikhub.douyin_search=0.001,openrouter.chat=0.02'"""
+    prices = dict(DEFAULT_PRICES)
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item or "=" not in item:
+            continue
+        key, value = item.split("=", 1)
+        try:
+            prices[key.strip()] = float(value)
+        except ValueError:
+            print(f"警告：无法解析接口单价配置：{item}")
+    return prices
+
+
+def _host(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower() if "://" in url else url.lower()
+
+
+def _priced_endpoints():
+    """(主机, 路径前缀, 计费键) 列表，用于把请求 URL 映射到单价（未配置的端点不参与匹配）"""
+    tikhub = _host(config.DOUYIN_API_BASE_URL)
+    openrouter = urlsplit(config.OPENROUTER_BASE_URL)
+    endpoints = [
+        (tikhub, config.DOUYIN_SEARCH_ENDPOINT, "tikhub.douyin_search"),
+        (tikhub, config.DOUYIN_DOWNLOAD_ENDPOINT, "tikhub.douyin_download"),
+        (tikhub, config.DOUYIN_HIGH_QUALITY_ENDPOINT, "tikhub.douyin_high_quality"),
+        (_host(config.YOUTUBE_API_BASE_URL), "/api/v1/youtube/web/get_video_info", "tikhub.youtube_video_info"),
+        (_host(config.RAPIDAPI_YOUTUBE_BASE_URL), "/search", "rapidapi.youtube_search"),
+        ((openrouter.hostname or "").lower(), openrouter.path.rstrip("/") + "/chat/completions", "openrouter.chat"),
+    ]
+    return [(h, p, k) for h, p, k in endpoints if h and p]
+
+
+class CostGovernor:
+    """费用记账与预算判断（进程内单例，见 get_cost_governor）"""
+
+    def __init__(self, db_path: str = None):
+        """
+        Args:
+            db_path: 记账数据库路径，默认与主库一致（data/wechatdouyin.db）
+        """
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_path = db_path
+        self.prices = _parse_prices(config.API_PRICES)
+        self.run_budget = config.COST_BUDGET_PER_RUN_USD
+        self.day_budget = config.COST_BUDGET_PER_DAY_USD
+        self._endpoints = _priced_endpoints()
+        self.run_id = f"adhoc-{os.getpid()}-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self._run_spend = 0.0
+        self._run_calls: Dict[str, Dict[str, float]] = {}
+        self._denied: Dict[str, int] = {}
+        # (线程ID, 计费键) -> 已预占、尚未结算的金额
+        self._reservations: Dict[Tuple[int, str], List[float]] = {}
+
+    @property
+    def db(self):
+        if self._db is None:
+            from modules.database import VideoDatabase
+            self._db = VideoDatabase(self._db_path)
+        return self._db
+
+    def start_run(self, run_id: str = None):
+        """开始一次工作流运行：重置本次运行的花费统计"""
+        with self._lock:
+            self.run_id = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+            self._run_spend = 0.0
+            self._run_calls = {}
+            self._denied = {}
+            self._reservations = {}
+
+    def price_key_for(self, url: str) -> Optional[str]:
+        """根据请求 URL 匹配计费键，非计费接口返回 None"""
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        for ep_host, path_prefix, key in self._endpoints:
+            if host == ep_host and parts.path.startswith(path_prefix):
+                return key
+        return None
+
+    def day_spend(self) -> float:
+        """今日（本地时间）累计花费，含其他进程"""
+        midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+        return self.db.get_cost_total(since_ts=midnight)
+
+    def _reserved_total(self) -> float:
+        return sum(sum(amounts) for amounts in self._reservations.values())
+
+    def can_spend(self, key: str, units: float = 1.0) -> bool:
+        """
+        判断是否还能发起一次付费调用（按单价估算，不超出本次运行与当日预算），可以时预占额度
+
+        预占的额度由本线程随后该计费键的记账结算；请求最终没有发出或没有响应时须调用 release()
+
+        Args:
+            key: 计费键，如 tikhub.douyin_high_quality
+            units: 调用次数
+
+        Returns:
+            True 表示可以调用；超预算时返回 False 并计入被拒绝次数
+        """
+        estimated = self.prices.get(key, 0.0) * units
+        if estimated <= 0:
+            return True
+        day_spend = self.day_spend() if self.day_budget > 0 else 0.0
+        with self._lock:
+            reserved = self._reserved_total()
+            if self.run_budget > 0 and self._run_spend + reserved + estimated > self.run_budget:
+                allowed = False
+            elif self.day_budget > 0 and day_spend + reserved + estimated > self.day_budget:
+                allowed = False
+            else:
+                allowed = True
+                self._reservations.setdefault((threading.get_ident(), key), []).append(estimated)
+            if not allowed:
+                self._denied[key] = self._denied.get(key, 0) + 1
+        return allowed
+
+    def release(self, key: str):
+        """释放本线程该计费键尚未结算的预占额度（付费请求未发出、失败或已结束时调用）"""
+        with self._lock:
+            self._reservations.pop((threading.get_ident(), key), None)
+
+    def record(self, key: str, endpoint: str, latency: float, status: int,
+               cost: Optional[float] = None, units: float = 1.0):
+        """
+        记一笔账
+
+        Args:
+            key: 计费键（provider.接口）
+            endpoint: 请求路径
+            latency: 耗时（秒）
+            status: HTTP 状态码
+            cost: 实际费用（如 OpenRouter usage.cost），为空时按单价估算
+            units: 计费单位数
+        """
+        estimated = cost if cost is not None else self.prices.get(key, 0.0) * units
+        provider = key.split(".", 1)[0]
+        with self._lock:
+            # 结算本线程该计费键最早的一笔预占（重试产生的后续请求没有预占，直接记账）
+            pending = self._reservations.get((threading.get_ident(), key))
+            if pending:
+                pending.pop(0)
+                if not pending:
+                    del self._reservations[(threading.get_ident(), key)]
+            self._run_spend += estimated
+            stats = self._run_calls.setdefault(key, {"calls": 0, "cost": 0.0})
+            stats["calls"] += 1
+            stats["cost"] += estimated
+            run_id = self.run_id
+        self.db.insert_cost_entry(run_id, provider, endpoint, units, estimated, latency, status)
+
+    def record_response(self, url: str, response, latency: float):
+        """http_client 回调：计费接口的响应自动记账（OpenRouter 优先取响应中的 usage.cost）"""
+        key = self.price_key_for(url)
+        if key is None:
+            return
+        cost = None
+        if key == "openrouter.chat" and response.status_code == 200:
+            try:
+                usage = response.json().get("usage") or {}
+                if usage.get("cost") is not None:
+                    cost = float(usage["cost"])
+            except Exception:
+                pass
+        elif response.status_code >= 400:
+            # 失败请求一般不计费，仍记一笔 0 费用便于统计耗时与失败率
+            cost = 0.0
+        self.record(key, urlsplit(url).path, latency, response.status_code, cost=cost)
+
+    def summary(self) -> Dict:
+        """
+        本次运行的费用汇总
+
+        Returns:
+            {"run_id", "run_spend", "run_budget", "run_remaining", "day_spend", "day_budget",
+             "day_remaining", "by_key": {key: {"calls", "cost"}}, "denied": {key: 次数}}
+            预算为 0（不限）时 remaining 为 None
+        """
+        day_spend = self.day_spend()
+        with self._lock:
+            return {
+                "run_id": self.run_id,
+                "run_spend": self._run_spend,
+                "run_budget": self.run_budget,
+                "run_remaining": max(0.0, self.run_budget - self._run_spend) if self.run_budget > 0 else None,
+                "day_spend": day_spend,
+                "day_budget": self.day_budget,
+                "day_remaining": max(0.0, self.day_budget - day_spend) if self.day_budget > 0 else None,
+                "by_key": {k: dict(v) for k, v in self._run_calls.items()},
+                "denied": dict(self._denied),
+            }
+
+
+_governor: Optional[CostGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_cost_governor() -> CostGovernor:
+    """获取进程内共享的费用管控器"""
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                _governor = CostGovernor()
+    return _governor
+
+
+def record_http_response(url: str, response, started_at: float):
+    """供 http_client 调用：计费接口的响应记账（未启用记账或非计费接口时忽略，记账失败不影响请求）"""
+    if not config.COST_LEDGER_ENABLED:
+        return
+    try:
+        get_cost_governor().record_response(url, response, time.perf_counter() - started_at)
+    except Exception as e:
+        print(f"  ⚠ 费用记账失败：{str(e)}")
+
+
+def can_spend(key: str, units: float = 1.0) -> bool:
+    """调用方在发起付费请求前调用（通过时预占额度）：未启用记账时总是返回 True"""
+    if not config.COST_LEDGER_ENABLED:
+        return True
+    try:
+        return get_cost_governor().can_spend(key, units)
+    except Exception as e:
+        print(f"  ⚠ 预算检查失败（按可调用处理）：{str(e)}")
+        return True
+
+
+def release(key: str):
+    """调用方在付费请求结束后调用（含失败、异常路径）：释放本线程未结算的预占额度"""
+    if not config.COST_LEDGER_ENABLED:
+        return
+    try:
+        get_cost_governor().release(key)
+    except Exception as e:
+        print(f"  ⚠ 释放预占额度失败：{str(e)}")
@@ -5,6 +5,10 @@
 import sqlite3
 import os
 import json
+import hashlib
+import time
+import unicodedata
+import zlib
 from typing import Dict, List, Optional
 from datetime import datetime
 import config
@@ -58,6 +62,8 @@ class VideoDatabase:
                 game_company TEXT,
                 gameplay_analysis TEXT,  -- 游戏玩法分析结果
                 analysis_model TEXT,  -- 使用的分析模型
+                analysis_prompt_version TEXT,  -- 分析提示词版本（modules/prompt_registry.py）
+                analysis_id INTEGER,  -- 当前使用的分析（analyses.id）
                 analyzed_at TIMESTAMP,  -- 分析时间
                 game_rank TEXT,      -- 保留原有字段（兼容性）
                 rank_change TEXT,
@@ -111,7 +117,9 @@ class VideoDatabase:
             ("original_video_url", "TEXT"),
             ("gdrive_url", "TEXT"),
             ("gdrive_file_id", "TEXT"),
-            ("screenshot_image_key", "TEXT")
+            ("screenshot_image_key", "TEXT"),
+            ("analysis_prompt_version", "TEXT"),
+            ("analysis_id", "INTEGER")
         ]
         
         for field_name, field_type in migrations:
@@ -249,6 +257,210 @@ class VideoDatabase:
         ''')
 
         self._ensure_ranking_chart_key_schema(cursor)
+
+        # search_response_cache：搜索API原始响应缓存（按 endpoint + 规范化请求参数去重，zlib 压缩存储）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS search_response_cache (
+                cache_key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                request_json TEXT NOT NULL,
+                response_blob BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_search_cache_endpoint
+            ON search_response_cache(endpoint)
+        ''')
+
+        # api_cost_ledger：付费API调用账本（按运行、按天汇总花费，见 modules/cost_governor.py）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS api_cost_ledger (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                units REAL NOT NULL DEFAULT 1,
+                estimated_cost REAL NOT NULL DEFAULT 0,
+                latency_ms REAL,
+                status_code INTEGER,
+                created_ts REAL NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_cost_ledger_created
+            ON api_cost_ledger(created_ts)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_cost_ledger_run
+            ON api_cost_ledger(run_id)
+        ''')
+
+        # search_negative_cache：搜索无结果的游戏（按规范化游戏名 + 搜索来源），指数退避后再重试
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS search_negative_cache (
+                game_key TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                game_name TEXT,
+                query TEXT,
+                reason TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_attempt_at REAL,
+                next_retry_at REAL NOT NULL,
+                PRIMARY KEY (game_key, provider)
+            )
+        ''')
+
+        # video_blobs：按 sha256 去重的本地视频实体文件，及其 Google Drive 文件（见 modules/video_store.py）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS video_blobs (
+                sha256 TEXT PRIMARY KEY,
+                size INTEGER NOT NULL DEFAULT 0,
+                blob_path TEXT NOT NULL,
+                gdrive_file_id TEXT,
+                gdrive_url TEXT,
+                created_ts REAL NOT NULL
+            )
+        ''')
+
+        # video_manifest：来源视频ID（抖音 aweme_id / YouTube video_id）+ 游戏名 → 实体文件
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS video_manifest (
+                source TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                game_name TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                local_path TEXT,
+                updated_ts REAL NOT NULL,
+                PRIMARY KEY (source, video_id, game_name)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_video_manifest_sha256
+            ON video_manifest(sha256)
+        ''')
+
+        # video_probes：下载后的容器头检查结果（时长、分辨率、编码；坏文件的隔离路径，见 modules/video_probe.py）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS video_probes (
+                local_path TEXT PRIMARY KEY,
+                source TEXT,
+                video_id TEXT,
+                game_name TEXT,
+                size INTEGER NOT NULL DEFAULT 0,
+                mtime REAL,
+                ok INTEGER NOT NULL DEFAULT 0,
+                reason TEXT,
+                container TEXT,
+                codec TEXT,
+                duration REAL,
+                width INTEGER,
+                height INTEGER,
+                has_audio INTEGER,
+                faststart INTEGER,
+                quarantine_path TEXT,
+                probed_ts REAL NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_video_probes_video
+            ON video_probes(source, video_id)
+        ''')
+        
+        # gdrive_upload_sessions：进行中的 Drive 可续传上传会话（会话地址与已确认字节数，进程重启后从断点续传；
+        # file_id 不为空表示文件已上传、尚未设置公开访问，见 modules/gdrive_upload_manager.py）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS gdrive_upload_sessions (
+                local_path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL,
+                folder_id TEXT,
+                file_name TEXT,
+                session_uri TEXT,
+                chunk_size INTEGER,
+                uploaded_bytes INTEGER NOT NULL DEFAULT 0,
+                file_id TEXT,
+                created_ts REAL NOT NULL,
+                updated_ts REAL NOT NULL
+            )
+        ''')
+        
+        # gdrive_files：Drive 文件内容索引 (md5, 大小) → file_id，上传前先查，相同内容不重复上传
+        # （首次使用时从 Drive 文件夹列表一次性导入，之后每次上传成功时写入，见 modules/gdrive_index.py）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS gdrive_files (
+                md5 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                sha256 TEXT,
+                file_id TEXT NOT NULL,
+                file_name TEXT,
+                folder_id TEXT,
+                is_public INTEGER NOT NULL DEFAULT 0,
+                indexed_ts REAL NOT NULL,
+                PRIMARY KEY (md5, size)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_gdrive_files_file_id
+            ON gdrive_files(file_id)
+        ''')
+        # gdrive_index_folders：已从 Drive 导入过文件列表的文件夹
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS gdrive_index_folders (
+                folder_id TEXT PRIMARY KEY,
+                folder_name TEXT,
+                files INTEGER NOT NULL DEFAULT 0,
+                seeded_ts REAL NOT NULL
+            )
+        ''')
+        
+        # analyses：玩法分析结果，按 (视频键, 模型, 提示词版本) 保存，games.analysis_id 指向各游戏当前使用的一条；
+        # 视频键为 md5:<Drive文件md5> / aweme:<视频ID> / gdrive:<Drive文件ID> / url:<链接哈希>（见 VideoAnalyzer._video_key）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analyses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                video_key TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL DEFAULT '',
+                game_name TEXT,
+                analysis TEXT NOT NULL,
+                analyzed_at TIMESTAMP NOT NULL,
+                UNIQUE (video_key, model, prompt_version)
+            )
+        ''')
+        
+        # 视频感知哈希（modules/phash.py：每个视频若干采样帧的 64 位 dHash，十六进制保存）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS video_phash (
+                video_key TEXT NOT NULL,
+                frame_index INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                game_name TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (video_key, frame_index)
+            )
+        ''')
+        
+        # 近似重复视频复用分析的记录（供人工复核：draft 待确认，skip 已直接复用，可驳回）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analysis_links (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                game_name TEXT NOT NULL,
+                video_key TEXT NOT NULL,
+                source_video_key TEXT NOT NULL,
+                source_analysis_id INTEGER NOT NULL,
+                source_game_name TEXT,
+                analysis_id INTEGER,
+                mode TEXT NOT NULL,
+                match_ratio REAL,
+                avg_distance REAL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                reviewed_at TIMESTAMP,
+                UNIQUE (video_key, source_video_key)
+            )
+        ''')
         
         conn.commit()
         conn.close()
@@ -343,7 +555,7 @@ class VideoDatabase:
             # 期望的新列顺序（重要字段在前）
             expected_order = [
                 'id', 'game_name', 'rank_wx', 'rank_dy', 'rank_ios', 'rank_android',
-                'game_company', 'gameplay_analysis', 'analysis_model', 'analyzed_at',
+                'game_company', 'gameplay_analysis', 'analysis_model', 'analysis_prompt_version', 'analysis_id', 'analyzed_at',
                 'game_rank', 'rank_change', 'platform', 'source', 'board_name', 'monitor_date',
                 'aweme_id', 'title', 'description', 'video_url', 'video_urls', 'cover_url',
                 'author_uid', 'duration', 'like_count', 'comment_count', 'play_count',
@@ -385,6 +597,8 @@ class VideoDatabase:
                     game_company TEXT,
                     gameplay_analysis TEXT,
                     analysis_model TEXT,
+                    analysis_prompt_version TEXT,
+                    analysis_id INTEGER,
                     analyzed_at TIMESTAMP,
                     game_rank TEXT,
                     rank_change TEXT,
@@ -426,7 +640,7 @@ class VideoDatabase:
             # 迁移数据（只迁移两个表都有的列）
             if rows:
                 new_columns = ['id', 'game_name', 'rank_wx', 'rank_dy', 'rank_ios', 'rank_android',
-                             'game_company', 'gameplay_analysis', 'analysis_model', 'analyzed_at',
+                             'game_company', 'gameplay_analysis', 'analysis_model', 'analysis_prompt_version', 'analysis_id', 'analyzed_at',
                              'game_rank', 'rank_change', 'platform', 'source', 'board_name', 'monitor_date',
                              'aweme_id', 'title', 'description', 'video_url', 'video_urls', 'cover_url',
                              'author_uid', 'duration', 'like_count', 'comment_count', 'play_count',
@@ -1025,6 +1239,46 @@ class VideoDatabase:
             print(f"获取游戏信息时出错：{str(e)}")
             return None
     
+    # 游戏的视频相关字段（同一游戏的不同写法共享搜索/下载/上传结果时整体复制，见 copy_game_video）
+    VIDEO_FIELDS = (
+        "aweme_id", "title", "description", "video_url", "video_urls", "cover_url", "author_uid", "duration",
+        "like_count", "comment_count", "play_count", "create_time", "share_url", "original_video_url",
+        "gdrive_url", "gdrive_file_id", "local_path", "downloaded", "search_keyword", "relevance_score",
+    )
+
+    def copy_game_video(self, source_game: str, target_game: str) -> bool:
+        """
+        把一个游戏的视频信息（本地路径、Google Drive 链接等）复制到另一个游戏名下（目标不存在时新建）
+
+        Args:
+            source_game: 已有视频的游戏名称
+            target_game: 目标游戏名称（如规范化后相同的另一种写法）
+
+        Returns:
+            是否复制（来源没有视频时返回False）
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT {", ".join(self.VIDEO_FIELDS)} FROM games WHERE game_name = ?', (source_game,))
+            row = cursor.fetchone()
+            if not row or not (row["local_path"] or row["gdrive_url"]):
+                conn.close()
+                return False
+            cursor.execute('INSERT OR IGNORE INTO games (game_name) VALUES (?)', (target_game,))
+            assignments = ", ".join(f"{field} = COALESCE(?, {field})" for field in self.VIDEO_FIELDS)
+            cursor.execute(f'''
+                UPDATE games SET {assignments}, updated_at = CURRENT_TIMESTAMP
+                WHERE game_name = ?
+            ''', (*tuple(row), target_game))
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"复制游戏视频信息时出错：{str(e)}")
+            return False
+
     def get_all_games(self, limit: int = None) -> List[Dict]:
         """
         获取所有游戏
@@ -1085,7 +1339,7 @@ class VideoDatabase:
             game_name: 游戏名称
         
         Returns:
-            分析结果字典，包含gameplay_analysis和analysis_model，如果不存在返回None
+            分析结果字典，包含gameplay_analysis、analysis_model、prompt_version、analysis_id和video_key，如果不存在返回None
         """
         try:
             conn = sqlite3.connect(self.db_path)
@@ -1093,9 +1347,10 @@ class VideoDatabase:
             cursor = conn.cursor()
             
             cursor.execute('''
-                SELECT gameplay_analysis, analysis_model, analyzed_at 
-                FROM games 
-                WHERE game_name = ? AND gameplay_analysis IS NOT NULL AND gameplay_analysis != ''
+                SELECT g.gameplay_analysis, g.analysis_model, g.analysis_prompt_version, g.analyzed_at,
+                       g.analysis_id, a.video_key
+                FROM games g LEFT JOIN analyses a ON a.id = g.analysis_id
+                WHERE g.game_name = ? AND g.gameplay_analysis IS NOT NULL AND g.gameplay_analysis != ''
             ''', (game_name,))
             
             row = cursor.fetchone()
@@ -1105,7 +1360,10 @@ class VideoDatabase:
                 return {
                     "gameplay_analysis": row["gameplay_analysis"],
                     "analysis_model": row["analysis_model"],
-                    "analyzed_at": row["analyzed_at"]
+                    "prompt_version": row["analysis_prompt_version"],
+                    "analyzed_at": row["analyzed_at"],
+                    "analysis_id": row["analysis_id"],
+                    "video_key": row["video_key"],  # 旧版分析（未写入 analyses）为None
                 }
             return None
             
@@ -1113,14 +1371,17 @@ class VideoDatabase:
             print(f"获取玩法分析时出错：{str(e)}")
             return None
     
-    def save_gameplay_analysis(self, game_name: str, analysis_text: str, model_used: str) -> bool:
+    def save_gameplay_analysis(self, game_name: str, analysis_text: str, model_used: str,
+                               prompt_version: str = None, video_key: str = None) -> bool:
         """
-        保存游戏的玩法分析结果到数据库
+        保存游戏的玩法分析结果到数据库（提供 video_key 时同时写入 analyses 表，并作为该游戏的当前分析）
         
         Args:
             game_name: 游戏名称
             analysis_text: 分析结果文本
             model_used: 使用的模型
+            prompt_version: 提示词版本（见 modules/prompt_registry.py）
+            video_key: 被分析视频的键（见 analyses 表）
         
         Returns:
             是否保存成功
@@ -1128,17 +1389,36 @@ class VideoDatabase:
         try:
             from datetime import datetime
             
+            now = datetime.now()
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
+            analysis_id = None
+            if video_key:
+                cursor.execute('''
+                    INSERT INTO analyses (video_key, model, prompt_version, game_name, analysis, analyzed_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(video_key, model, prompt_version) DO UPDATE SET
+                        game_name = excluded.game_name,
+                        analysis = excluded.analysis,
+                        analyzed_at = excluded.analyzed_at
+                ''', (video_key, model_used, prompt_version or "", game_name, analysis_text, now))
+                cursor.execute(
+                    "SELECT id FROM analyses WHERE video_key = ? AND model = ? AND prompt_version = ?",
+                    (video_key, model_used, prompt_version or ""),
+                )
+                analysis_id = cursor.fetchone()[0]
+            
             cursor.execute('''
                 UPDATE games SET
                     gameplay_analysis = ?,
                     analysis_model = ?,
+                    analysis_prompt_version = ?,
+                    analysis_id = ?,
                     analyzed_at = ?,
                     updated_at = CURRENT_TIMESTAMP
                 WHERE game_name = ?
-            ''', (analysis_text, model_used, datetime.now(), game_name))
+            ''', (analysis_text, model_used, prompt_version, analysis_id, now, game_name))
             
             conn.commit()
             conn.close()
@@ -1167,6 +1447,8 @@ class VideoDatabase:
                 UPDATE games SET
                     gameplay_analysis = NULL,
                     analysis_model = NULL,
+                    analysis_prompt_version = NULL,
+                    analysis_id = NULL,
                     analyzed_at = NULL,
                     updated_at = CURRENT_TIMESTAMP
                 WHERE game_name = ? AND gameplay_analysis IS NOT NULL AND gameplay_analysis != ''
@@ -1653,6 +1935,15 @@ class VideoDatabase:
                 out.append(s)
         return "~".join(out) if len(out) == 2 else week_range
 
+    @staticmethod
+    def normalize_game_name(game_name: str) -> str:
+        """
+        游戏名规范化键：NFKC（全角转半角等）、合并空白、忽略大小写。
+        同一游戏在不同榜单/平台的写法差异（如全角括号、多余空格）归为同一键，用于同次运行内合并重复调用。
+        """
+        s = unicodedata.normalize("NFKC", game_name or "")
+        return " ".join(s.split()).casefold()
+
     def get_distinct_week_ranges(self) -> List[str]:
         """返回 weekly_rankings 表中所有不同的 week_range 值（用于诊断对比）。"""
         try:
@@ -1913,30 +2204,1011 @@ class VideoDatabase:
             print(f"查询最近周报趋势时出错：{str(e)}")
             return []
 
-    # 兼容旧方法名（向后兼容）
-    def save_video(self, video_info: Dict) -> bool:
-        """兼容旧方法名，实际调用save_game"""
-        return self.save_game(video_info)
-    
-    def get_video(self, aweme_id: str) -> Optional[Dict]:
-        """兼容旧方法名，根据aweme_id查找游戏（不推荐使用）"""
+    @staticmethod
+    def build_search_cache_key(endpoint: str, payload: Dict) -> str:
+        """
+        生成搜索响应缓存键：endpoint + 规范化请求参数（键排序、去首尾空白）的 sha256
+
+        Args:
+            endpoint: 接口路径，如 /api/v1/douyin/search/fetch_general_search_v1
+            payload: 请求参数（POST body 或 GET query）
+        """
+        normalized = {
+            k: (v.strip() if isinstance(v, str) else v)
+            for k, v in (payload or {}).items()
+        }
+        raw = endpoint + "\n" + json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_search_response(self, endpoint: str, payload: Dict, allow_expired: bool = False):
+        """
+        读取搜索响应缓存
+
+        Args:
+            endpoint: 接口路径
+            payload: 请求参数
+            allow_expired: 是否允许返回已过期的缓存（离线复算时使用）
+
+        Returns:
+            缓存的响应数据（已解析的JSON），未命中或已过期返回None
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT response_blob, expires_at FROM search_response_cache WHERE cache_key = ?",
+                (self.build_search_cache_key(endpoint, payload),),
+            )
+            row = cursor.fetchone()
+            conn.close()
+            if not row:
+                return None
+            if not allow_expired and row[1] < time.time():
+                return None
+            return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+        except Exception as e:
+            print(f"读取搜索响应缓存时出错：{str(e)}")
+            return None
+
+    def save_search_response(self, endpoint: str, payload: Dict, response, ttl_seconds: float) -> bool:
+        """
+        写入搜索响应缓存（同一请求覆盖旧记录）
+
+        Args:
+            endpoint: 接口路径
+            payload: 请求参数
+            response: 响应数据（可JSON序列化）
+            ttl_seconds: 有效期（秒）
+        """
+        try:
+            now = time.time()
+            blob = zlib.compress(json.dumps(response, ensure_ascii=False).encode("utf-8"))
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                '''
+                INSERT OR REPLACE INTO search_response_cache
+                (cache_key, endpoint, request_json, response_blob, created_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ''',
+                (
+                    self.build_search_cache_key(endpoint, payload),
+                    endpoint,
+                    json.dumps(payload, sort_keys=True, ensure_ascii=False),
+                    blob,
+                    now,
+                    now + ttl_seconds,
+                ),
+            )
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"写入搜索响应缓存时出错：{str(e)}")
+            return False
+
+    def get_search_responses(self, endpoint: str = None) -> List[Dict]:
+        """
+        列出缓存的搜索响应（含过期记录），用于离线复算/评估
+
+        Args:
+            endpoint: 只返回该接口的记录，默认全部
+
+        Returns:
+            [{"endpoint", "request": 请求参数dict, "response": 响应数据, "created_at", "expires_at"}]
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            if endpoint:
+                cursor.execute(
+                    "SELECT endpoint, request_json, response_blob, created_at, expires_at "
+                    "FROM search_response_cache WHERE endpoint = ? ORDER BY created_at",
+                    (endpoint,),
+                )
+            else:
+                cursor.execute(
+                    "SELECT endpoint, request_json, response_blob, created_at, expires_at "
+                    "FROM search_response_cache ORDER BY created_at"
+                )
+            rows = cursor.fetchall()
+            conn.close()
+            return [
+                {
+                    "endpoint": r[0],
+                    "request": json.loads(r[1]),
+                    "response": json.loads(zlib.decompress(r[2]).decode("utf-8")),
+                    "created_at": r[3],
+                    "expires_at": r[4],
+                }
+                for r in rows
+            ]
+        except Exception as e:
+            print(f"列出搜索响应缓存时出错：{str(e)}")
+            return []
+
+    def purge_expired_search_responses(self) -> int:
+        """删除已过期的搜索响应缓存，返回删除行数"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM search_response_cache WHERE expires_at < ?", (time.time(),))
+            deleted = cursor.rowcount
+            conn.commit()
+            conn.close()
+            return deleted
+        except Exception as e:
+            print(f"清理搜索响应缓存时出错：{str(e)}")
+            return 0
+
+    def get_negative_search(self, game_name: str, provider: str, active_only: bool = True) -> Optional[Dict]:
+        """
+        查询搜索无结果记录
+
+        Args:
+            game_name: 游戏名称（按 normalize_game_name 规范化后匹配）
+            provider: 搜索来源，如 douyin / youtube
+            active_only: 只返回仍在退避期内（next_retry_at 未到）的记录
+
+        Returns:
+            记录字典（game_name, query, reason, attempts, last_attempt_at, next_retry_at），无记录返回None
+        """
         try:
             conn = sqlite3.connect(self.db_path)
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            
-            cursor.execute('SELECT * FROM games WHERE aweme_id = ?', (aweme_id,))
+            cursor.execute(
+                "SELECT * FROM search_negative_cache WHERE game_key = ? AND provider = ?",
+                (self.normalize_game_name(game_name), provider),
+            )
             row = cursor.fetchone()
-            
             conn.close()
-            
-            if row:
-                return self._row_to_dict(row)
+            if not row:
+                return None
+            if active_only and row["next_retry_at"] <= time.time():
+                return None
+            return dict(row)
+        except Exception as e:
+            print(f"查询搜索无结果记录时出错：{str(e)}")
             return None
-            
+
+    def record_negative_search(self, game_name: str, provider: str, query: str, reason: str) -> Optional[Dict]:
+        """
+        记录一次搜索无结果，下次重试时间按 NEGATIVE_CACHE_BASE_HOURS 指数退避（上限 NEGATIVE_CACHE_MAX_DAYS）
+
+        Args:
+            game_name: 游戏名称
+            provider: 搜索来源，如 douyin / youtube
+            query: 搜索关键词
+            reason: 无结果原因，如 no_results / no_relevant_results
+
+        Returns:
+            更新后的记录字典，失败返回None
+        """
+        try:
+            game_key = self.normalize_game_name(game_name)
+            now = time.time()
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT attempts FROM search_negative_cache WHERE game_key = ? AND provider = ?",
+                (game_key, provider),
+            )
+            row = cursor.fetchone()
+            attempts = (row[0] if row else 0) + 1
+            backoff_hours = min(
+                config.NEGATIVE_CACHE_BASE_HOURS * (2 ** (attempts - 1)),
+                config.NEGATIVE_CACHE_MAX_DAYS * 24,
+            )
+            next_retry_at = now + backoff_hours * 3600
+            cursor.execute(
+                '''
+                INSERT OR REPLACE INTO search_negative_cache
+                (game_key, provider, game_name, query, reason, attempts, last_attempt_at, next_retry_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                (game_key, provider, game_name, query, reason, attempts, now, next_retry_at),
+            )
+            conn.commit()
+            conn.close()
+            return {
+                "game_name": game_name,
+                "query": query,
+                "reason": reason,
+                "attempts": attempts,
+                "last_attempt_at": now,
+                "next_retry_at": next_retry_at,
+            }
         except Exception as e:
-            print(f"获取视频信息时出错：{str(e)}")
+            print(f"记录搜索无结果时出错：{str(e)}")
             return None
+
+    def clear_negative_search(self, game_name: str, provider: str = None) -> int:
+        """删除搜索无结果记录（搜索成功后调用；provider 为空时删除该游戏所有来源的记录），返回删除行数"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            if provider:
+                cursor.execute(
+                    "DELETE FROM search_negative_cache WHERE game_key = ? AND provider = ?",
+                    (self.normalize_game_name(game_name), provider),
+                )
+            else:
+                cursor.execute(
+                    "DELETE FROM search_negative_cache WHERE game_key = ?",
+                    (self.normalize_game_name(game_name),),
+                )
+            deleted = cursor.rowcount
+            conn.commit()
+            conn.close()
+            return deleted
+        except Exception as e:
+            print(f"删除搜索无结果记录时出错：{str(e)}")
+            return 0
+
+    def insert_cost_entry(self, run_id: str, provider: str, endpoint: str, units: float,
+                          estimated_cost: float, latency: float, status_code: int = None) -> bool:
+        """
+        写入一笔付费API调用记录
+
+        Args:
+            run_id: 运行ID
+            provider: 服务商，如 tikhub / rapidapi / openrouter
+            endpoint: 请求路径
+            units: 计费单位数
+            estimated_cost: 估算/实际费用（美元）
+            latency: 耗时（秒）
+            status_code: HTTP 状态码
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                '''
+                INSERT INTO api_cost_ledger
+                (run_id, provider, endpoint, units, estimated_cost, latency_ms, status_code, created_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                (run_id, provider, endpoint, units, estimated_cost,
+                 round(latency * 1000, 1) if latency is not None else None, status_code, time.time()),
+            )
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"写入费用记录时出错：{str(e)}")
+            return False
+
+    def get_cost_total(self, since_ts: float = None, run_id: str = None) -> float:
+        """汇总花费（美元）：可按起始时间戳和/或运行ID过滤"""
+        try:
+            conditions, params = [], []
+            if since_ts is not None:
+                conditions.append("created_ts >= ?")
+                params.append(since_ts)
+            if run_id:
+                conditions.append("run_id = ?")
+                params.append(run_id)
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COALESCE(SUM(estimated_cost), 0) FROM api_cost_ledger {where}", params)
+            total = cursor.fetchone()[0]
+            conn.close()
+            return float(total or 0.0)
+        except Exception as e:
+            print(f"汇总费用时出错：{str(e)}")
+            return 0.0
+
+    def get_video_manifest(self, source: str, video_id: str) -> Optional[Dict]:
+        """
+        按来源视频ID查询本地存储记录（同一视频ID对应多个游戏时取最近一条）
+
+        Args:
+            source: 来源，如 douyin / youtube
+            video_id: aweme_id / YouTube video_id
+
+        Returns:
+            记录字典（source, video_id, game_name, sha256, local_path, size, blob_path, gdrive_file_id, gdrive_url），无记录返回None
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(
+                '''
+                SELECT m.source, m.video_id, m.game_name, m.sha256, m.local_path,
+                       b.size, b.blob_path, b.gdrive_file_id, b.gdrive_url
+                FROM video_manifest m JOIN video_blobs b ON b.sha256 = m.sha256
+                WHERE m.source = ? AND m.video_id = ?
+                ORDER BY m.updated_ts DESC
+                LIMIT 1
+                ''',
+                (source, str(video_id)),
+            )
+            row = cursor.fetchone()
+            conn.close()
+            return dict(row) if row else None
+        except Exception as e:
+            print(f"查询本地视频存储记录时出错：{str(e)}")
+            return None
+
+    def save_video_manifest(self, source: str, video_id: str, game_name: str, sha256: str, local_path: str) -> bool:
+        """记录 来源视频ID + 游戏名 → 实体文件（已存在时更新路径与时间）"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                '''
+                INSERT OR REPLACE INTO video_manifest
+                (source, video_id, game_name, sha256, local_path, updated_ts)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ''',
+                (source, str(video_id), game_name, sha256, local_path, time.time()),
+            )
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"保存本地视频存储记录时出错：{str(e)}")
+            return False
+
+    def save_video_blob(self, sha256: str, size: int, blob_path: str) -> bool:
+        """登记实体文件（已存在时只更新大小与路径，保留 Google Drive 信息）"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                '''
+                INSERT INTO video_blobs (sha256, size, blob_path, created_ts)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(sha256) DO UPDATE SET size = excluded.size, blob_path = excluded.blob_path
+                ''',
+                (sha256, size, blob_path, time.time()),
+            )
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"登记视频实体文件时出错：{str(e)}")
+            return False
+
+    def update_video_blob_drive(self, sha256: str, gdrive_url: str, gdrive_file_id: str) -> bool:
+        """记录实体文件对应的 Google Drive 文件"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE video_blobs SET gdrive_url = ?, gdrive_file_id = ? WHERE sha256 = ?",
+                (gdrive_url, gdrive_file_id, sha256),
+            )
+            updated = cursor.rowcount
+            conn.commit()
+            conn.close()
+            return updated > 0
+        except Exception as e:
+            print(f"更新视频实体文件的Google Drive信息时出错：{str(e)}")
+            return False
+
+    def get_local_video_states(self) -> List[Dict]:
+        """
+        获取有本地视频的游戏及其后续处理状态（供本地视频配额清理判断视频是否仍被需要）
+
+        Returns:
+            [{"game_name", "local_path", "gdrive_url", "gameplay_analysis", "screenshot_image_key"}]
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(
+                '''
+                SELECT game_name, local_path, gdrive_url, gameplay_analysis, screenshot_image_key
+                FROM games
+                WHERE local_path IS NOT NULL AND local_path != ''
+                '''
+            )
+            rows = [dict(row) for row in cursor.fetchall()]
+            conn.close()
+            return rows
+        except Exception as e:
+            print(f"获取本地视频状态时出错：{str(e)}")
+            return []
+
+    def clear_local_paths(self, local_paths: List[str], clear_gdrive: bool = False) -> int:
+        """
+        本地视频被清理后，把对应游戏的 local_path 置空、downloaded 置 0（按绝对路径匹配）
+
+        Args:
+            local_paths: 已删除的视频路径
+            clear_gdrive: 同时清除 Google Drive 链接（视频文件损坏被隔离时，已上传的也是坏文件）
+
+        Returns:
+            受影响的记录数
+        """
+        removed = {os.path.abspath(p) for p in local_paths}
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("SELECT game_name, local_path FROM games WHERE local_path IS NOT NULL AND local_path != ''")
+            game_names = [name for name, path in cursor.fetchall() if os.path.abspath(path) in removed]
+            gdrive_sql = ", gdrive_url = NULL, gdrive_file_id = NULL" if clear_gdrive else ""
+            for game_name in game_names:
+                cursor.execute(
+                    f'''
+                    UPDATE games SET local_path = NULL, downloaded = 0{gdrive_sql}, updated_at = CURRENT_TIMESTAMP
+                    WHERE game_name = ?
+                    ''',
+                    (game_name,),
+                )
+            conn.commit()
+            conn.close()
+            return len(game_names)
+        except Exception as e:
+            print(f"清除本地视频路径时出错：{str(e)}")
+            return 0
+
+    def delete_video_blob(self, sha256: str) -> int:
+        """删除实体文件登记及指向它的清单（内容损坏时，避免后续复用该文件或其 Google Drive 文件）"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM video_manifest WHERE sha256 = ?", (sha256,))
+            deleted = cursor.rowcount
+            cursor.execute("DELETE FROM video_blobs WHERE sha256 = ?", (sha256,))
+            conn.commit()
+            conn.close()
+            return deleted
+        except Exception as e:
+            print(f"删除视频实体文件登记时出错：{str(e)}")
+            return 0
+
+    def get_video_probe(self, local_path: str) -> Optional[Dict]:
+        """
+        查询本地视频的检查结果（按绝对路径）
+
+        Returns:
+            video_probes 记录字典，无记录返回None
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM video_probes WHERE local_path = ?", (os.path.abspath(local_path),))
+            row = cursor.fetchone()
+            conn.close()
+            return dict(row) if row else None
+        except Exception as e:
+            print(f"查询视频检查结果时出错：{str(e)}")
+            return None
+
+    def save_video_probe(self, probe: Dict) -> bool:
+        """
+        保存视频检查结果（同一路径覆盖旧记录）
+
+        Args:
+            probe: video_probe.check 生成的记录（local_path, source, video_id, game_name, size, mtime, ok, reason,
+                   container, codec, duration, width, height, has_audio, faststart, quarantine_path）
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                '''
+                INSERT OR REPLACE INTO video_probes
+                (local_path, source, video_id, game_name, size, mtime, ok, reason, container, codec,
+                 duration, width, height, has_audio, faststart, quarantine_path, probed_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                (
+                    os.path.abspath(probe["local_path"]),
+                    probe.get("source"),
+                    str(probe["video_id"]) if probe.get("video_id") else None,
+                    probe.get("game_name"),
+                    int(probe.get("size") or 0),
+                    probe.get("mtime"),
+                    1 if probe.get("ok") else 0,
+                    probe.get("reason"),
+                    probe.get("container"),
+                    probe.get("codec"),
+                    probe.get("duration"),
+                    probe.get("width"),
+                    probe.get("height"),
+                    None if probe.get("has_audio") is None else int(bool(probe["has_audio"])),
+                    None if probe.get("faststart") is None else int(bool(probe["faststart"])),
+                    probe.get("quarantine_path"),
+                    time.time(),
+                ),
+            )
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"保存视频检查结果时出错：{str(e)}")
+            return False
+
+    def get_upload_session(self, local_path: str) -> Optional[Dict]:
+        """
+        查询本地文件未完成的 Drive 上传会话（按绝对路径）
+
+        Returns:
+            gdrive_upload_sessions 记录字典，无记录返回None
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM gdrive_upload_sessions WHERE local_path = ?", (os.path.abspath(local_path),))
+            row = cursor.fetchone()
+            conn.close()
+            return dict(row) if row else None
+        except Exception as e:
+            print(f"查询Drive上传会话时出错：{str(e)}")
+            return None
+
+    def get_upload_sessions(self) -> List[Dict]:
+        """所有未完成的 Drive 上传会话（按创建时间）"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM gdrive_upload_sessions ORDER BY created_ts")
+            rows = [dict(r) for r in cursor.fetchall()]
+            conn.close()
+            return rows
+        except Exception as e:
+            print(f"查询Drive上传会话时出错：{str(e)}")
+            return []
+
+    def save_upload_session(self, session: Dict) -> bool:
+        """
+        保存 Drive 上传会话进度（同一路径覆盖旧记录，保留首次创建时间）
+
+        Args:
+            session: {local_path, size, mtime, folder_id, file_name, session_uri, chunk_size, uploaded_bytes, file_id}
+        """
+        try:
+            now = time.time()
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                '''
+                INSERT INTO gdrive_upload_sessions
+                (local_path, size, mtime, folder_id, file_name, session_uri, chunk_size, uploaded_bytes, file_id,
+                 created_ts, updated_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(local_path) DO UPDATE SET
+                    size = excluded.size, mtime = excluded.mtime, folder_id = excluded.folder_id,
+                    file_name = excluded.file_name, session_uri = excluded.session_uri,
+                    chunk_size = excluded.chunk_size, uploaded_bytes = excluded.uploaded_bytes,
+                    file_id = excluded.file_id, updated_ts = excluded.updated_ts
+                ''',
+                (
+                    os.path.abspath(session["local_path"]),
+                    int(session["size"]),
+                    session.get("mtime"),
+                    session.get("folder_id"),
+                    session.get("file_name"),
+                    session.get("session_uri"),
+                    session.get("chunk_size"),
+                    int(session.get("uploaded_bytes") or 0),
+                    session.get("file_id"),
+                    now,
+                    now,
+                ),
+            )
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"保存Drive上传会话时出错：{str(e)}")
+            return False
+
+    def delete_upload_session(self, local_path: str) -> bool:
+        """上传完成（或会话失效）后删除会话记录"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM gdrive_upload_sessions WHERE local_path = ?", (os.path.abspath(local_path),))
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"删除Drive上传会话时出错：{str(e)}")
+            return False
+
+    def get_gdrive_file(self, md5: str, size: int) -> Optional[Dict]:
+        """
+        按内容 (md5, 大小) 查找已上传的 Drive 文件
+
+        Returns:
+            gdrive_files 记录字典，无记录返回None
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM gdrive_files WHERE md5 = ? AND size = ?", (md5, int(size)))
+            row = cursor.fetchone()
+            conn.close()
+            return dict(row) if row else None
+        except Exception as e:
+            print(f"查询Drive文件索引时出错：{str(e)}")
+            return None
+
+    def save_gdrive_files(self, files: List[Dict]) -> int:
+        """
+        写入 Drive 文件索引（同一内容覆盖旧记录；已知的 sha256 不会被未提供 sha256 的记录清空）
+
+        Args:
+            files: [{md5, size, file_id, sha256?, file_name?, folder_id?, is_public?}]
+
+        Returns:
+            写入条数
+        """
+        try:
+            now = time.time()
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.executemany(
+                '''
+                INSERT INTO gdrive_files (md5, size, sha256, file_id, file_name, folder_id, is_public, indexed_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(md5, size) DO UPDATE SET
+                    sha256 = COALESCE(excluded.sha256, gdrive_files.sha256),
+                    file_id = excluded.file_id, file_name = excluded.file_name, folder_id = excluded.folder_id,
+                    is_public = excluded.is_public, indexed_ts = excluded.indexed_ts
+                ''',
+                [
+                    (f["md5"], int(f["size"]), f.get("sha256"), f["file_id"], f.get("file_name"),
+                     f.get("folder_id"), 1 if f.get("is_public") else 0, now)
+                    for f in files
+                ],
+            )
+            conn.commit()
+            conn.close()
+            return len(files)
+        except Exception as e:
+            print(f"保存Drive文件索引时出错：{str(e)}")
+            return 0
+
+    def delete_gdrive_file(self, file_id: str) -> bool:
+        """Drive 文件已删除或移入回收站时移出索引"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM gdrive_files WHERE file_id = ?", (file_id,))
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"删除Drive文件索引时出错：{str(e)}")
+            return False
+
+    def get_gdrive_index_folder(self, folder_id: str) -> Optional[Dict]:
+        """查询文件夹是否已从 Drive 导入过文件列表"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM gdrive_index_folders WHERE folder_id = ?", (folder_id,))
+            row = cursor.fetchone()
+            conn.close()
+            return dict(row) if row else None
+        except Exception as e:
+            print(f"查询Drive文件索引状态时出错：{str(e)}")
+            return None
+
+    def save_gdrive_index_folder(self, folder_id: str, folder_name: str, files: int) -> bool:
+        """记录文件夹已导入（files 为导入的文件数）"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR REPLACE INTO gdrive_index_folders (folder_id, folder_name, files, seeded_ts) VALUES (?, ?, ?, ?)",
+                (folder_id, folder_name, int(files), time.time()),
+            )
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"保存Drive文件索引状态时出错：{str(e)}")
+            return False
+
+    def get_gdrive_file_by_id(self, file_id: str) -> Optional[Dict]:
+        """按 Drive 文件ID查找内容索引记录（用于得到文件 md5）"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM gdrive_files WHERE file_id = ?", (file_id,))
+            row = cursor.fetchone()
+            conn.close()
+            return dict(row) if row else None
+        except Exception as e:
+            print(f"查询Drive文件索引时出错：{str(e)}")
+            return None
+
+    def get_analysis(self, video_key: str, model: str, prompt_version: str) -> Optional[Dict]:
+        """
+        按 (视频键, 模型, 提示词版本) 查找已有分析（不限游戏：同一视频出现在多个游戏名下时共用）
+
+        Returns:
+            与 get_gameplay_analysis 相同结构的字典（另含分析时的 game_name），无记录返回None
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT * FROM analyses WHERE video_key = ? AND model = ? AND prompt_version = ?",
+                (video_key, model, prompt_version or ""),
+            )
+            row = cursor.fetchone()
+            conn.close()
+            return self._analysis_row_to_dict(row) if row else None
+        except Exception as e:
+            print(f"查询分析记录时出错：{str(e)}")
+            return None
+
+    def set_current_analysis(self, game_name: str, analysis: Dict) -> bool:
+        """把游戏的当前分析指向 analyses 中的一条（analysis 为 get_analysis 的返回值；已指向该条时不写入）"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE games SET
+                    gameplay_analysis = ?,
+                    analysis_model = ?,
+                    analysis_prompt_version = ?,
+                    analysis_id = ?,
+                    analyzed_at = ?,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE game_name = ? AND analysis_id IS NOT ?
+            ''', (analysis["gameplay_analysis"], analysis["analysis_model"], analysis["prompt_version"],
+                  analysis["analysis_id"], analysis["analyzed_at"], game_name, analysis["analysis_id"]))
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"更新当前分析时出错：{str(e)}")
+            return False
+
+    def get_stale_analysis_games(self, model: str, prompt_version: str) -> List[str]:
+        """当前分析的模型或提示词版本与给定值不同的游戏（含未记录版本的旧分析）"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT game_name FROM games
+                WHERE gameplay_analysis IS NOT NULL AND gameplay_analysis != ''
+                  AND (analysis_model IS NOT ? OR analysis_prompt_version IS NOT ?)
+                ORDER BY game_name
+            ''', (model, prompt_version))
+            names = [row[0] for row in cursor.fetchall()]
+            conn.close()
+            return names
+        except Exception as e:
+            print(f"查询过期分析时出错：{str(e)}")
+            return []
+
+    def save_video_phash(self, video_key: str, game_name: str, hashes: List[str]) -> bool:
+        """保存视频各采样帧的感知哈希（十六进制，按顺序对应帧序号；覆盖该视频的旧记录）"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM video_phash WHERE video_key = ?", (video_key,))
+            cursor.executemany(
+                "INSERT INTO video_phash (video_key, frame_index, hash, game_name) VALUES (?, ?, ?, ?)",
+                [(video_key, i, h, game_name) for i, h in enumerate(hashes)],
+            )
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"保存视频感知哈希时出错：{str(e)}")
+            return False
+
+    def get_video_phashes(self, video_key: str = None) -> Dict[str, List[str]]:
+        """
+        获取视频感知哈希
+
+        Args:
+            video_key: 只取该视频（默认全部，供建立索引）
+
+        Returns:
+            {视频键: [十六进制哈希, ...]}（按帧序号排列）
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            if video_key:
+                cursor.execute(
+                    "SELECT video_key, hash FROM video_phash WHERE video_key = ? ORDER BY frame_index", (video_key,)
+                )
+            else:
+                cursor.execute("SELECT video_key, hash FROM video_phash ORDER BY video_key, frame_index")
+            result: Dict[str, List[str]] = {}
+            for key, value in cursor.fetchall():
+                result.setdefault(key, []).append(value)
+            conn.close()
+            return result
+        except Exception as e:
+            print(f"获取视频感知哈希时出错：{str(e)}")
+            return {}
+
+    def get_analysis_by_id(self, analysis_id: int) -> Optional[Dict]:
+        """按ID查找 analyses 中的一条，结构同 get_analysis"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM analyses WHERE id = ?", (analysis_id,))
+            row = cursor.fetchone()
+            conn.close()
+            return self._analysis_row_to_dict(row) if row else None
+        except Exception as e:
+            print(f"查询分析记录时出错：{str(e)}")
+            return None
+
+    @staticmethod
+    def _analysis_row_to_dict(row) -> Dict:
+        return {
+            "gameplay_analysis": row["analysis"],
+            "analysis_model": row["model"],
+            "prompt_version": row["prompt_version"],
+            "analyzed_at": row["analyzed_at"],
+            "analysis_id": row["id"],
+            "video_key": row["video_key"],
+            "game_name": row["game_name"],
+        }
+
+    def delete_analysis(self, analysis_id: int) -> bool:
+        """删除 analyses 中的一条，并清除仍指向它的游戏的当前分析"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE games SET
+                    gameplay_analysis = NULL,
+                    analysis_model = NULL,
+                    analysis_prompt_version = NULL,
+                    analysis_id = NULL,
+                    analyzed_at = NULL,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE analysis_id = ?
+            ''', (analysis_id,))
+            cursor.execute("DELETE FROM analyses WHERE id = ?", (analysis_id,))
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"删除分析记录时出错：{str(e)}")
+            return False
+
+    def save_analysis_link(self, game_name: str, video_key: str, source: Dict, mode: str,
+                           match_ratio: float, avg_distance: float, analysis_id: int = None) -> Optional[int]:
+        """
+        记录一次近似重复视频的分析复用（同一对视频只保留一条，已人工复核的记录不改状态）
+
+        Args:
+            game_name: 复用分析的游戏
+            video_key: 该游戏的视频键
+            source: 被复用的分析（get_analysis 的返回值）
+            mode: draft（待人工确认）/ skip（已直接复用）
+            match_ratio: 匹配上的采样帧比例
+            avg_distance: 匹配帧的平均汉明距离
+            analysis_id: skip 模式下为该游戏写入的 analyses 记录
+
+        Returns:
+            记录ID，失败返回None
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO analysis_links (game_name, video_key, source_video_key, source_analysis_id, source_game_name,
+                                            analysis_id, mode, match_ratio, avg_distance, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(video_key, source_video_key) DO UPDATE SET
+                    game_name = excluded.game_name,
+                    source_analysis_id = excluded.source_analysis_id,
+                    analysis_id = COALESCE(excluded.analysis_id, analysis_links.analysis_id),
+                    mode = excluded.mode,
+                    match_ratio = excluded.match_ratio,
+                    avg_distance = excluded.avg_distance,
+                    status = CASE WHEN analysis_links.status IN ('pending', 'auto')
+                                  THEN excluded.status ELSE analysis_links.status END
+            ''', (game_name, video_key, source["video_key"], source["analysis_id"], source.get("game_name"),
+                  analysis_id, mode, match_ratio, avg_distance, "pending" if mode == "draft" else "auto"))
+            cursor.execute(
+                "SELECT id FROM analysis_links WHERE video_key = ? AND source_video_key = ?",
+                (video_key, source["video_key"]),
+            )
+            link_id = cursor.fetchone()[0]
+            conn.commit()
+            conn.close()
+            return link_id
+        except Exception as e:
+            print(f"记录分析复用时出错：{str(e)}")
+            return None
+
+    def get_analysis_links(self, status: str = None, video_key: str = None) -> List[Dict]:
+        """
+        获取分析复用记录
+
+        Args:
+            status: pending（草稿待确认）/ auto（已直接复用）/ accepted / rejected，默认全部
+            video_key: 只取该视频的记录
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            query = "SELECT * FROM analysis_links WHERE 1 = 1"
+            params = []
+            if status:
+                query += " AND status = ?"
+                params.append(status)
+            if video_key:
+                query += " AND video_key = ?"
+                params.append(video_key)
+            cursor.execute(query + " ORDER BY created_at DESC, id DESC", params)
+            rows = [dict(row) for row in cursor.fetchall()]
+            conn.close()
+            return rows
+        except Exception as e:
+            print(f"获取分析复用记录时出错：{str(e)}")
+            return []
+
+    def set_analysis_link_status(self, link_id: int, status: str, analysis_id: int = None) -> bool:
+        """人工复核分析复用记录：accepted / rejected（确认草稿时记下写入的 analyses 记录）"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE analysis_links SET
+                    status = ?,
+                    analysis_id = COALESCE(?, analysis_id),
+                    reviewed_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (status, analysis_id, link_id))
+            changed = cursor.rowcount
+            conn.commit()
+            conn.close()
+            return changed > 0
+        except Exception as e:
+            print(f"更新分析复用记录时出错：{str(e)}")
+            return False
+
+    # 兼容旧方法名（向后兼容）
+    def save_video(self, video_info: Dict) -> bool:
+        """兼容旧方法名，实际调用save_game"""
+        return self.save_game(video_info)
+    
+    def get_video(self, aweme_id: str) -> Optional[Dict]:
+        """兼容旧方法名，根据aweme_id查找游戏（不推荐使用）"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT * FROM games WHERE aweme_id = ?', (aweme_id,))
+            row = cursor.fetchone()
+            
+            conn.close()
+            
+            if row:
+                return self._row_to_dict(row)
+            return None
+            
+        except Exception as e:
+            print(f"获取视频信息时出错：{str(e)}")
+            return None
+    
+    def get_all_videos(self, limit: int = None) -> List[Dict]:
+        """兼容旧方法名，实际调用get_all_games"""
+        return self.get_all_games(limit=limit)
     
     def get_videos_by_game(self, game_name: str) -> List[Dict]:
         """兼容旧方法名，实际返回单个游戏的列表（因为现在每个游戏只有一条记录）"""
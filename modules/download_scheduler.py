@@ -0,0 +1,250 @@
+"""
+统一下载调度（抖音直链/最高画质链接、YouTube TikHub 直链、yt-dlp）
+- 有界工作线程池（DOWNLOAD_CONCURRENCY），每个主机同时最多 DOWNLOAD_PER_HOST_LIMIT 个下载
+- 优先级：排名靠前的游戏先下载（数值越小越优先，调用方用 job_priority 设置当前线程的优先级）
+- 全局带宽上限 DOWNLOAD_BANDWIDTH_MBPS：HTTP 下载在 downloader 中按令牌桶限速，yt-dlp 任务按并发数均分限速
+- yt-dlp 任务在子进程中执行（spawn 进程池），不占用主流程的 GIL
+- 统计排队/执行耗时、各主机任务数、最大并发数，供运行汇总输出
+"""
+import heapq
+import itertools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import config
+from modules import downloader
+
+YTDLP_HOST = "youtube.com"
+
+_local = threading.local()
+
+
+@contextmanager
+def job_priority(priority: int):
+    """在该上下文中（当前线程）提交的下载任务使用指定优先级，如游戏在榜单中的序号"""
+    previous = getattr(_local, "priority", None)
+    _local.priority = priority
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+def _current_priority() -> int:
+    priority = getattr(_local, "priority", None)
+    return priority if priority is not None else 1 << 30
+
+
+def host_of(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+def _run_ytdlp(url: str, ydl_opts: Dict) -> Optional[str]:
+    """子进程中执行 yt-dlp 下载，成功返回None，失败返回错误信息（yt-dlp 的异常不一定能跨进程传递）"""
+    try:
+        import yt_dlp
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            ydl.download([url])
+        return None
+    except Exception as e:
+        return str(e) or e.__class__.__name__
+
+
+class _Job:
+    __slots__ = ("priority", "seq", "host", "fn", "args", "kwargs", "future", "queued_at")
+
+    def __init__(self, priority, seq, host, fn, args, kwargs):
+        self.priority = priority
+        self.seq = seq
+        self.host = host
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.queued_at = time.perf_counter()
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class DownloadScheduler:
+    """下载调度器：优先级队列 + 有界线程池 + 每主机并发上限"""
+
+    def __init__(self, workers: int = None, per_host: int = None):
+        """
+        Args:
+            workers: 同时进行的下载数，默认 DOWNLOAD_CONCURRENCY
+            per_host: 每个主机同时进行的下载数，默认 DOWNLOAD_PER_HOST_LIMIT
+        """
+        self.workers = max(1, workers or config.DOWNLOAD_CONCURRENCY)
+        self.per_host = max(1, per_host or config.DOWNLOAD_PER_HOST_LIMIT)
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._active: Dict[str, int] = {}
+        self._threads = []
+        self._process_pool = None
+        self._stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict:
+        return {"jobs": 0, "failed": 0, "ytdlp": 0, "wait_seconds": 0.0, "run_seconds": 0.0,
+                "peak_running": 0, "by_host": {}}
+
+    # ---- 提交 ----
+
+    def submit(self, host: str, fn: Callable, *args, **kwargs) -> Future:
+        """
+        提交任务（按当前线程的 job_priority 排队）
+
+        Args:
+            host: 用于每主机并发上限的主机名
+            fn: 实际执行的函数，其余参数原样传入
+
+        Returns:
+            Future
+        """
+        job = _Job(_current_priority(), next(self._seq), host or "", fn, args, kwargs)
+        with self._cond:
+            self._ensure_workers()
+            heapq.heappush(self._heap, job)
+            self._cond.notify_all()
+        return job.future
+
+    def run(self, host: str, fn: Callable, *args, **kwargs):
+        """提交任务并等待结果（异常原样抛出）"""
+        return self.submit(host, fn, *args, **kwargs).result()
+
+    def download(self, url: str, dest_path: str, **kwargs) -> Optional[Dict]:
+        """经调度器执行 downloader.download_file，参数与其相同"""
+        return self.run(host_of(url), downloader.download_file, url, dest_path, **kwargs)
+
+    def ytdlp(self, url: str, ydl_opts: Dict) -> None:
+        """
+        在子进程中执行 yt-dlp 下载（占用一个下载名额），失败时抛出 RuntimeError
+
+        Args:
+            url: 视频页面地址
+            ydl_opts: yt-dlp 选项（需可序列化）
+        """
+        opts = dict(ydl_opts)
+        if config.DOWNLOAD_BANDWIDTH_MBPS > 0 and not opts.get("ratelimit"):
+            opts["ratelimit"] = int(config.DOWNLOAD_BANDWIDTH_MBPS * 1024 * 1024 / self.workers)
+        error = self.run(YTDLP_HOST, self._run_in_process, url, opts)
+        if error:
+            raise RuntimeError(error)
+
+    def _run_in_process(self, url: str, opts: Dict) -> Optional[str]:
+        with self._cond:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            pool = self._process_pool
+            self._stats["ytdlp"] += 1
+        return pool.submit(_run_ytdlp, url, opts).result()
+
+    # ---- 工作线程 ----
+
+    def _ensure_workers(self):
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._worker, name=f"download-{len(self._threads) + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_job(self) -> Optional[_Job]:
+        """取优先级最高、且所在主机未达并发上限的任务（调用方持有锁）"""
+        for job in sorted(self._heap):
+            if self._active.get(job.host, 0) < self.per_host:
+                self._heap.remove(job)
+                heapq.heapify(self._heap)
+                return job
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next_job()
+                self._active[job.host] = self._active.get(job.host, 0) + 1
+                running = sum(self._active.values())
+                self._stats["peak_running"] = max(self._stats["peak_running"], running)
+            started = time.perf_counter()
+            if not job.future.set_running_or_notify_cancel():
+                self._finish(job, started, failed=False)
+                continue
+            try:
+                job.future.set_result(job.fn(*job.args, **job.kwargs))
+                self._finish(job, started, failed=False)
+            except BaseException as e:
+                job.future.set_exception(e)
+                self._finish(job, started, failed=True)
+
+    def _finish(self, job: _Job, started: float, failed: bool):
+        now = time.perf_counter()
+        with self._cond:
+            self._active[job.host] -= 1
+            stats = self._stats
+            stats["jobs"] += 1
+            stats["failed"] += 1 if failed else 0
+            stats["wait_seconds"] += started - job.queued_at
+            stats["run_seconds"] += now - started
+            stats["by_host"][job.host] = stats["by_host"].get(job.host, 0) + 1
+            self._cond.notify_all()
+
+    # ---- 统计 ----
+
+    def get_stats(self) -> Dict:
+        """
+        Returns:
+            {"jobs", "failed", "ytdlp", "wait_seconds": 累计排队时间, "run_seconds": 累计执行时间,
+             "peak_running": 最大同时下载数, "by_host": {主机: 任务数}, "workers", "per_host"}
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats["by_host"] = dict(self._stats["by_host"])
+        stats["workers"] = self.workers
+        stats["per_host"] = self.per_host
+        return stats
+
+    def reset_stats(self):
+        with self._cond:
+            self._stats = self._empty_stats()
+
+    def shutdown(self):
+        """关闭 yt-dlp 进程池（工作线程为守护线程，随进程退出）"""
+        with self._cond:
+            pool, self._process_pool = self._process_pool, None
+        if pool:
+            pool.shutdown(wait=True)
+
+
+_scheduler: Optional[DownloadScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_download_scheduler() -> DownloadScheduler:
+    """进程内共享的下载调度器（首次调用时按当前配置创建）"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = DownloadScheduler()
+        return _scheduler
+
+
+def configure(workers: int = None, per_host: int = None) -> DownloadScheduler:
+    """按新的并发设置重建共享调度器（如 --download-concurrency），旧调度器的进程池会被关闭"""
+    global _scheduler
+    with _scheduler_lock:
+        old, _scheduler = _scheduler, DownloadScheduler(workers, per_host)
+    if old:
+        old.shutdown()
+    return _scheduler
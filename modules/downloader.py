@@ -0,0 +1,411 @@
+"""
+视频下载模块（抖音直链/最高画质链接、YouTube TikHub 直链共用）
+- 先写入 <目标文件>.part，下载完成并校验大小后再原子重命名为目标文件，中断不会留下不完整的 mp4
+- 断点续传：已有 .part 时用 HTTP Range 从断点继续；服务器不支持 Range 时从头下载
+- 大文件（≥ DOWNLOAD_PARALLEL_MIN_MB）且服务器支持 Range 时按字节区间多线程并行下载，
+  每段写入独立的分段文件，重试时各段分别续传
+- 全局带宽上限（DOWNLOAD_BANDWIDTH_MBPS）：所有下载线程共享一个令牌桶
+- 统计下载量、耗时与吞吐量，供运行汇总输出
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+import config
+from modules import http_client
+
+
+class _DownloadStats:
+    """下载统计（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = self._empty()
+
+    @staticmethod
+    def _empty() -> Dict:
+        return {"files": 0, "failed": 0, "bytes": 0, "resumed_bytes": 0, "seconds": 0.0, "parallel": 0, "retries": 0}
+
+    def add(self, **values):
+        with self._lock:
+            for k, v in values.items():
+                self._stats[k] += v
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def reset(self):
+        with self._lock:
+            self._stats = self._empty()
+
+
+_stats = _DownloadStats()
+
+
+class _Bandwidth:
+    """全局下载带宽令牌桶（DOWNLOAD_BANDWIDTH_MBPS，所有下载线程共享；0 表示不限速）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._updated = time.perf_counter()
+
+    def consume(self, nbytes: int):
+        rate = config.DOWNLOAD_BANDWIDTH_MBPS * 1024 * 1024
+        if rate <= 0:
+            return
+        with self._lock:
+            now = time.perf_counter()
+            # 桶容量为 1 秒的流量，空闲后最多突发 1 秒
+            self._tokens = min(rate, self._tokens + (now - self._updated) * rate) - nbytes
+            self._updated = now
+            wait = -self._tokens / rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+_bandwidth = _Bandwidth()
+
+
+def throttle(nbytes: int):
+    """按全局带宽上限限速（下载循环每读到一块数据调用一次）"""
+    _bandwidth.consume(nbytes)
+
+
+class _Progress:
+    """按时间间隔打印进度与瞬时吞吐量（多个分段共享）"""
+
+    def __init__(self, total: int, label: str, interval: float = 5.0):
+        self.total = total
+        self.label = label
+        self.interval = interval
+        self.done = 0
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._last_print = self._started
+
+    def add(self, n: int):
+        with self._lock:
+            self.done += n
+            now = time.perf_counter()
+            if now - self._last_print < self.interval:
+                return
+            self._last_print = now
+            elapsed = now - self._started
+            speed = self.done / elapsed / 1024 / 1024 if elapsed > 0 else 0.0
+            if self.total > 0:
+                print(f"  {self.label}下载进度：{self.done / self.total * 100:.1f}% "
+                      f"({self.done / 1024 / 1024:.1f} MB / {self.total / 1024 / 1024:.1f} MB，{speed:.2f} MB/s)")
+            else:
+                print(f"  {self.label}已下载：{self.done / 1024 / 1024:.1f} MB（{speed:.2f} MB/s）")
+
+
+def _chunk_size() -> int:
+    return max(8, config.DOWNLOAD_CHUNK_KB) * 1024
+
+
+def _parse_total(content_range: str) -> Optional[int]:
+    """解析 Content-Range（bytes 0-0/12345）中的总大小"""
+    if not content_range or "/" not in content_range:
+        return None
+    total = content_range.rsplit("/", 1)[1].strip()
+    return int(total) if total.isdigit() else None
+
+
+def _file_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def _probe(url: str, headers: Dict, timeout) -> Tuple[Optional[int], bool]:
+    """
+    用 Range: bytes=0-0 探测文件大小与是否支持 Range
+
+    Returns:
+        (总大小或 None, 是否支持 Range)
+    """
+    response = http_client.get(url, headers={**headers, "Range": "bytes=0-0"}, stream=True, timeout=timeout)
+    try:
+        if response.status_code == 206:
+            return _parse_total(response.headers.get("Content-Range", "")), True
+        if response.status_code == 200:
+            length = response.headers.get("Content-Length")
+            return (int(length) if length and length.isdigit() else None), False
+        raise requests.exceptions.HTTPError(f"HTTP {response.status_code}", response=response)
+    finally:
+        response.close()
+
+
+def _fetch_range(url: str, path: str, headers: Dict, timeout, start: int, end: Optional[int],
+                 progress: _Progress) -> Tuple[int, Optional[int]]:
+    """
+    把 [start + 已有大小, end] 区间追加写入 path（end 为 None 表示到文件末尾）
+
+    Returns:
+        (本次写入字节数, 从响应得知的文件总大小或 None)
+    """
+    range_start = start + _file_size(path)
+    if end is not None and range_start > end:
+        return 0, None
+    request_headers = dict(headers)
+    if range_start > 0 or end is not None:
+        request_headers["Range"] = f"bytes={range_start}-{'' if end is None else end}"
+
+    response = http_client.get(url, headers=request_headers, stream=True, timeout=timeout)
+    try:
+        if response.status_code == 416:
+            # 请求的起点已超出文件末尾：.part 已是完整文件（或已失效，由调用方按大小校验）
+            return 0, _parse_total(response.headers.get("Content-Range", ""))
+        if response.status_code == 200 and range_start > 0:
+            # 服务器忽略了 Range，从头重写
+            if start > 0:
+                raise requests.exceptions.HTTPError("服务器不支持 Range，无法分段续传", response=response)
+            mode = "wb"
+        elif response.status_code in (200, 206):
+            mode = "ab"
+        else:
+            raise requests.exceptions.HTTPError(f"HTTP {response.status_code}", response=response)
+
+        total = _parse_total(response.headers.get("Content-Range", ""))
+        if total is None and response.status_code == 200:
+            length = response.headers.get("Content-Length")
+            total = int(length) if length and length.isdigit() else None
+
+        written = 0
+        with open(path, mode) as f:
+            for chunk in response.iter_content(chunk_size=_chunk_size()):
+                if chunk:
+                    f.write(chunk)
+                    written += len(chunk)
+                    progress.add(len(chunk))
+                    throttle(len(chunk))
+        return written, total
+    finally:
+        response.close()
+
+
+def _download_single(url: str, part_path: str, headers: Dict, timeout, progress: _Progress,
+                     expected_total: Optional[int]) -> Optional[int]:
+    """单连接下载（支持续传），返回文件总大小（未知时返回实际大小）"""
+    _, total = _fetch_range(url, part_path, headers, timeout, 0, None, progress)
+    total = total or expected_total
+    size = _file_size(part_path)
+    if total is not None and size > total:
+        # .part 比服务器上的文件还大（链接已指向另一个文件），只能从头下载
+        os.remove(part_path)
+        raise IOError(f"已下载部分与服务器文件不一致（{size} > {total} 字节），将从头下载")
+    if total is not None and size != total:
+        raise IOError(f"文件不完整（期望 {total} 字节，实际 {size} 字节）")
+    return size
+
+
+def _segments(total: int, workers: int) -> List[Tuple[int, int]]:
+    """把 [0, total) 均分为 workers 个闭区间"""
+    size = -(-total // workers)
+    return [(i, min(i + size, total) - 1) for i in range(0, total, size)]
+
+
+def _segment_paths(part_path: str, ranges: List[Tuple[int, int]]) -> List[str]:
+    return [f"{part_path}.{i}of{len(ranges)}" for i in range(len(ranges))]
+
+
+def _download_parallel(url: str, part_path: str, headers: Dict, timeout, progress: _Progress,
+                       total: int, workers: int) -> int:
+    """分段并行下载到 <part>.<i>of<n>，全部完成后按顺序拼接为 .part"""
+    ranges = _segments(total, workers)
+    segment_paths = _segment_paths(part_path, ranges)
+
+    def _worker(i: int):
+        start, end = ranges[i]
+        expected = end - start + 1
+        if _file_size(segment_paths[i]) > expected:
+            # 分段文件比应有长度还大（上次写入异常或文件已变化），无法续传，从头下载该分段
+            os.remove(segment_paths[i])
+        _fetch_range(url, segment_paths[i], headers, timeout, start, end, progress)
+        size = _file_size(segment_paths[i])
+        if size > expected:
+            os.remove(segment_paths[i])
+            raise IOError(f"分段 {i + 1}/{len(ranges)} 超出应有长度（期望 {expected} 字节，实际 {size} 字节），将从头下载该分段")
+        if size != expected:
+            raise IOError(f"分段 {i + 1}/{len(ranges)} 不完整（期望 {expected} 字节，实际 {size} 字节）")
+
+    with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="download") as pool:
+        for future in [pool.submit(_worker, i) for i in range(len(ranges))]:
+            future.result()
+
+    with open(part_path, "wb") as out:
+        for seg in segment_paths:
+            with open(seg, "rb") as f:
+                while True:
+                    block = f.read(_chunk_size())
+                    if not block:
+                        break
+                    out.write(block)
+    for seg in segment_paths:
+        os.remove(seg)
+    return _file_size(part_path)
+
+
+def _partial_files(part_path: str) -> List[str]:
+    """.part 及其分段文件（<part>.<i>of<n>）"""
+    directory = os.path.dirname(part_path) or "."
+    prefix = os.path.basename(part_path)
+    if not os.path.isdir(directory):
+        return []
+    return [
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name == prefix or (name.startswith(prefix + ".") and "of" in name)
+    ]
+
+
+def _prune_partial(part_path: str, keep: Dict[str, Optional[int]]) -> int:
+    """
+    删除与本次下载方式不符的未完成文件（如分段数不同的分段、改为单连接时的分段），保留可续传的部分
+
+    Args:
+        part_path: .part 路径
+        keep: 本次会续传的文件 -> 应有的最大长度（None 表示不限）
+
+    Returns:
+        可续传的字节数（超出应有长度的分段会被从头下载，不计入）
+    """
+    reusable = 0
+    for path in _partial_files(part_path):
+        if path not in keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        size = _file_size(path)
+        if keep[path] is None or size <= keep[path]:
+            reusable += size
+    return reusable
+
+
+def _remove_partial(part_path: str):
+    """删除 .part 及分段文件"""
+    for path in _partial_files(part_path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def download_file(url: str, dest_path: str, headers: Dict = None, timeout=None,
+                  max_retries: int = None, min_bytes: int = 1024, label: str = "") -> Optional[Dict]:
+    """
+    下载文件到 dest_path（先写 .part，支持断点续传与分段并行）
+
+    Args:
+        url: 下载地址
+        dest_path: 目标文件路径
+        headers: 额外请求头
+        timeout: 请求超时，默认使用 http_client 的默认超时
+        max_retries: 连接中断后的续传重试次数，默认 DOWNLOAD_MAX_RETRIES
+        min_bytes: 小于该大小视为无效文件（如错误页）
+        label: 进度输出前缀
+
+    Returns:
+        {"path", "bytes", "seconds", "mbps", "resumed_bytes", "parallel"}；失败返回 None（.part 保留供下次续传）
+    """
+    headers = dict(headers or {})
+    max_retries = config.DOWNLOAD_MAX_RETRIES if max_retries is None else max_retries
+    part_path = dest_path + ".part"
+    dest_dir = os.path.dirname(dest_path)
+    if dest_dir:
+        os.makedirs(dest_dir, exist_ok=True)
+
+    resumed = None
+    started = time.perf_counter()
+    parallel = False
+    last_error = None
+
+    for attempt in range(max_retries + 1):
+        if attempt > 0:
+            _stats.add(retries=1)
+            delay = config.API_RETRY_DELAY * (2 ** (attempt - 1))
+            print(f"  ⚠ 下载中断（{last_error}），{delay:.1f} 秒后续传（第 {attempt}/{max_retries} 次重试）")
+            time.sleep(delay)
+        try:
+            total = None
+            parallel = False
+            workers = config.DOWNLOAD_PARALLEL_WORKERS
+            if workers > 1 and not os.path.exists(part_path):
+                total, accepts_ranges = _probe(url, headers, timeout)
+                parallel = bool(accepts_ranges and total and total >= config.DOWNLOAD_PARALLEL_MIN_MB * 1024 * 1024)
+            if parallel:
+                ranges = _segments(total, workers)
+                keep = {path: end - start + 1 for path, (start, end) in zip(_segment_paths(part_path, ranges), ranges)}
+            else:
+                keep = {part_path: None}
+            progress = _Progress(total or 0, label)
+            progress.done = _prune_partial(part_path, keep)
+            if resumed is None:
+                # 只统计本次调用开始时已有、且确实被续传的部分
+                resumed = progress.done
+                if resumed:
+                    print(f"  发现未完成的下载（{resumed / 1024 / 1024:.1f} MB），断点续传")
+            if parallel:
+                size = _download_parallel(url, part_path, headers, timeout, progress, total, workers)
+            else:
+                size = _download_single(url, part_path, headers, timeout, progress, total)
+        except (requests.exceptions.RequestException, IOError) as e:
+            last_error = str(e)
+            response = getattr(e, "response", None)
+            if response is not None and response.status_code in (401, 403, 404, 410):
+                # 链接失效或无权限，重试无意义（.part 已无法续传，删除）
+                _remove_partial(part_path)
+                break
+            continue
+
+        if size < min_bytes:
+            print(f"  ⚠ 下载的文件可能不完整（大小：{size} 字节）")
+            _remove_partial(part_path)
+            last_error = "文件过小"
+            continue
+
+        os.replace(part_path, dest_path)
+        elapsed = time.perf_counter() - started
+        downloaded = max(0, size - resumed)
+        mbps = downloaded / elapsed / 1024 / 1024 if elapsed > 0 else 0.0
+        _stats.add(files=1, bytes=downloaded, resumed_bytes=resumed, seconds=elapsed, parallel=1 if parallel else 0)
+        mode = "分段并行" if parallel else "单连接"
+        print(f"  ✓ 下载完成（{mode}）：{size / 1024 / 1024:.2f} MB，用时 {elapsed:.1f} 秒，{mbps:.2f} MB/s")
+        return {
+            "path": dest_path,
+            "bytes": size,
+            "seconds": elapsed,
+            "mbps": mbps,
+            "resumed_bytes": resumed,
+            "parallel": parallel,
+        }
+
+    _stats.add(failed=1)
+    print(f"  ✗ 下载失败：{last_error}")
+    return None
+
+
+def record_streamed(size: int, seconds: float):
+    """记录一次不经 download_file 的流式下载（如边下载边上传 Google Drive），计入下载统计"""
+    _stats.add(files=1, bytes=size, seconds=seconds)
+
+
+def get_download_stats() -> Dict:
+    """
+    获取下载统计
+
+    Returns:
+        {"files": 成功数, "failed": 失败数, "bytes": 本次下载字节数, "resumed_bytes": 续传复用的字节数,
+         "seconds": 累计耗时, "parallel": 分段并行下载的文件数, "retries": 重试次数}
+    """
+    return _stats.snapshot()
+
+
+def reset_download_stats():
+    """清零下载统计（每次工作流运行开始时调用）"""
+    _stats.reset()
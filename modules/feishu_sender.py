@@ -2,11 +2,11 @@
 飞书机器人发送模块
 通过飞书Webhook发送日报
 """
-import requests
 import json
 import os
 from typing import Dict, Optional
 import config
+from modules import http_client
 
 
 class FeishuSender:
@@ -207,11 +207,11 @@ class FeishuSender:
         try:
             # 步骤1：获取访问令牌
             print("正在获取飞书访问令牌...")
-            token_url = 'https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal/'
+            token_url = f'{config.FEISHU_OPEN_API_BASE_URL}/auth/v3/tenant_access_token/internal/'
             token_headers = {'Content-Type': 'application/json'}
             token_data = {'app_id': app_id, 'app_secret': app_secret}
             
-            token_response = requests.post(token_url, json=token_data, headers=token_headers)
+            token_response = http_client.post(token_url, json=token_data, headers=token_headers)
             token_result = token_response.json()
             
             if token_result.get('code') != 0:
@@ -223,7 +223,7 @@ class FeishuSender:
             
             # 步骤2：上传图片
             print("正在上传图片到飞书...")
-            upload_url = 'https://open.feishu.cn/open-apis/im/v1/images'
+            upload_url = f'{config.FEISHU_OPEN_API_BASE_URL}/im/v1/images'
             
             # 检测图片MIME类型
             mime_type = 'image/jpeg'
@@ -246,7 +246,7 @@ class FeishuSender:
                         'Authorization': f'Bearer {tenant_access_token}',
                         'Content-Type': multi_form.content_type
                     }
-                    upload_response = requests.post(upload_url, headers=upload_headers, data=multi_form)
+                    upload_response = http_client.post(upload_url, headers=upload_headers, data=multi_form)
             except ImportError:
                 # 如果没有requests_toolbelt，使用标准方式
                 print("  警告：未安装requests_toolbelt，使用标准方式上传")
@@ -259,7 +259,7 @@ class FeishuSender:
                     upload_headers = {
                         'Authorization': f'Bearer {tenant_access_token}'
                     }
-                    upload_response = requests.post(upload_url, headers=upload_headers, files=files)
+                    upload_response = http_client.post(upload_url, headers=upload_headers, files=files)
             
             upload_result = upload_response.json()
             
@@ -306,7 +306,7 @@ class FeishuSender:
             是否发送成功
         """
         try:
-            response = requests.post(
+            response = http_client.post(
                 self.webhook_url,
                 json=payload,
                 headers={"Content-Type": "application/json"},
@@ -0,0 +1,252 @@
+"""
+视频取帧服务（截图、关键帧等按帧号取帧的场景共用）
+- 一次顺序读取：按帧号从前往后，目标帧之间只 grab() 不 retrieve()，不再对每一帧 cap.set(CAP_PROP_POS_FRAMES) 定位
+  （定位到靠后的帧时解码器要从前一个关键帧重新解码，取结尾帧尤其慢）
+- 直接用 cv2 缩放（INTER_AREA）与 JPEG 编码，不再经过 BGR→RGB 转换、PIL 与 LANCZOS
+- 每个视频的取帧任务在进程池（FRAME_EXTRACT_WORKERS 个进程）中执行，解码不占用主进程的 GIL；
+  工作流可以先提交任务，等视频分析请求返回后再取结果
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import config
+
+try:
+    import cv2
+    FRAME_EXTRACTION_AVAILABLE = True
+except ImportError:
+    FRAME_EXTRACTION_AVAILABLE = False
+
+
+def video_info(cap) -> Dict:
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
+    return {"frames": total, "fps": fps, "duration": total / fps if fps > 0 else 0.0}
+
+
+def read_frames(cap, indices: List[int]) -> Dict[int, "object"]:
+    """从当前位置（须为第 0 帧）开始一次顺序读取，取出指定帧（目标帧之间只 grab，不转换画面）"""
+    frames = {}
+    idx = 0
+    for target in sorted(set(i for i in indices if i >= 0)):
+        while idx <= target:
+            if not cap.grab():
+                return frames
+            idx += 1
+        ok, frame = cap.retrieve()
+        if ok:
+            frames[target] = frame
+    return frames
+
+
+def encode_jpeg(frame, max_size: Tuple[int, int], quality: int) -> Optional[bytes]:
+    """等比缩放到 max_size（宽, 高）以内后编码为 JPEG"""
+    height, width = frame.shape[:2]
+    scale = min(max_size[0] / width, max_size[1] / height) if max_size else 1.0
+    if scale < 1.0:
+        frame = cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+    ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)])
+    return buf.tobytes() if ok else None
+
+
+def extract_frames(video_path: str, indices: List[int] = None, fractions: List[float] = None,
+                   max_size: Tuple[int, int] = None, quality: int = None) -> Dict:
+    """
+    从一个视频中取出指定帧并编码为 JPEG（在进程池中执行时也调用本函数）
+
+    Args:
+        video_path: 本地视频路径
+        indices: 帧号列表
+        fractions: 位置列表（0~1，0 为第一帧，1 为最后一帧），与 indices 二选一
+        max_size: 最大尺寸（宽, 高），默认 (FRAME_MAX_WIDTH, FRAME_MAX_HEIGHT)
+        quality: JPEG 质量，默认 FRAME_JPEG_QUALITY
+
+    Returns:
+        {"video_path", "frames": 视频总帧数, "fps", "seconds": 耗时,
+         "images": 按请求顺序的 [{"position": 在请求中的序号, "index", "timestamp", "jpeg", "width", "height"}]
+                   （取不到的帧不出现）}
+    """
+    started = time.perf_counter()
+    result = {"video_path": video_path, "frames": 0, "fps": 0.0, "seconds": 0.0, "images": []}
+    if not FRAME_EXTRACTION_AVAILABLE:
+        return result
+    max_size = max_size or (config.FRAME_MAX_WIDTH, config.FRAME_MAX_HEIGHT)
+    quality = quality or config.FRAME_JPEG_QUALITY
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return result
+        info = video_info(cap)
+        result["frames"], result["fps"] = info["frames"], info["fps"]
+        if indices is None:
+            last = max(0, info["frames"] - 1)
+            indices = [min(last, max(0, int(round(f * last)))) for f in fractions or []]
+        frames = read_frames(cap, indices)
+    finally:
+        cap.release()
+    for position, idx in enumerate(indices):
+        frame = frames.get(idx)
+        if frame is None:
+            continue
+        jpeg = encode_jpeg(frame, max_size, quality)
+        if jpeg:
+            height, width = frame.shape[:2]
+            scale = min(1.0, max_size[0] / width, max_size[1] / height)
+            result["images"].append({
+                "position": position,
+                "index": idx,
+                "timestamp": round(idx / info["fps"], 2) if info["fps"] > 0 else None,
+                "jpeg": jpeg,
+                "width": max(1, int(width * scale)),
+                "height": max(1, int(height * scale)),
+            })
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+class FrameExtractor:
+    """取帧服务：每个视频一个任务，在进程池中执行"""
+
+    def __init__(self, workers: int = None):
+        """
+        Args:
+            workers: 进程数，默认 FRAME_EXTRACT_WORKERS（≤1 时在当前进程中执行）
+        """
+        self.workers = max(1, workers or config.FRAME_EXTRACT_WORKERS)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict:
+        return {"videos": 0, "failed": 0, "frames": 0, "bytes": 0, "seconds": 0.0}
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """
+        进程池（调用方持有 self._lock）：用 spawn 启动子进程——工作流是多线程进程且已加载 opencv，
+        fork 会把其他线程持有的锁原样复制进子进程，可能死锁
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def submit(self, video_path: str, indices: List[int] = None, fractions: List[float] = None,
+               max_size: Tuple[int, int] = None, quality: int = None) -> Future:
+        """
+        提交一个视频的取帧任务，参数与 extract_frames 相同
+
+        Returns:
+            Future，结果与 extract_frames 相同（视频打不开时 images 为空）
+        """
+        args = (os.path.abspath(video_path), indices, fractions, max_size, quality)
+        if self.workers <= 1:
+            future = Future()
+            try:
+                future.set_result(extract_frames(*args))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            with self._lock:
+                future = self._pool().submit(extract_frames, *args)
+        future.add_done_callback(self._record)
+        return future
+
+    def submit_call(self, fn, *args) -> Future:
+        """在取帧进程池中执行任意取帧任务（fn 须为模块级函数），不计入本服务的统计"""
+        if self.workers <= 1:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        with self._lock:
+            return self._pool().submit(fn, *args)
+
+    def extract(self, video_path: str, indices: List[int] = None, fractions: List[float] = None,
+                max_size: Tuple[int, int] = None, quality: int = None) -> Dict:
+        """提交取帧任务并等待结果"""
+        return self.submit(video_path, indices, fractions, max_size, quality).result()
+
+    def extract_many(self, jobs: List[Dict]) -> List[Optional[Dict]]:
+        """
+        并行处理多个视频
+
+        Args:
+            jobs: extract_frames 的关键字参数列表（需含 video_path）
+
+        Returns:
+            按输入顺序的结果（单个视频出错时为None）
+        """
+        futures = [self.submit(**job) for job in jobs]
+        results = []
+        for job, future in zip(jobs, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"  ⚠ 提取视频帧时出错（{job.get('video_path')}）：{str(e)}")
+                results.append(None)
+        return results
+
+    def _record(self, future: Future):
+        with self._lock:
+            if future.exception() is not None or not future.result()["images"]:
+                self._stats["failed"] += 1
+                return
+            result = future.result()
+            self._stats["videos"] += 1
+            self._stats["frames"] += len(result["images"])
+            self._stats["bytes"] += sum(len(image["jpeg"]) for image in result["images"])
+            self._stats["seconds"] += result["seconds"]
+
+    def get_stats(self) -> Dict:
+        """
+        Returns:
+            {"videos", "failed": 出错或没有取到帧的视频数, "frames", "bytes": JPEG 总字节数,
+             "seconds": 各任务耗时之和, "workers"}
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["workers"] = self.workers
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = self._empty_stats()
+
+    def shutdown(self):
+        """等待进行中的任务结束并关闭进程池（之后再提交时重新创建）"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+
+
+_extractor: Optional[FrameExtractor] = None
+_extractor_lock = threading.Lock()
+
+
+def get_frame_extractor() -> FrameExtractor:
+    """进程内共享的取帧服务（首次调用时按当前配置创建）"""
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = FrameExtractor()
+        return _extractor
+
+
+def configure(workers: int = None) -> FrameExtractor:
+    """按新的进程数重建共享取帧服务，旧服务等待进行中的任务结束后关闭"""
+    global _extractor
+    with _extractor_lock:
+        old, _extractor = _extractor, FrameExtractor(workers)
+    if old:
+        old.shutdown()
+    return _extractor
@@ -286,7 +286,7 @@ def synthesize_trends_with_llm(
     """
     try:
         import config as _config
-        import requests
+        from modules import http_client, prompt_registry
     except ImportError:
         return []
 
@@ -323,26 +323,7 @@ def synthesize_trends_with_llm(
                 last_lines.append(f"{disp}：{t[:500]}{'…' if len(t) > 500 else ''}")
         last_week_block = "\n".join(last_lines)
 
-    prompt = f"""你是一位游戏市场与玩法分析专家。下面给出的是「本周」各平台（微信小游戏、抖音小游戏、iOS、Android）排行榜中、已有玩法分析的游戏列表及其玩法分析内容与排名变化。
-
-请基于这些内容，为**每个平台**分别写一段「本周玩法趋势」分析（每段控制在 150–250 字，避免过长导致输出被截断）：
-1. 概括该平台本周榜单中的主流/热点玩法类型；
-2. 结合排名变化（上升/新进榜/下降）指出哪些玩法在升温、哪些在降温；
-3. 若有「上周各平台玩法趋势」参考，请简要对比本周与上周的变化（同与异）。
-
-要求：
-- **必须**输出一个合法的 JSON 对象，不要任何解释或 markdown 包裹；键必须为 wx, dy, ios, android；某平台无数据则对应值为空字符串 ""；
-- JSON 内字符串中的双引号请用反斜杠转义（如 \\"），不要换行，确保可被解析；
-- 语言简洁、有条理，可直接用于周报；不要编造未在输入中出现的游戏或玩法。
-
-格式示例（请严格按此格式输出）：
-{{"wx": "微信小游戏的趋势分析正文...", "dy": "抖音小游戏的趋势分析正文...", "ios": "iOS 的趋势分析正文...", "android": "Android 的趋势分析正文..."}}
-
-【本周各平台榜单游戏玩法】
-{input_text}
-"""
-    if last_week_block:
-        prompt += f"\n\n{last_week_block}\n"
+    prompt = prompt_registry.build_weekly_trends_prompt(input_text, last_week_block)
 
     print(f"  [周报趋势] 使用模型: {model}")
     headers = {
@@ -357,7 +338,7 @@ def synthesize_trends_with_llm(
     }
 
     try:
-        resp = requests.post(
+        resp = http_client.post(
             f"{base_url}/chat/completions",
             headers=headers,
             json=payload,
@@ -0,0 +1,145 @@
+"""
+Google Drive 文件内容索引（按 md5 + 大小去重，相同内容只上传一次）
+- gdrive_files 表：(md5, 大小) → Drive file_id。某个文件夹第一次上传前，分页列出该文件夹（files.list 取 md5Checksum）
+  一次性导入，导入过的文件夹记在 gdrive_index_folders，之后不再列出
+- 上传前计算本地文件的 md5（同一遍读取顺带得到 sha256），命中索引时先确认 Drive 文件仍在（files.get 一次），
+  再直接复用；文件已删除或在回收站时移出索引，照常上传
+- 每次上传成功后用 Drive 返回的 md5Checksum 写入索引（边下载边上传的文件也会记录）
+- 与 video_store 的区别：video_store 按视频ID找本地实体文件，这里按内容找 Drive 文件，
+  不同来源/文件名/重新下载得到的相同字节也能命中
+"""
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+
+import config
+
+_seed_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stale": 0, "seeded": 0, "saved_bytes": 0}
+
+
+def _add_stats(**values):
+    with _stats_lock:
+        for k, v in values.items():
+            _stats[k] += v
+
+
+def get_index_stats() -> Dict:
+    """本次运行的索引统计：hits 复用的 Drive 文件、misses 未命中、stale 已失效的索引、seeded 导入的文件数、saved_bytes 省下的上传量"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_index_stats():
+    with _stats_lock:
+        for k in _stats:
+            _stats[k] = 0
+
+
+def enabled(db) -> bool:
+    return bool(config.GDRIVE_DEDUPE_ENABLED and db is not None)
+
+
+def file_digests(path: str) -> Tuple[str, str]:
+    """一遍读取同时计算 (md5, sha256)"""
+    md5 = hashlib.md5()
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            md5.update(block)
+            sha256.update(block)
+    return md5.hexdigest(), sha256.hexdigest()
+
+
+def _is_public(drive_file: Dict) -> bool:
+    return "anyoneWithLink" in (drive_file.get("permissionIds") or [])
+
+
+def ensure_seeded(db, uploader, folder_id: str, folder_name: str) -> int:
+    """
+    文件夹尚未导入时，分页列出其中的文件写入索引（列出失败时不记录，下次再试）
+
+    Returns:
+        本次导入的文件数
+    """
+    if not (enabled(db) and folder_id):
+        return 0
+    with _seed_lock:
+        if db.get_gdrive_index_folder(folder_id):
+            return 0
+        files = uploader.list_folder_files(folder_id)
+        if files is None:
+            return 0
+        rows = [
+            {"md5": f["md5Checksum"], "size": int(f["size"]), "file_id": f["id"], "file_name": f.get("name"),
+             "folder_id": folder_id, "is_public": _is_public(f)}
+            for f in files if f.get("md5Checksum") and f.get("size") is not None
+        ]
+        if rows:
+            db.save_gdrive_files(rows)
+        db.save_gdrive_index_folder(folder_id, folder_name, len(rows))
+        _add_stats(seeded=len(rows))
+        print(f"  ✓ 已从Google Drive导入文件索引：{folder_name}（{len(rows)} 个文件）")
+        return len(rows)
+
+
+def find(db, uploader, md5: str, size: int) -> Optional[Dict]:
+    """
+    按内容查找已上传的 Drive 文件（确认文件仍在 Drive 中）
+
+    Args:
+        db: VideoDatabase 实例
+        uploader: GoogleDriveUploader（用于确认文件状态）
+        md5: 本地文件 md5
+        size: 本地文件大小
+
+    Returns:
+        {"file_id", "file_name", "is_public"}；未命中或 Drive 文件已失效返回None
+    """
+    if not enabled(db):
+        return None
+    entry = db.get_gdrive_file(md5, size)
+    if not entry:
+        _add_stats(misses=1)
+        return None
+    try:
+        drive_file = uploader.get_file(entry["file_id"])
+    except Exception as e:
+        print(f"  ⚠ 确认Google Drive文件状态时出错（照常上传）：{str(e)}")
+        _add_stats(misses=1)
+        return None
+    if not drive_file or drive_file.get("trashed") or drive_file.get("md5Checksum", md5) != md5:
+        db.delete_gdrive_file(entry["file_id"])
+        _add_stats(stale=1, misses=1)
+        return None
+    _add_stats(hits=1, saved_bytes=size)
+    return {"file_id": entry["file_id"], "file_name": drive_file.get("name") or entry.get("file_name"),
+            "is_public": _is_public(drive_file) or bool(entry.get("is_public"))}
+
+
+def remember(db, drive_file: Dict, folder_id: str = None, sha256: str = None, md5: str = None,
+             size: int = None, is_public: bool = True) -> bool:
+    """
+    上传成功后写入索引
+
+    Args:
+        db: VideoDatabase 实例
+        drive_file: Drive 返回的文件资源（需含 id；md5Checksum/size 缺失时使用传入的 md5/size）
+        folder_id: 所在文件夹
+        sha256: 本地计算的 sha256（可选）
+        md5: 本地计算的 md5（可选）
+        size: 文件大小（可选）
+        is_public: 是否已设置公开访问
+    """
+    if not enabled(db) or not drive_file:
+        return False
+    md5 = drive_file.get("md5Checksum") or md5
+    size = drive_file.get("size") if drive_file.get("size") is not None else size
+    if not (md5 and size is not None and drive_file.get("id")):
+        return False
+    return db.save_gdrive_files([{
+        "md5": md5, "size": int(size), "sha256": sha256, "file_id": drive_file["id"],
+        "file_name": drive_file.get("name"), "folder_id": folder_id, "is_public": is_public,
+    }]) > 0
+
@@ -0,0 +1,211 @@
+"""
+Google Drive 上传管理（并行上传本地视频）
+- 有界线程池（GDRIVE_UPLOAD_CONCURRENCY）同时上传多个文件，各工作线程使用共享上传器的线程内服务对象
+- 分块大小按文件大小选择、可续传会话写入数据库（gdrive_upload_sessions），进程重启后再次上传同一文件时从断点续传，
+  见 GoogleDriveUploader.upload_video
+- 同一文件正在上传时再次提交，直接返回进行中的任务；内容已上传过的文件直接复用（modules/gdrive_index.py）
+- 设置公开访问：其他上传仍在进行时最多等待 GDRIVE_PERMISSION_BATCH_WINDOW 秒，把先后完成的文件合并为一个 Drive 批量请求
+  （媒体上传本身不能放进批量请求，文件夹ID已由共享上传器缓存）
+- 统计上传数、字节数、续传省下的字节数、设置公开访问的请求数，供运行汇总输出
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import config
+from modules.gdrive_uploader import get_drive_uploader
+
+
+class DriveUploadManager:
+    """Google Drive 上传管理器：有界线程池 + 公开访问批量设置"""
+
+    def __init__(self, workers: int = None):
+        """
+        Args:
+            workers: 同时进行的上传数，默认 GDRIVE_UPLOAD_CONCURRENCY
+        """
+        self.workers = max(1, workers or config.GDRIVE_UPLOAD_CONCURRENCY)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._running = 0
+        self._pending_permissions: List[Dict] = []
+        self._flushing = False
+        self._stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict:
+        return {"uploads": 0, "failed": 0, "bytes": 0, "seconds": 0.0, "resumed": 0, "resumed_bytes": 0,
+                "deduped": 0, "peak_running": 0, "permission_requests": 0, "permissions": 0}
+
+    # ---- 提交 ----
+
+    def submit(self, video_path: str, folder_name: str = "Game Videos", db=None) -> Future:
+        """
+        提交上传任务
+
+        Args:
+            video_path: 本地视频文件路径
+            folder_name: 上传到的文件夹名称，默认"Game Videos"
+            db: VideoDatabase 实例（可选，用于断点续传）
+
+        Returns:
+            Future，结果与 GoogleDriveUploader.upload_video 相同
+        """
+        key = os.path.abspath(video_path)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="gdrive-upload")
+                future = self._executor.submit(self._upload, video_path, folder_name, db)
+                self._inflight[key] = future
+        future.add_done_callback(lambda f: self._forget(key, f))
+        return future
+
+    def upload(self, video_path: str, folder_name: str = "Game Videos", db=None) -> Optional[Dict]:
+        """提交上传任务并等待结果（获取上传器失败时抛出 ImportError / FileNotFoundError）"""
+        return self.submit(video_path, folder_name, db).result()
+
+    def upload_many(self, video_paths: List[str], folder_name: str = "Game Videos", db=None) -> List[Optional[Dict]]:
+        """并行上传多个文件，按输入顺序返回结果（单个文件出错时对应结果为None）"""
+        futures = [self.submit(path, folder_name, db) for path in video_paths]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"  ⚠ 上传到Google Drive时出错：{str(e)}")
+                results.append(None)
+        return results
+
+    def _forget(self, key: str, future: Future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _upload(self, video_path: str, folder_name: str, db) -> Optional[Dict]:
+        uploader = get_drive_uploader()
+        with self._lock:
+            self._running += 1
+            self._stats["peak_running"] = max(self._stats["peak_running"], self._running)
+        started = time.perf_counter()
+        result = None
+        try:
+            result = uploader.upload_video(video_path, folder_name, db=db, make_public=self._make_public)
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._running -= 1
+                stats = self._stats
+                stats["seconds"] += elapsed
+                if result and result.get("deduped"):
+                    stats["deduped"] += 1
+                elif result:
+                    stats["uploads"] += 1
+                    stats["bytes"] += result.get("bytes", 0) - result.get("resumed_from", 0)
+                    if result.get("resumed_from"):
+                        stats["resumed"] += 1
+                        stats["resumed_bytes"] += result["resumed_from"]
+                else:
+                    stats["failed"] += 1
+
+    # ---- 公开访问（合并为批量请求） ----
+
+    def make_public(self, file_id: str) -> bool:
+        """设置公开访问，与本管理器中其他上传的文件合并为批量请求（供边下载边上传等不经过管理器的上传使用）"""
+        return self._make_public(file_id)
+
+    def _make_public(self, file_id: str) -> bool:
+        """
+        设置公开访问：第一个到达的线程负责发送，其他线程把文件ID放入队列后等待结果；
+        仍有其他上传在进行时，发送前最多等待 GDRIVE_PERMISSION_BATCH_WINDOW 秒，让它们的文件进入同一批
+        """
+        entry = {"file_id": file_id, "ok": False, "done": threading.Event()}
+        with self._lock:
+            self._pending_permissions.append(entry)
+            leader = not self._flushing
+            self._flushing = True
+        if not leader:
+            entry["done"].wait()
+            return entry["ok"]
+
+        deadline = time.perf_counter() + config.GDRIVE_PERMISSION_BATCH_WINDOW
+        while time.perf_counter() < deadline:
+            with self._lock:
+                if len(self._pending_permissions) >= self._running:
+                    break
+            time.sleep(0.02)
+
+        while True:
+            with self._lock:
+                batch, self._pending_permissions = self._pending_permissions, []
+                if not batch:
+                    self._flushing = False
+                    break
+            results = {}
+            # 多个等待者可能是同一文件（复用相同内容的文件），只请求一次，结果分给每个等待者
+            file_ids = list(dict.fromkeys(e["file_id"] for e in batch))
+            try:
+                results = get_drive_uploader().make_public(file_ids)
+            except Exception as e:
+                print(f"  ⚠ 设置公开访问时出错：{str(e)}")
+            finally:
+                with self._lock:
+                    self._stats["permission_requests"] += 1
+                    self._stats["permissions"] += len(file_ids)
+                for item in batch:
+                    item["ok"] = results.get(item["file_id"], False)
+                    item["done"].set()
+        return entry["ok"]
+
+    # ---- 统计 ----
+
+    def get_stats(self) -> Dict:
+        """
+        Returns:
+            {"uploads", "failed", "bytes": 本次实际上传字节数, "seconds": 累计上传耗时, "resumed": 断点续传次数,
+             "resumed_bytes": 续传省下的字节数, "deduped": 复用相同内容文件、未上传的次数, "peak_running": 最大同时上传数,
+             "permission_requests": 设置公开访问的请求数（批量算一次）, "permissions": 设置公开访问的文件数, "workers"}
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["workers"] = self.workers
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = self._empty_stats()
+
+    def shutdown(self):
+        """等待进行中的上传结束并关闭线程池（之后再提交时重新创建）"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+
+
+_manager: Optional[DriveUploadManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_upload_manager() -> DriveUploadManager:
+    """进程内共享的上传管理器（首次调用时按当前配置创建）"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = DriveUploadManager()
+        return _manager
+
+
+def configure(workers: int = None) -> DriveUploadManager:
+    """按新的并发设置重建共享上传管理器，旧管理器等待进行中的上传结束后关闭"""
+    global _manager
+    with _manager_lock:
+        old, _manager = _manager, DriveUploadManager(workers)
+    if old:
+        old.shutdown()
+    return _manager
@@ -1,25 +1,223 @@
 """
 Google Drive上传模块
 将视频上传到Google Drive并获取公开访问链接
+- upload_video：上传本地文件（分块大小按文件大小选择；传入 db 时可续传会话写入数据库，进程重启后从断点续传）
+- upload_stream：边下载边上传（HTTP 响应体经有界缓冲直接送入 Drive 可续传上传会话，可选同时写一份本地文件）
+- get_drive_uploader：进程内共享的上传器，凭证只读取/刷新一次、发现文档只解析一次、文件夹ID按名称缓存；
+  httplib2 连接不能跨线程共享，每个线程各自用缓存的发现文档构建服务对象（不发网络请求）
+- make_public：设置公开访问，多个文件合并为一个 Drive 批量请求
+- 传入 db 时上传前按内容（md5 + 大小）查 Drive 文件索引，相同内容直接复用已上传的文件，见 modules/gdrive_index.py
+- 并行上传见 modules/gdrive_upload_manager.py
 """
+import hashlib
 import os
+import queue
 import re
-from typing import Optional, Dict
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit
 import config
+from modules import downloader, gdrive_index, http_client, video_probe
 
 try:
     from google.oauth2.credentials import Credentials
     from google_auth_oauthlib.flow import InstalledAppFlow
     from google.auth.transport.requests import Request
-    from googleapiclient.discovery import build
-    from googleapiclient.http import MediaFileUpload
+    from googleapiclient.discovery import build, build_from_document
+    from googleapiclient.http import MediaFileUpload, MediaUpload
     from googleapiclient.errors import HttpError
     GOOGLE_DRIVE_AVAILABLE = True
 except ImportError:
     GOOGLE_DRIVE_AVAILABLE = False
+    MediaUpload = object
     print("警告：未安装Google Drive API库，请运行: pip install google-api-python-client google-auth-httplib2 google-auth-oauthlib")
 
 
+# Drive 可续传上传会话约一周后失效，超过该时间的会话直接重新上传
+UPLOAD_SESSION_MAX_AGE = 6 * 24 * 3600
+PERMISSION_BATCH_LIMIT = 100  # Drive 批量请求最多包含的子请求数
+
+_discovery_doc: Optional[Any] = None
+_discovery_lock = threading.Lock()
+
+
+def _drive_discovery_doc() -> Optional[Any]:
+    """Drive v3 发现文档（googleapiclient 自带的静态文档，进程内只解析一次；取不到时返回None，改用 build）"""
+    global _discovery_doc
+    with _discovery_lock:
+        if _discovery_doc is None:
+            try:
+                import json
+                from googleapiclient.discovery_cache import get_static_doc
+                doc = get_static_doc("drive", "v3")
+                _discovery_doc = json.loads(doc) if doc else False
+            except Exception:
+                _discovery_doc = False
+        return _discovery_doc or None
+
+
+def upload_chunk_size(size: int) -> int:
+    """
+    按文件大小选择可续传上传的分块大小：小文件一个请求传完，大文件约分 4 块（断点续传时最多重传一块），
+    不超过 GDRIVE_UPLOAD_MAX_CHUNK_MB；GDRIVE_UPLOAD_CHUNK_MB 大于 0 时使用固定大小。结果为 256KB 的整数倍
+    """
+    unit = 256 * 1024
+    if config.GDRIVE_UPLOAD_CHUNK_MB > 0:
+        chunk = config.GDRIVE_UPLOAD_CHUNK_MB * 1024 * 1024
+    else:
+        chunk = min(max(size / 4, 8 * 1024 * 1024), config.GDRIVE_UPLOAD_MAX_CHUNK_MB * 1024 * 1024)
+    return max(1, -(-int(chunk) // unit)) * unit
+
+
+if GOOGLE_DRIVE_AVAILABLE:
+    import httplib2
+
+    class _EndpointHttp(httplib2.Http):
+        """离线回放：googleapiclient 只替换上传地址的主机、仍使用 https；回放服务为 http 时改写协议"""
+        def __init__(self):
+            super().__init__()
+            # 与 googleapiclient.http.build_http 一致：308 是可续传上传的进度响应，不能当作重定向
+            self.redirect_codes = self.redirect_codes - {308}
+            self._endpoint = urlsplit(config.GDRIVE_API_ENDPOINT)
+        
+        def request(self, uri, *args, **kwargs):
+            parts = urlsplit(uri)
+            if parts.netloc == self._endpoint.netloc and parts.scheme != self._endpoint.scheme:
+                uri = urlunsplit(parts._replace(scheme=self._endpoint.scheme))
+            return super().request(uri, *args, **kwargs)
+
+
+class _StreamBuffer:
+    """
+    下载线程与上传线程之间的有界缓冲：下载线程读取 HTTP 响应体写入队列（可同时写本地文件、计算 sha256），
+    上传线程按需读取；队列满时下载线程阻塞，内存占用不超过 GDRIVE_STREAM_BUFFER_MB
+    """
+
+    def __init__(self, response, tee_path: str = None):
+        read_size = 256 * 1024
+        self._response = response
+        self._read_size = read_size
+        self._queue = queue.Queue(maxsize=max(2, int(config.GDRIVE_STREAM_BUFFER_MB * 1024 * 1024 // read_size)))
+        self._pending = b""
+        self._eof = False
+        self._tee_path = tee_path
+        self.bytes_read = 0
+        self.sha256 = hashlib.sha256()
+        self._closed = False
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def _produce(self):
+        tee = None
+        try:
+            if self._tee_path:
+                tee = open(self._tee_path, "wb")
+            for block in self._response.iter_content(chunk_size=self._read_size):
+                if self._closed:
+                    return
+                if not block:
+                    continue
+                self.sha256.update(block)
+                downloader.throttle(len(block))
+                if tee:
+                    tee.write(block)
+                self._queue.put(block)
+            self._queue.put(None)
+        except Exception as e:
+            self._queue.put(e)
+        finally:
+            if tee:
+                tee.close()
+            self._response.close()
+
+    def _fill(self, n: int):
+        """缓冲至少 n 字节，阻塞直到读满或下载结束；下载出错时抛出异常"""
+        while len(self._pending) < n and not self._eof:
+            item = self._queue.get()
+            if item is None:
+                self._eof = True
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                self._pending += item
+
+    def peek(self, n: int) -> bytes:
+        """查看开头最多 n 字节（不消耗，之后的 read 仍从这里开始）"""
+        self._fill(n)
+        return self._pending[:n]
+
+    def read(self, n: int) -> bytes:
+        """读取最多 n 字节，阻塞直到读满或下载结束；下载出错时抛出异常"""
+        self._fill(n)
+        data, self._pending = self._pending[:n], self._pending[n:]
+        self.bytes_read += len(data)
+        return data
+
+    def close(self):
+        """结束下载线程并等待本地文件写完（上传失败时丢弃队列中剩余数据）"""
+        self._closed = True
+        while self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+class StreamingMediaUpload(MediaUpload):
+    """
+    以 HTTP 下载流为数据源的 Drive 可续传上传（与 MediaIoBaseUpload 相同的分块语义，但数据源不可回退）
+    - 总大小未知时按 "*" 上传，读到末尾后才确定总大小
+    - 保留最近一个分块，服务器只确认了部分数据时可从确认位置重发
+    """
+
+    def __init__(self, source: _StreamBuffer, mimetype: str = "video/mp4", chunksize: int = None):
+        chunk_mb = config.GDRIVE_STREAM_CHUNK_MB if chunksize is None else chunksize / 1024 / 1024
+        # Drive 要求分块大小为 256KB 的整数倍
+        self._chunksize = max(1, int(chunk_mb * 4)) * 256 * 1024
+        self._mimetype = mimetype
+        self._source = source
+        self._buffer = b""
+        self._buffer_start = 0
+        self._total = None
+
+    def chunksize(self):
+        return self._chunksize
+
+    def mimetype(self):
+        return self._mimetype
+
+    def resumable(self):
+        return True
+
+    def has_stream(self):
+        return False
+
+    def _fill(self, end: int):
+        """缓冲区至少覆盖到偏移 end（或下载结束）"""
+        while self._total is None and self._buffer_start + len(self._buffer) < end:
+            data = self._source.read(end - self._buffer_start - len(self._buffer))
+            if not data:
+                self._total = self._buffer_start + len(self._buffer)
+                break
+            self._buffer += data
+
+    def size(self):
+        # 下一个分块最晚从 _buffer_start + chunksize 开始；预读到它之后 1 字节，若已到末尾，
+        # 本次分块就带上总大小（否则最后一个分块恰好读满时，上传无法正常结束）
+        self._fill(self._buffer_start + self._chunksize * 2 + 1)
+        return self._total
+
+    def getbytes(self, begin, length):
+        if begin < self._buffer_start:
+            raise IOError(f"上传流无法回退到 {begin}（已丢弃 {self._buffer_start} 之前的数据）")
+        # 丢弃服务器已确认的数据，只保留从 begin 开始的部分
+        self._buffer = self._buffer[begin - self._buffer_start:]
+        self._buffer_start = begin
+        self._fill(begin + length)
+        return self._buffer[:length]
+
+
 class GoogleDriveUploader:
     """Google Drive上传器"""
     
@@ -49,11 +247,59 @@ class GoogleDriveUploader:
                 self.credentials_file = "credentials.json"  # 默认值
         
         self.token_file = "token.json"
-        self.service = None
+        self._creds = None
+        self._auth_lock = threading.Lock()
+        self._local = threading.local()
+        self._folder_ids: Dict[str, str] = {}
+        self._folder_lock = threading.Lock()
         self._authenticate()
     
+    @property
+    def service(self):
+        """当前线程的Drive服务对象（凭证过期前先刷新；首次在该线程使用时用缓存的发现文档构建）"""
+        self._refresh_if_expired()
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = self._build_service()
+            self._local.service = service
+        return service
+    
+    def _build_service(self):
+        if config.GDRIVE_API_ENDPOINT:
+            # 离线回放：指向本地回放服务，不带凭证，不走OAuth
+            kwargs = {'http': _EndpointHttp(), 'client_options': {'api_endpoint': config.GDRIVE_API_ENDPOINT}}
+        else:
+            kwargs = {'credentials': self._creds}
+        doc = _drive_discovery_doc()
+        if doc:
+            if config.GDRIVE_API_ENDPOINT:
+                # 批量请求地址取自发现文档的 rootUrl（不受 api_endpoint 影响），同样指向回放服务
+                endpoint = urlsplit(config.GDRIVE_API_ENDPOINT)
+                doc = dict(doc, rootUrl=f"{endpoint.scheme}://{endpoint.netloc}/")
+            return build_from_document(doc, **kwargs)
+        return build('drive', 'v3', **kwargs)
+    
+    def _refresh_if_expired(self):
+        """访问令牌过期时刷新并写回token文件（多个线程共用同一份凭证，只刷新一次）"""
+        creds = self._creds
+        if creds is None or creds.valid or not creds.refresh_token:
+            return
+        with self._auth_lock:
+            if creds.valid:
+                return
+            try:
+                creds.refresh(Request())
+                with open(self.token_file, 'w') as token:
+                    token.write(creds.to_json())
+            except Exception as e:
+                print(f"刷新token时出错：{str(e)}")
+    
     def _authenticate(self):
         """认证并创建Drive服务"""
+        if config.GDRIVE_API_ENDPOINT:
+            self._local.service = self._build_service()
+            return
+        
         creds = None
         
         # 检查是否已有保存的token
@@ -92,18 +338,28 @@ class GoogleDriveUploader:
                 token.write(creds.to_json())
         
         # 创建Drive服务
-        self.service = build('drive', 'v3', credentials=creds)
+        self._creds = creds
+        self._local.service = self._build_service()
     
-    def upload_video(self, video_path: str, folder_name: str = "Game Videos") -> Optional[Dict]:
+    def upload_video(self, video_path: str, folder_name: str = "Game Videos", db=None,
+                     make_public: Callable[[str], bool] = None) -> Optional[Dict]:
         """
-        上传视频到Google Drive
+        上传视频到Google Drive（可续传上传，分块大小按文件大小选择）
+        
+        传入 db 时：先按内容（md5 + 大小）查 Drive 文件索引，已有相同内容的文件时直接复用、不再上传；
+        每个分块确认后把会话地址与已上传字节数写入 gdrive_upload_sessions，
+        进程中断后再次上传同一文件（大小与修改时间未变）时先向 Drive 查询进度，从断点继续。
         
         Args:
             video_path: 本地视频文件路径
             folder_name: 上传到的文件夹名称，默认"Game Videos"
+            db: VideoDatabase 实例（可选，用于断点续传）
+            make_public: 设置公开访问的函数（file_id -> 是否成功），默认单独调用 permissions.create；
+                上传管理器传入批量版本
         
         Returns:
-            包含file_id和public_url的字典，如果失败返回None
+            包含file_id、public_url、bytes（文件大小）、resumed_from（续传起点字节数）、deduped（是否复用了相同内容的文件）
+            的字典，如果失败返回None
         """
         if not os.path.exists(video_path):
             print(f"错误：视频文件不存在：{video_path}")
@@ -115,40 +371,92 @@ class GoogleDriveUploader:
             
             # 获取文件名
             file_name = os.path.basename(video_path)
+            st = os.stat(video_path)
             
-            print(f"正在上传视频到Google Drive：{file_name}")
+            # 相同内容已上传过（任意文件名/来源）时直接复用
+            md5 = sha256 = None
+            if gdrive_index.enabled(db):
+                gdrive_index.ensure_seeded(db, self, folder_id, folder_name)
+                md5, sha256 = gdrive_index.file_digests(video_path)
+                existing = gdrive_index.find(db, self, md5, st.st_size)
+                if existing:
+                    return self._reuse_file(existing, video_path, st.st_size, md5, sha256, folder_id, db, make_public)
             
-            # 创建文件元数据
-            file_metadata = {
-                'name': file_name,
-                'parents': [folder_id] if folder_id else []
+            chunk_size = upload_chunk_size(st.st_size)
+            session = {
+                'local_path': video_path, 'size': st.st_size, 'mtime': st.st_mtime, 'folder_id': folder_id,
+                'file_name': file_name, 'session_uri': None, 'chunk_size': chunk_size,
+                'uploaded_bytes': 0, 'file_id': None,
             }
+            saved = self._saved_session(db, session)
+            resumed_from = 0
+            file = None
             
-            # 上传文件
-            media = MediaFileUpload(
-                video_path,
-                mimetype='video/mp4',
-                resumable=True
-            )
-            
-            file = self.service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields='id, name, webViewLink'
-            ).execute()
+            if saved and saved.get('file_id'):
+                # 上次已上传完成、只差设置公开访问
+                file = {'id': saved['file_id'], 'name': saved.get('file_name') or file_name}
+                resumed_from = st.st_size
+                print(f"Google Drive中已有上传完成的文件，继续设置公开访问：{file_name}")
+            else:
+                # 创建文件元数据
+                file_metadata = {
+                    'name': file_name,
+                    'parents': [folder_id] if folder_id else []
+                }
+                media = MediaFileUpload(
+                    video_path,
+                    mimetype='video/mp4',
+                    chunksize=chunk_size,
+                    resumable=True
+                )
+                request = self.service.files().create(
+                    body=file_metadata,
+                    media_body=media,
+                    fields='id, name, webViewLink, md5Checksum, size'
+                )
+                if saved and saved.get('session_uri'):
+                    progress, file = self._session_status(saved['session_uri'], st.st_size)
+                    if file is None and progress is not None:
+                        request.resumable_uri = saved['session_uri']
+                        request.resumable_progress = progress
+                        session['session_uri'] = saved['session_uri']
+                    resumed_from = st.st_size if file else (progress or 0)
+                
+                if file:
+                    print(f"Google Drive上传会话已完成，继续设置公开访问：{file_name}")
+                elif resumed_from:
+                    print(f"继续上传视频到Google Drive：{file_name}"
+                          f"（从 {resumed_from / 1024 / 1024:.1f} MB / {st.st_size / 1024 / 1024:.1f} MB 处续传）")
+                else:
+                    print(f"正在上传视频到Google Drive：{file_name}")
+                
+                while file is None:
+                    status, file = request.next_chunk(num_retries=config.API_MAX_RETRIES)
+                    if status:
+                        print(f"  已上传 {status.resumable_progress / 1024 / 1024:.1f} MB")
+                        if db is not None and request.resumable_uri:
+                            session.update(session_uri=request.resumable_uri,
+                                           uploaded_bytes=status.resumable_progress)
+                            db.save_upload_session(session)
             
             file_id = file.get('id')
             print(f"  ✓ 上传成功，文件ID：{file_id}")
+            if db is not None:
+                # 公开访问设置失败时保留记录，下次只需补设公开访问
+                session.update(file_id=file_id, uploaded_bytes=st.st_size)
+                db.save_upload_session(session)
             
             # 设置文件为公开可访问
-            permission = {
-                'type': 'anyone',
-                'role': 'reader'
-            }
-            self.service.permissions().create(
-                fileId=file_id,
-                body=permission
-            ).execute()
+            if make_public is None:
+                made_public = self.make_public([file_id]).get(file_id, False)
+            else:
+                made_public = make_public(file_id)
+            if not made_public:
+                print(f"  ✗ 设置公开访问失败，文件ID：{file_id}")
+                return None
+            if db is not None:
+                db.delete_upload_session(video_path)
+                gdrive_index.remember(db, file, folder_id, sha256=sha256, md5=md5, size=st.st_size)
             
             # 生成直接访问链接
             direct_url = f"https://drive.google.com/uc?export=download&id={file_id}"
@@ -160,7 +468,10 @@ class GoogleDriveUploader:
                 'file_id': file_id,
                 'file_name': file.get('name'),
                 'public_url': direct_url,
-                'web_view_link': file.get('webViewLink')
+                'web_view_link': file.get('webViewLink') or f"https://drive.google.com/file/d/{file_id}/view",
+                'bytes': st.st_size,
+                'resumed_from': resumed_from,
+                'deduped': False,
             }
             
         except HttpError as error:
@@ -172,6 +483,286 @@ class GoogleDriveUploader:
             traceback.print_exc()
             return None
     
+    def _reuse_file(self, existing: Dict, video_path: str, size: int, md5: str, sha256: str, folder_id: str,
+                    db, make_public: Callable[[str], bool] = None) -> Optional[Dict]:
+        """复用内容相同的已上传文件（未公开时补设公开访问），结果字典与 upload_video 相同"""
+        file_id = existing['file_id']
+        print(f"Google Drive中已有相同内容的文件，跳过上传：{os.path.basename(video_path)}（文件ID：{file_id}）")
+        if not existing.get('is_public'):
+            made_public = make_public(file_id) if make_public else self.make_public([file_id]).get(file_id, False)
+            if not made_public:
+                print(f"  ✗ 设置公开访问失败，文件ID：{file_id}")
+                return None
+        gdrive_index.remember(db, {'id': file_id, 'name': existing.get('file_name')}, folder_id,
+                              sha256=sha256, md5=md5, size=size)
+        db.delete_upload_session(video_path)
+        direct_url = f"https://drive.google.com/uc?export=download&id={file_id}"
+        print(f"  直接访问链接：{direct_url}")
+        return {
+            'file_id': file_id,
+            'file_name': existing.get('file_name'),
+            'public_url': direct_url,
+            'web_view_link': f"https://drive.google.com/file/d/{file_id}/view",
+            'bytes': size,
+            'resumed_from': size,
+            'deduped': True,
+        }
+    
+    @staticmethod
+    def _saved_session(db, session: Dict) -> Optional[Dict]:
+        """数据库中同一文件仍可续传的上传会话（文件已变化、换了文件夹或会话过期时删除记录）"""
+        if db is None:
+            return None
+        saved = db.get_upload_session(session['local_path'])
+        if not saved:
+            return None
+        if (saved['size'] != session['size'] or saved['mtime'] != session['mtime']
+                or saved['folder_id'] != session['folder_id']
+                or (not saved.get('file_id') and time.time() - saved['created_ts'] > UPLOAD_SESSION_MAX_AGE)):
+            db.delete_upload_session(session['local_path'])
+            return None
+        return saved
+    
+    @staticmethod
+    def _session_status(session_uri: str, size: int):
+        """
+        查询可续传上传会话的进度（PUT 空请求体，Content-Range: bytes */总大小）
+        
+        Returns:
+            (已确认字节数, None)：可从该位置续传；(None, 文件字典)：上传已完成；(None, None)：会话失效，需重新上传
+        """
+        try:
+            response = http_client.request(
+                "PUT", session_uri,
+                headers={'Content-Range': f"bytes */{size}", 'Content-Length': '0'},
+                allow_redirects=False,
+            )
+            if response.status_code in (200, 201):
+                return None, response.json()
+            if response.status_code == 308:
+                match = re.match(r"bytes=0-(\d+)", response.headers.get('Range', ''))
+                return (int(match.group(1)) + 1 if match else 0), None
+            print(f"  ⚠ 上传会话已失效（HTTP {response.status_code}），重新上传")
+        except Exception as e:
+            print(f"  ⚠ 查询上传会话进度时出错（重新上传）：{str(e)}")
+        return None, None
+    
+    def list_folder_files(self, folder_id: str) -> Optional[List[Dict]]:
+        """
+        分页列出文件夹中的文件（含 md5Checksum、size、permissionIds，供建立内容索引）
+        
+        Returns:
+            文件资源列表，出错返回None
+        """
+        files: List[Dict] = []
+        page_token = None
+        try:
+            while True:
+                results = self.service.files().list(
+                    q=f"'{folder_id}' in parents and trashed=false",
+                    fields="nextPageToken, files(id, name, md5Checksum, size, permissionIds)",
+                    pageSize=1000,
+                    pageToken=page_token
+                ).execute(num_retries=config.API_MAX_RETRIES)
+                files.extend(results.get('files', []))
+                page_token = results.get('nextPageToken')
+                if not page_token:
+                    return files
+        except Exception as e:
+            print(f"列出Google Drive文件夹时出错：{str(e)}")
+            return None
+    
+    def get_file(self, file_id: str) -> Optional[Dict]:
+        """
+        查询文件状态（id、name、md5Checksum、trashed、permissionIds）
+        
+        Returns:
+            文件资源，文件不存在（404）返回None；其他错误抛出异常
+        """
+        try:
+            return self.service.files().get(
+                fileId=file_id,
+                fields='id, name, md5Checksum, trashed, permissionIds'
+            ).execute(num_retries=config.API_MAX_RETRIES)
+        except HttpError as error:
+            if error.resp.status == 404:
+                return None
+            raise
+    
+    def make_public(self, file_ids: List[str]) -> Dict[str, bool]:
+        """
+        把文件设置为任何人可查看；多个文件时合并为 Drive 批量请求（每批最多 100 个），批量中失败的文件再单独重试
+        
+        Args:
+            file_ids: 文件ID列表
+        
+        Returns:
+            {file_id: 是否成功}（重复的文件ID只请求一次，共用同一结果）
+        """
+        permission = {
+            'type': 'anyone',
+            'role': 'reader'
+        }
+        results: Dict[str, bool] = {}
+        # 同一文件可能被多个调用方同时设置（复用相同内容的文件时），批量请求中的 request_id 不能重复
+        file_ids = list(dict.fromkeys(file_ids))
+        if len(file_ids) > 1:
+            def on_response(request_id, response, exception):
+                results[request_id] = exception is None
+            
+            for start in range(0, len(file_ids), PERMISSION_BATCH_LIMIT):
+                try:
+                    batch = self.service.new_batch_http_request(callback=on_response)
+                    for file_id in file_ids[start:start + PERMISSION_BATCH_LIMIT]:
+                        batch.add(self.service.permissions().create(fileId=file_id, body=permission),
+                                  request_id=file_id)
+                    batch.execute()
+                except Exception as e:
+                    print(f"  ⚠ 批量设置公开访问时出错（逐个重试）：{str(e)}")
+        for file_id in file_ids:
+            if results.get(file_id):
+                continue
+            try:
+                self.service.permissions().create(
+                    fileId=file_id,
+                    body=permission
+                ).execute(num_retries=config.API_MAX_RETRIES)
+                results[file_id] = True
+            except Exception as e:
+                print(f"设置公开访问时出错：{str(e)}")
+                results[file_id] = False
+        return results
+    
+    def upload_stream(self, url: str, file_name: str, folder_name: str = "Game Videos",
+                      headers: Dict = None, tee_path: str = None, timeout=None, db=None,
+                      make_public: Callable[[str], bool] = None) -> Optional[Dict]:
+        """
+        边下载边上传视频到Google Drive：下载与上传同时进行，数据经有界缓冲直接送入可续传上传会话，
+        不经过本地磁盘（tee_path 不为空时同时写一份本地文件，仍不需要再读回磁盘）
+        不写本地副本时无法事后检查文件，因此上传前检查 Content-Type 与开头字节（HTML/JSON 错误页、非 MP4/WebM），
+        上传后核对字节数与 Content-Length（传输被截断）；上传后任何一步失败都会删除已创建的 Drive 文件
+        
+        Args:
+            url: 视频下载地址
+            file_name: Drive 中的文件名
+            folder_name: 上传到的文件夹名称，默认"Game Videos"
+            headers: 下载请求头
+            tee_path: 本地副本路径（可选，先写 .part，成功后重命名）
+            timeout: 下载请求超时
+            db: VideoDatabase 实例（可选，上传完成后写入 Drive 文件内容索引）
+            make_public: 设置公开访问的函数（file_id -> 是否成功），默认调用 make_public；
+                上传管理器传入合并批量请求的版本
+        
+        Returns:
+            与 upload_video 相同的字典，另含 bytes、seconds、sha256、local_path（未写本地副本时为None）；失败返回None
+        """
+        part_path = tee_path + ".part" if tee_path else None
+        source = None
+        file_id = None
+        started = time.perf_counter()
+        try:
+            response = http_client.get(url, headers=headers or {}, stream=True, timeout=timeout)
+            if response.status_code != 200:
+                response.close()
+                print(f"  下载失败：HTTP {response.status_code}")
+                return None
+            content_type = response.headers.get("Content-Type")
+            if not video_probe.content_type_ok(content_type):
+                response.close()
+                print(f"  ✗ 下载内容不是视频（Content-Type：{content_type}），不上传")
+                return None
+            length = response.headers.get("Content-Length")
+            expected_bytes = int(length) if length and length.isdigit() else None
+            
+            folder_id = self._get_or_create_folder(folder_name)
+            if part_path:
+                os.makedirs(os.path.dirname(part_path) or ".", exist_ok=True)
+            source = _StreamBuffer(response, part_path)
+            reason = video_probe.sniff_head(source.peek(64))
+            if reason:
+                print(f"  ✗ 下载内容不是视频（{reason}），不上传")
+                return None
+            print(f"正在边下载边上传到Google Drive：{file_name}")
+            
+            request = self.service.files().create(
+                body={'name': file_name, 'parents': [folder_id] if folder_id else []},
+                media_body=StreamingMediaUpload(source),
+                fields='id, name, webViewLink, md5Checksum, size'
+            )
+            file = None
+            while file is None:
+                # 分块失败（5xx/网络错误）时 googleapiclient 会重发同一分块，数据源无需回退
+                status, file = request.next_chunk(num_retries=config.API_MAX_RETRIES)
+                if status:
+                    print(f"  已上传 {status.resumable_progress / 1024 / 1024:.1f} MB")
+            source.close()
+            
+            file_id = file.get('id')
+            if expected_bytes is not None and source.bytes_read != expected_bytes:
+                raise IOError(f"传输不完整（Content-Length {expected_bytes} 字节，实际 {source.bytes_read} 字节）")
+            print(f"  ✓ 上传成功，文件ID：{file_id}")
+            
+            # 设置文件为公开可访问
+            if make_public is None:
+                made_public = self.make_public([file_id]).get(file_id, False)
+            else:
+                made_public = make_public(file_id)
+            if not made_public:
+                raise IOError("设置公开访问失败")
+            
+            local_path = None
+            if part_path:
+                os.replace(part_path, tee_path)
+                local_path = tee_path
+            gdrive_index.remember(db, file, folder_id, sha256=source.sha256.hexdigest(), size=source.bytes_read)
+            
+            elapsed = time.perf_counter() - started
+            direct_url = f"https://drive.google.com/uc?export=download&id={file_id}"
+            print(f"  ✓ 已设置为公开访问（{source.bytes_read / 1024 / 1024:.2f} MB，用时 {elapsed:.1f} 秒）")
+            print(f"  直接访问链接：{direct_url}")
+            
+            return {
+                'file_id': file_id,
+                'file_name': file.get('name'),
+                'public_url': direct_url,
+                'web_view_link': file.get('webViewLink'),
+                'bytes': source.bytes_read,
+                'seconds': elapsed,
+                'sha256': source.sha256.hexdigest(),
+                'local_path': local_path,
+            }
+            
+        except HttpError as error:
+            print(f"边下载边上传到Google Drive时出错：{str(error)}")
+        except Exception as e:
+            print(f"边下载边上传视频时出错：{str(e)}")
+        finally:
+            if source:
+                source.close()
+            if part_path and os.path.exists(part_path):
+                os.remove(part_path)
+        # 已创建的 Drive 文件不可用（截断、公开访问失败等），删除以免被复用或送去分析
+        if file_id:
+            self.delete_file(file_id)
+        return None
+    
+    def delete_file(self, file_id: str) -> bool:
+        """
+        删除Google Drive文件（如已上传的视频检查后发现损坏）
+        
+        Args:
+            file_id: 文件ID
+        
+        Returns:
+            是否删除成功
+        """
+        try:
+            self.service.files().delete(fileId=file_id).execute(num_retries=config.API_MAX_RETRIES)
+            return True
+        except Exception as e:
+            print(f"删除Google Drive文件时出错：{str(e)}")
+            return False
+    
     def upload_image(self, image_path: str, folder_name: str = "Game Screenshots") -> Optional[Dict]:
         """
         上传图片到Google Drive并获取公开访问链接
@@ -267,6 +858,16 @@ class GoogleDriveUploader:
         Returns:
             文件夹ID，如果失败返回None
         """
+        # 同一进程内按名称缓存（持锁查询/创建，避免并发上传时重复创建同名文件夹）
+        with self._folder_lock:
+            folder_id = self._folder_ids.get(folder_name)
+            if not folder_id:
+                folder_id = self._lookup_or_create_folder(folder_name)
+                if folder_id:
+                    self._folder_ids[folder_name] = folder_id
+            return folder_id
+    
+    def _lookup_or_create_folder(self, folder_name: str) -> Optional[str]:
         try:
             # 查找文件夹
             results = self.service.files().list(
@@ -318,3 +919,21 @@ class GoogleDriveUploader:
             return f"https://drive.google.com/uc?export=download&id={file_id}"
         
         return None
+
+
+_uploader: Optional[GoogleDriveUploader] = None
+_uploader_lock = threading.Lock()
+
+
+def get_drive_uploader() -> GoogleDriveUploader:
+    """
+    进程内共享的Google Drive上传器（首次调用时认证，之后复用凭证、发现文档与文件夹ID）
+
+    Raises:
+        ImportError / FileNotFoundError：与 GoogleDriveUploader() 相同（失败不缓存，下次调用重试）
+    """
+    global _uploader
+    with _uploader_lock:
+        if _uploader is None:
+            _uploader = GoogleDriveUploader()
+        return _uploader
@@ -0,0 +1,223 @@
+"""
+HTTP 录制/回放（cassette）模块
+- 录制：设置 HTTP_RECORD_DIR 后，经 http_client 发出的非流式请求及其响应逐条写入 cassette 目录
+  （每条一个 JSON 文件）；请求头不落盘，请求参数中的密钥与响应中的令牌会被替换为 REDACTED
+- 回放：scripts/benchmarks/replay_server.py 用同样的请求键（方法 + 路径 + 查询参数 + 请求体，不含主机）
+  查找录制的响应，各服务根地址指向回放服务后即可离线跑通整个工作流
+"""
+import base64
+import glob
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import config
+
+# 不参与请求键、也不写入 cassette 的参数名（鉴权信息）
+SENSITIVE_FIELDS = {"key", "token", "access_token", "api_key", "app_id", "app_secret"}
+
+# 请求体超过该大小（如 base64 编码的视频）时只记录摘要
+MAX_STORED_BODY_BYTES = 64 * 1024
+
+_write_lock = threading.Lock()
+_sequence = 0
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def _strip_sensitive(value):
+    """递归去掉 dict 中的鉴权字段"""
+    if isinstance(value, dict):
+        return {k: _strip_sensitive(v) for k, v in value.items() if str(k).lower() not in SENSITIVE_FIELDS}
+    if isinstance(value, list):
+        return [_strip_sensitive(v) for v in value]
+    return value
+
+
+def _redact_tokens(value):
+    """递归把响应中名称含 token 的字段替换为 REDACTED（如飞书 tenant_access_token）"""
+    if isinstance(value, dict):
+        return {
+            k: ("REDACTED" if "token" in str(k).lower() and isinstance(v, str) else _redact_tokens(v))
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [_redact_tokens(v) for v in value]
+    return value
+
+
+def normalize_request(method: str, url: str, params=None, json_body=None, data=None) -> Dict:
+    """
+    将一次请求规范化为与主机无关的描述，录制与回放两端共用
+
+    Args:
+        method: HTTP 方法
+        url: 完整 URL（可带查询参数）
+        params: requests 的 params 参数
+        json_body: requests 的 json 参数（或回放端解析出的 JSON 请求体）
+        data: requests 的 data 参数（dict / str / bytes，或回放端收到的原始请求体）
+
+    Returns:
+        {"method", "host", "path", "query": [[k, v], ...], "body": JSON 或 None, "body_sha256": 原始请求体摘要或 None}
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if isinstance(params, dict):
+        query += [(str(k), str(v)) for k, v in params.items() if v is not None]
+    elif params:
+        query += [(str(k), str(v)) for k, v in params]
+    query = sorted([k, v] for k, v in query if k.lower() not in SENSITIVE_FIELDS)
+
+    body = None
+    body_sha256 = None
+    if json_body is not None:
+        body = _strip_sensitive(json_body)
+    elif isinstance(data, dict):
+        body = _strip_sensitive({str(k): v for k, v in data.items()})
+    elif data:
+        raw = data.encode("utf-8") if isinstance(data, str) else bytes(data) if isinstance(data, (bytes, bytearray)) else None
+        if raw is not None:
+            try:
+                body = _strip_sensitive(json.loads(raw.decode("utf-8")))
+            except (UnicodeDecodeError, ValueError):
+                body_sha256 = hashlib.sha256(raw).hexdigest()
+
+    return {
+        "method": method.upper(),
+        "host": (parts.hostname or "").lower(),
+        "path": parts.path.rstrip("/") or "/",
+        "query": query,
+        "body": body,
+        "body_sha256": body_sha256,
+    }
+
+
+def request_key(request: Dict) -> str:
+    """请求键：sha256(方法 + 路径 + 查询参数 + 请求体)，不含主机，便于改写根地址后回放"""
+    raw = "\n".join([
+        request["method"],
+        request["path"],
+        _canonical(request["query"]),
+        _canonical(request["body"]) if request.get("body") is not None else (request.get("body_sha256") or ""),
+    ])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def encode_response_body(content: bytes, content_type: str) -> Dict:
+    """把响应体编码为可写入 JSON 的形式：JSON → json，文本 → text，其他 → base64"""
+    if not content:
+        return {"text": ""}
+    try:
+        text = content.decode("utf-8")
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(content).decode("ascii")}
+    if "json" in (content_type or "") or text.lstrip()[:1] in ("{", "["):
+        try:
+            return {"json": _redact_tokens(json.loads(text))}
+        except ValueError:
+            pass
+    return {"text": text}
+
+
+def decode_response_body(response: Dict) -> bytes:
+    """encode_response_body 的逆操作"""
+    if "json" in response:
+        return json.dumps(response["json"], ensure_ascii=False).encode("utf-8")
+    if "base64" in response:
+        return base64.b64decode(response["base64"])
+    return (response.get("text") or "").encode("utf-8")
+
+
+def write_interaction(directory: str, request: Dict, response: Dict) -> str:
+    """
+    写入一条录制记录
+
+    Args:
+        directory: cassette 目录
+        request: normalize_request 的结果
+        response: {"status", "headers", "latency_ms", 以及 json/text/base64 之一}
+
+    Returns:
+        写入的文件路径
+    """
+    global _sequence
+    key = request_key(request)
+    stored_request = dict(request)
+    if stored_request.get("body") is not None and len(_canonical(stored_request["body"])) > MAX_STORED_BODY_BYTES:
+        stored_request["body_sha256"] = hashlib.sha256(_canonical(stored_request["body"]).encode("utf-8")).hexdigest()
+        stored_request["body"] = None
+        stored_request["body_omitted"] = True
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", request["path"]).strip("_")[-60:] or "root"
+    os.makedirs(directory, exist_ok=True)
+    with _write_lock:
+        _sequence += 1
+        name = f"{request['method']}_{slug}_{key[:12]}_{time.time_ns()}_{_sequence}.json"
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"key": key, "recorded_at": time.time(), "request": stored_request, "response": response},
+                  f, ensure_ascii=False, indent=2)
+    return path
+
+
+def record_http_response(method: str, url: str, kwargs: Dict, response, started_at: float):
+    """供 http_client 调用：未设置 HTTP_RECORD_DIR 或流式请求（视频下载）时忽略，录制失败不影响请求"""
+    if not config.HTTP_RECORD_DIR or kwargs.get("stream"):
+        return
+    try:
+        request = normalize_request(method, url, params=kwargs.get("params"),
+                                    json_body=kwargs.get("json"), data=kwargs.get("data"))
+        content_type = response.headers.get("Content-Type", "")
+        stored = {
+            "status": response.status_code,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() in ("content-type", "retry-after")},
+            "latency_ms": round((time.perf_counter() - started_at) * 1000, 1),
+        }
+        stored.update(encode_response_body(response.content, content_type))
+        write_interaction(config.HTTP_RECORD_DIR, request, stored)
+    except Exception as e:
+        print(f"  ⚠ HTTP录制失败：{str(e)}")
+
+
+def load_cassettes(directory: str) -> List[Dict]:
+    """读取 cassette 目录下的全部录制记录（按录制时间排序，跳过无法解析的文件）"""
+    records = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+            if record.get("key") and record.get("request") and record.get("response"):
+                records.append(record)
+        except Exception as e:
+            print(f"警告：无法读取录制文件 {path}：{str(e)}")
+    records.sort(key=lambda r: r.get("recorded_at") or 0)
+    return records
+
+
+def summarize(records: List[Dict]) -> Dict[str, int]:
+    """按 方法 + 路径 统计录制条数"""
+    counts: Dict[str, int] = {}
+    for record in records:
+        req = record["request"]
+        label = f"{req['method']} {req['path']}"
+        counts[label] = counts.get(label, 0) + 1
+    return dict(sorted(counts.items()))
+
+
+def search_keyword(request: Dict) -> Optional[str]:
+    """请求中的搜索关键词（抖音 keyword / YouTube q），回放端兜底匹配时用于替换响应中的关键词"""
+    body = request.get("body")
+    if isinstance(body, dict):
+        for field in ("keyword", "q", "query"):
+            if isinstance(body.get(field), str):
+                return body[field]
+    for k, v in request.get("query") or []:
+        if k in ("keyword", "q", "query"):
+            return v
+    return None
@@ -0,0 +1,222 @@
+"""
+HTTP连接池模块
+按主机复用 requests.Session（keep-alive），统一连接池大小、默认超时和连接级重试，
+并统计每个主机新建连接数与复用次数，供运行汇总输出；
+配置了限流的主机（见 rate_limiter）自动经过令牌桶，计费接口（见 cost_governor）自动记账，
+设置 HTTP_RECORD_DIR 时录制请求与响应（见 http_cassette）
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+import config
+from modules import cost_governor, http_cassette, rate_limiter
+
+
+class _ConnectionStats:
+    """按主机统计新建连接数与请求数（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._opened: Dict[str, int] = {}
+        self._requests: Dict[str, int] = {}
+
+    def record_opened(self, host: str):
+        with self._lock:
+            self._opened[host] = self._opened.get(host, 0) + 1
+
+    def record_request(self, host: str):
+        with self._lock:
+            self._requests[host] = self._requests.get(host, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            hosts = set(self._opened) | set(self._requests)
+            result = {}
+            for host in sorted(hosts):
+                opened = self._opened.get(host, 0)
+                total = self._requests.get(host, 0)
+                result[host] = {
+                    "opened": opened,
+                    "requests": total,
+                    "reused": max(0, total - opened),
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._opened.clear()
+            self._requests.clear()
+
+
+_stats = _ConnectionStats()
+
+
+class _CountingPoolMixin:
+    """在 urllib3 连接池上统计新建连接（_new_conn）与实际发出的请求（_make_request）"""
+
+    def _new_conn(self):
+        _stats.record_opened(self.host)
+        return super()._new_conn()
+
+    def _make_request(self, conn, method, url, *args, **kwargs):
+        _stats.record_request(self.host)
+        return super()._make_request(conn, method, url, *args, **kwargs)
+
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """使用带计数连接池的 HTTPAdapter"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+class PooledSession(requests.Session):
+    """
+    带默认超时的 Session：调用方未传 timeout 时使用统一默认值；
+    目标主机配置了限流时，请求前先从令牌桶取令牌，并按响应状态码反馈调整速率；
+    计费接口的响应写入费用账本；开启录制时写入 cassette
+    """
+
+    def __init__(self, default_timeout: Tuple[float, float]):
+        super().__init__()
+        self.default_timeout = default_timeout
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.default_timeout
+        limiter = rate_limiter.get_limiter(url)
+        if limiter is None:
+            started = time.perf_counter()
+            response = super().request(method, url, **kwargs)
+            cost_governor.record_http_response(url, response, started)
+            http_cassette.record_http_response(method, url, kwargs, response, started)
+            return response
+        limiter.acquire()
+        started = time.perf_counter()
+        try:
+            response = super().request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            limiter.on_error()
+            raise
+        limiter.observe(response.status_code, response.headers.get("Retry-After"))
+        cost_governor.record_http_response(url, response, started)
+        http_cassette.record_http_response(method, url, kwargs, response, started)
+        return response
+
+
+_sessions: Dict[str, PooledSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def _session_key(url_or_host: str) -> str:
+    """将 URL 或主机名规范化为 scheme://host[:port]"""
+    if "://" not in url_or_host:
+        url_or_host = f"https://{url_or_host}"
+    parts = urlsplit(url_or_host)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _build_session() -> PooledSession:
+    """创建一个新的连接池 Session"""
+    session = PooledSession(
+        default_timeout=(config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT)
+    )
+    # 只对建连失败做自动重试（请求尚未发出，对 POST 也安全）；
+    # 状态码相关的重试仍由各调用方按业务语义处理
+    retry = Retry(
+        total=config.HTTP_CONNECT_RETRIES,
+        connect=config.HTTP_CONNECT_RETRIES,
+        read=0,
+        status=0,
+        backoff_factor=0.5,
+        raise_on_status=False,
+    )
+    adapter = PooledHTTPAdapter(
+        pool_connections=config.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=config.HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(url_or_host: str) -> PooledSession:
+    """
+    获取某主机共享的连接池 Session（进程内复用，keep-alive）
+
+    Args:
+        url_or_host: 完整 URL 或主机名，如 https://api.tikhub.io/xxx 或 api.tikhub.io
+
+    Returns:
+        该主机对应的 PooledSession
+    """
+    key = _session_key(url_or_host)
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _build_session()
+            _sessions[key] = session
+        return session
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """通过该 URL 所属主机的共享 Session 发送请求（参数同 requests.request）"""
+    return get_session(url).request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """共享 Session 版本的 requests.get"""
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """共享 Session 版本的 requests.post"""
+    return request("POST", url, **kwargs)
+
+
+def get_connection_stats() -> Dict[str, Dict[str, int]]:
+    """
+    获取各主机连接统计
+
+    Returns:
+        {host: {"opened": 新建连接数, "requests": 请求数, "reused": 复用连接发出的请求数}}
+    """
+    return _stats.snapshot()
+
+
+def reset_connection_stats():
+    """清零连接统计（每次工作流运行开始时调用）"""
+    _stats.reset()
+
+
+def close_all_sessions(host: Optional[str] = None):
+    """关闭共享 Session（指定 host 时只关闭该主机）"""
+    with _sessions_lock:
+        keys = [_session_key(host)] if host else list(_sessions.keys())
+        for key in keys:
+            session = _sessions.pop(key, None)
+            if session is not None:
+                session.close()
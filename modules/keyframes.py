@@ -0,0 +1,137 @@
+"""
+视频关键帧抽取（关键帧分析模式：只把少量代表性画面作为图片发给模型，代替整段视频）
+- 选帧：scene 按降采样灰度缩略图的帧间差找画面切换，取变化最大的若干帧（相邻关键帧保持最小间隔），
+  不足时用均匀采样补齐；uniform 在时长内均匀取帧（取各段中点，避开片头片尾的黑帧）
+- 取帧：按帧号一次顺序读取（modules/frame_extractor.py），不再逐帧 seek
+- 缩放（长边不超过 KEYFRAME_MAX_SIDE，INTER_AREA）与 JPEG 编码由视频帧服务完成（modules/video_frames.py，
+  与截图合并为一次解码、结果缓存在磁盘）
+"""
+from typing import Dict, List
+
+import config
+from modules.frame_extractor import video_info
+
+try:
+    import cv2
+    import numpy as np
+    KEYFRAMES_AVAILABLE = True
+except ImportError:
+    KEYFRAMES_AVAILABLE = False
+
+SCENE_SAMPLE_FPS = 4.0  # 计算画面变化时每秒取样帧数
+SCENE_THUMB_SIZE = (64, 36)  # 计算画面变化用的灰度缩略图尺寸
+
+
+def uniform_indices(total: int, count: int) -> List[int]:
+    """在 total 帧中均匀取 count 帧（各段中点）"""
+    if total <= 0 or count <= 0:
+        return []
+    if total <= count:
+        return list(range(total))
+    return sorted({int((i + 0.5) * total / count) for i in range(count)})
+
+
+def scene_scores(video_path: str, sample_fps: float = SCENE_SAMPLE_FPS) -> List[tuple]:
+    """
+    顺序读取视频，按 sample_fps 取样并计算与上一取样帧的差异
+
+    Returns:
+        [(帧号, 差异 0~1)]，第一帧差异为 0；打不开时返回空列表
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return []
+    info = video_info(cap)
+    step = max(1, int(round(info["fps"] / sample_fps))) if info["fps"] > 0 else 1
+    scores = []
+    prev = None
+    idx = 0
+    try:
+        while True:
+            if not cap.grab():
+                break
+            if idx % step == 0:
+                ok, frame = cap.retrieve()
+                if ok:
+                    thumb = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), SCENE_THUMB_SIZE,
+                                       interpolation=cv2.INTER_AREA).astype(np.int16)
+                    score = 0.0 if prev is None else float(np.mean(np.abs(thumb - prev))) / 255.0
+                    scores.append((idx, score))
+                    prev = thumb
+            idx += 1
+    finally:
+        cap.release()
+    return scores
+
+
+def select_indices(video_path: str, count: int, method: str = "scene") -> List[int]:
+    """
+    选出关键帧帧号（升序）
+
+    Args:
+        video_path: 本地视频路径
+        count: 帧数
+        method: scene（画面切换）或 uniform（均匀）
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return []
+    total = video_info(cap)["frames"]
+    cap.release()
+    if method != "scene" or total <= count:
+        return uniform_indices(total, count)
+
+    scores = scene_scores(video_path)
+    if not scores:
+        return uniform_indices(total, count)
+    total = max(total, scores[-1][0] + 1)
+    min_gap = max(1, total // (count * 2))
+    threshold = config.KEYFRAME_SCENE_THRESHOLD
+    # 第一帧总是保留（交代初始画面），其余按画面变化从大到小选取，与已选帧保持最小间隔
+    picked = [scores[0][0]]
+    for idx, score in sorted(scores[1:], key=lambda s: s[1], reverse=True):
+        if len(picked) >= count or score < threshold:
+            break
+        if all(abs(idx - p) >= min_gap for p in picked):
+            picked.append(idx)
+    for idx in uniform_indices(total, count):
+        if len(picked) >= count:
+            break
+        if all(abs(idx - p) >= min_gap // 2 for p in picked):
+            picked.append(idx)
+    return sorted(picked)
+
+
+def extract_keyframes(video_path: str, count: int = None, method: str = None, max_side: int = None,
+                      quality: int = None) -> List[Dict]:
+    """
+    抽取关键帧并编码为 JPEG（经视频帧服务，选帧结果与编码后的帧缓存在磁盘，与截图共用一次解码）
+
+    Args:
+        video_path: 本地视频路径
+        count: 帧数，默认 KEYFRAME_COUNT
+        method: scene / uniform，默认 KEYFRAME_METHOD
+        max_side: 长边上限（像素），默认 KEYFRAME_MAX_SIDE
+        quality: JPEG 质量，默认 KEYFRAME_JPEG_QUALITY
+
+    Returns:
+        按时间顺序的 [{"index": 帧号, "timestamp": 秒, "jpeg": bytes}]；缺少 opencv 或读取失败时返回空列表
+    """
+    if not KEYFRAMES_AVAILABLE:
+        return []
+    from modules.video_frames import get_video_frame_service
+    max_side = max_side or config.KEYFRAME_MAX_SIDE
+    return get_video_frame_service().get_frames(
+        video_path, keyframes=keyframe_spec(count, method)["keyframes"], max_size=(max_side, max_side),
+        quality=quality or config.KEYFRAME_JPEG_QUALITY,
+    )
+
+
+def keyframe_spec(count: int = None, method: str = None, max_side: int = None, quality: int = None) -> Dict:
+    """关键帧分析的取帧需求（供工作流提前提交给视频帧服务，格式见 video_frames.decode_job）"""
+    max_side = max_side or config.KEYFRAME_MAX_SIDE
+    return {
+        "keyframes": [count or config.KEYFRAME_COUNT, method or config.KEYFRAME_METHOD],
+        "max_size": [max_side, max_side],
+        "quality": quality or config.KEYFRAME_JPEG_QUALITY,
+    }
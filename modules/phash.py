@@ -0,0 +1,283 @@
+"""
+视频感知哈希与近似重复检测（换皮/克隆游戏复用已有分析）
+- 每个视频均匀取 PHASH_FRAMES 帧（经视频帧服务取 256px 缩略图，与截图、关键帧共用解码与缓存），
+  每帧计算 64 位 dHash（9x8 灰度图相邻像素比较），按视频键保存在 video_phash 表
+- 纯色/大面积平坦的画面（黑屏、加载页背景）dHash 几乎全 0 或全 1，不同视频之间也很接近，这类帧不参与匹配；
+  有效帧中互不相同的画面少于 MIN_DISTINCT_FRAMES 个的视频（静止标题页、加载画面）不做检测
+- 所有已保存的有效帧哈希放入 BK 树（汉明距离），用来找出有相近帧的候选视频；再对每个候选按时间顺序一对一匹配帧
+  （最长公共子序列，帧距离 ≤ PHASH_MAX_DISTANCE 视为相同），匹配帧数 / 两个视频有效帧数的较大值
+  ≥ PHASH_MIN_MATCH_RATIO 的视为近似重复（采样位置不要求对齐，片头长短不同的换皮视频也能匹配；
+  同一画面只能匹配一次，静止画面不会因为出现在另一个视频中就得到高比例）
+- 索引在首次使用时从数据库加载，之后新保存的哈希直接加入，进程内共享
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import config
+
+try:
+    import cv2
+    import numpy as np
+    PHASH_AVAILABLE = True
+except ImportError:
+    PHASH_AVAILABLE = False
+
+HASH_FRAME_SIZE = 256  # 计算哈希用的缩略图长边（像素）
+MIN_HASH_BITS = 8  # 有效帧哈希中 1 的个数须在 [MIN_HASH_BITS, 64 - MIN_HASH_BITS] 内，否则视为平坦画面
+MIN_DISTINCT_FRAMES = 3  # 参与匹配的视频至少要有的不同画面数
+
+_stats_lock = threading.Lock()
+_stats = {"hashed": 0, "queries": 0, "matches": 0, "drafts": 0, "reused": 0}
+
+
+def _add_stats(**values):
+    with _stats_lock:
+        for k, v in values.items():
+            _stats[k] += v
+
+
+def get_phash_stats() -> Dict:
+    """本次运行的统计：hashed 计算哈希的视频数、queries 查询次数、matches 找到近似重复的次数、drafts/reused 提供草稿/直接复用的次数"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_phash_stats():
+    with _stats_lock:
+        for k in _stats:
+            _stats[k] = 0
+
+
+def record_reuse(mode: str):
+    """记录一次近似重复复用（draft / skip）"""
+    if mode == "draft":
+        _add_stats(drafts=1)
+    else:
+        _add_stats(reused=1)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def is_informative(value: int) -> bool:
+    """哈希是否来自有内容的画面（纯色、大面积平坦的画面 dHash 几乎全 0 或全 1）"""
+    return MIN_HASH_BITS <= bin(value).count("1") <= 64 - MIN_HASH_BITS
+
+
+def informative_hashes(hashes: List[str]) -> List[int]:
+    """按时间顺序保留有效帧的哈希（整数）"""
+    values = [int(h, 16) for h in hashes]
+    return [v for v in values if is_informative(v)]
+
+
+def distinct_frames(values: List[int], max_distance: int) -> int:
+    """互不相同（两两距离 > max_distance）的画面数（贪心计数）"""
+    kept: List[int] = []
+    for value in values:
+        if all(hamming(value, k) > max_distance for k in kept):
+            kept.append(value)
+    return len(kept)
+
+
+def match_in_order(query: List[int], candidate: List[int], max_distance: int) -> Tuple[int, int]:
+    """
+    按时间顺序一对一匹配两段帧哈希（最长公共子序列，距离 ≤ max_distance 视为相同；匹配数相同时取总距离小的）
+
+    Returns:
+        (匹配帧数, 匹配帧距离之和)
+    """
+    # best[j] = 候选前 j 帧与查询已处理部分的最优 (匹配数, -距离和)
+    best = [(0, 0)] * (len(candidate) + 1)
+    for q in query:
+        row = [(0, 0)]
+        for j, c in enumerate(candidate, 1):
+            options = [best[j], row[j - 1]]
+            d = hamming(q, c)
+            if d <= max_distance:
+                options.append((best[j - 1][0] + 1, best[j - 1][1] - d))
+            row.append(max(options))
+        best = row
+    matched, neg_distance = best[-1]
+    return matched, -neg_distance
+
+
+def dhash(image) -> int:
+    """64 位 dHash（BGR 或灰度图）"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def frame_spec(frames: int = None) -> Dict:
+    """感知哈希的取帧需求（供工作流提前提交给视频帧服务，格式见 video_frames.decode_job）"""
+    return {
+        "keyframes": [frames or config.PHASH_FRAMES, "uniform"],
+        "max_size": [HASH_FRAME_SIZE, HASH_FRAME_SIZE],
+        "quality": 90,
+    }
+
+
+def video_hashes(video_path: str, frames: int = None) -> List[str]:
+    """
+    视频采样帧的 dHash
+
+    Returns:
+        十六进制哈希列表（按时间顺序）；缺少 opencv/numpy 或取帧失败时返回空列表
+    """
+    if not PHASH_AVAILABLE:
+        return []
+    from modules.video_frames import get_video_frame_service
+    spec = frame_spec(frames)
+    images = get_video_frame_service().get_frames(
+        video_path, keyframes=spec["keyframes"], max_size=tuple(spec["max_size"]), quality=spec["quality"],
+    )
+    hashes = []
+    for image in images:
+        decoded = cv2.imdecode(np.frombuffer(image["jpeg"], dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        if decoded is not None:
+            hashes.append(f"{dhash(decoded):016x}")
+    if hashes:
+        _add_stats(hashed=1)
+    return hashes
+
+
+class BKTree:
+    """按汉明距离组织的 BK 树：节点为 [哈希, [载荷...], {距离: 子节点}]"""
+
+    def __init__(self):
+        self._root = None
+        self.size = 0
+
+    def add(self, value: int, payload):
+        self.size += 1
+        if self._root is None:
+            self._root = [value, [payload], {}]
+            return
+        node = self._root
+        while True:
+            d = hamming(value, node[0])
+            if d == 0:
+                node[1].append(payload)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [value, [payload], {}]
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, object]]:
+        """距离 ≤ radius 的所有载荷：[(距离, 载荷)]"""
+        found = []
+        stack = [self._root] if self._root else []
+        while stack:
+            node = stack.pop()
+            d = hamming(value, node[0])
+            if d <= radius:
+                found.extend((d, payload) for payload in node[1])
+            for child_d, child in node[2].items():
+                if d - radius <= child_d <= d + radius:
+                    stack.append(child)
+        return found
+
+
+class PhashIndex:
+    """视频感知哈希索引（BK 树，载荷为 (视频键, 有效帧序号)）"""
+
+    def __init__(self, db=None):
+        self.db = db
+        self._lock = threading.Lock()
+        self._tree = BKTree()
+        self._videos: Dict[str, List[int]] = {}  # 视频键 -> 按时间顺序的有效帧哈希
+        self._loaded = False
+
+    def _ensure_loaded(self):
+        if self._loaded or self.db is None:
+            self._loaded = True
+            return
+        for video_key, hashes in self.db.get_video_phashes().items():
+            self._add(video_key, hashes)
+        self._loaded = True
+
+    def _add(self, video_key: str, hashes: List[str]):
+        if video_key in self._videos:
+            return
+        values = informative_hashes(hashes)
+        for i, value in enumerate(values):
+            self._tree.add(value, (video_key, i))
+        self._videos[video_key] = values
+
+    def add(self, video_key: str, hashes: List[str], game_name: str = None):
+        """加入索引（提供 db 时同时写入 video_phash 表）"""
+        if not hashes:
+            return
+        if self.db is not None:
+            self.db.save_video_phash(video_key, game_name, hashes)
+        with self._lock:
+            self._ensure_loaded()
+            self._add(video_key, hashes)
+
+    def find_similar(self, video_key: str, hashes: List[str], max_distance: int = None,
+                     min_ratio: float = None) -> List[Dict]:
+        """
+        查找近似重复的视频（不含自身）
+
+        Args:
+            video_key: 查询视频的键
+            hashes: 查询视频的帧哈希
+            max_distance: 单帧最大汉明距离，默认 PHASH_MAX_DISTANCE
+            min_ratio: 最低匹配帧比例，默认 PHASH_MIN_MATCH_RATIO
+
+        Returns:
+            [{"video_key", "matched": 匹配帧数, "ratio": 匹配帧比例, "avg_distance": 匹配帧平均距离}]，按比例降序、距离升序；
+            有效帧中不同画面少于 MIN_DISTINCT_FRAMES 个时返回空列表
+        """
+        max_distance = config.PHASH_MAX_DISTANCE if max_distance is None else max_distance
+        min_ratio = config.PHASH_MIN_MATCH_RATIO if min_ratio is None else min_ratio
+        query = informative_hashes(hashes or [])
+        if distinct_frames(query, max_distance) < MIN_DISTINCT_FRAMES:
+            return []
+        _add_stats(queries=1)
+        with self._lock:
+            self._ensure_loaded()
+            candidates = {
+                other_key
+                for value in query
+                for _, (other_key, _) in self._tree.search(value, max_distance)
+                if other_key != video_key
+            }
+            sequences = {key: self._videos[key] for key in candidates}
+        results = []
+        for other_key, sequence in sequences.items():
+            matched, distance = match_in_order(query, sequence, max_distance)
+            if not matched:
+                continue
+            ratio = matched / max(len(query), len(sequence))
+            if ratio >= min_ratio:
+                results.append({
+                    "video_key": other_key,
+                    "matched": matched,
+                    "ratio": round(ratio, 3),
+                    "avg_distance": round(distance / matched, 2),
+                })
+        results.sort(key=lambda r: (-r["ratio"], r["avg_distance"]))
+        if results:
+            _add_stats(matches=1)
+        return results
+
+
+_index: Optional[PhashIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_phash_index(db) -> PhashIndex:
+    """进程内共享的感知哈希索引（首次调用时绑定数据库并在首次查询时加载）"""
+    global _index
+    with _index_lock:
+        if _index is None or (_index.db is not db and getattr(_index.db, "db_path", None) != getattr(db, "db_path", None)):
+            _index = PhashIndex(db)
+        return _index
@@ -0,0 +1,273 @@
+"""
+提示词注册表
+- 提示词模板在模块加载时编译一次（预先拆分为字面量与占位符），渲染时只做拼接，不再每次调用都重建多 KB 的 f-string
+- 每个模板的版本号为模板名与正文的哈希；视频分析的版本号还包含基线游戏分类参考，
+  随分析结果写入数据库（games.analysis_prompt_version），修改提示词或 GAME_TYPE.json 后可据此找出旧版本的分析
+- 基线游戏分类（data/GAME_TYPE.json）只在首次使用或文件修改时间变化时重新读取
+- 关键帧分析模式（modules/keyframes.py）在提示词末尾附加关键帧说明，版本号与视频模式不同，两种模式的分析分别缓存
+"""
+import hashlib
+import json
+import os
+import re
+import string
+import threading
+from typing import Dict, List, Optional, Tuple
+
+GAME_TYPE_JSON_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "GAME_TYPE.json")
+BASELINE_LIMIT = 50  # 基线分类参考最多列出的条数（限制提示词长度）
+BASELINE_FALLBACK = "请根据常见游戏类型判断（如：三消、合成、跑酷、射击、解谜等）"
+
+
+class PromptTemplate:
+    """编译后的提示词模板（str.format 语法，{{ }} 为字面量花括号）"""
+
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.text = text
+        self._parts: List[Tuple[str, Optional[str]]] = [
+            (literal, field) for literal, field, _, _ in string.Formatter().parse(text)
+        ]
+        self.fields = tuple(field for _, field in self._parts if field)
+        self.version = hashlib.sha256(f"{name}\n{text}".encode("utf-8")).hexdigest()[:12]
+
+    def render(self, **values) -> str:
+        """填入占位符（缺少的占位符抛出 KeyError）"""
+        out = []
+        for literal, field in self._parts:
+            out.append(literal)
+            if field:
+                out.append(str(values[field]))
+        return "".join(out)
+
+
+_templates: Dict[str, PromptTemplate] = {}
+
+
+def register(name: str, text: str) -> PromptTemplate:
+    """注册（编译）一个模板；同名模板会被替换"""
+    template = PromptTemplate(name, text)
+    _templates[name] = template
+    return template
+
+
+def get(name: str) -> PromptTemplate:
+    return _templates[name]
+
+
+# ---- 基线游戏分类（按文件修改时间缓存） ----
+
+_taxonomy_lock = threading.Lock()
+_taxonomy_cache = {"key": None, "reference": "", "digest": ""}
+
+
+def _format_baseline(game_types: Dict, limit: int) -> str:
+    baseline_list = []
+    for category in game_types.get("休闲游戏分类", []):
+        first_level = category.get("一级分类", "")
+        for second_level in category.get("二级分类", []):
+            second_name = second_level.get("名称", "")
+            for third_level in second_level.get("三级细分", []):
+                third_name = third_level.get("名称", "")
+                desc = third_level.get("描述", "")
+                example = third_level.get("代表作品", "")
+                baseline_list.append(f"- {first_level} > {second_name} > {third_name}：{desc}（代表作品：{example}）")
+    return "\n".join(baseline_list[:limit])
+
+
+def _load_taxonomy(path: str = None) -> Tuple[str, str]:
+    """返回 (基线分类参考文本, 文本哈希)；文件未变化时直接使用缓存"""
+    path = path or GAME_TYPE_JSON_PATH
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return "", ""
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _taxonomy_lock:
+        if _taxonomy_cache["key"] != key:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    reference = _format_baseline(json.load(f), BASELINE_LIMIT)
+            except Exception as e:
+                print(f"  警告：读取GAME_TYPE.json失败：{e}")
+                return "", ""
+            _taxonomy_cache.update(
+                key=key, reference=reference, digest=hashlib.sha256(reference.encode("utf-8")).hexdigest()[:12]
+            )
+        return _taxonomy_cache["reference"], _taxonomy_cache["digest"]
+
+
+def baseline_reference(path: str = None) -> str:
+    """
+    基线游戏分类参考文本（每行一个三级细分，最多 BASELINE_LIMIT 条）
+
+    Args:
+        path: 分类文件路径，默认 data/GAME_TYPE.json
+
+    Returns:
+        分类参考文本；文件不存在或读取失败时返回空字符串
+    """
+    return _load_taxonomy(path)[0]
+
+
+# ---- 视频玩法分析 ----
+
+FOCUS_INSTRUCTIONS = {
+    "new_entry": """【本游戏为新进榜游戏】请正常分析其核心玩法、基线游戏与创新点。在输出的 JSON 中可增加顶层字段 "is_new_entry": true 表示新游戏。""",
+    "rank_up": """【本游戏为排名提升/飙升游戏】请重点观察视频中是否存在新玩法或明显创新：
+- 若存在新玩法/新内容：正常输出 core_gameplay、baseline_game、innovation_points，并可在 innovation_points 中强调本次新玩法。
+- 若仍是老玩法、无显著创新：core_gameplay 与 baseline_game 照常写；在 innovation_points 中只保留一条："未发现新玩法，建议手动观察该游戏动态"。并增加顶层字段 "suggest_manual_watch": true。""",
+    "normal": """请正常分析核心玩法、基线游戏与创新点。""",
+}
+
+TEXT_ONLY_SUFFIX = "\n\n注意：由于视频格式限制，请基于游戏名称和类型进行通用分析。"
+
+KEYFRAMES_NOTE = register("video_analysis_keyframes", """
+
+说明：本次未提供完整视频，以下 {count} 张图片是按时间顺序从该游戏视频中抽取的关键画面（时间点依次为：{timestamps}）。请结合画面之间的变化推断操作方式、核心循环与关卡目标，不要臆测画面中看不出的内容。""")
+
+VIDEO_ANALYSIS = register("video_analysis", """你是一名“小游戏玩法拆解 & 品类微创新”分析师。
+
+{focus_instruction}
+
+本次只输出三个部分（以及上述情形下的可选字段）：
+1) 核心玩法（用通俗易懂的话说明游戏怎么玩）
+2) 基线游戏（参考下面的基线游戏分类，找出最相似的基线游戏类型）
+3) 基于基线游戏的创新点（说明相比基线游戏做了哪些改进或创新）
+
+不要做“吸引力分析/为什么好玩/目标用户/留存点”等内容，也不要输出相关字段。
+
+游戏名称：{game_name}
+游戏类型：{game_type}
+排名变化：{rank_change}
+
+基线游戏分类参考（请从中选择最相似的基线游戏类型）：
+{baseline_reference}
+
+请仔细观看视频内容，然后以JSON格式返回分析结果（严格JSON，可直接解析；至少包含下面三个顶层字段）：
+{{
+  "core_gameplay": "用通俗易懂的1-2段话说明核心玩法，包括：玩家要做什么、怎么操作、主要目标是什么。要求简短（80-150字），避免专业术语，用大白话解释。",
+  "baseline_game": "基线游戏类型，格式：一级分类 > 二级分类 > 三级细分（例如：益智解谜 > 消除类 > 交换三消），如果找不到完全匹配的，就写最接近的分类，不确定就写“未知”。",
+  "innovation_points": [
+    "列出 3-5 条基于基线游戏的创新点，每条用一句话说明（20-40字），要具体说明做了什么改进，不要空泛。若为排名提升且无新玩法，则只保留一条：未发现新玩法，建议手动观察该游戏动态。"
+  ]
+}}
+
+重要要求：
+1. **三个部分输出**：至少输出 `core_gameplay`、`baseline_game` 和 `innovation_points`，不要出现其他无关顶层字段。
+2. **通俗易懂**：所有描述都要用简单直白的话，避免专业术语，让普通人也能看懂。
+3. **简短精炼**：
+   - **core_gameplay**：80-150字，用1-2段话说明怎么玩
+   - **baseline_game**：直接写分类路径，如"益智解谜 > 消除类 > 交换三消"
+   - **innovation_points**：3-5条（或按上述情形为1条），每条20-40字，要具体说明创新点
+
+4. **必须仔细观察视频中的实际游戏画面和操作**
+
+5. **直接返回JSON格式，不要有任何前缀说明文字（如"好的"、"以下是"等）**
+
+6. **确保JSON格式正确，可以被解析**
+
+7. **所有描述都要基于视频中的实际内容，不要编造信息**
+
+示例格式：
+{{
+  "core_gameplay": "玩家通过点击屏幕发射小鸟攻击旋转的目标。需要找准时机在目标旋转的间隙中攻击，避开TNT等危险障碍物，收集青虫和宝石等奖励。通过不断攻击将目标的生命值清空即可通关。操作简单，只需要点击屏幕即可。",
+  "baseline_game": "街机动作 > 技巧/平台 > 精确控制",
+  "innovation_points": [
+    "将传统射击改为角色本身作为发射物",
+    "目标从单一变为可被逐步破坏的多层结构",
+    "增加了需要躲避的危险障碍物和可收集的奖励物",
+    "引入了生命值进度条，从插满变为摧毁目标"
+  ]
+}}""")
+
+
+def _format_timestamp(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "未知"
+    return f"{int(seconds) // 60}:{int(seconds) % 60:02d}"
+
+
+def build_video_analysis_prompt(game_name: str, game_type: str = "未知", rank_change: str = None,
+                                is_new_entry: bool = False, is_rank_up: bool = False,
+                                keyframe_timestamps: List[Optional[float]] = None) -> str:
+    """
+    视频玩法分析提示词
+
+    Args:
+        game_name: 游戏名称
+        game_type: 游戏类型（榜单字段）
+        rank_change: 排名变化，默认"--"
+        is_new_entry: 是否新进榜（优先于 is_rank_up）
+        is_rank_up: 是否排名提升
+        keyframe_timestamps: 关键帧分析模式下各关键帧的时间（秒），提供时附加关键帧说明
+    """
+    focus = "new_entry" if is_new_entry else ("rank_up" if is_rank_up else "normal")
+    prompt = VIDEO_ANALYSIS.render(
+        focus_instruction=FOCUS_INSTRUCTIONS[focus],
+        game_name=game_name,
+        game_type=game_type,
+        rank_change=rank_change or "--",
+        baseline_reference=baseline_reference() or BASELINE_FALLBACK,
+    )
+    if keyframe_timestamps:
+        prompt += KEYFRAMES_NOTE.render(
+            count=len(keyframe_timestamps),
+            timestamps="、".join(_format_timestamp(t) for t in keyframe_timestamps),
+        )
+    return prompt
+
+
+def video_analysis_version(mode: str = "video") -> str:
+    """
+    视频分析提示词版本：模板、关注点说明与基线分类参考任一变化都会得到新版本
+
+    Args:
+        mode: 分析模式 video / keyframes（关键帧模式的版本还包含关键帧说明模板）
+    """
+    parts = [VIDEO_ANALYSIS.version, TEXT_ONLY_SUFFIX] + [FOCUS_INSTRUCTIONS[k] for k in sorted(FOCUS_INSTRUCTIONS)]
+    parts.append(_load_taxonomy()[1])
+    if mode == "keyframes":
+        parts.append(KEYFRAMES_NOTE.version)
+    return "va-" + hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:12]
+
+
+# ---- 周报玩法趋势 ----
+
+WEEKLY_TRENDS = register("weekly_trends", """你是一位游戏市场与玩法分析专家。下面给出的是「本周」各平台（微信小游戏、抖音小游戏、iOS、Android）排行榜中、已有玩法分析的游戏列表及其玩法分析内容与排名变化。
+
+请基于这些内容，为**每个平台**分别写一段「本周玩法趋势」分析（每段控制在 150–250 字，避免过长导致输出被截断）：
+1. 概括该平台本周榜单中的主流/热点玩法类型；
+2. 结合排名变化（上升/新进榜/下降）指出哪些玩法在升温、哪些在降温；
+3. 若有「上周各平台玩法趋势」参考，请简要对比本周与上周的变化（同与异）。
+
+要求：
+- **必须**输出一个合法的 JSON 对象，不要任何解释或 markdown 包裹；键必须为 wx, dy, ios, android；某平台无数据则对应值为空字符串 ""；
+- JSON 内字符串中的双引号请用反斜杠转义（如 \\"），不要换行，确保可被解析；
+- 语言简洁、有条理，可直接用于周报；不要编造未在输入中出现的游戏或玩法。
+
+格式示例（请严格按此格式输出）：
+{{"wx": "微信小游戏的趋势分析正文...", "dy": "抖音小游戏的趋势分析正文...", "ios": "iOS 的趋势分析正文...", "android": "Android 的趋势分析正文..."}}
+
+【本周各平台榜单游戏玩法】
+{input_text}
+""")
+
+
+def build_weekly_trends_prompt(input_text: str, last_week_block: str = "") -> str:
+    """周报玩法趋势提示词（last_week_block 为上周趋势参考，可为空）"""
+    prompt = WEEKLY_TRENDS.render(input_text=input_text)
+    if last_week_block:
+        prompt += f"\n\n{last_week_block}\n"
+    return prompt
+
+
+# ---- 提示词长度估算 ----
+
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3400-\u9fff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中文字符与全角标点各约 1 个 token，其余字符约 4 个一个 token"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
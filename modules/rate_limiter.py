@@ -0,0 +1,264 @@
+"""
+API限流模块
+按主机共享的自适应令牌桶：进程内共享，配置 RATE_LIMIT_STATE_DIR 后可通过文件锁跨进程共享；
+遇到 429 / Retry-After 时降速并暂停，连续成功后逐步恢复，取代各处固定的 time.sleep
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import config
+
+try:
+    import fcntl
+    FILE_LOCK_AVAILABLE = True
+except ImportError:
+    FILE_LOCK_AVAILABLE = False
+
+
+class _MemoryState:
+    """进程内状态存储"""
+
+    def __init__(self, initial: Dict):
+        self._lock = threading.Lock()
+        self._state = dict(initial)
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            yield self._state
+
+
+class _FileState:
+    """基于文件锁的跨进程状态存储（同一主机的多个进程共享一个 JSON 状态文件）"""
+
+    def __init__(self, path: str, initial: Dict):
+        self._thread_lock = threading.Lock()
+        self._path = path
+        self._lock_path = path + ".lock"
+        self._initial = dict(initial)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    @contextmanager
+    def transaction(self):
+        with self._thread_lock:
+            with open(self._lock_path, "a+") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    state = dict(self._initial)
+                    try:
+                        with open(self._path, "r", encoding="utf-8") as f:
+                            state.update(json.load(f))
+                    except (FileNotFoundError, json.JSONDecodeError):
+                        pass
+                    yield state
+                    tmp_path = self._path + ".tmp"
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump(state, f)
+                    os.replace(tmp_path, self._path)
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class TokenBucket:
+    """
+    自适应令牌桶（AIMD）：
+    - 每次请求前 acquire() 取一个令牌，不足时等待
+    - 429：速率减半，并按 Retry-After（无则按当前速率间隔）暂停整个桶
+    - 5xx / 网络错误：按 API_RETRY_DELAY 指数退避暂停，速率不变
+    - 成功：速率按初始速率的 10% 逐步回升，不超过上限
+    """
+
+    def __init__(self, name: str, rate: float, burst: float, state_dir: str = None):
+        """
+        初始化令牌桶
+
+        Args:
+            name: 桶名称（一般为主机名）
+            rate: 初始速率（每秒请求数）
+            burst: 突发容量（令牌上限）
+            state_dir: 状态文件目录，设置后跨进程共享
+        """
+        self.name = name
+        self.base_rate = rate
+        self.min_rate = rate * config.API_RATE_MIN_FACTOR
+        self.max_rate = rate * config.API_RATE_MAX_FACTOR
+        self.burst = max(1.0, burst)
+        initial = {
+            "tokens": self.burst,
+            "rate": rate,
+            "updated_at": time.time(),
+            "blocked_until": 0.0,
+            "error_streak": 0,
+        }
+        if state_dir and FILE_LOCK_AVAILABLE:
+            safe_name = "".join(c if c.isalnum() or c in ".-" else "_" for c in name)
+            self._state = _FileState(os.path.join(state_dir, f"{safe_name}.json"), initial)
+        else:
+            self._state = _MemoryState(initial)
+        self._stats_lock = threading.Lock()
+        self.stats = {"acquired": 0, "waited_seconds": 0.0, "throttled": 0, "errors": 0}
+
+    @staticmethod
+    def _refill(state: Dict, now: float, burst: float):
+        elapsed = max(0.0, now - state["updated_at"])
+        state["tokens"] = min(burst, state["tokens"] + elapsed * state["rate"])
+        state["updated_at"] = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        获取令牌，不足或处于暂停期时阻塞等待
+
+        Returns:
+            本次等待的秒数
+        """
+        waited = 0.0
+        while True:
+            now = time.time()
+            with self._state.transaction() as state:
+                self._refill(state, now, self.burst)
+                if state["blocked_until"] > now:
+                    wait = state["blocked_until"] - now
+                elif state["tokens"] >= tokens:
+                    state["tokens"] -= tokens
+                    wait = 0.0
+                else:
+                    wait = (tokens - state["tokens"]) / max(state["rate"], 1e-6)
+            if wait <= 0:
+                break
+            # 分段睡眠，便于其他进程/线程调整状态后及时生效
+            wait = min(wait, 5.0)
+            time.sleep(wait)
+            waited += wait
+        with self._stats_lock:
+            self.stats["acquired"] += 1
+            self.stats["waited_seconds"] += waited
+        return waited
+
+    def on_success(self):
+        """请求成功：速率缓慢回升"""
+        with self._state.transaction() as state:
+            state["error_streak"] = 0
+            state["rate"] = min(self.max_rate, state["rate"] + self.base_rate * 0.1)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        """收到 429：速率减半并暂停"""
+        now = time.time()
+        with self._state.transaction() as state:
+            state["rate"] = max(self.min_rate, state["rate"] / 2)
+            pause = retry_after if retry_after is not None else 1.0 / state["rate"]
+            state["blocked_until"] = max(state["blocked_until"], now + pause)
+            state["tokens"] = 0.0
+            state["updated_at"] = now
+        with self._stats_lock:
+            self.stats["throttled"] += 1
+        print(f"    [限流] {self.name} 返回429，降速至 {state['rate']:.2f} 次/秒，暂停 {pause:.1f} 秒")
+
+    def on_error(self):
+        """5xx / 网络错误：指数退避暂停"""
+        now = time.time()
+        with self._state.transaction() as state:
+            state["error_streak"] = state.get("error_streak", 0) + 1
+            pause = min(60.0, config.API_RETRY_DELAY * (2 ** (state["error_streak"] - 1)))
+            state["blocked_until"] = max(state["blocked_until"], now + pause)
+        with self._stats_lock:
+            self.stats["errors"] += 1
+
+    def observe(self, status_code: int, retry_after_header: Optional[str] = None):
+        """根据响应状态码反馈调整速率"""
+        if status_code == 429:
+            self.on_throttle(parse_retry_after(retry_after_header))
+        elif status_code >= 500:
+            self.on_error()
+        elif status_code < 400:
+            self.on_success()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 头（秒数或 HTTP 日期），无法解析返回 None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def _parse_rate_limits(spec: str) -> Dict[str, tuple]:
+    """解析 API_RATE_LIMITS：'host=每秒请求数:突发容量,host2=...'"""
+    limits = {}
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item or "=" not in item:
+            continue
+        host, value = item.split("=", 1)
+        rate_str, _, burst_str = value.partition(":")
+        try:
+            rate = float(rate_str)
+            burst = float(burst_str) if burst_str else 1.0
+        except ValueError:
+            print(f"警告：无法解析限流配置：{item}")
+            continue
+        if rate > 0:
+            limits[host.strip().lower()] = (rate, burst)
+    return limits
+
+
+def _default_rate_limits() -> Dict[str, tuple]:
+    """未配置 API_RATE_LIMITS 时，按原 API_REQUEST_DELAY 推导 TikHub / RapidAPI 的初始速率"""
+    if config.API_REQUEST_DELAY <= 0:
+        return {}
+    rate = 1.0 / config.API_REQUEST_DELAY
+    hosts = {
+        urlsplit(config.DOUYIN_API_BASE_URL).hostname,
+        urlsplit(config.YOUTUBE_API_BASE_URL).hostname,
+        urlsplit(config.RAPIDAPI_YOUTUBE_BASE_URL).hostname,
+    }
+    return {h.lower(): (rate, 1.0) for h in hosts if h}
+
+
+_limits = _parse_rate_limits(config.API_RATE_LIMITS) if config.API_RATE_LIMITS else _default_rate_limits()
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_limiter(url_or_host: str) -> Optional[TokenBucket]:
+    """
+    获取某主机的令牌桶（进程内单例）
+
+    Args:
+        url_or_host: 完整 URL 或主机名
+
+    Returns:
+        TokenBucket；该主机未配置限流时返回 None
+    """
+    host = urlsplit(url_or_host).hostname if "://" in url_or_host else url_or_host
+    host = (host or "").lower()
+    if host not in _limits:
+        return None
+    bucket = _buckets.get(host)
+    if bucket is not None:
+        return bucket
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            rate, burst = _limits[host]
+            bucket = TokenBucket(host, rate, burst, state_dir=config.RATE_LIMIT_STATE_DIR or None)
+            _buckets[host] = bucket
+        return bucket
+
+
+def get_limiter_stats() -> Dict[str, Dict]:
+    """获取各主机令牌桶的统计（获取次数、累计等待秒数、429 次数、错误次数）"""
+    with _buckets_lock:
+        return {host: dict(bucket.stats) for host, bucket in _buckets.items()}
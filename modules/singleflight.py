@@ -0,0 +1,94 @@
+"""
+单次执行（single-flight）模块
+同一次运行内，相同操作 + 相同键（如规范化后的游戏名）的调用只真正执行一次：
+并发调用等待进行中的那一次并共享结果，之后的重复调用直接复用结果；
+同一游戏出现在多个榜单/平台时，避免重复搜索、下载、上传和分析
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    """一次进行中（或已完成）的调用"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """
+    按 (操作类型, 键) 合并调用：
+    - 首次调用执行 fn 并记录结果（包括 None 等失败结果，本次运行内不再重试）
+    - 并发的相同调用阻塞等待首次调用完成，共享其结果或异常
+    - 抛出异常的调用不记录，后续调用会重新执行
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[tuple, _Call] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def do(self, kind: str, key: Hashable, fn: Callable, *args, **kwargs):
+        """
+        执行或复用一次调用
+
+        Args:
+            kind: 操作类型，如 search / download / upload / analysis（用于分类统计）
+            key: 调用键，一般为规范化后的游戏名（可为元组）
+            fn: 实际执行的函数
+            *args, **kwargs: 传给 fn 的参数
+
+        Returns:
+            fn 的返回值（可能来自其他调用）
+        """
+        call_key = (kind, key)
+        with self._lock:
+            stats = self._stats.setdefault(kind, {"executed": 0, "saved": 0})
+            call = self._calls.get(call_key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[call_key] = call
+                stats["executed"] += 1
+            else:
+                stats["saved"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._calls.pop(call_key, None)
+            raise
+        finally:
+            call.done.set()
+        return call.result
+
+    def forget(self, kind: str, key: Hashable):
+        """丢弃某次调用的记录（结果已失效时使用），下次调用重新执行"""
+        with self._lock:
+            self._calls.pop((kind, key), None)
+
+    def reset(self):
+        """清空所有调用记录与统计（每次工作流运行开始时调用）"""
+        with self._lock:
+            self._calls.clear()
+            self._stats.clear()
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        获取各操作类型的统计
+
+        Returns:
+            {kind: {"executed": 实际执行次数, "saved": 合并/复用而省下的调用次数}}
+        """
+        with self._lock:
+            return {kind: dict(s) for kind, s in self._stats.items()}
@@ -4,26 +4,41 @@
 """
 import requests
 import base64
+import hashlib
 import os
 import json
 import re
 from typing import Dict, Optional, List
 import config
+from modules import cost_governor, http_client, keyframes, phash, prompt_registry
 
-# 尝试导入视频处理库
-try:
-    from PIL import Image
-    import cv2
-    VIDEO_PROCESSING_AVAILABLE = True
-except ImportError:
-    VIDEO_PROCESSING_AVAILABLE = False
-    print("警告：未安装视频处理库（opencv-python, pillow），将使用文本模式分析")
+ANALYSIS_MODES = ("video", "keyframes")
+
+if not keyframes.KEYFRAMES_AVAILABLE:
+    print("警告：未安装视频处理库（opencv-python, numpy），关键帧分析模式不可用，将使用视频URL分析")
+
+
+def _parse_mode_map(spec: str) -> Dict[str, str]:
+    """解析 ANALYSIS_MODE_BY_MODEL：'模型=模式,模型2=模式'"""
+    modes = {}
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item or "=" not in item:
+            continue
+        model, mode = item.rsplit("=", 1)
+        mode = mode.strip().lower()
+        if mode not in ANALYSIS_MODES:
+            print(f"警告：无法解析分析模式配置：{item}")
+            continue
+        modes[model.strip()] = mode
+    return modes
 
 
 class VideoAnalyzer:
     """视频分析器，使用OpenRouter API"""
     
-    def __init__(self, api_key: str = None, model: str = None, use_database: bool = True):
+    def __init__(self, api_key: str = None, model: str = None, use_database: bool = True, refresh_stale: str = None,
+                 analysis_mode: str = None, phash_reuse_mode: str = None):
         """
         初始化视频分析器
         
@@ -31,11 +46,26 @@ class VideoAnalyzer:
             api_key: OpenRouter API密钥，默认从配置文件读取
             model: 使用的模型名称，默认从配置文件读取
             use_database: 是否使用数据库存储分析结果，默认True
+            refresh_stale: 已有分析何时重新分析：all / video / off，默认 ANALYSIS_REFRESH_STALE（all）
+            analysis_mode: 分析模式 video（发送视频URL）/ keyframes（发送本地视频的关键帧），
+                默认按 ANALYSIS_MODE_BY_MODEL 中该模型的设置，未设置时为 ANALYSIS_MODE
+            phash_reuse_mode: 近似重复视频复用已有分析：off / draft / skip，默认 PHASH_REUSE_MODE
         """
         self.api_key = api_key or config.OPENROUTER_API_KEY
         self.model = model or config.VIDEO_ANALYSIS_MODEL
         self.base_url = config.OPENROUTER_BASE_URL
         self.use_database = use_database
+        self.refresh_stale = (refresh_stale or config.ANALYSIS_REFRESH_STALE or "all").lower()
+        mode = (analysis_mode or _parse_mode_map(config.ANALYSIS_MODE_BY_MODEL).get(self.model)
+                or config.ANALYSIS_MODE or "video").lower()
+        if mode not in ANALYSIS_MODES:
+            print(f"警告：未知的分析模式 {mode}，使用 video")
+            mode = "video"
+        self.analysis_mode = mode
+        self.phash_reuse_mode = (phash_reuse_mode or config.PHASH_REUSE_MODE or "off").lower()
+        # needs_request 的近似重复检测结果（(视频键, 提示词版本) -> _find_reuse_source 的结果，未找到时为None），
+        # analyze_video 取用，避免同一视频重复计算哈希与查询
+        self._reuse_sources: Dict[tuple, Optional[Dict]] = {}
         
         # 初始化数据库
         if use_database:
@@ -92,82 +122,223 @@ class VideoAnalyzer:
     
     def _extract_video_frames(self, video_path: str, max_frames: int = 5) -> List[str]:
         """
-        从视频中提取关键帧作为图像
+        从视频中均匀提取若干帧作为图像（见 modules/keyframes.py）
         
         Args:
             video_path: 视频文件路径
             max_frames: 最大提取帧数
         
         Returns:
-            base64编码的图像列表
+            base64编码的JPEG图像列表
+        """
+        frames = keyframes.extract_keyframes(video_path, count=max_frames, method="uniform", max_side=1024, quality=85)
+        return [base64.b64encode(frame["jpeg"]).decode("utf-8") for frame in frames]
+    
+    def _keyframe_source(self, game_name: str = None, video_path: str = None) -> Optional[str]:
+        """关键帧模式使用的本地视频（未安装 opencv 时返回None）"""
+        if not keyframes.KEYFRAMES_AVAILABLE:
+            return None
+        return self._local_video(game_name, video_path)
+    
+    def _local_video(self, game_name: str = None, video_path: str = None) -> Optional[str]:
+        """本地视频：传入的 video_path，其次数据库中记录的下载路径；没有可用文件时返回None"""
+        if video_path and os.path.exists(video_path):
+            return video_path
+        if self.use_database and self.db and game_name:
+            local_path = (self.db.get_game(game_name) or {}).get("local_path")
+            if local_path and os.path.exists(local_path):
+                return local_path
+        return None
+    
+    def _effective_mode(self, game_name: str = None, video_path: str = None, analysis_mode: str = None):
+        """
+        本次实际使用的分析模式（关键帧模式没有本地视频时退回 video）
+        
+        Returns:
+            (模式, 关键帧模式使用的本地视频路径或None)
+        """
+        mode = (analysis_mode or self.analysis_mode).lower()
+        if mode != "keyframes":
+            return "video", None
+        source = self._keyframe_source(game_name, video_path)
+        return ("keyframes", source) if source else ("video", None)
+    
+    def needs_request(self, game_name: str = None, force_refresh: bool = False, video_url: str = None,
+                      video_path: str = None) -> bool:
+        """
+        analyze_video 是否会请求 OpenRouter（数据库有可用的分析结果或未配置API密钥时不会，供分析引擎决定是否占用并发名额）
+        
+        Args:
+            game_name: 游戏名称
+            force_refresh: 是否强制重新分析
+            video_url: 视频URL（数据库中没有视频信息时用于生成视频键）
+            video_path: 本地视频路径（关键帧模式）
+        """
+        if not self.api_key:
+            return False
+        mode, _ = self._effective_mode(game_name, video_path)
+        cached, video_key, stale_reason = self._lookup_cached(game_name, video_url, force_refresh, mode)
+        if cached is not None:
+            return False
+        if force_refresh or stale_reason:
+            return True
+        # 近似重复视频会直接复用已有分析，不请求API（结果留给随后的 analyze_video）
+        prompt_version = prompt_registry.video_analysis_version(mode)
+        self._reuse_sources.pop((video_key, prompt_version), None)
+        found = self._find_reuse_source(game_name, video_path, video_key, prompt_version)
+        self._reuse_sources[(video_key, prompt_version)] = found
+        return not found
+    
+    @staticmethod
+    def _drive_file_id(url: Optional[str]) -> Optional[str]:
+        match = re.search(r"(?:/d/|[?&]id=)([\w-]+)", url or "")
+        return match.group(1) if match else None
+    
+    def _video_key(self, game_name: str, video_url: str = None) -> Optional[str]:
+        """
+        被分析视频的键：Drive 文件的 md5（内容索引中有记录时）> 视频ID（aweme_id）> Drive 文件ID > 视频URL哈希
+        """
+        game = self.db.get_game(game_name) or {}
+        file_id = game.get("gdrive_file_id") or self._drive_file_id(game.get("gdrive_url") or video_url)
+        if file_id:
+            indexed = self.db.get_gdrive_file_by_id(file_id)
+            if indexed and indexed.get("md5"):
+                return f"md5:{indexed['md5']}"
+        if game.get("aweme_id"):
+            return f"aweme:{game['aweme_id']}"
+        if file_id:
+            return f"gdrive:{file_id}"
+        url = video_url or game.get("original_video_url") or game.get("video_url")
+        if url:
+            return "url:" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+        return None
+    
+    def _stale_reason(self, current: Dict, video_key: Optional[str], prompt_version: str) -> Optional[str]:
+        """按 refresh_stale 判断当前分析是否需要重新分析，返回原因（不需要时返回None）"""
+        if self.refresh_stale == "off":
+            return None
+        old_key = current.get("video_key")
+        # 只比较同一种视频键（旧版分析没有视频键，键的种类不同时无法判断视频是否更换）
+        if video_key and old_key and old_key.split(":", 1)[0] == video_key.split(":", 1)[0] and old_key != video_key:
+            return "视频已更换"
+        if self.refresh_stale == "all" and (
+            current.get("analysis_model") != self.model or current.get("prompt_version") != prompt_version
+        ):
+            return "模型或提示词版本不同"
+        return None
+    
+    def _lookup_cached(self, game_name: str, video_url: str = None, force_refresh: bool = False,
+                       mode: str = "video"):
+        """
+        查找可直接使用的已有分析（mode 为本次的分析模式，两种模式的提示词版本不同）
+        
+        Returns:
+            (已有分析或None, 视频键, 已有分析过期的原因或None)
+        """
+        if not (self.use_database and self.db and game_name):
+            return None, None, None
+        video_key = self._video_key(game_name, video_url)
+        if force_refresh:
+            return None, video_key, None
+        prompt_version = prompt_registry.video_analysis_version(mode)
+        if video_key:
+            exact = self.db.get_analysis(video_key, self.model, prompt_version)
+            if exact:
+                return exact, video_key, None
+        current = self.db.get_gameplay_analysis(game_name)
+        if not (current and current.get("gameplay_analysis")):
+            return None, video_key, None
+        reason = self._stale_reason(current, video_key, prompt_version)
+        if reason:
+            return None, video_key, reason
+        return current, video_key, None
+    
+    def _find_reuse_source(self, game_name: str, video_path: str = None, video_key: str = None,
+                           prompt_version: str = None) -> Optional[Dict]:
         """
-        if not VIDEO_PROCESSING_AVAILABLE:
-            return []
+        查找可复用的近似重复视频分析（见 PHASH_REUSE_MODE），只接受用当前模型与提示词版本分析过的视频
         
+        Returns:
+            {"source": 被复用的分析（get_analysis 的返回值）, "match": find_similar 的一项, "frames": 本视频采样帧数}；
+            未开启、没有本地视频或没有可复用的分析时返回None
+        """
+        if self.phash_reuse_mode not in ("draft", "skip") or not phash.PHASH_AVAILABLE:
+            return None
+        if not (self.use_database and self.db and game_name and video_key):
+            return None
+        cache_key = (video_key, prompt_version)
+        if cache_key in self._reuse_sources:
+            return self._reuse_sources.pop(cache_key, None)
+        source_path = self._local_video(game_name, video_path)
+        if not source_path:
+            return None
         try:
-            import cv2
-            from PIL import Image
-            import io
-            
-            # 打开视频
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                print(f"    无法打开视频文件：{video_path}")
-                return []
-            
-            # 获取视频信息
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            duration = total_frames / fps if fps > 0 else 0
-            
-            print(f"    视频信息：总帧数={total_frames}, FPS={fps:.2f}, 时长={duration:.2f}秒")
-            
-            # 计算提取帧的间隔（均匀分布）
-            if total_frames <= max_frames:
-                frame_indices = list(range(total_frames))
-            else:
-                step = total_frames // max_frames
-                frame_indices = [i * step for i in range(max_frames)]
-                # 确保包含最后一帧
-                if frame_indices[-1] != total_frames - 1:
-                    frame_indices[-1] = total_frames - 1
-            
-            frames_base64 = []
-            
-            for idx in frame_indices:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-                ret, frame = cap.read()
-                
-                if not ret:
+            hashes = phash.video_hashes(source_path)
+            if not hashes:
+                return None
+            index = phash.get_phash_index(self.db)
+            matches = index.find_similar(video_key, hashes)
+            # 本视频也加入索引，之后的换皮视频可以匹配到它
+            index.add(video_key, hashes, game_name)
+            rejected = {link["source_video_key"] for link in self.db.get_analysis_links("rejected", video_key)}
+            for candidate in matches:
+                if candidate["video_key"] in rejected:
                     continue
-                
-                # 转换BGR到RGB（OpenCV使用BGR，PIL使用RGB）
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # 转换为PIL Image
-                pil_image = Image.fromarray(frame_rgb)
-                
-                # 调整大小（如果太大，限制最大尺寸）
-                max_size = 1024
-                if pil_image.width > max_size or pil_image.height > max_size:
-                    pil_image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-                
-                # 转换为JPEG格式的base64
-                buffer = io.BytesIO()
-                pil_image.save(buffer, format='JPEG', quality=85)
-                frame_bytes = buffer.getvalue()
-                frame_base64 = base64.b64encode(frame_bytes).decode('utf-8')
-                
-                frames_base64.append(frame_base64)
-            
-            cap.release()
-            return frames_base64
-            
+                source = self.db.get_analysis(candidate["video_key"], self.model, prompt_version)
+                if source and source.get("gameplay_analysis"):
+                    return {"source": source, "match": candidate, "frames": len(hashes)}
         except Exception as e:
-            print(f"    提取视频帧时出错：{str(e)}")
-            import traceback
-            traceback.print_exc()
-            return []
+            print(f"  ⚠ 近似重复检测出错，继续正常分析：{str(e)}")
+        return None
+    
+    def _reuse_near_duplicate(self, game_name: str, video_path: str = None, video_key: str = None,
+                              prompt_version: str = None) -> Optional[Dict]:
+        """
+        近似重复视频（换皮/克隆游戏）复用已有分析，见 PHASH_REUSE_MODE：
+        draft 返回已有分析作为草稿（不写入该游戏，待人工确认），skip 直接写入该游戏（可人工驳回）
+        
+        Returns:
+            复用的分析结果；未开启、没有本地视频或没有可复用的分析时返回None
+        """
+        found = self._find_reuse_source(game_name, video_path, video_key, prompt_version)
+        if not found:
+            return None
+        source, match = found["source"], found["match"]
+        
+        mode = self.phash_reuse_mode
+        analysis_text = source["gameplay_analysis"]
+        analysis_id = None
+        if mode == "skip":
+            # 来源分析与本次的模型、提示词版本相同，写入后下次运行直接命中缓存
+            self.db.save_gameplay_analysis(
+                game_name, analysis_text, self.model, prompt_version=prompt_version, video_key=video_key,
+            )
+            saved = self.db.get_analysis(video_key, self.model, prompt_version)
+            analysis_id = saved.get("analysis_id") if saved else None
+        link_id = self.db.save_analysis_link(
+            game_name, video_key, source, mode, match["ratio"], match["avg_distance"], analysis_id
+        )
+        phash.record_reuse(mode)
+        print(f"✓ {game_name} 的视频与 {source.get('game_name') or match['video_key']} 近似重复"
+              f"（{match['matched']}/{found['frames']} 帧匹配，平均距离 {match['avg_distance']}），"
+              + ("已复用其分析" if mode == "skip" else "提供其分析作为草稿（待确认）")
+              + f"，复核：python scripts/tools/review_analysis_links.py（记录 #{link_id}）")
+        return {
+            "game_name": game_name,
+            "analysis": analysis_text,
+            "analysis_data": self._parse_analysis_json(analysis_text),
+            "model_used": source.get("analysis_model", "unknown"),
+            "prompt_version": source.get("prompt_version"),
+            "status": "reused" if mode == "skip" else "draft",
+            "reused_from": {
+                "game_name": source.get("game_name"),
+                "video_key": match["video_key"],
+                "analysis_id": source.get("analysis_id"),
+                "match_ratio": match["ratio"],
+                "avg_distance": match["avg_distance"],
+                "link_id": link_id,
+            },
+        }
     
     def analyze_video(
         self,
@@ -176,6 +347,7 @@ class VideoAnalyzer:
         game_info: Dict = None,
         video_url: str = None,
         force_refresh: bool = False,
+        analysis_mode: str = None,
     ) -> Optional[Dict]:
         """
         分析视频内容，提取游戏玩法信息
@@ -186,42 +358,62 @@ class VideoAnalyzer:
             game_info: 游戏的其他信息（可选）
             video_url: 视频URL（优先使用，如果不提供则尝试从数据库获取）
             force_refresh: 是否强制重新分析（忽略数据库中的玩法分析缓存）
+            analysis_mode: 本次的分析模式 video / keyframes，默认使用初始化时确定的模式
         
         Returns:
-            分析结果字典，包含玩法解析等信息
+            分析结果字典，包含玩法解析等信息；付费API预算用尽时返回None（留待下次运行）
         """
-        # 首先检查数据库是否已有分析结果
-        if (not force_refresh) and self.use_database and self.db and game_name:
-            existing_analysis = self.db.get_gameplay_analysis(game_name)
-            if existing_analysis and existing_analysis.get("gameplay_analysis"):
-                print(f"✓ 找到 {game_name} 的已有分析结果（使用数据库缓存）")
-                print(f"  分析模型：{existing_analysis.get('analysis_model', 'unknown')}")
-                print(f"  分析时间：{existing_analysis.get('analyzed_at', 'unknown')}")
-                
-                # 获取原始分析文本
-                analysis_text = existing_analysis.get("gameplay_analysis")
-                
-                # 尝试解析JSON格式的分析数据
-                analysis_data = self._parse_analysis_json(analysis_text)
-                
-                if analysis_data:
-                    print(f"  ✓ 成功解析缓存中的JSON格式数据")
-                else:
-                    print(f"  ⚠ 缓存数据不是JSON格式，将使用文本格式")
-                
-                return {
-                    "game_name": game_name,
-                    "analysis": analysis_text,  # 原始文本
-                    "analysis_data": analysis_data,  # 解析后的结构化数据
-                    "model_used": existing_analysis.get("analysis_model", "unknown"),
-                    "status": "cached"
-                }
+        # 首先检查数据库是否已有分析结果（按视频、模型与提示词版本；过期规则见 refresh_stale）
+        mode, keyframe_source = self._effective_mode(game_name, video_path, analysis_mode)
+        existing_analysis, video_key, stale_reason = self._lookup_cached(game_name, video_url, force_refresh, mode)
+        prompt_version = prompt_registry.video_analysis_version(mode)
+        if stale_reason:
+            print(f"  ⚠ {game_name} 的已有分析已过期（{stale_reason}），重新分析")
+        if existing_analysis:
+            # 同一视频已由其他任务分析完成：needs_request 留下的近似重复检测结果不再需要
+            self._reuse_sources.pop((video_key, prompt_version), None)
+            # 该视频用当前模型与提示词分析过（可能记在其他游戏名下）时，让本游戏也指向这条分析
+            if existing_analysis.get("analysis_id"):
+                self.db.set_current_analysis(game_name, existing_analysis)
+            print(f"✓ 找到 {game_name} 的已有分析结果（使用数据库缓存）")
+            print(f"  分析模型：{existing_analysis.get('analysis_model', 'unknown')}")
+            print(f"  分析时间：{existing_analysis.get('analyzed_at', 'unknown')}")
+            
+            # 获取原始分析文本
+            analysis_text = existing_analysis.get("gameplay_analysis")
+            
+            # 尝试解析JSON格式的分析数据
+            analysis_data = self._parse_analysis_json(analysis_text)
+            
+            if analysis_data:
+                print(f"  ✓ 成功解析缓存中的JSON格式数据")
+            else:
+                print(f"  ⚠ 缓存数据不是JSON格式，将使用文本格式")
+            
+            return {
+                "game_name": game_name,
+                "analysis": analysis_text,  # 原始文本
+                "analysis_data": analysis_data,  # 解析后的结构化数据
+                "model_used": existing_analysis.get("analysis_model", "unknown"),
+                "status": "cached"
+            }
         
         if not self.api_key:
             print("警告：未配置OpenRouter API密钥，使用Mock分析结果")
             return self._mock_analyze(video_path, game_name, game_info)
         
+        # 与已分析视频近似重复（换皮/克隆）时复用其分析，不再请求付费API
+        # （强制重新分析或已有分析过期时不复用：这时需要的正是一次新的分析）
+        if force_refresh or stale_reason:
+            self._reuse_sources.pop((video_key, prompt_version), None)
+        else:
+            reused = self._reuse_near_duplicate(game_name, video_path, video_key, prompt_version)
+            if reused:
+                return reused
+        
         print(f"正在使用 {self.model} 分析视频：{game_name}")
+        if (analysis_mode or self.analysis_mode) == "keyframes" and mode != "keyframes":
+            print(f"  ⚠ 没有可用的本地视频（或未安装 opencv），关键帧模式退回视频URL分析")
         
         # 优先从数据库获取Google Drive URL，如果没有则尝试其他URL
         if not video_url and self.use_database and self.db and game_name:
@@ -241,14 +433,27 @@ class VideoAnalyzer:
                         url_type = "视频URL"
                     print(f"  从数据库获取{url_type}：{video_url[:50]}...")
         
+        # 关键帧模式：从本地视频抽取关键帧作为图片发送（抽取失败时退回视频URL分析）
+        frames = []
+        if mode == "keyframes":
+            frames = keyframes.extract_keyframes(keyframe_source)
+            if frames:
+                print(f"  已抽取 {len(frames)} 张关键帧（{config.KEYFRAME_METHOD}，长边 ≤ {config.KEYFRAME_MAX_SIDE}px）："
+                      f"{sum(len(f['jpeg']) for f in frames) / 1024:.0f} KB")
+            else:
+                print(f"  ⚠ 未能抽取关键帧，退回视频URL分析")
+                mode = "video"
+        
         # 如果既没有video_url也没有video_path，使用Mock
-        if not video_url and (not video_path or not os.path.exists(video_path)):
+        if not frames and not video_url and (not video_path or not os.path.exists(video_path)):
             print(f"警告：未提供视频URL或视频文件不存在，使用Mock分析结果")
             return self._mock_analyze(video_path, game_name, game_info)
         
         try:
-            # 优先使用video_url
-            if video_url:
+            # 关键帧模式 > video_url > 本地文件
+            if frames:
+                use_url = False
+            elif video_url:
                 print(f"  使用视频URL进行分析：{video_url[:50]}...")
                 use_url = True
             else:
@@ -256,99 +461,19 @@ class VideoAnalyzer:
                 print(f"  警告：未提供视频URL，尝试使用本地文件（不推荐）")
                 use_url = False
             
-            # 读取GAME_TYPE.json作为基线游戏参考
-            game_type_json_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "GAME_TYPE.json")
-            baseline_reference = ""
-            try:
-                if os.path.exists(game_type_json_path):
-                    with open(game_type_json_path, 'r', encoding='utf-8') as f:
-                        game_types = json.load(f)
-                        # 提取所有基线游戏分类信息
-                        baseline_list = []
-                        for category in game_types.get("休闲游戏分类", []):
-                            first_level = category.get("一级分类", "")
-                            for second_level in category.get("二级分类", []):
-                                second_name = second_level.get("名称", "")
-                                for third_level in second_level.get("三级细分", []):
-                                    third_name = third_level.get("名称", "")
-                                    desc = third_level.get("描述", "")
-                                    example = third_level.get("代表作品", "")
-                                    baseline_list.append(f"- {first_level} > {second_name} > {third_name}：{desc}（代表作品：{example}）")
-                        if baseline_list:
-                            baseline_reference = "\n".join(baseline_list[:50])  # 限制长度
-            except Exception as e:
-                print(f"  警告：读取GAME_TYPE.json失败：{e}")
-            
-            # 根据排名变化类型选择分析重点
+            # 根据排名变化类型选择分析重点；提示词模板与基线游戏分类由注册表缓存（modules/prompt_registry.py）
             rank_change = (game_info or {}).get("排名变化") or ""
             is_new_entry = self._is_new_entry(rank_change)
             is_rank_up = self._is_rank_up(rank_change)
-            
-            if is_new_entry:
-                focus_instruction = """【本游戏为新进榜游戏】请正常分析其核心玩法、基线游戏与创新点。在输出的 JSON 中可增加顶层字段 "is_new_entry": true 表示新游戏。"""
-            elif is_rank_up:
-                focus_instruction = """【本游戏为排名提升/飙升游戏】请重点观察视频中是否存在新玩法或明显创新：
-- 若存在新玩法/新内容：正常输出 core_gameplay、baseline_game、innovation_points，并可在 innovation_points 中强调本次新玩法。
-- 若仍是老玩法、无显著创新：core_gameplay 与 baseline_game 照常写；在 innovation_points 中只保留一条："未发现新玩法，建议手动观察该游戏动态"。并增加顶层字段 "suggest_manual_watch": true。"""
-            else:
-                focus_instruction = """请正常分析核心玩法、基线游戏与创新点。"""
-            
-            # 构建API请求
-            # 要求返回结构化且可解析的JSON；只输出三个部分：核心玩法、基线游戏、基于基线游戏的创新点
-            prompt = f"""你是一名“小游戏玩法拆解 & 品类微创新”分析师。
-
-{focus_instruction}
-
-本次只输出三个部分（以及上述情形下的可选字段）：
-1) 核心玩法（用通俗易懂的话说明游戏怎么玩）
-2) 基线游戏（参考下面的基线游戏分类，找出最相似的基线游戏类型）
-3) 基于基线游戏的创新点（说明相比基线游戏做了哪些改进或创新）
-
-不要做“吸引力分析/为什么好玩/目标用户/留存点”等内容，也不要输出相关字段。
-
-游戏名称：{game_name}
-游戏类型：{game_info.get('游戏类型', '未知') if game_info else '未知'}
-排名变化：{rank_change or '--'}
-
-基线游戏分类参考（请从中选择最相似的基线游戏类型）：
-{baseline_reference if baseline_reference else "请根据常见游戏类型判断（如：三消、合成、跑酷、射击、解谜等）"}
-
-请仔细观看视频内容，然后以JSON格式返回分析结果（严格JSON，可直接解析；至少包含下面三个顶层字段）：
-{{
-  "core_gameplay": "用通俗易懂的1-2段话说明核心玩法，包括：玩家要做什么、怎么操作、主要目标是什么。要求简短（80-150字），避免专业术语，用大白话解释。",
-  "baseline_game": "基线游戏类型，格式：一级分类 > 二级分类 > 三级细分（例如：益智解谜 > 消除类 > 交换三消），如果找不到完全匹配的，就写最接近的分类，不确定就写“未知”。",
-  "innovation_points": [
-    "列出 3-5 条基于基线游戏的创新点，每条用一句话说明（20-40字），要具体说明做了什么改进，不要空泛。若为排名提升且无新玩法，则只保留一条：未发现新玩法，建议手动观察该游戏动态。"
-  ]
-}}
-
-重要要求：
-1. **三个部分输出**：至少输出 `core_gameplay`、`baseline_game` 和 `innovation_points`，不要出现其他无关顶层字段。
-2. **通俗易懂**：所有描述都要用简单直白的话，避免专业术语，让普通人也能看懂。
-3. **简短精炼**：
-   - **core_gameplay**：80-150字，用1-2段话说明怎么玩
-   - **baseline_game**：直接写分类路径，如"益智解谜 > 消除类 > 交换三消"
-   - **innovation_points**：3-5条（或按上述情形为1条），每条20-40字，要具体说明创新点
-
-4. **必须仔细观察视频中的实际游戏画面和操作**
-
-5. **直接返回JSON格式，不要有任何前缀说明文字（如"好的"、"以下是"等）**
-
-6. **确保JSON格式正确，可以被解析**
-
-7. **所有描述都要基于视频中的实际内容，不要编造信息**
-
-示例格式：
-{{
-  "core_gameplay": "玩家通过点击屏幕发射小鸟攻击旋转的目标。需要找准时机在目标旋转的间隙中攻击，避开TNT等危险障碍物，收集青虫和宝石等奖励。通过不断攻击将目标的生命值清空即可通关。操作简单，只需要点击屏幕即可。",
-  "baseline_game": "街机动作 > 技巧/平台 > 精确控制",
-  "innovation_points": [
-    "将传统射击改为角色本身作为发射物",
-    "目标从单一变为可被逐步破坏的多层结构",
-    "增加了需要躲避的危险障碍物和可收集的奖励物",
-    "引入了生命值进度条，从插满变为摧毁目标"
-  ]
-}}"""
+            prompt = prompt_registry.build_video_analysis_prompt(
+                game_name,
+                game_type=(game_info or {}).get('游戏类型', '未知'),
+                rank_change=rank_change,
+                is_new_entry=is_new_entry,
+                is_rank_up=is_rank_up,
+                keyframe_timestamps=[f["timestamp"] for f in frames] or None,
+            )
+            prompt_version = prompt_registry.video_analysis_version(mode)
             
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
@@ -359,7 +484,18 @@ class VideoAnalyzer:
             
             # 构建content数组 - 直接使用视频URL
             video_file_size = 0  # 初始化变量
-            if use_url:
+            if frames:
+                # 关键帧按时间顺序作为图片附在提示词之后
+                content_items = [{"type": "text", "text": prompt}] + [
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": "data:image/jpeg;base64," + base64.b64encode(f["jpeg"]).decode("utf-8")
+                        }
+                    }
+                    for f in frames
+                ]
+            elif use_url:
                 # 使用视频URL（HTTP/HTTPS URL）
                 content_items = [
                     {
@@ -415,20 +551,26 @@ class VideoAnalyzer:
                         "content": content_items
                     }
                 ],
-                "max_tokens": 12000  # 增加token限制，确保详细分析结果完整返回
+                "max_tokens": 12000,  # 增加token限制，确保详细分析结果完整返回
+                "usage": {"include": True},  # 响应中返回实际费用，供费用账本记账
             }
             
+            # 超出付费API预算时不发起分析：返回None，不写入数据库，下次运行会重新分析
+            if not cost_governor.can_spend("openrouter.chat"):
+                print(f"  ⚠ 付费API预算已用尽，跳过分析（留待下次运行）")
+                return None
+            
             # 发送API请求（增加简单重试，缓解偶发的 SSL/网络错误）
             print(f"  发送API请求到 {self.base_url}/chat/completions...")
             print(f"  注意：视频分析可能需要较长时间，请耐心等待...")
             
-            timeout = 180 if use_url else (180 if video_file_size > 10 else 120)
+            timeout = 120 if frames else (180 if use_url else (180 if video_file_size > 10 else 120))
 
             response = None
             last_err = None
             for attempt in range(3):
                 try:
-                    response = requests.post(
+                    response = http_client.post(
                         f"{self.base_url}/chat/completions",
                         headers=headers,
                         json=payload,
@@ -482,7 +624,9 @@ class VideoAnalyzer:
                     
                     # 保存分析结果到数据库（保存原始文本）
                     if self.use_database and self.db:
-                        success = self.db.save_gameplay_analysis(game_name, analysis_text, self.model)
+                        success = self.db.save_gameplay_analysis(
+                            game_name, analysis_text, self.model, prompt_version=prompt_version, video_key=video_key
+                        )
                         if success:
                             print(f"  ✓ 分析结果已保存到数据库")
                     
@@ -498,11 +642,15 @@ class VideoAnalyzer:
                         "analysis": analysis_text,  # 原始文本（已清理）
                         "analysis_data": analysis_data,  # 解析后的结构化数据
                         "model_used": self.model,
+                        "prompt_version": prompt_version,
+                        "analysis_mode": mode,
+                        "frames": len(frames),  # 关键帧模式发送的图片数
                         "status": "success",
                         "finish_reason": finish_reason,
                         "text_length": text_length,
                         "change_type": change_type,  # 新进榜 / 飙升 / 空
                         "is_new_entry": is_new_entry,
+                        "usage": result.get("usage") or {},  # token 用量，供分析引擎修正每分钟 token 限额
                     }
                 else:
                     print(f"  API响应格式异常：{result}")
@@ -515,6 +663,9 @@ class VideoAnalyzer:
                 
                 # 如果是 400 或 404（例如 Qwen 在 OpenRouter 上暂不支持 video_url），
                 # 说明当前模型不接受我们传的视频格式，退回到“纯文本模式”继续分析。
+                if response.status_code in (400, 404) and not cost_governor.can_spend("openrouter.chat"):
+                    print("  ⚠ 付费API预算已用尽，跳过纯文本模式分析（留待下次运行）")
+                    return None
                 if response.status_code in (400, 404):
                     print("  尝试使用纯文本模式（不包含视频，只基于游戏名称和类型进行分析）...")
                     text_only_payload = {
@@ -525,7 +676,7 @@ class VideoAnalyzer:
                                 "content": [
                                     {
                                         "type": "text",
-                                        "text": prompt + "\n\n注意：由于视频格式限制，请基于游戏名称和类型进行通用分析。"
+                                        "text": prompt + prompt_registry.TEXT_ONLY_SUFFIX
                                     }
                                 ]
                             }
@@ -536,7 +687,7 @@ class VideoAnalyzer:
                     print("  [Qwen API 输入] text_only_payload:")
                     print(json.dumps(text_only_payload, ensure_ascii=False, indent=2))
                     
-                    text_response = requests.post(
+                    text_response = http_client.post(
                         f"{self.base_url}/chat/completions",
                         headers=headers,
                         json=text_only_payload,
@@ -565,6 +716,9 @@ class VideoAnalyzer:
             print(f"分析视频时出错：{str(e)}")
             print("使用Mock分析结果")
             return self._mock_analyze(video_path, game_name, game_info)
+        finally:
+            # 未发出或未拿到响应的请求不会记账，释放 can_spend 预占的额度
+            cost_governor.release("openrouter.chat")
     
     def analyze_game_info(self, game_name: str, game_info: Dict = None) -> Dict:
         """
@@ -591,10 +745,9 @@ class VideoAnalyzer:
             公开访问的URL，如果失败返回None
         """
         try:
-            from modules.gdrive_uploader import GoogleDriveUploader
+            from modules.gdrive_upload_manager import get_upload_manager
             
-            uploader = GoogleDriveUploader()
-            result = uploader.upload_video(video_path, folder_name="Game Videos")
+            result = get_upload_manager().upload(video_path, folder_name="Game Videos", db=self.db)
             
             if result and result.get('public_url'):
                 public_url = result['public_url']
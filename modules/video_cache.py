@@ -0,0 +1,187 @@
+"""
+本地视频磁盘配额管理（data/videos 与本地视频存储目录）
+- 按 inode 统计占用（同一实体文件的多个硬链接只算一次，删除时一并删除）
+- 仍被需要的视频不清理：未上传 Google Drive、未完成玩法分析、需要截图但还没有截图
+- 其余视频按最近使用时间（LRU，读取时显式刷新 atime）清理，直到总占用不超过 VIDEO_CACHE_QUOTA_MB；
+  超过 VIDEO_CACHE_MAX_AGE_DAYS 未使用的视频无论是否超额都会清理
+- 被清理视频对应的 games.local_path 置空、downloaded 置 0，下次需要时重新下载
+- 统计本地视频命中/未命中与清理情况，供运行汇总输出
+"""
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import config
+
+VIDEO_EXTENSIONS = (".mp4", ".webm", ".mkv", ".mov")
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evicted_files": 0, "evicted_bytes": 0, "used_bytes": 0}
+
+
+def _add_stats(**values):
+    with _stats_lock:
+        for k, v in values.items():
+            _stats[k] += v
+
+
+def get_cache_stats() -> Dict:
+    """本次运行的缓存统计：hits/misses 本地视频命中与未命中、evicted_files/evicted_bytes 清理量、used_bytes 最近一次清理后的占用"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        for k in _stats:
+            _stats[k] = 0
+
+
+def record_access(path: Optional[str]) -> bool:
+    """
+    记录一次本地视频命中：文件存在时计为命中并刷新访问时间（LRU 依据）
+
+    Args:
+        path: 本地视频路径（可为空）
+
+    Returns:
+        文件是否存在
+    """
+    if not (path and os.path.exists(path)):
+        return False
+    try:
+        os.utime(path, (time.time(), os.path.getmtime(path)))
+    except OSError:
+        pass
+    _add_stats(hits=1)
+    return True
+
+
+def record_miss():
+    """本地没有可用视频、需要重新下载"""
+    _add_stats(misses=1)
+
+
+def _cache_dirs() -> List[str]:
+    dirs = [os.path.abspath(config.VIDEOS_DIR)]
+    store_dir = os.path.abspath(config.VIDEO_STORE_DIR)
+    if not any(store_dir == d or store_dir.startswith(d + os.sep) for d in dirs):
+        dirs.append(store_dir)
+    return dirs
+
+
+def scan_videos() -> List[Dict]:
+    """
+    扫描缓存目录中的视频文件，按 inode 分组（下载中的 .part 文件不计入）
+
+    Returns:
+        [{"paths": [绝对路径...], "size", "last_used"}]
+    """
+    units: Dict[tuple, Dict] = {}
+    for directory in _cache_dirs():
+        if not os.path.isdir(directory):
+            continue
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if not name.lower().endswith(VIDEO_EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                unit = units.setdefault((st.st_dev, st.st_ino), {"paths": [], "size": st.st_size, "last_used": 0.0})
+                unit["paths"].append(path)
+                unit["last_used"] = max(unit["last_used"], st.st_atime, st.st_mtime)
+    return list(units.values())
+
+
+def _pinned_paths(db, need_screenshots: bool) -> set:
+    """仍被需要的视频路径（绝对路径）"""
+    pinned = set()
+    for row in db.get_local_video_states():
+        needed = (
+            not row.get("gdrive_url")
+            or not row.get("gameplay_analysis")
+            or (need_screenshots and not row.get("screenshot_image_key"))
+        )
+        if needed:
+            pinned.add(os.path.abspath(row["local_path"]))
+    return pinned
+
+
+def enforce_quota(db, quota_mb: float = None, max_age_days: float = None,
+                  need_screenshots: bool = True, dry_run: bool = False) -> Dict:
+    """
+    清理本地视频，使总占用不超过配额
+
+    Args:
+        db: VideoDatabase 实例（用于判断哪些视频仍被需要、同步 games.local_path）
+        quota_mb: 配额（MB），默认 VIDEO_CACHE_QUOTA_MB；<= 0 表示不按配额清理
+        max_age_days: 超过该天数未使用即清理，默认 VIDEO_CACHE_MAX_AGE_DAYS；<= 0 表示不按时间清理
+        need_screenshots: 还没有截图的游戏是否保留视频（跳过截图时传 False）
+        dry_run: 只统计不删除
+
+    Returns:
+        {"used_bytes": 清理后占用, "evicted_files", "evicted_bytes", "pinned_bytes", "evicted_paths": [...]}
+    """
+    quota_mb = config.VIDEO_CACHE_QUOTA_MB if quota_mb is None else quota_mb
+    max_age_days = config.VIDEO_CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    result = {"used_bytes": 0, "evicted_files": 0, "evicted_bytes": 0, "pinned_bytes": 0, "evicted_paths": []}
+    if quota_mb <= 0 and max_age_days <= 0:
+        return result
+
+    try:
+        units = scan_videos()
+        used = sum(u["size"] for u in units)
+        pinned = _pinned_paths(db, need_screenshots)
+        candidates = []
+        for unit in units:
+            if any(p in pinned for p in unit["paths"]):
+                result["pinned_bytes"] += unit["size"]
+            else:
+                candidates.append(unit)
+        candidates.sort(key=lambda u: u["last_used"])
+
+        quota_bytes = quota_mb * 1024 * 1024
+        expire_before = time.time() - max_age_days * 86400 if max_age_days > 0 else None
+        evicted_paths = []
+        for unit in candidates:
+            over_quota = quota_mb > 0 and used > quota_bytes
+            expired = expire_before is not None and unit["last_used"] < expire_before
+            if not (over_quota or expired):
+                continue
+            gone = []
+            for path in unit["paths"]:
+                if not dry_run:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        print(f"  ⚠ 清理视频失败 {path}：{str(e)}")
+                        continue
+                gone.append(path)
+            evicted_paths.extend(gone)
+            if len(gone) == len(unit["paths"]):
+                used -= unit["size"]
+                result["evicted_files"] += 1
+                result["evicted_bytes"] += unit["size"]
+
+        if evicted_paths and not dry_run:
+            db.clear_local_paths(evicted_paths)
+        result["used_bytes"] = used
+        result["evicted_paths"] = evicted_paths
+        if quota_mb > 0 and used > quota_bytes:
+            print(f"  ⚠ 本地视频占用 {used / 1024 / 1024:.1f} MB 仍超过配额 {quota_mb:.0f} MB"
+                  f"（仍被需要的视频 {result['pinned_bytes'] / 1024 / 1024:.1f} MB）")
+        if not dry_run:
+            with _stats_lock:
+                _stats["evicted_files"] += result["evicted_files"]
+                _stats["evicted_bytes"] += result["evicted_bytes"]
+                _stats["used_bytes"] = used
+        return result
+    except Exception as e:
+        print(f"  ⚠ 清理本地视频时出错：{str(e)}")
+        return result
@@ -0,0 +1,399 @@
+"""
+视频帧服务（截图、关键帧分析、以后的缩略图共用一次解码）
+- 同一视频的多种取帧需求（截图：开头/中间/结尾，最大 1920x1080；分析：关键帧或均匀帧，长边 768/1024）合并为一个任务：
+  打开文件一次，按各需求帧号的并集一次顺序读取（modules/frame_extractor.py），再按各需求的尺寸与质量编码
+- 编码后的帧写入磁盘缓存 FRAME_CACHE_DIR/<视频哈希前两位>/<视频哈希>/<帧号>_<宽>x<高>_q<质量>.jpg，
+  键为（视频内容哈希, 帧号, 尺寸, 质量），帧号与时间点一一对应（时间点 = 帧号 / fps）；
+  视频总帧数、fps 与关键帧选帧结果记在同目录的 meta.json，之后的请求全部命中时不再打开视频
+  （scene 选帧需要额外一次低分辨率取样扫描，结果记入 meta.json 后不再重复）
+- 视频哈希按文件大小与开头/中间/结尾各 1 MB 内容计算（同一内容的硬链接、重新下载得到同一哈希），按路径、大小与修改时间缓存
+- 任务在取帧服务的进程池中执行；工作流可以先提交（prefetch），使用时等待同一视频进行中的任务，再从缓存读取
+- 缓存按视频目录的最近使用时间清理，总占用不超过 FRAME_CACHE_QUOTA_MB
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import config
+from modules import frame_extractor
+
+HASH_SAMPLE_BYTES = 1024 * 1024
+
+_hash_cache: Dict[Tuple[str, int, int], str] = {}
+_hash_lock = threading.Lock()
+
+
+def video_hash(video_path: str) -> str:
+    """视频内容哈希（文件大小 + 开头/中间/结尾各 HASH_SAMPLE_BYTES 字节）"""
+    path = os.path.abspath(video_path)
+    st = os.stat(path)
+    key = (path, st.st_size, st.st_mtime_ns)
+    with _hash_lock:
+        if key in _hash_cache:
+            return _hash_cache[key]
+    digest = hashlib.sha256(str(st.st_size).encode("ascii"))
+    with open(path, "rb") as f:
+        for offset in (0, max(0, st.st_size // 2 - HASH_SAMPLE_BYTES // 2), max(0, st.st_size - HASH_SAMPLE_BYTES)):
+            f.seek(offset)
+            digest.update(f.read(HASH_SAMPLE_BYTES))
+    value = digest.hexdigest()[:32]
+    with _hash_lock:
+        _hash_cache[key] = value
+    return value
+
+
+def _video_dir(cache_dir: str, vhash: str) -> str:
+    return os.path.join(cache_dir, vhash[:2], vhash)
+
+
+def _frame_path(cache_dir: str, vhash: str, index: int, max_size, quality: int) -> str:
+    return os.path.join(_video_dir(cache_dir, vhash), f"{index:07d}_{max_size[0]}x{max_size[1]}_q{quality}.jpg")
+
+
+def _load_meta(cache_dir: str, vhash: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(_video_dir(cache_dir, vhash), "meta.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _keyframes_key(spec: Dict) -> str:
+    count, method = spec["keyframes"]
+    return f"{method}:{count}"
+
+
+def _resolve_indices(spec: Dict, meta: Dict) -> Optional[List[int]]:
+    """按 meta 把需求换算为帧号列表（关键帧选帧结果不在 meta 中时返回None）"""
+    if spec.get("indices") is not None:
+        return list(spec["indices"])
+    if spec.get("fractions") is not None:
+        last = max(0, meta["frames"] - 1)
+        return [min(last, max(0, int(round(f * last)))) for f in spec["fractions"]]
+    return meta.get("keyframes", {}).get(_keyframes_key(spec))
+
+
+def _spec_size(spec: Dict) -> Tuple[Tuple[int, int], int]:
+    max_size = tuple(spec.get("max_size") or (config.FRAME_MAX_WIDTH, config.FRAME_MAX_HEIGHT))
+    return max_size, int(spec.get("quality") or config.FRAME_JPEG_QUALITY)
+
+
+def decode_job(video_path: str, vhash: str, cache_dir: str, specs: List[Dict]) -> Dict:
+    """
+    为一个视频的多个取帧需求解码一次并写入缓存（在取帧进程池中执行）
+
+    Args:
+        video_path: 本地视频路径
+        vhash: 视频哈希
+        cache_dir: 缓存目录
+        specs: 需求列表，每项为 {"indices": [帧号] | "fractions": [0~1] | "keyframes": [帧数, scene/uniform],
+               "max_size": [宽, 高], "quality": JPEG 质量}
+
+    Returns:
+        {"decoded": 实际解码的帧数, "written": 写入的缓存文件数, "bytes", "seconds", "ok": 视频能否打开}
+    """
+    started = time.perf_counter()
+    result = {"decoded": 0, "written": 0, "bytes": 0, "seconds": 0.0, "ok": False}
+    if not frame_extractor.FRAME_EXTRACTION_AVAILABLE:
+        return result
+    import cv2
+
+    cap = None
+    try:
+        meta = _load_meta(cache_dir, vhash)
+        if not meta:
+            cap = cv2.VideoCapture(video_path)
+            if not cap.isOpened():
+                return result
+            info = frame_extractor.video_info(cap)
+            meta = {"frames": info["frames"], "fps": info["fps"], "keyframes": {}}
+        result["ok"] = True
+        _decode_into_cache(cap, video_path, vhash, cache_dir, specs, meta, result)
+    finally:
+        if cap is not None:
+            cap.release()
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def _decode_into_cache(cap, video_path: str, vhash: str, cache_dir: str, specs: List[Dict], meta: Dict, result: Dict):
+    """按 meta 换算各需求的帧号，一次顺序读取未缓存的帧并编码写入缓存（cap 为已打开且位于第 0 帧的视频，或None）"""
+    import cv2
+    from modules import keyframes
+
+    meta_changed = not os.path.exists(os.path.join(_video_dir(cache_dir, vhash), "meta.json"))
+
+    wanted: Dict[int, List[Tuple[Tuple[int, int], int]]] = {}
+    for spec in specs:
+        indices = _resolve_indices(spec, meta)
+        if indices is None:
+            count, method = spec["keyframes"]
+            indices = keyframes.select_indices(video_path, count, method) if keyframes.KEYFRAMES_AVAILABLE else []
+            meta.setdefault("keyframes", {})[_keyframes_key(spec)] = indices
+            meta_changed = True
+        max_size, quality = _spec_size(spec)
+        for idx in indices:
+            if idx in meta.get("unreadable", []):
+                continue
+            if not os.path.exists(_frame_path(cache_dir, vhash, idx, max_size, quality)):
+                variants = wanted.setdefault(idx, [])
+                if (max_size, quality) not in variants:
+                    variants.append((max_size, quality))
+
+    if wanted:
+        if cap is None:
+            cap = cv2.VideoCapture(video_path)
+            try:
+                frames = frame_extractor.read_frames(cap, list(wanted)) if cap.isOpened() else {}
+            finally:
+                cap.release()
+        else:
+            frames = frame_extractor.read_frames(cap, list(wanted))
+        result["decoded"] = len(frames)
+        # 记录读到末尾仍取不到的帧（视频实际帧数少于容器记录的总帧数），之后的请求不再为它们重新解码
+        unreadable = sorted(set(meta.get("unreadable", [])) | (set(wanted) - set(frames) if frames else set()))
+        if unreadable != meta.get("unreadable", []):
+            meta["unreadable"] = unreadable
+            meta_changed = True
+        tasks = [(idx, size, quality) for idx, variants in wanted.items() if idx in frames for size, quality in variants]
+
+        def encode(task):
+            idx, size, quality = task
+            jpeg = frame_extractor.encode_jpeg(frames[idx], size, quality)
+            if jpeg:
+                _write_atomic(_frame_path(cache_dir, vhash, idx, size, quality), jpeg)
+            return len(jpeg or b"")
+
+        with ThreadPoolExecutor(max_workers=max(1, config.KEYFRAME_ENCODE_WORKERS)) as executor:
+            sizes = list(executor.map(encode, tasks))
+        result["written"] = sum(1 for n in sizes if n)
+        result["bytes"] = sum(sizes)
+
+    if meta_changed:
+        _write_atomic(os.path.join(_video_dir(cache_dir, vhash), "meta.json"),
+                      json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+
+class VideoFrameService:
+    """视频帧服务：合并同一视频的取帧需求、一次解码，结果按（视频哈希, 帧号, 尺寸, 质量）缓存在磁盘"""
+
+    def __init__(self, cache_dir: str = None):
+        """
+        Args:
+            cache_dir: 缓存目录，默认 FRAME_CACHE_DIR
+        """
+        self.cache_dir = os.path.abspath(cache_dir or config.FRAME_CACHE_DIR)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict:
+        return {"requests": 0, "hits": 0, "videos_decoded": 0, "frames_decoded": 0, "frames_written": 0,
+                "bytes_written": 0, "decode_seconds": 0.0, "failed": 0}
+
+    def _add_stats(self, **values):
+        with self._lock:
+            for k, v in values.items():
+                self._stats[k] += v
+
+    # ---- 提交与读取 ----
+
+    def prefetch(self, video_path: str, specs: List[Dict]) -> Optional[Future]:
+        """
+        提交一个视频的全部取帧需求（在取帧进程池中解码一次并写入缓存），同一视频进行中的任务完成后才提交新任务
+
+        Args:
+            video_path: 本地视频路径
+            specs: 需求列表，格式见 decode_job
+
+        Returns:
+            Future（结果同 decode_job）；未安装 opencv 或文件不存在时返回None
+        """
+        if not (frame_extractor.FRAME_EXTRACTION_AVAILABLE and specs and video_path and os.path.exists(video_path)):
+            return None
+        vhash = video_hash(video_path)
+        with self._lock:
+            previous = self._pending.get(vhash)
+        if previous is not None:
+            previous.exception()  # 等待同一视频进行中的任务，避免重复解码
+        future = frame_extractor.get_frame_extractor().submit_call(
+            decode_job, os.path.abspath(video_path), vhash, self.cache_dir, specs
+        )
+        with self._lock:
+            self._pending[vhash] = future
+        future.add_done_callback(lambda f: self._finish(vhash, f))
+        return future
+
+    def _finish(self, vhash: str, future: Future):
+        with self._lock:
+            if self._pending.get(vhash) is future:
+                del self._pending[vhash]
+        if future.exception() is not None or not future.result()["ok"]:
+            self._add_stats(failed=1)
+            return
+        result = future.result()
+        if result["decoded"]:
+            self._add_stats(videos_decoded=1, frames_decoded=result["decoded"], frames_written=result["written"],
+                            bytes_written=result["bytes"], decode_seconds=result["seconds"])
+
+    def get_frames(self, video_path: str, indices: List[int] = None, fractions: List[float] = None,
+                   keyframes: Tuple[int, str] = None, max_size: Tuple[int, int] = None,
+                   quality: int = None) -> List[Dict]:
+        """
+        取帧（先等待同一视频进行中的任务，全部命中缓存时不打开视频）
+
+        Args:
+            video_path: 本地视频路径
+            indices: 帧号列表
+            fractions: 位置列表（0~1）
+            keyframes: (帧数, scene/uniform)，按 modules/keyframes.py 选帧
+            max_size: 最大尺寸（宽, 高），默认 (FRAME_MAX_WIDTH, FRAME_MAX_HEIGHT)
+            quality: JPEG 质量，默认 FRAME_JPEG_QUALITY
+
+        Returns:
+            按请求顺序的 [{"position", "index", "timestamp", "jpeg", "path"}]（取不到的帧不出现）；出错时返回空列表
+        """
+        spec = {"indices": indices, "fractions": fractions, "keyframes": list(keyframes) if keyframes else None,
+                "max_size": list(max_size) if max_size else None, "quality": quality}
+        spec = {k: v for k, v in spec.items() if v is not None}
+        try:
+            if not (video_path and os.path.exists(video_path)):
+                return []
+            vhash = video_hash(video_path)
+            with self._lock:
+                self._stats["requests"] += 1
+                pending = self._pending.get(vhash)
+            if pending is not None:
+                pending.exception()
+            images = self._read_cached(vhash, spec)
+            if images is not None:
+                self._add_stats(hits=len(images))
+                return images
+            future = self.prefetch(video_path, [spec])
+            if future is None:
+                return []
+            future.result()
+            return self._read_cached(vhash, spec) or []
+        except Exception as e:
+            print(f"    取视频帧时出错：{str(e)}")
+            return []
+
+    def _read_cached(self, vhash: str, spec: Dict) -> Optional[List[Dict]]:
+        """从缓存读取需求的全部帧（跳过读不到的帧）；meta 不存在、帧号无法换算或有帧未缓存时返回None"""
+        meta = _load_meta(self.cache_dir, vhash)
+        if not meta:
+            return None
+        indices = _resolve_indices(spec, meta)
+        if indices is None:
+            return None
+        max_size, quality = _spec_size(spec)
+        unreadable = set(meta.get("unreadable", []))
+        images = []
+        for position, idx in enumerate(indices):
+            if idx in unreadable:
+                continue
+            path = _frame_path(self.cache_dir, vhash, idx, max_size, quality)
+            try:
+                with open(path, "rb") as f:
+                    jpeg = f.read()
+            except OSError:
+                return None
+            images.append({
+                "position": position,
+                "index": idx,
+                "timestamp": round(idx / meta["fps"], 2) if meta.get("fps") else None,
+                "jpeg": jpeg,
+                "path": path,
+            })
+        try:
+            os.utime(_video_dir(self.cache_dir, vhash))  # 最近使用时间（清理依据）
+        except OSError:
+            pass
+        return images
+
+    # ---- 缓存清理 ----
+
+    def prune(self, quota_mb: float = None) -> Dict:
+        """
+        按视频目录的最近使用时间清理缓存，使总占用不超过配额
+
+        Args:
+            quota_mb: 配额（MB），默认 FRAME_CACHE_QUOTA_MB；<= 0 表示不清理
+
+        Returns:
+            {"used_bytes": 清理后占用, "evicted_videos", "evicted_bytes"}
+        """
+        quota_mb = config.FRAME_CACHE_QUOTA_MB if quota_mb is None else quota_mb
+        result = {"used_bytes": 0, "evicted_videos": 0, "evicted_bytes": 0}
+        if quota_mb <= 0 or not os.path.isdir(self.cache_dir):
+            return result
+        units = []
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for vhash in os.listdir(prefix_dir):
+                video_dir = os.path.join(prefix_dir, vhash)
+                try:
+                    size = sum(e.stat().st_size for e in os.scandir(video_dir) if e.is_file())
+                    units.append((os.path.getmtime(video_dir), size, vhash, video_dir))
+                except OSError:
+                    continue
+        used = sum(u[1] for u in units)
+        quota_bytes = quota_mb * 1024 * 1024
+        with self._lock:
+            pending = set(self._pending)
+        for _, size, vhash, video_dir in sorted(units):
+            if used <= quota_bytes:
+                break
+            if vhash in pending:
+                continue
+            shutil.rmtree(video_dir, ignore_errors=True)
+            used -= size
+            result["evicted_videos"] += 1
+            result["evicted_bytes"] += size
+        result["used_bytes"] = used
+        return result
+
+    # ---- 统计 ----
+
+    def get_stats(self) -> Dict:
+        """
+        Returns:
+            {"requests": 取帧请求数, "hits": 直接从缓存读取的帧数, "videos_decoded": 实际解码的视频数,
+             "frames_decoded", "frames_written": 写入缓存的帧文件数, "bytes_written", "decode_seconds": 解码与编码耗时之和,
+             "failed": 打不开或出错的任务数}
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = self._empty_stats()
+
+
+_service: Optional[VideoFrameService] = None
+_service_lock = threading.Lock()
+
+
+def get_video_frame_service() -> VideoFrameService:
+    """进程内共享的视频帧服务（首次调用时按当前配置创建）"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = VideoFrameService()
+        return _service
@@ -0,0 +1,301 @@
+"""
+视频完整性快速检查（纯 Python 解析 MP4/MOV 容器头，不解码、不读取媒体数据）
+- 逐个读取顶层 box 头（mdat 直接跳过），只完整读取 moov：时长（mvhd/mehd）、分辨率（tkhd）、轨道类型（hdlr）与编码（stsd）
+- 识别常见的坏文件：HTML/JSON 错误页、空文件、缺少 moov、box 超出文件末尾（下载被截断）、没有视频轨、时长过短
+- 下载完成后立即检查，结果写入 video_probes 表；坏文件移入隔离目录（VIDEO_QUARANTINE_DIR），
+  并清除对应游戏的本地路径与 Google Drive 链接，调用方随即改用付费最高画质API或重新搜索，
+  不会把坏文件上传 Google Drive、送去付费的视频分析
+- WebM/MKV（yt-dlp 可能产出）只确认 EBML 文件头
+"""
+import os
+import shutil
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+
+import config
+
+MOOV_MAX_BYTES = 64 * 1024 * 1024  # moov 通常只有几百KB，超过该大小视为损坏
+_CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"mvex", b"edts"}
+_TOP_LEVEL_BOXES = {b"ftyp", b"styp", b"moov", b"mdat", b"free", b"skip", b"wide", b"uuid", b"pdin",
+                    b"moof", b"mfra", b"sidx", b"meta"}
+
+_stats_lock = threading.Lock()
+_stats = {"probed": 0, "ok": 0, "quarantined": 0, "reasons": {}}
+
+
+def get_probe_stats() -> Dict:
+    """本次运行的检查统计：probed 检查次数、ok 通过数、quarantined 隔离数、reasons {原因: 次数}"""
+    with _stats_lock:
+        stats = dict(_stats)
+        stats["reasons"] = dict(_stats["reasons"])
+        return stats
+
+
+def reset_probe_stats():
+    with _stats_lock:
+        _stats.update({"probed": 0, "ok": 0, "quarantined": 0, "reasons": {}})
+
+
+def _iter_boxes(data: bytes, start: int = 0, end: int = None):
+    """遍历内存中的 box，产出 (类型, 内容起点, 内容终点)；box 越界时抛出 ValueError"""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack(">I4s", data[offset:offset + 8])
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                raise ValueError("box 头不完整")
+            size = struct.unpack(">Q", data[offset + 8:offset + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            raise ValueError(f"box {box_type!r} 长度异常")
+        yield box_type, offset + header, offset + size
+        offset += size
+
+
+def _parse_moov(data: bytes, result: Dict):
+    """解析 moov：时长、分辨率、轨道与编码"""
+    timescale = 0
+    duration = 0
+    fragment_duration = 0
+    tracks: List[Dict] = []
+
+    def walk(start, end, track):
+        nonlocal timescale, duration, fragment_duration
+        for box_type, body, box_end in _iter_boxes(data, start, end):
+            if box_type == b"mvhd":
+                version = data[body]
+                if version == 1:
+                    timescale, duration = struct.unpack(">IQ", data[body + 20:body + 32])
+                else:
+                    timescale, duration = struct.unpack(">II", data[body + 12:body + 20])
+            elif box_type == b"mehd":
+                version = data[body]
+                fmt = ">Q" if version == 1 else ">I"
+                fragment_duration = struct.unpack(fmt, data[body + 4:body + 4 + struct.calcsize(fmt)])[0]
+            elif box_type == b"trak":
+                new_track = {"handler": None, "width": 0, "height": 0, "codec": None}
+                tracks.append(new_track)
+                walk(body, box_end, new_track)
+            elif box_type == b"tkhd" and track is not None:
+                offset = body + (88 if data[body] == 1 else 76)
+                width, height = struct.unpack(">II", data[offset:offset + 8])
+                track["width"], track["height"] = width >> 16, height >> 16
+            elif box_type == b"hdlr" and track is not None:
+                track["handler"] = data[body + 8:body + 12].decode("latin-1")
+            elif box_type == b"stsd" and track is not None and box_end - body >= 16:
+                track["codec"] = data[body + 12:body + 16].decode("latin-1").strip()
+            elif box_type in _CONTAINER_BOXES:
+                walk(body, box_end, track)
+
+    walk(0, len(data), None)
+    if not duration and fragment_duration:
+        duration = fragment_duration
+    if timescale:
+        result["duration"] = round(duration / timescale, 3)
+    video = next((t for t in tracks if t["handler"] == "vide"), None)
+    if video:
+        result["has_video"] = True
+        result["width"], result["height"] = video["width"], video["height"]
+        result["codec"] = video["codec"]
+    result["has_audio"] = any(t["handler"] == "soun" for t in tracks)
+
+
+# 下载响应的 Content-Type：video/* 与这些通用二进制类型可接受，其余（text/html、application/json 等）视为错误页
+_BINARY_CONTENT_TYPES = {"application/octet-stream", "binary/octet-stream", "application/mp4", "application/x-matroska"}
+
+
+def content_type_ok(content_type: Optional[str]) -> bool:
+    """下载响应的 Content-Type 是否可能是视频（缺少该响应头时不判断）"""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return not media_type or media_type.startswith("video/") or media_type in _BINARY_CONTENT_TYPES
+
+
+def sniff_head(head: bytes) -> Optional[str]:
+    """
+    按文件开头的字节判断是否是视频（与 probe 的文件头检查相同）
+
+    Args:
+        head: 文件开头（至少 64 字节；更短时视为空文件）
+
+    Returns:
+        不是视频的原因 empty / html_or_text / not_mp4；MP4 或 WebM/MKV 返回None
+    """
+    if len(head) < 64:
+        return "empty"
+    stripped = head.lstrip()
+    if stripped[:1] in (b"<", b"{", b"[") or stripped[:5].lower() == b"error":
+        return "html_or_text"
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return None
+    if head[4:8] not in _TOP_LEVEL_BOXES:
+        return "not_mp4"
+    return None
+
+
+def probe(path: str) -> Dict:
+    """
+    检查视频文件（只读取文件头与 moov）
+
+    Args:
+        path: 本地视频路径
+
+    Returns:
+        {"ok", "reason", "size", "container", "codec", "duration", "width", "height",
+         "has_video", "has_audio", "faststart"}；reason 为 None 表示通过
+    """
+    result = {"ok": False, "reason": None, "size": 0, "container": None, "codec": None, "duration": None,
+              "width": None, "height": None, "has_video": False, "has_audio": False, "faststart": None}
+    try:
+        size = os.path.getsize(path)
+        result["size"] = size
+        with open(path, "rb") as f:
+            head = f.read(64)
+            reason = sniff_head(head)
+            if reason:
+                result["reason"] = reason
+                return result
+            if head[:4] == b"\x1a\x45\xdf\xa3":
+                result.update(ok=True, container="matroska", has_video=True)
+                return result
+
+            result["container"] = "mp4"
+            offset = 0
+            moov = None
+            seen_mdat = False
+            while offset < size:
+                f.seek(offset)
+                header = f.read(16)
+                if len(header) < 8:
+                    result["reason"] = "truncated"
+                    return result
+                box_size, box_type = struct.unpack(">I4s", header[:8])
+                header_len = 8
+                if box_size == 1:
+                    if len(header) < 16:
+                        result["reason"] = "truncated"
+                        return result
+                    box_size = struct.unpack(">Q", header[8:16])[0]
+                    header_len = 16
+                elif box_size == 0:
+                    box_size = size - offset
+                if box_size < header_len:
+                    result["reason"] = "corrupt"
+                    return result
+                if offset + box_size > size:
+                    # 下载中断：最后一个 box（通常是 mdat）声明的长度超出文件末尾
+                    result["reason"] = "truncated"
+                    return result
+                if box_type == b"mdat":
+                    seen_mdat = True
+                elif box_type == b"moov":
+                    if box_size > MOOV_MAX_BYTES:
+                        result["reason"] = "corrupt"
+                        return result
+                    result["faststart"] = not seen_mdat
+                    f.seek(offset + header_len)
+                    moov = f.read(box_size - header_len)
+                offset += box_size
+
+        if moov is None:
+            result["reason"] = "no_moov"
+            return result
+        try:
+            _parse_moov(moov, result)
+        except (ValueError, struct.error, IndexError):
+            result["reason"] = "corrupt"
+            return result
+        if not result["has_video"] or not result["width"] or not result["height"]:
+            result["reason"] = "no_video_track"
+        elif result["duration"] is not None and result["duration"] < config.VIDEO_PROBE_MIN_DURATION:
+            result["reason"] = "too_short"
+        else:
+            result["ok"] = True
+        return result
+    except OSError as e:
+        result["reason"] = f"unreadable: {e.strerror or e}"
+        return result
+
+
+def _quarantine(db, path: str, reason: str) -> Optional[str]:
+    """把坏文件移入隔离目录，并清除本地存储与游戏记录中指向它的路径和 Google Drive 链接"""
+    from modules import video_store
+
+    os.makedirs(config.VIDEO_QUARANTINE_DIR, exist_ok=True)
+    base, ext = os.path.splitext(os.path.basename(path))
+    target = os.path.join(config.VIDEO_QUARANTINE_DIR, f"{base}.{int(time.time())}.{reason.split(':')[0]}{ext}")
+    sha256 = None
+    if db is not None:
+        try:
+            sha256 = video_store.file_sha256(path)
+        except OSError:
+            pass
+    shutil.move(path, target)
+    if sha256:
+        blob_path = video_store.blob_path_for(sha256, ext)
+        if os.path.exists(blob_path) and os.path.samefile(blob_path, target):
+            os.remove(blob_path)
+        db.delete_video_blob(sha256)
+    if db is not None:
+        db.clear_local_paths([path], clear_gdrive=True)
+    return target
+
+
+def check(db, path: str, source: str = None, video_id: str = None, game_name: str = None) -> bool:
+    """
+    检查刚下载（或从缓存取出）的视频，记录到 video_probes 表，坏文件移入隔离目录
+
+    同一路径、大小与修改时间未变时直接使用上次的检查结果。
+
+    Args:
+        db: VideoDatabase 实例（可为None，此时只检查与隔离，不记录）
+        path: 本地视频路径
+        source: 来源，如 douyin / youtube
+        video_id: aweme_id / YouTube video_id
+        game_name: 游戏名称
+
+    Returns:
+        视频是否可用（未启用检查时只判断文件是否存在）
+    """
+    if not (path and os.path.exists(path)):
+        return False
+    if not config.VIDEO_PROBE_ENABLED:
+        return True
+    try:
+        st = os.stat(path)
+        if db is not None:
+            cached = db.get_video_probe(path)
+            if cached and cached["size"] == st.st_size and cached["mtime"] == st.st_mtime and cached["ok"]:
+                return True
+
+        result = probe(path)
+        with _stats_lock:
+            _stats["probed"] += 1
+            if result["ok"]:
+                _stats["ok"] += 1
+            else:
+                reason = result["reason"].split(":")[0]
+                _stats["reasons"][reason] = _stats["reasons"].get(reason, 0) + 1
+        record = dict(result, local_path=path, source=source, video_id=video_id, game_name=game_name,
+                      mtime=st.st_mtime, quarantine_path=None)
+        if result["ok"]:
+            if db is not None:
+                db.save_video_probe(record)
+            return True
+
+        print(f"  ✗ 视频文件不可用（{result['reason']}，{result['size'] / 1024:.0f} KB）：{path}")
+        record["quarantine_path"] = _quarantine(db, path, result["reason"])
+        with _stats_lock:
+            _stats["quarantined"] += 1
+        print(f"  ⚠ 已移入隔离目录：{record['quarantine_path']}")
+        if db is not None:
+            db.save_video_probe(record)
+        return False
+    except Exception as e:
+        print(f"  ⚠ 检查视频文件时出错（按可用处理）：{str(e)}")
+        return True
@@ -0,0 +1,270 @@
+"""
+候选视频排序模块
+抖音 / YouTube 搜索结果共用的打分与排序：
+- 关键词匹配：相关词、高优先级词、不相关词预编译为 Aho–Corasick 自动机，标题+描述只扫描一遍
+- 游戏名相似度：字符 n-gram（默认二元组）覆盖率，容忍空格、标点与个别字的写法差异
+- 时长、点赞、播放量等特征
+各特征权重可通过 RANKER_WEIGHTS 配置；所有候选先一次性算出特征列，再与权重向量点乘得分，
+返回的前 k 个结果附带各特征的得分明细（score_explanation）
+"""
+import math
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+
+import config
+
+
+# 相关关键词（加分项）
+RELEVANT_KEYWORDS = [
+    "玩法", "演示", "教程", "怎么玩", "如何玩", "操作",
+    "技巧", "攻略", "教学", "展示", "试玩", "体验",
+    "gameplay", "walkthrough", "tutorial", "guide", "how to play",
+]
+
+# 高优先级关键词（在相关关键词基础上额外加分）
+PRIORITY_KEYWORDS = ["玩法", "演示", "怎么玩", "教程", "攻略", "gameplay", "how to play"]
+
+# 不相关关键词（只命中不相关词、未命中相关词的视频会被排除）
+IRRELEVANT_KEYWORDS = [
+    "宣传", "广告", "推广", "下载", "安装", "注册",
+    "充值", "氪金", "抽奖", "活动", "福利", "奖励",
+]
+
+# 特征顺序（与权重向量一一对应）
+FEATURES = ("name", "relevant", "priority", "irrelevant", "duration", "likes", "plays")
+
+# 默认权重：与旧版 _filter_and_score_videos 的加分尺度一致（游戏名 10、相关词 5、高优先级词 +3、时长 5），
+# 点赞/播放量按 log10 计入，取代旧版 like_count * 1000 + play_count 的整体覆盖排序
+DEFAULT_WEIGHTS = {
+    "name": 10.0,
+    "relevant": 5.0,
+    "priority": 3.0,
+    "irrelevant": 0.0,
+    "duration": 5.0,
+    "likes": 2.0,
+    "plays": 1.0,
+}
+
+
+class KeywordAutomaton:
+    """Aho–Corasick 多模式匹配自动机：一次扫描文本，找出命中的全部关键词"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Set[str]] = [set()]
+        for kw in keywords:
+            kw = normalize_text(kw)
+            if kw:
+                self._add(kw)
+        self._build_fail_links()
+
+    def _add(self, keyword: str):
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._output[state].add(keyword)
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._output[nxt] |= self._output[self._fail[nxt]]
+
+    def find(self, text: str) -> Set[str]:
+        """返回 text（需已 normalize_text）中出现的全部关键词"""
+        found: Set[str] = set()
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+def normalize_text(text: str) -> str:
+    """NFKC 规范化（全角转半角）并转小写"""
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def char_ngrams(text: str, n: int = 2) -> Set[str]:
+    """字符 n-gram 集合（忽略空白与标点；不足 n 个字符时返回整串）"""
+    chars = "".join(ch for ch in text if ch.isalnum())
+    if len(chars) <= n:
+        return {chars} if chars else set()
+    return {chars[i:i + n] for i in range(len(chars) - n + 1)}
+
+
+def ngram_similarity(name_grams: Set[str], text_grams: Set[str]) -> float:
+    """游戏名 n-gram 在文本中的覆盖率（0~1）"""
+    if not name_grams:
+        return 0.0
+    return len(name_grams & text_grams) / len(name_grams)
+
+
+def _count(value) -> int:
+    """点赞/播放数转为非负整数（接口偶尔返回字符串或空值）"""
+    try:
+        return max(0, int(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """解析 RANKER_WEIGHTS：'name=10,relevant=5,likes=2'，未配置的特征使用默认权重"""
+    weights = dict(DEFAULT_WEIGHTS)
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item or "=" not in item:
+            continue
+        key, value = item.split("=", 1)
+        key = key.strip()
+        if key not in weights:
+            print(f"警告：未知的排序特征：{key}")
+            continue
+        try:
+            weights[key] = float(value)
+        except ValueError:
+            print(f"警告：无法解析排序权重：{item}")
+    return weights
+
+
+class VideoRanker:
+    """候选视频排序器（关键词自动机在初始化时编译，可复用）"""
+
+    def __init__(self, weights: Dict[str, float] = None, ngram_size: int = 2):
+        """
+        Args:
+            weights: 特征权重，默认 DEFAULT_WEIGHTS
+            ngram_size: 游戏名相似度使用的字符 n-gram 长度
+        """
+        self.weights = dict(DEFAULT_WEIGHTS)
+        self.weights.update(weights or {})
+        self.ngram_size = ngram_size
+        self._weight_vector = [self.weights[f] for f in FEATURES]
+        self._relevant = {normalize_text(k) for k in RELEVANT_KEYWORDS}
+        self._priority = {normalize_text(k) for k in PRIORITY_KEYWORDS}
+        self._irrelevant = {normalize_text(k) for k in IRRELEVANT_KEYWORDS}
+        self._automaton = KeywordAutomaton(RELEVANT_KEYWORDS + PRIORITY_KEYWORDS + IRRELEVANT_KEYWORDS)
+
+    @staticmethod
+    def _duration_feature(duration: float) -> float:
+        """15-60 秒最适合玩法演示；超过 1 分钟可能不是纯玩法演示"""
+        if 15 <= duration <= 60:
+            return 1.0
+        if 10 <= duration < 15:
+            return 0.4
+        if duration > 60:
+            return -0.4
+        return 0.0
+
+    def _features(self, video: Dict, name_grams: Set[str]) -> tuple:
+        """提取单个候选的特征行与命中的关键词"""
+        text = normalize_text(f"{video.get('title') or ''} {video.get('description') or ''}")
+        hits = self._automaton.find(text)
+        relevant = hits & self._relevant
+        priority = hits & self._priority
+        irrelevant = hits & self._irrelevant
+        plays = video.get("play_count")
+        if plays is None:
+            plays = video.get("views")
+        row = (
+            ngram_similarity(name_grams, char_ngrams(text, self.ngram_size)),
+            float(len(relevant)),
+            float(len(priority)),
+            float(len(irrelevant)),
+            self._duration_feature(float(_count(video.get("duration")))),
+            math.log10(1 + _count(video.get("like_count"))),
+            math.log10(1 + _count(plays)),
+        )
+        return row, relevant, irrelevant
+
+    def rank(self, videos: List[Dict], game_name: str, top_k: Optional[int] = None,
+             drop_irrelevant: bool = True) -> List[Dict]:
+        """
+        对候选视频打分排序
+
+        Args:
+            videos: 候选视频列表（需含 title/description/duration，及 like_count/play_count 或 views）
+            game_name: 游戏名称
+            top_k: 只返回前 k 个，默认全部
+            drop_irrelevant: 是否排除只命中不相关词、未命中相关词的视频
+
+        Returns:
+            排序后的视频列表；每个视频写入 relevance_score（整数，兼容数据库列）、
+            ranker_score（浮点原始得分），前 k 个另写入 score_explanation（各特征得分明细）
+        """
+        name_grams = char_ngrams(normalize_text(game_name), self.ngram_size)
+
+        # 第一遍：提取所有候选的特征列
+        kept, rows, hits = [], [], []
+        for video in videos:
+            row, relevant, irrelevant = self._features(video, name_grams)
+            if drop_irrelevant and irrelevant and not relevant:
+                continue
+            kept.append(video)
+            rows.append(row)
+            hits.append((relevant, irrelevant))
+
+        # 特征矩阵与权重向量点乘
+        w = self._weight_vector
+        scores = [sum(x * wi for x, wi in zip(row, w)) for row in rows]
+
+        order = sorted(range(len(kept)), key=lambda i: scores[i], reverse=True)
+        if top_k is not None:
+            order = order[:top_k]
+
+        ranked = []
+        for i in order:
+            video = kept[i]
+            video["ranker_score"] = round(scores[i], 3)
+            video["relevance_score"] = int(round(scores[i]))
+            video["score_explanation"] = self._explain(rows[i], hits[i])
+            ranked.append(video)
+        return ranked
+
+    def _explain(self, row: tuple, hits: tuple) -> List[str]:
+        """生成各特征的得分明细（按贡献绝对值降序）"""
+        relevant, irrelevant = hits
+        parts = []
+        for feature, value, weight in zip(FEATURES, row, self._weight_vector):
+            contribution = value * weight
+            if not contribution:
+                continue
+            label = feature
+            if feature in ("relevant", "priority") and relevant:
+                matched = relevant & self._priority if feature == "priority" else relevant
+                label = f"{feature}({'/'.join(sorted(matched))})"
+            elif feature == "irrelevant" and irrelevant:
+                label = f"{feature}({'/'.join(sorted(irrelevant))})"
+            parts.append((abs(contribution), f"{label}={contribution:+.1f}"))
+        parts.sort(reverse=True)
+        return [p[1] for p in parts]
+
+
+_ranker: Optional[VideoRanker] = None
+
+
+def get_ranker() -> VideoRanker:
+    """获取按 RANKER_WEIGHTS 配置的共享排序器（进程内单例，关键词自动机只编译一次）"""
+    global _ranker
+    if _ranker is None:
+        _ranker = VideoRanker(parse_weights(config.RANKER_WEIGHTS))
+    return _ranker
@@ -5,15 +5,27 @@
 import requests
 import os
 import json
-import time
+from datetime import datetime
 from typing import Dict, Optional, List
 import config
+from modules import (
+    cost_governor, download_scheduler, downloader, http_client, rate_limiter, video_cache, video_probe, video_ranker,
+    video_store,
+)
 from modules.database import VideoDatabase
 
 
+def format_retry_time(timestamp: float) -> str:
+    """将下次重试时间戳格式化为本地时间字符串"""
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+
 class VideoSearcher:
     """视频搜索和下载器"""
     
+    # 来源标识（搜索无结果记录 search_negative_cache、本地视频存储 video_manifest 共用）
+    SEARCH_PROVIDER = "douyin"
+    
     def __init__(self, videos_dir: str = None, video_info_dir: str = None, use_database: bool = True):
         """
         初始化视频搜索器
@@ -41,7 +53,8 @@ class VideoSearcher:
         else:
             self.db = None
     
-    def search_videos(self, game_name: str, game_type: str = None, max_results: int = 5) -> List[Dict]:
+    def search_videos(self, game_name: str, game_type: str = None, max_results: int = 5,
+                      ignore_negative_cache: bool = False) -> List[Dict]:
         """
         搜索游戏相关视频（先检查数据库缓存）
         
@@ -49,6 +62,7 @@ class VideoSearcher:
             game_name: 游戏名称
             game_type: 游戏类型（可选）
             max_results: 最大返回结果数
+            ignore_negative_cache: 是否忽略搜索无结果记录（强制重新搜索）
         
         Returns:
             视频信息列表，每个视频包含URL、ID等信息
@@ -79,6 +93,17 @@ class VideoSearcher:
             print(f"警告：未配置抖音API Token，使用Mock数据")
             return [self._mock_search_result(game_name)]
         
+        # 近期搜索无结果的游戏，退避期内直接跳过（不调用API）
+        if not ignore_negative_cache:
+            negative = self.get_negative_search(game_name)
+            if negative:
+                print(f"  ⚠ 该游戏近期搜索无结果（已 {negative['attempts']} 次），"
+                      f"{format_retry_time(negative['next_retry_at'])} 前跳过搜索")
+                return []
+        # 退避期已过的重试必须真正请求API：缓存的仍是上次的无结果响应（缓存有效期比首次退避长），
+        # 命中缓存会在没有实际搜索的情况下再次记录无结果、加倍退避
+        retrying_negative = bool(self.get_negative_search(game_name, active_only=False))
+        
         # 构建搜索关键词：统一使用“小游戏攻略”
         # 例：羊了个羊 小游戏攻略
         keywords = [
@@ -86,6 +111,8 @@ class VideoSearcher:
         ]
         
         all_videos = []
+        parsed_count = 0
+        all_fetched = True
         
         # 第一步：用所有关键词搜索，收集所有视频
         print(f"开始搜索游戏 '{game_name}' 的相关视频...")
@@ -93,162 +120,18 @@ class VideoSearcher:
         for keyword in keywords:
             print(f"  搜索关键词：'{keyword}'...")
             
-            # 添加请求间隔，避免频率过高
-            if config.API_REQUEST_DELAY > 0:
-                time.sleep(config.API_REQUEST_DELAY)
-            
-            # 重试机制
-            success = False
-            for retry in range(config.API_MAX_RETRIES):
-                try:
-                    # 构建请求
-                    url = f"{self.api_base_url}{self.search_endpoint}"
-                    headers = {
-                        "Authorization": f"Bearer {self.api_token}",
-                        "Content-Type": "application/json"
-                    }
-                    
-                    # 首次请求参数
-                    # 筛选条件：1分钟以内的视频，只要玩法演示
-                    payload = {
-                        "keyword": keyword,
-                        "cursor": 0,
-                        "sort_type": "1",  # 最多点赞，更可能找到热门玩法视频
-                        "publish_time": "0",  # 不限时间
-                        "filter_duration": "0-1",  # 1分钟以内
-                        "content_type": "1",  # 只要视频
-                        "search_id": "",
-                        "backtrace": ""
-                    }
-                    
-                    response = requests.post(
-                        url,
-                        headers=headers,
-                        json=payload,
-                        timeout=30
-                    )
-                    
-                    # 处理不同的HTTP状态码
-                    if response.status_code == 200:
-                        result = response.json()
-                        
-                        # 检查响应状态
-                        if result.get("code") == 200:
-                            # 解析返回数据
-                            data_str = result.get("data")
-                            if data_str:
-                                # data可能是JSON字符串，需要解析
-                                if isinstance(data_str, str):
-                                    try:
-                                        data = json.loads(data_str)
-                                    except json.JSONDecodeError:
-                                        print(f"    无法解析JSON数据：{data_str[:100]}...")
-                                        data = None
-                                else:
-                                    data = data_str
-                                
-                                if data:
-                                    # 提取视频信息
-                                    videos = self._parse_search_results(data, game_name, keyword)
-                                    
-                                    # 对视频进行筛选和评分
-                                    filtered_videos = self._filter_and_score_videos(videos, game_name)
-                                    all_videos.extend(filtered_videos)
-                                    print(f"    ✓ 找到 {len(filtered_videos)} 个视频")
-                                    success = True
-                                    break
-                        else:
-                            error_msg = result.get('message_zh') or result.get('message', '未知错误')
-                            print(f"    API返回错误：{error_msg} (code: {result.get('code')})")
-                            # API业务错误，不重试
-                            break
-                    
-                    elif response.status_code == 400:
-                        # 400 Bad Request - 需要重试
-                        print(f"    ✗ HTTP 400: 请求参数错误")
-                        try:
-                            error_detail = response.json()
-                            print(f"      错误详情: {error_detail.get('message', '未知')}")
-                        except:
-                            print(f"      响应内容: {response.text[:100]}")
-                        if retry < config.API_MAX_RETRIES - 1:
-                            wait_time = config.API_RETRY_DELAY * (retry + 1)
-                            print(f"      等待 {wait_time} 秒后重试 ({retry + 1}/{config.API_MAX_RETRIES})...")
-                            time.sleep(wait_time)
-                            continue
-                        else:
-                            print(f"      达到最大重试次数，跳过该关键词")
-                            break
-                    
-                    elif response.status_code == 401:
-                        # 401 Unauthorized - 认证失败
-                        print(f"    ✗ HTTP 401: 认证失败，请检查API Token是否正确")
-                        break  # 不重试
-                    
-                    elif response.status_code == 429:
-                        # 429 Too Many Requests - 请求频率过高
-                        print(f"    ✗ HTTP 429: 请求频率过高，等待后重试...")
-                        if retry < config.API_MAX_RETRIES - 1:
-                            wait_time = config.API_RETRY_DELAY * (retry + 1)
-                            print(f"      等待 {wait_time} 秒后重试...")
-                            time.sleep(wait_time)
-                            continue
-                        else:
-                            print(f"      达到最大重试次数，跳过该关键词")
-                            break
-                    
-                    elif response.status_code in [500, 502, 503, 504]:
-                        # 5xx 服务器错误 - 可以重试
-                        print(f"    ✗ HTTP {response.status_code}: 服务器错误")
-                        if retry < config.API_MAX_RETRIES - 1:
-                            wait_time = config.API_RETRY_DELAY * (retry + 1)
-                            print(f"      等待 {wait_time} 秒后重试 ({retry + 1}/{config.API_MAX_RETRIES})...")
-                            time.sleep(wait_time)
-                            continue
-                        else:
-                            print(f"      达到最大重试次数，跳过该关键词")
-                            break
-                    
-                    else:
-                        # 其他HTTP错误
-                        print(f"    ✗ HTTP {response.status_code}: 请求失败")
-                        try:
-                            error_detail = response.text[:200]
-                            print(f"      响应内容: {error_detail}")
-                        except:
-                            pass
-                        # 对于未知错误，不重试
-                        break
-                    
-                except requests.exceptions.Timeout:
-                    print(f"    ✗ 请求超时")
-                    if retry < config.API_MAX_RETRIES - 1:
-                        wait_time = config.API_RETRY_DELAY * (retry + 1)
-                        print(f"      等待 {wait_time} 秒后重试 ({retry + 1}/{config.API_MAX_RETRIES})...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        print(f"      达到最大重试次数，跳过该关键词")
-                        break
+            data = self._fetch_search_data(keyword, use_cache=not retrying_negative)
+            if data:
+                # 提取视频信息
+                videos = self._parse_search_results(data, game_name, keyword)
+                parsed_count += len(videos)
                 
-                except requests.exceptions.RequestException as e:
-                    print(f"    ✗ 网络请求异常：{str(e)}")
-                    if retry < config.API_MAX_RETRIES - 1:
-                        wait_time = config.API_RETRY_DELAY * (retry + 1)
-                        print(f"      等待 {wait_time} 秒后重试 ({retry + 1}/{config.API_MAX_RETRIES})...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        print(f"      达到最大重试次数，跳过该关键词")
-                        break
-                
-                except Exception as e:
-                    print(f"    ✗ 搜索视频时出错：{str(e)}")
-                    import traceback
-                    traceback.print_exc()
-                    break  # 其他异常不重试
-            
-            if not success:
+                # 对视频进行筛选和评分
+                filtered_videos = self._filter_and_score_videos(videos, game_name)
+                all_videos.extend(filtered_videos)
+                print(f"    ✓ 找到 {len(filtered_videos)} 个视频")
+            else:
+                all_fetched = False
                 print(f"    ⚠ 关键词 '{keyword}' 搜索失败，继续搜索其他关键词...")
         
         # 第二步：统一去重（基于aweme_id）
@@ -265,32 +148,248 @@ class VideoSearcher:
         
         # 如果API搜索失败，返回Mock结果
         if not unique_videos:
+            # 请求均成功但没有可用视频：记录为无结果，按指数退避跳过后续搜索（请求失败不记录）
+            if all_fetched:
+                self._record_negative_search(
+                    game_name, ", ".join(keywords),
+                    "no_relevant_results" if parsed_count else "no_results",
+                )
             print("API搜索未找到结果，使用Mock数据")
             return [self._mock_search_result(game_name)]
         
-        # 第三步：统一按点赞数和播放量排序，选择最高的
-        print(f"  按点赞量和播放量排序...")
-        # 计算综合分数：点赞数 * 0.6 + 播放量 * 0.4（归一化后）
-        for video in unique_videos:
-            like_count = video.get("like_count", 0)
-            play_count = video.get("play_count", 0)
-            # 简单排序：优先点赞数，其次播放量
-            video["_sort_score"] = like_count * 1000 + play_count  # 点赞数权重更高
-        
-        unique_videos.sort(key=lambda x: x.get("_sort_score", 0), reverse=True)
-        
-        # 显示前3个视频的点赞数和播放量（用于调试）
-        if len(unique_videos) > 0:
-            top_video = unique_videos[0]
-            print(f"  点赞播放量最高的视频：{str(top_video.get('title') or 'N/A')[:50]}")
+        if self.use_database and self.db and config.NEGATIVE_CACHE_ENABLED:
+            self.db.clear_negative_search(game_name, self.SEARCH_PROVIDER)
+        
+        # 第三步：多关键词结果合并后统一排序（相关性 + 热度，见 modules/video_ranker.py），选择得分最高的
+        print(f"  按综合评分排序...")
+        ranked = video_ranker.get_ranker().rank(unique_videos, game_name, top_k=1)
+        if ranked:
+            top_video = ranked[0]
+            print(f"  综合评分最高的视频：{str(top_video.get('title') or 'N/A')[:50]}")
+            print(f"    评分：{top_video.get('ranker_score')}（{', '.join(top_video.get('score_explanation') or [])}）")
             print(f"    点赞数：{top_video.get('like_count', 0):,}")
             print(f"    播放量：{top_video.get('play_count', 0):,}")
             print(f"    视频ID：{top_video.get('aweme_id')}")
         
-        # 只返回点赞播放量最高的那一条
-        return [unique_videos[0]] if unique_videos else []
+        # 只返回评分最高的那一条
+        return ranked
     
-    def _parse_search_results(self, data: Dict, game_name: str, search_keyword: str = "") -> List[Dict]:
+    def _build_search_payload(self, keyword: str) -> Dict:
+        """
+        构建抖音搜索请求参数
+        
+        筛选条件：1分钟以内的视频，只要玩法演示
+        """
+        return {
+            "keyword": keyword,
+            "cursor": 0,
+            "sort_type": "1",  # 最多点赞，更可能找到热门玩法视频
+            "publish_time": "0",  # 不限时间
+            "filter_duration": "0-1",  # 1分钟以内
+            "content_type": "1",  # 只要视频
+            "search_id": "",
+            "backtrace": ""
+        }
+    
+    def _fetch_search_data(self, keyword: str, use_cache: bool = True):
+        """
+        获取某关键词的搜索原始数据（先查搜索响应缓存，未命中再请求API并写入缓存）
+        
+        Args:
+            keyword: 搜索关键词
+            use_cache: 是否读取缓存（写入不受影响）
+        
+        Returns:
+            API返回的 data（已解析的JSON），失败返回None
+        """
+        payload = self._build_search_payload(keyword)
+        if use_cache:
+            cached = self._load_search_cache(payload)
+            if cached is not None:
+                print(f"    ✓ 命中搜索响应缓存（未调用API）")
+                return cached
+        
+        if not cost_governor.can_spend("tikhub.douyin_search"):
+            print(f"    ⚠ 付费API预算已用尽，跳过搜索（留待下次运行）")
+            return None
+        
+        # 构建请求
+        url = f"{self.api_base_url}{self.search_endpoint}"
+        headers = {
+            "Authorization": f"Bearer {self.api_token}",
+            "Content-Type": "application/json"
+        }
+        
+        # 重试机制（请求间隔与退避由 api.tikhub.io 的共享令牌桶控制，见 modules/rate_limiter.py）
+        for retry in range(config.API_MAX_RETRIES):
+            try:
+                response = http_client.post(
+                    url,
+                    headers=headers,
+                    json=payload,
+                    timeout=30
+                )
+                
+                # 处理不同的HTTP状态码
+                if response.status_code == 200:
+                    result = response.json()
+                    
+                    # 检查响应状态
+                    if result.get("code") == 200:
+                        # 解析返回数据
+                        data_str = result.get("data")
+                        if data_str:
+                            # data可能是JSON字符串，需要解析
+                            if isinstance(data_str, str):
+                                try:
+                                    data = json.loads(data_str)
+                                except json.JSONDecodeError:
+                                    print(f"    无法解析JSON数据：{data_str[:100]}...")
+                                    data = None
+                            else:
+                                data = data_str
+                            
+                            if data:
+                                self._save_search_cache(payload, data)
+                                return data
+                    else:
+                        error_msg = result.get('message_zh') or result.get('message', '未知错误')
+                        print(f"    API返回错误：{error_msg} (code: {result.get('code')})")
+                        # API业务错误，不重试
+                        break
+                
+                elif response.status_code == 400:
+                    # 400 Bad Request - 需要重试
+                    print(f"    ✗ HTTP 400: 请求参数错误")
+                    try:
+                        error_detail = response.json()
+                        print(f"      错误详情: {error_detail.get('message', '未知')}")
+                    except:
+                        print(f"      响应内容: {response.text[:100]}")
+                    if retry < config.API_MAX_RETRIES - 1:
+                        # TikHub 的 400 多为临时性错误，令牌桶不会自动退避，这里显式退避
+                        limiter = rate_limiter.get_limiter(url)
+                        if limiter:
+                            limiter.on_error()
+                        print(f"      退避后重试 ({retry + 1}/{config.API_MAX_RETRIES})...")
+                        continue
+                    else:
+                        print(f"      达到最大重试次数，跳过该关键词")
+                        break
+                
+                elif response.status_code == 401:
+                    # 401 Unauthorized - 认证失败
+                    print(f"    ✗ HTTP 401: 认证失败，请检查API Token是否正确")
+                    break  # 不重试
+                
+                elif response.status_code == 429:
+                    # 429 Too Many Requests - 请求频率过高
+                    print(f"    ✗ HTTP 429: 请求频率过高，等待后重试...")
+                    if retry < config.API_MAX_RETRIES - 1:
+                        print(f"      退避后重试 ({retry + 1}/{config.API_MAX_RETRIES})...")
+                        continue
+                    else:
+                        print(f"      达到最大重试次数，跳过该关键词")
+                        break
+                
+                elif response.status_code in [500, 502, 503, 504]:
+                    # 5xx 服务器错误 - 可以重试
+                    print(f"    ✗ HTTP {response.status_code}: 服务器错误")
+                    if retry < config.API_MAX_RETRIES - 1:
+                        print(f"      退避后重试 ({retry + 1}/{config.API_MAX_RETRIES})...")
+                        continue
+                    else:
+                        print(f"      达到最大重试次数，跳过该关键词")
+                        break
+                
+                else:
+                    # 其他HTTP错误
+                    print(f"    ✗ HTTP {response.status_code}: 请求失败")
+                    try:
+                        error_detail = response.text[:200]
+                        print(f"      响应内容: {error_detail}")
+                    except:
+                        pass
+                    # 对于未知错误，不重试
+                    break
+                
+            except requests.exceptions.Timeout:
+                print(f"    ✗ 请求超时")
+                if retry < config.API_MAX_RETRIES - 1:
+                    print(f"      退避后重试 ({retry + 1}/{config.API_MAX_RETRIES})...")
+                    continue
+                else:
+                    print(f"      达到最大重试次数，跳过该关键词")
+                    break
+            
+            except requests.exceptions.RequestException as e:
+                print(f"    ✗ 网络请求异常：{str(e)}")
+                if retry < config.API_MAX_RETRIES - 1:
+                    print(f"      退避后重试 ({retry + 1}/{config.API_MAX_RETRIES})...")
+                    continue
+                else:
+                    print(f"      达到最大重试次数，跳过该关键词")
+                    break
+            
+            except Exception as e:
+                print(f"    ✗ 搜索视频时出错：{str(e)}")
+                import traceback
+                traceback.print_exc()
+                break  # 其他异常不重试
+        
+        # 请求都未拿到响应时不会记账，释放 can_spend 预占的额度
+        cost_governor.release("tikhub.douyin_search")
+        return None
+    
+    def get_negative_search(self, game_name: str, active_only: bool = True) -> Optional[Dict]:
+        """查询该游戏仍在退避期内（active_only=False 时含已过期）的搜索无结果记录，未启用或无记录返回None"""
+        if not (config.NEGATIVE_CACHE_ENABLED and self.use_database and self.db):
+            return None
+        return self.db.get_negative_search(game_name, self.SEARCH_PROVIDER, active_only=active_only)
+    
+    def _record_negative_search(self, game_name: str, query: str, reason: str) -> None:
+        """记录一次搜索无结果"""
+        if not (config.NEGATIVE_CACHE_ENABLED and self.use_database and self.db):
+            return
+        entry = self.db.record_negative_search(game_name, self.SEARCH_PROVIDER, query, reason)
+        if entry:
+            print(f"  已记录搜索无结果（第 {entry['attempts']} 次），{format_retry_time(entry['next_retry_at'])} 前不再搜索")
+    
+    def _load_search_cache(self, payload: Dict, allow_expired: bool = False):
+        """读取搜索响应缓存，未启用缓存或未命中返回None"""
+        if not (config.SEARCH_CACHE_ENABLED and self.use_database and self.db):
+            return None
+        return self.db.get_search_response(self.search_endpoint, payload, allow_expired=allow_expired)
+    
+    def _save_search_cache(self, payload: Dict, data) -> None:
+        """写入搜索响应缓存（TTL 见 config.SEARCH_CACHE_TTL_HOURS_DOUYIN）"""
+        if not (config.SEARCH_CACHE_ENABLED and self.use_database and self.db):
+            return
+        self.db.save_search_response(
+            self.search_endpoint, payload, data,
+            ttl_seconds=config.SEARCH_CACHE_TTL_HOURS_DOUYIN * 3600,
+        )
+    
+    def rescore_cached_search(self, game_name: str, keyword: str = None) -> List[Dict]:
+        """
+        用缓存的搜索原始响应重新解析与评分（不发起网络请求，不写数据库），
+        便于调整筛选/评分逻辑后离线复算
+        
+        Args:
+            game_name: 游戏名称
+            keyword: 搜索关键词，默认与 search_videos 一致（"{game_name} 小游戏攻略"）
+        
+        Returns:
+            按当前评分逻辑排序后的候选视频列表；缓存中没有该查询时返回空列表
+        """
+        keyword = keyword or f"{game_name} 小游戏攻略"
+        data = self._load_search_cache(self._build_search_payload(keyword), allow_expired=True)
+        if data is None:
+            return []
+        videos = self._parse_search_results(data, game_name, keyword, persist=False)
+        return self._filter_and_score_videos(videos, game_name)
+    
+    def _parse_search_results(self, data: Dict, game_name: str, search_keyword: str = "", persist: bool = True) -> List[Dict]:
         """
         解析搜索结果，提取视频信息
         
@@ -298,6 +397,7 @@ class VideoSearcher:
             data: API返回的数据（已解析的JSON）
             game_name: 游戏名称
             search_keyword: 搜索关键词
+            persist: 是否将解析出的视频写入数据库（离线复算时为False）
         
         Returns:
             视频信息列表
@@ -346,7 +446,7 @@ class VideoSearcher:
                             aweme_info = item
                     
                     if aweme_info:
-                        video_info = self._extract_video_info(aweme_info, game_name, search_keyword)
+                        video_info = self._extract_video_info(aweme_info, game_name, search_keyword, persist=persist)
                         if video_info:
                             videos.append(video_info)
             else:
@@ -370,75 +470,12 @@ class VideoSearcher:
             game_name: 游戏名称
         
         Returns:
-            筛选后的视频列表（按相关性评分排序）
+            筛选后的视频列表（按综合评分排序，含 relevance_score 与 score_explanation）
         """
-        # 相关关键词（加分项）
-        relevant_keywords = [
-            "玩法", "演示", "教程", "怎么玩", "如何玩", "操作", 
-            "技巧", "攻略", "教学", "展示", "试玩", "体验"
-        ]
-        
-        # 不相关关键词（排除项）
-        irrelevant_keywords = [
-            "宣传", "广告", "推广", "下载", "安装", "注册",
-            "充值", "氪金", "抽奖", "活动", "福利", "奖励"
-        ]
-        
-        filtered = []
-        
-        for video in videos:
-            title = video.get("title", "").lower()
-            description = video.get("description", "").lower()
-            text = f"{title} {description}"
-            
-            # 检查是否包含不相关关键词（如果只有不相关关键词，则排除）
-            has_irrelevant = any(kw in text for kw in irrelevant_keywords)
-            has_relevant = any(kw in text for kw in relevant_keywords)
-            
-            # 如果只有不相关关键词，且没有相关关键词，则排除
-            if has_irrelevant and not has_relevant:
-                continue
-            
-            # 计算相关性评分
-            score = 0
-            
-            # 基础分：包含游戏名称
-            if game_name in text:
-                score += 10
-            
-            # 相关关键词加分
-            for kw in relevant_keywords:
-                if kw in text:
-                    score += 5
-                    # 高优先级关键词额外加分
-                    if kw in ["玩法", "演示", "怎么玩", "教程", "攻略"]:
-                        score += 3
-            
-            # 时长加分：15-60秒的视频更适合玩法演示
-            duration = video.get("duration", 0)
-            if 15 <= duration <= 60:
-                score += 5
-            elif 10 <= duration < 15:
-                score += 2
-            elif duration > 60:
-                score -= 2  # 超过1分钟的视频可能不是纯玩法演示
-            
-            # 点赞数加分（热门视频可能更相关）
-            like_count = video.get("like_count", 0)
-            if like_count > 1000:
-                score += 2
-            elif like_count > 100:
-                score += 1
-            
-            video["relevance_score"] = score
-            filtered.append(video)
-        
-        # 按评分排序
-        filtered.sort(key=lambda x: x.get("relevance_score", 0), reverse=True)
-        
-        return filtered
+        # 关键词匹配、游戏名相似度、时长与热度的统一打分见 modules/video_ranker.py（权重：RANKER_WEIGHTS）
+        return video_ranker.get_ranker().rank(videos, game_name)
     
-    def _extract_video_info(self, aweme_info: Dict, game_name: str, search_keyword: str = "") -> Optional[Dict]:
+    def _extract_video_info(self, aweme_info: Dict, game_name: str, search_keyword: str = "", persist: bool = True) -> Optional[Dict]:
         """
         从aweme_info中提取视频信息
         
@@ -446,6 +483,7 @@ class VideoSearcher:
             aweme_info: 视频详细信息
             game_name: 游戏名称
             search_keyword: 搜索关键词
+            persist: 是否保存到数据库
         
         Returns:
             提取的视频信息字典
@@ -534,7 +572,7 @@ class VideoSearcher:
                 print(f"  ✓ 找到原视频URL（最高画质）: {original_video_url[:60]}...")
             
             # 保存到数据库
-            if self.use_database and self.db:
+            if persist and self.use_database and self.db:
                 self.db.save_video(video_info)
                 print(f"  ✓ 视频信息已保存到数据库: {aweme_id}")
             
@@ -585,6 +623,7 @@ class VideoSearcher:
         下载视频到本地
         
         下载逻辑（简化版）：
+        0. 启用 GDRIVE_STREAM_UPLOAD 时边下载边上传Google Drive（未保留本地副本时返回None，Drive链接已写入数据库）
         1. 优先使用免费的video_url直接下载
         2. 如果普通URL下载失败，使用付费的最高画质API（如果启用）
         
@@ -609,14 +648,36 @@ class VideoSearcher:
             existing = self.db.get_game(game_name)
             if existing and existing.get("downloaded") == 1 and existing.get("local_path"):
                 local_path = existing.get("local_path")
-                if os.path.exists(local_path):
+                if os.path.exists(local_path) and video_probe.check(
+                    self.db, local_path, self.SEARCH_PROVIDER, aweme_id, game_name
+                ):
                     print(f"  ✓ 视频已存在于数据库且已下载：{local_path}")
                     return local_path
         
+        # 同一视频已下载过（游戏改名、清空后重跑、多个游戏选中同一视频）时复用本地实体文件，不再下载
+        stored_path = video_store.materialize(
+            self.db, self.SEARCH_PROVIDER, aweme_id, game_name,
+            os.path.join(self.videos_dir, f"{game_name}_{aweme_id}.mp4"),
+        )
+        if stored_path and video_probe.check(self.db, stored_path, self.SEARCH_PROVIDER, aweme_id, game_name):
+            print(f"  ✓ 视频已在本地存储中（aweme_id={aweme_id}），跳过下载：{stored_path}")
+            video_cache.record_access(stored_path)
+            self._save_download_status(stored_path, game_name, aweme_id)
+            return stored_path
+        
+        video_cache.record_miss()
         print(f"正在下载视频：{video_info.get('title', '未知标题')}")
         print(f"  视频ID: {aweme_id}")
         print(f"  点赞数: {video_info.get('like_count', 0):,}")
         
+        # 方式0：边下载边上传Google Drive（GDRIVE_STREAM_UPLOAD，未保留本地副本时返回None，Drive链接已写入数据库）
+        if video_url and config.GDRIVE_STREAM_UPLOAD and self.use_database and self.db:
+            print(f"  尝试方式0: 边下载边上传Google Drive（免费URL）")
+            streamed = self._stream_direct_url_to_gdrive(video_url, game_name, aweme_id)
+            if streamed:
+                return streamed.get("local_path")
+            print(f"  ✗ 边下载边上传失败，改为先下载再上传")
+        
         # 方式1：优先使用免费的video_url直接下载
         if video_url:
             print(f"  尝试方式1: 直接下载URL（免费）")
@@ -626,10 +687,15 @@ class VideoSearcher:
                 return result
             print(f"  ✗ URL下载失败，尝试使用API")
         
-        # 方式2：如果普通URL失败，使用付费的最高画质API
-        if config.USE_HIGH_QUALITY_API_FALLBACK:
+        # 方式2：如果普通URL失败，使用付费的最高画质API（超出预算时跳过，留待下次运行）
+        if config.USE_HIGH_QUALITY_API_FALLBACK and not cost_governor.can_spend("tikhub.douyin_high_quality"):
+            print(f"  ⚠ 付费API预算已用尽，跳过最高画质API备用方案（留待下次运行）")
+        elif config.USE_HIGH_QUALITY_API_FALLBACK:
             print(f"  尝试方式2: 使用最高画质API（付费，0.005$）")
-            result = self._download_via_high_quality_api(aweme_id, share_url, game_name)
+            try:
+                result = self._download_via_high_quality_api(aweme_id, share_url, game_name)
+            finally:
+                cost_governor.release("tikhub.douyin_high_quality")
             if result:
                 print(f"  ✓ 下载成功（使用最高画质API）")
                 return result
@@ -669,7 +735,7 @@ class VideoSearcher:
             }
             
             print(f"  调用下载API: {url}")
-            response = requests.post(
+            response = http_client.post(
                 url,
                 headers=headers,
                 json=payload,
@@ -758,7 +824,7 @@ class VideoSearcher:
             if share_url:
                 print(f"  参数: share_url={share_url[:50]}...")
             
-            response = requests.get(
+            response = http_client.get(
                 url,
                 headers=headers,
                 params=params,
@@ -830,47 +896,95 @@ class VideoSearcher:
             
             print(f"  从URL下载: {video_url[:80]}...")
             
-            # 下载视频
-            response = requests.get(video_url, stream=True, timeout=60)
+            # 下载视频（经下载调度器排队；先写 .part，断点续传，大文件分段并行）
+            result = download_scheduler.get_download_scheduler().download(video_url, local_path, timeout=60)
+            if not result:
+                return None
             
-            if response.status_code == 200:
-                # 获取文件大小
-                total_size = int(response.headers.get('content-length', 0))
-                
-                with open(local_path, 'wb') as f:
-                    downloaded = 0
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            downloaded += len(chunk)
-                            # 显示下载进度（可选）
-                            if total_size > 0:
-                                percent = (downloaded / total_size) * 100
-                                if downloaded % (1024 * 1024) == 0:  # 每MB显示一次
-                                    print(f"  下载进度: {percent:.1f}%")
-                
-                print(f"视频已保存到：{local_path}")
-                
-                # 更新数据库下载状态
-                if self.use_database and self.db:
-                    # 自动上传到Google Drive并获取URL（先检查数据库）
-                    gdrive_url, gdrive_file_id = self._upload_to_gdrive(local_path, game_name, aweme_id)
-                    # 更新数据库（如果gdrive_url已存在，不会覆盖）
-                    if gdrive_url:
-                        self.db.update_download_status(game_name, local_path, gdrive_url, gdrive_file_id)
-                    else:
-                        # 只更新下载状态
-                        self.db.update_download_status(game_name, local_path)
-                
-                return local_path
-            else:
-                print(f"下载失败：HTTP {response.status_code}")
+            # 检查容器头（moov、时长、分辨率）：HTML错误页或被截断的文件隔离后按下载失败处理，
+            # 不上传 Google Drive，由调用方改用付费最高画质API
+            if not video_probe.check(self.db, local_path, self.SEARCH_PROVIDER, aweme_id, game_name):
                 return None
+            
+            print(f"视频已保存到：{local_path}")
+            
+            # 纳入本地视频存储（按内容去重）
+            video_store.ingest(self.db, local_path, self.SEARCH_PROVIDER, aweme_id, game_name)
+            self._save_download_status(local_path, game_name, aweme_id)
+            
+            return local_path
                 
         except Exception as e:
             print(f"下载视频时出错：{str(e)}")
             return None
     
+    def _stream_direct_url_to_gdrive(self, video_url: str, game_name: str, aweme_id: str) -> Optional[Dict]:
+        """
+        从URL边下载边上传到Google Drive（可选同时保留本地副本），并更新数据库
+        
+        Args:
+            video_url: 视频URL
+            game_name: 游戏名称
+            aweme_id: 视频ID
+        
+        Returns:
+            upload_stream 的结果字典（local_path 为本地副本路径或None），失败返回None
+        """
+        try:
+            from modules.gdrive_uploader import get_drive_uploader
+            from modules.gdrive_upload_manager import get_upload_manager
+            
+            local_path = os.path.join(self.videos_dir, f"{game_name}_{aweme_id}.mp4")
+            uploader = get_drive_uploader()
+            result = download_scheduler.get_download_scheduler().run(
+                download_scheduler.host_of(video_url),
+                uploader.upload_stream,
+                video_url,
+                os.path.basename(local_path),
+                folder_name="Game Videos",
+                tee_path=local_path if config.GDRIVE_STREAM_TEE_LOCAL else None,
+                timeout=60,
+                db=self.db,
+                make_public=get_upload_manager().make_public,
+            )
+            if not result:
+                return None
+            downloader.record_streamed(result["bytes"], result["seconds"])
+            
+            gdrive_url, gdrive_file_id = result["public_url"], result.get("file_id")
+            if result.get("local_path") and not video_probe.check(
+                self.db, local_path, self.SEARCH_PROVIDER, aweme_id, game_name
+            ):
+                # 本地副本检查不通过（HTML错误页/被截断），已上传的Drive文件同样不可用
+                if gdrive_file_id:
+                    uploader.delete_file(gdrive_file_id)
+                return None
+            if result.get("local_path"):
+                video_store.ingest(self.db, local_path, self.SEARCH_PROVIDER, aweme_id, game_name)
+                video_store.remember_drive_file(self.db, self.SEARCH_PROVIDER, aweme_id, gdrive_url, gdrive_file_id)
+            self.db.update_download_status(game_name, result.get("local_path"), gdrive_url, gdrive_file_id)
+            print(f"  ✓ 已边下载边上传到Google Drive：{gdrive_url[:60]}...")
+            return result
+        except ImportError:
+            print(f"  ⚠ Google Drive上传功能不可用（未安装相关库）")
+            return None
+        except Exception as e:
+            print(f"  ⚠ 边下载边上传时出错：{str(e)}")
+            return None
+    
+    def _save_download_status(self, local_path: str, game_name: str, aweme_id: str):
+        """上传到Google Drive（先检查数据库）并更新数据库下载状态"""
+        if not (self.use_database and self.db):
+            return
+        # 自动上传到Google Drive并获取URL（先检查数据库）
+        gdrive_url, gdrive_file_id = self._upload_to_gdrive(local_path, game_name, aweme_id)
+        # 更新数据库（如果gdrive_url已存在，不会覆盖）
+        if gdrive_url:
+            self.db.update_download_status(game_name, local_path, gdrive_url, gdrive_file_id)
+        else:
+            # 只更新下载状态
+            self.db.update_download_status(game_name, local_path)
+    
     def _upload_to_gdrive(self, video_path: str, game_name: str, aweme_id: str = None) -> tuple:
         """
         上传视频到Google Drive并获取公开访问链接（先检查数据库缓存）
@@ -883,38 +997,38 @@ class VideoSearcher:
         Returns:
             (gdrive_url, gdrive_file_id) 元组，如果失败返回 (None, None)
         """
-        # 先检查数据库中是否已有Google Drive链接
-        if self.use_database and self.db:
-            # 从video_path中提取game_name（格式：data/videos/游戏名_aweme_id.mp4）
-            game_name_from_path = os.path.basename(video_path).split('_')[0] if '_' in os.path.basename(video_path) else None
-            if game_name_from_path:
-                existing = self.db.get_game(game_name_from_path)
-                if existing and existing.get("gdrive_url"):
-                    gdrive_url = existing.get("gdrive_url")
-                    gdrive_file_id = existing.get("gdrive_file_id")
-                    print(f"  ✓ 从数据库找到Google Drive链接：{gdrive_url[:60]}...")
-                    return (gdrive_url, gdrive_file_id)
+        # 先检查数据库中是否已有Google Drive链接（按调用方传入的游戏名；游戏名本身可能含下划线，不能从文件名拆分）
+        if self.use_database and self.db and game_name:
+            existing = self.db.get_game(game_name)
+            if existing and existing.get("gdrive_url"):
+                gdrive_url = existing.get("gdrive_url")
+                gdrive_file_id = existing.get("gdrive_file_id")
+                print(f"  ✓ 从数据库找到Google Drive链接：{gdrive_url[:60]}...")
+                return (gdrive_url, gdrive_file_id)
+        
+        # 同一视频文件已上传过（其他游戏选中了同一视频）时复用该Drive文件
+        reused = video_store.drive_file(self.db, self.SEARCH_PROVIDER, aweme_id)
+        if reused:
+            print(f"  ✓ 复用同一视频文件的Google Drive链接：{reused[0][:60]}...")
+            return reused
         
         try:
-            from modules.gdrive_uploader import GoogleDriveUploader
+            from modules.gdrive_upload_manager import get_upload_manager
             
             print(f"  数据库中未找到Google Drive链接，正在上传到Google Drive...")
-            uploader = GoogleDriveUploader()
-            result = uploader.upload_video(video_path, folder_name="Game Videos")
+            result = get_upload_manager().upload(video_path, folder_name="Game Videos", db=self.db)
             
             if result and result.get('public_url'):
                 gdrive_url = result['public_url']
                 gdrive_file_id = result.get('file_id')
                 print(f"  ✓ 已上传到Google Drive")
                 print(f"  Google Drive链接：{gdrive_url[:60]}...")
+                video_store.remember_drive_file(self.db, self.SEARCH_PROVIDER, aweme_id, gdrive_url, gdrive_file_id)
                 
                 # 保存到数据库
-                if self.use_database and self.db:
-                    # 从video_path中提取game_name
-                    game_name_from_path = os.path.basename(video_path).split('_')[0] if '_' in os.path.basename(video_path) else None
-                    if game_name_from_path:
-                        self.db.update_download_status(game_name_from_path, video_path, gdrive_url, gdrive_file_id)
-                        print(f"  ✓ 已保存Google Drive链接到数据库")
+                if self.use_database and self.db and game_name:
+                    self.db.update_download_status(game_name, video_path, gdrive_url, gdrive_file_id)
+                    print(f"  ✓ 已保存Google Drive链接到数据库")
                 
                 return (gdrive_url, gdrive_file_id)
             else:
@@ -976,7 +1090,9 @@ class VideoSearcher:
             if existing_game:
                 if existing_game.get("downloaded") == 1 and existing_game.get("local_path"):
                     local_path = existing_game.get("local_path")
-                    if os.path.exists(local_path):
+                    if os.path.exists(local_path) and video_probe.check(
+                        self.db, local_path, self.SEARCH_PROVIDER, existing_game.get("aweme_id"), game_name
+                    ):
                         print(f"  ✓ 从数据库找到已下载的视频：{local_path}")
                         return local_path
         
@@ -1005,7 +1121,9 @@ class VideoSearcher:
             existing = self.db.get_game(game_name)
             if existing and existing.get("downloaded") == 1 and existing.get("local_path"):
                 local_path = existing.get("local_path")
-                if os.path.exists(local_path):
+                if os.path.exists(local_path) and video_probe.check(
+                    self.db, local_path, self.SEARCH_PROVIDER, existing.get("aweme_id"), game_name
+                ):
                     print(f"  ✓ 视频已下载，使用现有文件：{local_path}")
                     return local_path
         
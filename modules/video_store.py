@@ -0,0 +1,178 @@
+"""
+本地视频内容寻址存储（按 sha256 去重）
+- 实体文件：VIDEO_STORE_DIR/<sha256 前两位>/<sha256>.<扩展名>，相同内容只保存一份（video_blobs 表）
+- 清单：来源视频ID（抖音 aweme_id / YouTube video_id）+ 游戏名 → sha256（video_manifest 表）
+- data/videos/{游戏名}_{视频ID}.mp4 仍是 games.local_path 记录的路径，但只是指向实体文件的硬链接
+  （文件系统不支持硬链接时退化为复制）
+- 已知视频ID且实体文件存在时跳过下载，只补建友好文件名；同一实体文件只上传一次 Google Drive，
+  其他游戏/视频ID复用同一个 Drive 文件
+"""
+import hashlib
+import os
+import shutil
+import threading
+from typing import Dict, Optional, Tuple
+
+import config
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "ingested": 0, "deduped": 0, "saved_bytes": 0, "drive_reused": 0}
+
+
+def _add_stats(**values):
+    with _stats_lock:
+        for k, v in values.items():
+            _stats[k] += v
+
+
+def get_store_stats() -> Dict:
+    """本次运行的存储统计：hits 跳过的下载、ingested 新增实体文件、deduped 重复内容、saved_bytes 省下的磁盘、drive_reused 复用的 Drive 文件"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_store_stats():
+    with _stats_lock:
+        for k in _stats:
+            _stats[k] = 0
+
+
+def _enabled(db) -> bool:
+    return bool(config.VIDEO_STORE_ENABLED and db is not None)
+
+
+def file_sha256(path: str) -> str:
+    """计算文件 sha256（按块读取）"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def blob_path_for(sha256: str, ext: str = ".mp4") -> str:
+    """实体文件路径"""
+    return os.path.join(config.VIDEO_STORE_DIR, sha256[:2], f"{sha256}{ext or '.mp4'}")
+
+
+def _link(blob_path: str, friendly_path: str):
+    """让 friendly_path 指向 blob_path（已是同一文件时不动；优先硬链接，失败则复制）"""
+    if os.path.exists(friendly_path):
+        if os.path.samefile(blob_path, friendly_path):
+            return
+        os.remove(friendly_path)
+    os.makedirs(os.path.dirname(friendly_path) or ".", exist_ok=True)
+    try:
+        os.link(blob_path, friendly_path)
+    except OSError:
+        shutil.copy2(blob_path, friendly_path)
+
+
+def lookup(db, source: str, video_id: str) -> Optional[Dict]:
+    """
+    按来源视频ID查找已存储的实体文件
+
+    Args:
+        db: VideoDatabase 实例
+        source: 来源，如 douyin / youtube
+        video_id: aweme_id / YouTube video_id
+
+    Returns:
+        {"sha256", "size", "blob_path", "gdrive_file_id", "gdrive_url", ...}；未记录或实体文件已不存在时返回None
+    """
+    if not (_enabled(db) and video_id):
+        return None
+    entry = db.get_video_manifest(source, video_id)
+    if not entry or not entry.get("blob_path") or not os.path.exists(entry["blob_path"]):
+        return None
+    return entry
+
+
+def materialize(db, source: str, video_id: str, game_name: str, friendly_path: str) -> Optional[str]:
+    """
+    已知视频ID时不下载，直接为当前游戏建立友好文件名
+
+    Args:
+        db: VideoDatabase 实例
+        source: 来源，如 douyin / youtube
+        video_id: aweme_id / YouTube video_id
+        game_name: 游戏名称
+        friendly_path: 期望的本地路径（扩展名以实体文件为准）
+
+    Returns:
+        本地视频路径；未找到或建立失败返回None（调用方照常下载）
+    """
+    entry = lookup(db, source, video_id)
+    if not entry:
+        return None
+    try:
+        path = os.path.splitext(friendly_path)[0] + os.path.splitext(entry["blob_path"])[1]
+        _link(entry["blob_path"], path)
+        db.save_video_manifest(source, video_id, game_name, entry["sha256"], path)
+        _add_stats(hits=1)
+        return path
+    except Exception as e:
+        print(f"  ⚠ 复用本地视频失败，将重新下载：{str(e)}")
+        return None
+
+
+def ingest(db, path: str, source: str, video_id: str, game_name: str) -> Optional[Dict]:
+    """
+    把刚下载的视频纳入存储：内容已存在时删除重复数据、改为指向已有实体文件，否则新建实体文件
+
+    Args:
+        db: VideoDatabase 实例
+        path: 下载得到的本地文件（即友好文件名）
+        source: 来源，如 douyin / youtube
+        video_id: aweme_id / YouTube video_id
+        game_name: 游戏名称
+
+    Returns:
+        {"sha256", "blob_path", "size", "duplicate"}，未启用或失败返回None（不影响已下载的文件）
+    """
+    if not (_enabled(db) and video_id and os.path.exists(path)):
+        return None
+    try:
+        sha256 = file_sha256(path)
+        size = os.path.getsize(path)
+        blob_path = blob_path_for(sha256, os.path.splitext(path)[1])
+        duplicate = os.path.exists(blob_path) and not os.path.samefile(blob_path, path)
+        if os.path.exists(blob_path) and not duplicate:
+            pass  # 已是该实体文件的硬链接（重复纳入），只刷新清单
+        elif duplicate:
+            # 相同内容已存在（如同一视频被两个游戏选中），友好文件名改为硬链接，释放重复数据
+            _link(blob_path, path)
+            _add_stats(deduped=1, saved_bytes=size)
+            print(f"  ✓ 视频内容与已存储文件相同，已去重（省下 {size / 1024 / 1024:.1f} MB）")
+        else:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            try:
+                os.link(path, blob_path)
+            except OSError:
+                shutil.copy2(path, blob_path)
+            _add_stats(ingested=1)
+        db.save_video_blob(sha256, size, blob_path)
+        db.save_video_manifest(source, video_id, game_name, sha256, path)
+        return {"sha256": sha256, "blob_path": blob_path, "size": size, "duplicate": duplicate}
+    except Exception as e:
+        print(f"  ⚠ 写入本地视频存储失败：{str(e)}")
+        return None
+
+
+def drive_file(db, source: str, video_id: str) -> Optional[Tuple[str, str]]:
+    """同一实体文件已上传过 Google Drive 时返回 (gdrive_url, gdrive_file_id)，否则返回None（本地实体文件已被清理也可复用）"""
+    if not (_enabled(db) and video_id):
+        return None
+    entry = db.get_video_manifest(source, video_id)
+    if not entry or not entry.get("gdrive_url"):
+        return None
+    _add_stats(drive_reused=1)
+    return (entry["gdrive_url"], entry.get("gdrive_file_id"))
+
+
+def remember_drive_file(db, source: str, video_id: str, gdrive_url: str, gdrive_file_id: str) -> bool:
+    """上传成功后把 Drive 文件记到实体文件上，供同内容的其他游戏/视频ID复用"""
+    entry = lookup(db, source, video_id)
+    if not entry or not gdrive_url:
+        return False
+    return db.update_video_blob_drive(entry["sha256"], gdrive_url, gdrive_file_id)
@@ -3,7 +3,7 @@ import hashlib
 import time
 from typing import Optional
 
-import requests
+from modules import http_client
 
 
 class WeComSender:
@@ -41,7 +41,7 @@ class WeComSender:
         last_error: Optional[Exception] = None
         for attempt in range(self.max_retries + 1):
             self._throttle()
-            resp = requests.post(self.webhook_url, json=payload, timeout=30)
+            resp = http_client.post(self.webhook_url, json=payload, timeout=30)
             # 企业微信机器人一般返回 JSON: {"errcode":0,"errmsg":"ok"}
             try:
                 data = resp.json()
@@ -2,20 +2,23 @@
 YouTube 视频搜索和下载模块
 通过 RapidAPI 搜索 YouTube 视频，下载并上传到 Google Drive
 """
-import http.client
 import json
 import os
 import time
-import requests
 from typing import Dict, Optional, List
 import config
+from modules import cost_governor, download_scheduler, http_client, video_cache, video_probe, video_ranker, video_store
 from modules.database import VideoDatabase
-from modules.gdrive_uploader import GoogleDriveUploader
+from modules.gdrive_upload_manager import get_upload_manager
+from modules.video_searcher import format_retry_time
 
 
 class YouTubeSearcher:
     """YouTube 视频搜索和下载器"""
     
+    # 来源标识（搜索无结果记录 search_negative_cache、本地视频存储 video_manifest 共用）
+    SEARCH_PROVIDER = "youtube"
+    
     def __init__(self, videos_dir: str = None, use_database: bool = True):
         """
         初始化 YouTube 搜索器
@@ -29,7 +32,8 @@ class YouTubeSearcher:
         self.tikhub_token = getattr(config, 'YOUTUBE_API_TOKEN', '') or getattr(config, 'DOUYIN_API_TOKEN', '') or os.getenv("DOUYIN_API_TOKEN", "")
         self.tikhub_base_url = getattr(config, 'YOUTUBE_API_BASE_URL', 'https://api.tikhub.io')
         self.rapidapi_key = getattr(config, 'RAPIDAPI_KEY', '') or os.getenv("RAPIDAPI_KEY", "")
-        self.rapidapi_host = "youtube138.p.rapidapi.com"
+        self.rapidapi_host = config.RAPIDAPI_YOUTUBE_HOST
+        self.rapidapi_base_url = config.RAPIDAPI_YOUTUBE_BASE_URL.rstrip("/")
         self.use_database = use_database
         
         # 确保目录存在
@@ -41,13 +45,14 @@ class YouTubeSearcher:
         else:
             self.db = None
     
-    def search_videos(self, game_name: str, max_results: int = 5) -> List[Dict]:
+    def search_videos(self, game_name: str, max_results: int = 5, ignore_negative_cache: bool = False) -> List[Dict]:
         """
         搜索游戏相关视频（先检查数据库缓存）
         
         Args:
             game_name: 游戏名称
             max_results: 最大返回结果数
+            ignore_negative_cache: 是否忽略搜索无结果记录（强制重新搜索）
         
         Returns:
             视频信息列表，每个视频包含URL、ID等信息
@@ -74,10 +79,6 @@ class YouTubeSearcher:
         print(f"开始搜索游戏 '{game_name}' 的 YouTube 视频...")
         print(f"  搜索关键词：'{keywords}'...")
         
-        # 添加请求间隔
-        if config.API_REQUEST_DELAY > 0:
-            time.sleep(config.API_REQUEST_DELAY)
-        
         # 检查 API 配置
         use_rapidapi = bool(self.rapidapi_key)
         
@@ -85,18 +86,44 @@ class YouTubeSearcher:
             print(f"警告：未配置 RapidAPI Key，无法搜索视频")
             return []
         
+        # 近期搜索无结果的游戏，退避期内直接跳过（不调用API）
+        negative_cache_enabled = config.NEGATIVE_CACHE_ENABLED and self.use_database and self.db
+        if negative_cache_enabled and not ignore_negative_cache:
+            negative = self.db.get_negative_search(game_name, self.SEARCH_PROVIDER)
+            if negative:
+                print(f"  ⚠ 该游戏近期搜索无结果（已 {negative['attempts']} 次），"
+                      f"{format_retry_time(negative['next_retry_at'])} 前跳过搜索")
+                return []
+        # 退避期已过的重试不读搜索响应缓存（缓存的仍是上次的无结果响应，命中会在没有实际搜索的情况下加倍退避）
+        retrying_negative = bool(
+            negative_cache_enabled and self.db.get_negative_search(game_name, self.SEARCH_PROVIDER, active_only=False)
+        )
+        
         # 使用 RapidAPI 搜索（TikHub 可能没有搜索 API，先用 RapidAPI 搜索获取 video_id）
-        videos = self._search_with_rapidapi(keywords, game_name, max_results)
+        videos = self._search_with_rapidapi(keywords, game_name, max_results, use_cache=not retrying_negative)
+        
+        if videos is None:
+            print(f"  ✗ 搜索请求失败")
+            return []
         
         if not videos:
             print(f"  ✗ 未找到相关视频")
+            if negative_cache_enabled:
+                entry = self.db.record_negative_search(game_name, self.SEARCH_PROVIDER, keywords, "no_results")
+                if entry:
+                    print(f"  已记录搜索无结果（第 {entry['attempts']} 次），"
+                          f"{format_retry_time(entry['next_retry_at'])} 前不再搜索")
             return []
         
+        if negative_cache_enabled:
+            self.db.clear_negative_search(game_name, self.SEARCH_PROVIDER)
+        
         print(f"  ✓ 找到 {len(videos)} 个视频")
         return videos
     
     
-    def _search_with_rapidapi(self, keywords: str, game_name: str, max_results: int) -> List[Dict]:
+    def _search_with_rapidapi(self, keywords: str, game_name: str, max_results: int,
+                              use_cache: bool = True) -> Optional[List[Dict]]:
         """
         使用 RapidAPI 搜索 YouTube 视频
         
@@ -104,45 +131,53 @@ class YouTubeSearcher:
             keywords: 搜索关键词
             game_name: 游戏名称
             max_results: 最大结果数
+            use_cache: 是否读取搜索响应缓存（写入不受影响）
         
         Returns:
-            视频信息列表
+            视频信息列表（无结果为空列表）；请求全部失败返回None
         """
-        videos = []
+        videos = None
+        # 查询参数由 requests 负责 URL 编码，避免出现非 ASCII 字符（如 ®）导致编码错误
+        url = f"{self.rapidapi_base_url}/search/"
+        params = {"q": keywords, "hl": "en", "gl": "US"}
+        cache_enabled = config.SEARCH_CACHE_ENABLED and self.use_database and self.db
+        if cache_enabled and use_cache:
+            cached = self.db.get_search_response(url, params)
+            if cached is not None:
+                print(f"  ✓ 命中搜索响应缓存（未调用API）")
+                return self._parse_search_results(cached, game_name, max_results)
+        
+        if not cost_governor.can_spend("rapidapi.youtube_search"):
+            print(f"  ⚠ 付费API预算已用尽，跳过搜索（留待下次运行）")
+            return None
+        
         for retry in range(config.API_MAX_RETRIES):
             try:
-                conn = http.client.HTTPSConnection(self.rapidapi_host)
-                
-                # 构建搜索URL，必须对关键词做 URL 编码，避免出现非 ASCII 字符（如 ®）导致编码错误
-                import urllib.parse
-                search_query = urllib.parse.quote(keywords, safe="")
-                endpoint = f"/search/?q={search_query}&hl=en&gl=US"
-                
                 headers = {
                     'x-rapidapi-key': self.rapidapi_key,
                     'x-rapidapi-host': self.rapidapi_host
                 }
                 
-                conn.request("GET", endpoint, headers=headers)
-                res = conn.getresponse()
-                data = res.read()
+                res = http_client.get(url, headers=headers, params=params, timeout=30)
                 
-                if res.status == 200:
-                    result = json.loads(data.decode("utf-8"))
+                if res.status_code == 200:
+                    result = res.json()
+                    if cache_enabled:
+                        self.db.save_search_response(
+                            url, params, result,
+                            ttl_seconds=config.SEARCH_CACHE_TTL_HOURS_YOUTUBE * 3600,
+                        )
                     videos = self._parse_search_results(result, game_name, max_results)
-                    conn.close()
                     break
                 else:
-                    print(f"  ⚠ API请求失败，状态码：{res.status}")
-                    if retry < config.API_MAX_RETRIES - 1:
-                        time.sleep(config.API_RETRY_DELAY)
-                    conn.close()
+                    # 429/5xx 的等待由 RapidAPI 主机的共享令牌桶处理（见 modules/rate_limiter.py）
+                    print(f"  ⚠ API请求失败，状态码：{res.status_code}")
                     
             except Exception as e:
                 print(f"  ⚠ 搜索失败（尝试 {retry + 1}/{config.API_MAX_RETRIES}）：{str(e)}")
-                if retry < config.API_MAX_RETRIES - 1:
-                    time.sleep(config.API_RETRY_DELAY)
         
+        # 请求都未拿到响应时不会记账，释放 can_spend 预占的额度
+        cost_governor.release("rapidapi.youtube_search")
         return videos
     
     def _parse_search_results(self, result: Dict, game_name: str, max_results: int) -> List[Dict]:
@@ -156,10 +191,17 @@ class YouTubeSearcher:
         Returns:
             视频信息列表
         """
+        # 先收集所有候选视频，再统一打分排序
+        videos = self._extract_candidates(result, game_name)
+        # 与抖音共用排序器（短视频优先、观看数、标题相关性，见 modules/video_ranker.py）；
+        # YouTube 结果不做不相关词过滤，只返回前 max_results 个
+        return video_ranker.get_ranker().rank(videos, game_name, top_k=max_results, drop_irrelevant=False)
+    
+    def _extract_candidates(self, result: Dict, game_name: str) -> List[Dict]:
+        """从 YouTube 搜索结果中提取候选视频（未排序）"""
         videos: List[Dict] = []
         contents = result.get("contents", [])
         
-        # 先收集所有候选视频，再按“短视频优先（<=60 秒）、观看数”排序
         for item in contents:
             if item.get("type") != "video":
                 continue
@@ -195,21 +237,7 @@ class YouTubeSearcher:
             
             videos.append(video_info)
         
-        if not videos:
-            return []
-        
-        def _score(v: Dict) -> tuple:
-            """短视频（<=60秒）优先，然后按观看数排序。"""
-            dur = v.get("duration") or 0
-            is_short = 1 if (dur and dur <= 60) else 0
-            views_val = v.get("views") or 0
-            return (is_short, views_val)
-        
-        # 按（是否短视频, 观看数）降序排序
-        videos.sort(key=_score, reverse=True)
-        
-        # 只返回前 max_results 个
-        return videos[:max_results]
+        return videos
     
     def _mock_search_result(self, game_name: str) -> Dict:
         """生成Mock搜索结果（用于测试）"""
@@ -248,17 +276,31 @@ class YouTubeSearcher:
             existing = self.db.get_game(game_name)
             if existing and existing.get("downloaded") == 1 and existing.get("local_path"):
                 local_path = existing.get("local_path")
-                if os.path.exists(local_path):
+                if os.path.exists(local_path) and video_probe.check(
+                    self.db, local_path, self.SEARCH_PROVIDER, video_id, game_name
+                ):
                     print(f"  ✓ 视频已存在于数据库且已下载：{local_path}")
                     return local_path
         
+        # 构建输出文件名
+        safe_game_name = "".join(c for c in game_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        
+        # 同一视频已下载过（游戏改名、清空后重跑、多个游戏选中同一视频）时复用本地实体文件，不再下载
+        stored_path = video_store.materialize(
+            self.db, self.SEARCH_PROVIDER, video_id, game_name,
+            os.path.join(self.videos_dir, f"{safe_game_name}_{video_id}.mp4"),
+        )
+        if stored_path and video_probe.check(self.db, stored_path, self.SEARCH_PROVIDER, video_id, game_name):
+            print(f"  ✓ 视频已在本地存储中（video_id={video_id}），跳过下载：{stored_path}")
+            video_cache.record_access(stored_path)
+            self.db.update_download_status(game_name, stored_path, None, None)
+            return stored_path
+        
+        video_cache.record_miss()
         print(f"正在下载视频：{video_info.get('title', '未知标题')}")
         print(f"  视频ID: {video_id}")
         print(f"  观看数: {video_info.get('views', 0):,}")
         
-        # 构建输出文件名
-        safe_game_name = "".join(c for c in game_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        
         # NOTE:
         #  目前在本机环境下，使用 TikHub 返回的 googlevideo 直链下载会频繁出现
         #  ConnectionResetError / RemoteDisconnected，因此这里临时禁用
@@ -276,7 +318,7 @@ class YouTubeSearcher:
         
         # 使用 yt-dlp 下载视频
         try:
-            import yt_dlp
+            import yt_dlp  # noqa: F401  仅检查是否已安装，实际下载在子进程中执行
             
             output_template = os.path.join(self.videos_dir, f"{safe_game_name}_{video_id}.%(ext)s")
             
@@ -324,8 +366,8 @@ class YouTubeSearcher:
                     if attempt > 0:
                         print(f"  尝试格式选项 {attempt + 1}...")
                     
-                    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                        ydl.download([youtube_url])
+                    # 在下载调度器的子进程中执行（占用一个下载名额，不阻塞主流程）
+                    download_scheduler.get_download_scheduler().ytdlp(youtube_url, ydl_opts)
                     break  # 成功则退出循环
                 except Exception as e:
                     error_msg = str(e)
@@ -359,7 +401,12 @@ class YouTubeSearcher:
                     os.remove(expected_path)
                     return None
                 
+                # 检查容器头（moov、时长、分辨率），坏文件隔离后按下载失败处理
+                if not video_probe.check(self.db, expected_path, self.SEARCH_PROVIDER, video_id, game_name):
+                    return None
+                
                 print(f"  ✓ 下载成功：{expected_path} ({file_size / 1024 / 1024:.2f} MB)")
+                video_store.ingest(self.db, expected_path, self.SEARCH_PROVIDER, video_id, game_name)
                 
                 # 保存到数据库
                 if self.use_database and self.db:
@@ -377,7 +424,11 @@ class YouTubeSearcher:
                             os.remove(alt_path)
                             continue
                         
+                        if not video_probe.check(self.db, alt_path, self.SEARCH_PROVIDER, video_id, game_name):
+                            continue
+                        
                         print(f"  ✓ 下载成功：{alt_path} ({file_size / 1024 / 1024:.2f} MB)")
+                        video_store.ingest(self.db, alt_path, self.SEARCH_PROVIDER, video_id, game_name)
                         if self.use_database and self.db:
                             self.db.update_download_status(game_name, alt_path, None, None)
                         return alt_path
@@ -412,7 +463,6 @@ class YouTubeSearcher:
                 return None
             
             # 调用 TikHub API 获取视频信息
-            conn = http.client.HTTPSConnection("api.tikhub.io")
             # 简化参数，只传递必要的 video_id 和 lang
             # 注意：根据示例，参数中的 null 可能不需要传递，或者需要作为字符串 "null" 传递
             endpoint = f"/api/v1/youtube/web/get_video_info?video_id={video_id}&lang=zh-CN"
@@ -424,18 +474,20 @@ class YouTubeSearcher:
             print(f"  请求端点：{endpoint}")
             print(f"  Token 前缀：{self.tikhub_token[:10]}...")
             
-            conn.request("GET", endpoint, "", headers)
-            res = conn.getresponse()
-            data = res.read()
-            conn.close()
+            if not cost_governor.can_spend("tikhub.youtube_video_info"):
+                print(f"  ⚠ 付费API预算已用尽，跳过 TikHub 下载（留待下次运行）")
+                return None
+            
+            res = http_client.get(f"{self.tikhub_base_url}{endpoint}", headers=headers, timeout=60)
+            data = res.content
             
-            if res.status != 200:
-                error_body = data.decode("utf-8") if data else ""
-                print(f"  ⚠ TikHub API 请求失败，状态码：{res.status}")
+            if res.status_code != 200:
+                error_body = data.decode("utf-8", errors="replace") if data else ""
+                print(f"  ⚠ TikHub API 请求失败，状态码：{res.status_code}")
                 print(f"  错误响应：{error_body[:500]}")
                 
                 # 如果是 403，可能是 Token 问题
-                if res.status == 403:
+                if res.status_code == 403:
                     print(f"  💡 提示：403 错误通常表示：")
                     print(f"    1. Token 无效或已过期")
                     print(f"    2. Token 没有访问 YouTube API 的权限")
@@ -525,152 +577,37 @@ class YouTubeSearcher:
             
             print(f"  ✓ 获取到视频下载链接")
             
-            # 下载视频
+            # 下载视频（先写 .part，连接中断时断点续传，大文件分段并行）
             output_path = os.path.join(self.videos_dir, f"{safe_game_name}_{video_id}.mp4")
+            print(f"  正在下载视频...")
+            # 连接超时 30 秒，读取超时 300 秒（5分钟）
+            result = download_scheduler.get_download_scheduler().download(video_url, output_path, timeout=(30, 300))
+            if not result or not video_probe.check(self.db, output_path, self.SEARCH_PROVIDER, video_id, game_name):
+                return None
             
-            # 使用重试机制下载
-            max_retries = 3
-            for retry in range(max_retries):
-                try:
-                    if retry > 0:
-                        print(f"  重试下载（第 {retry + 1}/{max_retries} 次）...")
-                        time.sleep(5)  # 等待 5 秒后重试
-                    
-                    print(f"  正在下载视频...")
-                    # 使用更长的超时时间：(连接超时, 读取超时)
-                    # 连接超时 30 秒，读取超时 300 秒（5分钟）
-                    # 对于大文件，读取超时需要足够长
-                    response = requests.get(
-                        video_url, 
-                        stream=True, 
-                        timeout=(30, 300)  # (connect_timeout, read_timeout)
-                    )
-                    
-                    if response.status_code != 200:
-                        print(f"  ⚠ 下载失败，HTTP 状态码：{response.status_code}")
-                        if retry < max_retries - 1:
-                            continue
-                        return None
-                    
-                    total_size = int(response.headers.get('content-length', 0))
-                    downloaded_size = 0
-                    last_progress_time = time.time()
-                    
-                    # 使用临时文件，下载完成后再重命名
-                    temp_path = output_path + '.tmp'
-                    
-                    with open(temp_path, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192 * 4):  # 增大 chunk 大小到 32KB
-                            if chunk:
-                                f.write(chunk)
-                                downloaded_size += len(chunk)
-                                
-                                # 每 1MB 或每 5 秒打印一次进度
-                                current_time = time.time()
-                                if total_size > 0:
-                                    percent = (downloaded_size / total_size) * 100
-                                    if (downloaded_size % (1024 * 1024) == 0) or (current_time - last_progress_time >= 5):
-                                        print(f"  下载进度：{percent:.1f}% ({downloaded_size / 1024 / 1024:.1f} MB / {total_size / 1024 / 1024:.1f} MB)")
-                                        last_progress_time = current_time
-                                else:
-                                    # 如果没有 content-length，每 5 秒打印一次
-                                    if current_time - last_progress_time >= 5:
-                                        print(f"  已下载：{downloaded_size / 1024 / 1024:.1f} MB")
-                                        last_progress_time = current_time
-                    
-                    # 下载完成，重命名临时文件
-                    if os.path.exists(temp_path):
-                        if os.path.exists(output_path):
-                            os.remove(output_path)  # 删除旧文件
-                        os.rename(temp_path, output_path)
-                    
-                    # 验证文件
-                    if os.path.exists(output_path):
-                        file_size = os.path.getsize(output_path)
-                        if file_size < 1024:
-                            print(f"  ⚠ 下载的文件可能不完整（大小：{file_size} 字节）")
-                            os.remove(output_path)
-                            if retry < max_retries - 1:
-                                continue
-                            return None
-                        
-                        # 如果知道总大小，验证是否完整
-                        if total_size > 0 and abs(file_size - total_size) > 1024:
-                            print(f"  ⚠ 文件大小不匹配（期望：{total_size} 字节，实际：{file_size} 字节）")
-                            if retry < max_retries - 1:
-                                continue
-                        
-                        print(f"  ✓ 下载成功：{output_path} ({file_size / 1024 / 1024:.2f} MB)")
-                        
-                        # 保存到数据库
-                        if self.use_database and self.db:
-                            self.db.update_download_status(game_name, output_path, None, None)
-                        
-                        return output_path
-                    else:
-                        print(f"  ✗ 下载失败：文件不存在")
-                        if retry < max_retries - 1:
-                            continue
-                        return None
-                        
-                except requests.exceptions.Timeout as e:
-                    print(f"  ⚠ 下载超时：{str(e)}")
-                    # 清理可能的不完整文件
-                    temp_path = output_path + '.tmp'
-                    if os.path.exists(temp_path):
-                        try:
-                            os.remove(temp_path)
-                        except:
-                            pass
-                    if retry < max_retries - 1:
-                        print(f"  将重试下载...")
-                        continue
-                    return None
-                    
-                except requests.exceptions.RequestException as e:
-                    print(f"  ⚠ 下载请求失败：{str(e)}")
-                    # 清理可能的不完整文件
-                    temp_path = output_path + '.tmp'
-                    if os.path.exists(temp_path):
-                        try:
-                            os.remove(temp_path)
-                        except:
-                            pass
-                    if retry < max_retries - 1:
-                        print(f"  将重试下载...")
-                        continue
-                    return None
-                    
-                except Exception as e:
-                    print(f"  ⚠ 下载过程出错：{str(e)}")
-                    # 清理可能的不完整文件
-                    temp_path = output_path + '.tmp'
-                    if os.path.exists(temp_path):
-                        try:
-                            os.remove(temp_path)
-                        except:
-                            pass
-                    if retry < max_retries - 1:
-                        print(f"  将重试下载...")
-                        continue
-                    return None
+            # 保存到数据库
+            if self.use_database and self.db:
+                self.db.update_download_status(game_name, output_path, None, None)
             
-            print(f"  ✗ 下载失败：已重试 {max_retries} 次")
-            return None
+            return output_path
                 
         except Exception as e:
             print(f"  ⚠ TikHub 下载失败：{str(e)}")
             import traceback
             traceback.print_exc()
             return None
+        finally:
+            # 未拿到响应的请求不会记账，释放 can_spend 预占的额度
+            cost_governor.release("tikhub.youtube_video_info")
     
-    def upload_to_gdrive(self, video_path: str, game_name: str) -> Optional[str]:
+    def upload_to_gdrive(self, video_path: str, game_name: str, video_id: str = None) -> Optional[str]:
         """
         上传视频到 Google Drive 并获取公开访问链接
         
         Args:
             video_path: 本地视频文件路径
             game_name: 游戏名称
+            video_id: 视频ID（可选，用于复用同一视频文件已上传的Drive文件）
         
         Returns:
             Google Drive 公开访问URL，如果失败返回None
@@ -686,16 +623,24 @@ class YouTubeSearcher:
                 print(f"  ✓ 数据库中已有Google Drive链接")
                 return existing.get("gdrive_url")
         
+        # 同一视频文件已上传过（其他游戏选中了同一视频）时复用该Drive文件
+        reused = video_store.drive_file(self.db, self.SEARCH_PROVIDER, video_id)
+        if reused:
+            gdrive_url, gdrive_file_id = reused
+            print(f"  ✓ 复用同一视频文件的Google Drive链接：{gdrive_url[:60]}...")
+            self.db.update_download_status(game_name, video_path, gdrive_url, gdrive_file_id)
+            return gdrive_url
+        
         try:
             print(f"  正在上传到Google Drive...")
-            uploader = GoogleDriveUploader()
-            result = uploader.upload_video(video_path, folder_name="Game Videos")
+            result = get_upload_manager().upload(video_path, folder_name="Game Videos", db=self.db)
             
             if result and result.get('public_url'):
                 gdrive_url = result['public_url']
                 gdrive_file_id = result.get('file_id')
                 print(f"  ✓ 已上传到Google Drive")
                 print(f"  Google Drive链接：{gdrive_url[:60]}...")
+                video_store.remember_drive_file(self.db, self.SEARCH_PROVIDER, video_id, gdrive_url, gdrive_file_id)
                 
                 # 保存到数据库
                 if self.use_database and self.db:
@@ -741,7 +686,7 @@ class YouTubeSearcher:
         
         # 上传到Google Drive
         if upload_to_gdrive:
-            gdrive_url = self.upload_to_gdrive(video_path, game_name)
+            gdrive_url = self.upload_to_gdrive(video_path, game_name, video_info.get("video_id"))
             if gdrive_url:
                 video_info['gdrive_url'] = gdrive_url
                 video_info['local_path'] = video_path
@@ -0,0 +1,247 @@
+"""
+api.py 压测脚本
+在进程内通过 ASGI 直接驱动 FastAPI 应用（不经过网络与 uvicorn），按固定并发级别压测各接口，
+输出每个接口的 RPS 与 p50/p99 延迟，并保存为 JSON（含 git commit），便于跨提交对比。
+
+用法（项目根目录，先用 generate_synthetic_db.py 生成合成库）：
+  python scripts/benchmarks/bench_api.py
+  python scripts/benchmarks/bench_api.py --db data/benchmarks/synthetic.db --concurrency 1,8,32 --requests 2000
+  python scripts/benchmarks/bench_api.py --compare data/benchmarks/api_bench_xxx.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+DEFAULT_DB_PATH = "data/benchmarks/synthetic.db"
+DEFAULT_OUTPUT_DIR = "data/benchmarks"
+
+
+def get_git_commit() -> str:
+    """获取当前 git commit（短哈希），失败返回 unknown"""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=str(PROJECT_ROOT), capture_output=True, text=True, timeout=10,
+        )
+        return out.stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """最近秩法求分位数（sorted_values 需已升序）"""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def load_game_names(db_path: str, limit: int) -> list[str]:
+    """
+    从库中取压测用游戏名：优先取 weekly_report_simple 中出现最多的游戏（热门游戏，查询最重），
+    再补充随机游戏，贴近真实访问分布。
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT game_name FROM weekly_report_simple
+        GROUP BY game_name ORDER BY COUNT(*) DESC LIMIT ?
+        """,
+        (max(1, limit // 5),),
+    )
+    hot = [r[0] for r in cursor.fetchall()]
+    cursor.execute("SELECT game_name FROM games ORDER BY RANDOM() LIMIT ?", (limit,))
+    rest = [r[0] for r in cursor.fetchall()]
+    conn.close()
+    return hot + rest
+
+
+def build_endpoints(game_names: list[str], miss_ratio: float, rng: random.Random) -> dict:
+    """构造各接口的请求生成器：返回 {接口名: (path 生成函数, 视为成功的状态码集合)}"""
+
+    def weekly_report_path() -> str:
+        if rng.random() < miss_ratio:
+            name = f"不存在的游戏{rng.randint(0, 10 ** 9)}"
+        else:
+            name = rng.choice(game_names)
+        return f"/api/game-weekly-report?game_name={quote(name)}"
+
+    return {
+        "/health": (lambda: "/health", {200}),
+        "/api/game-weekly-report": (weekly_report_path, {200, 404}),
+    }
+
+
+async def run_level(client, make_path, ok_statuses: set, concurrency: int, total: int) -> dict:
+    """以固定并发跑 total 个请求，返回该级别的统计"""
+    latencies: list[float] = []
+    errors = 0
+    issued = 0
+
+    async def worker():
+        nonlocal errors, issued
+        while issued < total:
+            issued += 1
+            path = make_path()
+            start = time.perf_counter()
+            try:
+                resp = await client.get(path)
+                if resp.status_code not in ok_statuses:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000.0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+    }
+
+
+async def run_benchmark(app, endpoints: dict, levels: list[int], total: int, warmup: int) -> list[dict]:
+    """按接口 × 并发级别依次压测"""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for endpoint, (make_path, ok_statuses) in endpoints.items():
+            if warmup > 0:
+                await run_level(client, make_path, ok_statuses, 1, warmup)
+            for concurrency in levels:
+                stats = await run_level(client, make_path, ok_statuses, concurrency, total)
+                stats["endpoint"] = endpoint
+                results.append(stats)
+                print(
+                    f"  {endpoint:<28} c={concurrency:<4} "
+                    f"RPS={stats['rps']:<8} p50={stats['p50_ms']}ms p99={stats['p99_ms']}ms "
+                    f"errors={stats['errors']}"
+                )
+    return results
+
+
+def compare_results(current: list[dict], baseline_path: str) -> None:
+    """与历史压测结果对比，打印 RPS/p99 变化"""
+    try:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except Exception as e:
+        print(f"⚠ 读取对比文件失败：{str(e)}")
+        return
+
+    base_map = {(r["endpoint"], r["concurrency"]): r for r in baseline.get("results", [])}
+    print(f"\n与 {baseline_path}（commit {baseline.get('meta', {}).get('git_commit', '?')}）对比：")
+    for r in current:
+        base = base_map.get((r["endpoint"], r["concurrency"]))
+        if not base:
+            continue
+        rps_delta = (r["rps"] - base["rps"]) / base["rps"] * 100 if base["rps"] else 0.0
+        p99_delta = (r["p99_ms"] - base["p99_ms"]) / base["p99_ms"] * 100 if base["p99_ms"] else 0.0
+        print(
+            f"  {r['endpoint']:<28} c={r['concurrency']:<4} "
+            f"RPS {base['rps']} → {r['rps']} ({rps_delta:+.1f}%)  "
+            f"p99 {base['p99_ms']} → {r['p99_ms']}ms ({p99_delta:+.1f}%)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="进程内 ASGI 压测 api.py")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help=f"压测使用的数据库（默认 {DEFAULT_DB_PATH}）")
+    parser.add_argument("--concurrency", default="1,8,32", help="并发级别，逗号分隔（默认 1,8,32）")
+    parser.add_argument("--requests", type=int, default=2000, help="每个接口每个并发级别的请求数（默认 2000）")
+    parser.add_argument("--warmup", type=int, default=50, help="每个接口的预热请求数（默认 50）")
+    parser.add_argument("--sample-games", type=int, default=2000, help="参与压测的游戏名数量（默认 2000）")
+    parser.add_argument("--miss-ratio", type=float, default=0.05, help="查询不存在游戏（404）的比例（默认 0.05）")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子（默认 42）")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help=f"结果 JSON 输出目录（默认 {DEFAULT_OUTPUT_DIR}）")
+    parser.add_argument("--compare", default=None, help="可选，历史结果 JSON 路径，输出对比")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"✗ 数据库不存在：{args.db}")
+        print("  请先运行：python scripts/benchmarks/generate_synthetic_db.py")
+        sys.exit(1)
+
+    # 必须在导入 api 之前设置，api 模块在导入时创建数据库连接对象
+    os.environ["API_DB_PATH"] = args.db
+    import api
+
+    levels = [int(x) for x in args.concurrency.split(",") if x.strip()]
+    rng = random.Random(args.seed)
+    game_names = load_game_names(args.db, args.sample_games)
+    if not game_names:
+        print("✗ 数据库中没有游戏数据")
+        sys.exit(1)
+
+    endpoints = build_endpoints(game_names, args.miss_ratio, rng)
+    commit = get_git_commit()
+    print(f"开始压测 api.py（db={args.db}，commit={commit}，并发={levels}，每级 {args.requests} 请求）")
+
+    results = asyncio.run(run_benchmark(api.app, endpoints, levels, args.requests, args.warmup))
+
+    conn = sqlite3.connect(args.db)
+    cursor = conn.cursor()
+    table_counts = {}
+    for table in ("games", "top20_ranking", "rank_changes", "weekly_report_simple", "weekly_report_trends"):
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        table_counts[table] = cursor.fetchone()[0]
+    conn.close()
+
+    report = {
+        "meta": {
+            "git_commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "db_path": args.db,
+            "table_counts": table_counts,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests_per_level": args.requests,
+            "miss_ratio": args.miss_ratio,
+        },
+        "results": results,
+    }
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    out_path = os.path.join(args.output_dir, f"api_bench_{ts}_{commit}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ 压测结果已保存：{out_path}")
+
+    if args.compare:
+        compare_results(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+视频取帧压测（逐帧定位 + PIL vs 顺序读取 + cv2 vs 进程池）
+对 --videos-dir 下的视频（默认 data/videos），每个视频取截图用的开头/中间/结尾三帧加 --frames 个均匀分布的帧：
+  - legacy：旧行为，每帧 cap.set(CAP_PROP_POS_FRAMES) 定位后读取，BGR→RGB、PIL LANCZOS 缩放、PIL 编码 JPEG（需要 pillow）
+  - sequential：modules/frame_extractor.py 在当前进程中逐个视频执行（一次顺序读取，cv2 缩放与编码）
+  - pool：同上，每个视频一个任务，在 --workers 个进程中并行
+统计每种方式的总耗时、每秒取帧数与每个视频耗时（p50/p99），结果保存为 JSON（含 git commit）。
+
+用法（项目根目录）：
+  python scripts/benchmarks/bench_frames.py
+  python scripts/benchmarks/bench_frames.py --limit 20 --frames 8 --workers 4
+"""
+
+import argparse
+import glob
+import io
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import config
+from modules import frame_extractor
+from scripts.benchmarks.bench_api import get_git_commit, percentile
+
+DEFAULT_OUTPUT_DIR = "data/benchmarks"
+VIDEO_PATTERNS = ("*.mp4", "*.webm", "*.mkv", "*.mov")
+
+
+def target_indices(total: int, frames: int) -> List[int]:
+    """开头/中间/结尾 + frames 个均匀分布的帧"""
+    if total <= 0:
+        return []
+    indices = {0, total // 2, total - 1}
+    indices.update(int((i + 0.5) * total / frames) for i in range(frames))
+    return sorted(indices)
+
+
+def legacy_extract(video_path: str, indices: List[int], max_size, quality: int) -> int:
+    """旧行为：逐帧定位，经 PIL 缩放与编码"""
+    import cv2
+    from PIL import Image
+    cap = cv2.VideoCapture(video_path)
+    count = 0
+    for idx in indices:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+        ret, frame = cap.read()
+        if not ret:
+            continue
+        pil_image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if pil_image.width > max_size[0] or pil_image.height > max_size[1]:
+            pil_image.thumbnail(max_size, Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        pil_image.save(buffer, format="JPEG", quality=quality)
+        count += 1
+    cap.release()
+    return count
+
+
+def run_mode(name: str, jobs: List[Dict], workers: int) -> Dict:
+    per_video: List[float] = []
+    frames = 0
+    started = time.perf_counter()
+    if name == "legacy":
+        for job in jobs:
+            t = time.perf_counter()
+            frames += legacy_extract(job["video_path"], job["indices"], job["max_size"], job["quality"])
+            per_video.append(time.perf_counter() - t)
+    else:
+        extractor = frame_extractor.FrameExtractor(workers=1 if name == "sequential" else workers)
+        try:
+            for result in extractor.extract_many(jobs):
+                if result:
+                    frames += len(result["images"])
+                    per_video.append(result["seconds"])
+        finally:
+            extractor.shutdown()
+    wall = time.perf_counter() - started
+    per_video.sort()
+    row = {
+        "mode": name,
+        "videos": len(jobs),
+        "frames": frames,
+        "wall_seconds": round(wall, 3),
+        "frames_per_second": round(frames / wall, 1) if wall > 0 else 0.0,
+        "p50_video_ms": round(percentile(per_video, 50) * 1000, 1) if per_video else None,
+        "p99_video_ms": round(percentile(per_video, 99) * 1000, 1) if per_video else None,
+        "workers": workers if name == "pool" else 1,
+    }
+    print(
+        f"  {name:<10} {row['frames']:>5} 帧  {row['wall_seconds']:>7.2f} s  {row['frames_per_second']:>7.1f} 帧/秒  "
+        f"每个视频 p50 {row['p50_video_ms']} ms / p99 {row['p99_video_ms']} ms"
+    )
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="视频取帧压测（逐帧定位 + PIL vs 顺序读取 + cv2 vs 进程池）")
+    parser.add_argument("--videos-dir", default=config.VIDEOS_DIR, help=f"视频目录（默认 {config.VIDEOS_DIR}）")
+    parser.add_argument("--limit", type=int, default=0, help="最多使用的视频数（0=全部）")
+    parser.add_argument("--frames", type=int, default=8, help="每个视频额外均匀取的帧数（默认 8）")
+    parser.add_argument("--workers", type=int, default=config.FRAME_EXTRACT_WORKERS,
+                        help=f"进程池大小（默认 {config.FRAME_EXTRACT_WORKERS}）")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help=f"结果 JSON 输出目录（默认 {DEFAULT_OUTPUT_DIR}）")
+    args = parser.parse_args()
+
+    if not frame_extractor.FRAME_EXTRACTION_AVAILABLE:
+        print("✗ 未安装 opencv-python，无法压测")
+        return
+    import cv2
+
+    paths = sorted(p for pattern in VIDEO_PATTERNS for p in glob.glob(os.path.join(args.videos_dir, pattern)))
+    if args.limit:
+        paths = paths[:args.limit]
+    max_size = (config.FRAME_MAX_WIDTH, config.FRAME_MAX_HEIGHT)
+    jobs = []
+    for path in paths:
+        cap = cv2.VideoCapture(path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0) if cap.isOpened() else 0
+        cap.release()
+        if total > 0:
+            jobs.append({"video_path": path, "indices": target_indices(total, args.frames),
+                         "max_size": max_size, "quality": config.FRAME_JPEG_QUALITY})
+    if not jobs:
+        print(f"✗ {args.videos_dir} 下没有可读取的视频")
+        return
+
+    commit = get_git_commit()
+    print(f"视频取帧压测（commit={commit}，{len(jobs)} 个视频，每个约 {args.frames + 3} 帧，"
+          f"最大 {max_size[0]}x{max_size[1]}，进程池 {args.workers}）")
+
+    modes = ["sequential", "pool"]
+    try:
+        import PIL  # noqa: F401
+        modes.insert(0, "legacy")
+    except ImportError:
+        print("  ⚠ 未安装 pillow，跳过 legacy")
+    results = [run_mode(name, jobs, args.workers) for name in modes]
+    by_mode = {row["mode"]: row for row in results}
+    if "legacy" in by_mode and by_mode["legacy"]["frames_per_second"] > 0:
+        base = by_mode["legacy"]["frames_per_second"]
+        print(f"\n  每秒取帧数：sequential {by_mode['sequential']['frames_per_second'] / base:.1f} 倍，"
+              f"pool {by_mode['pool']['frames_per_second'] / base:.1f} 倍（相对 legacy）")
+
+    report = {
+        "meta": {
+            "git_commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "videos_dir": args.videos_dir,
+            "videos": len(jobs),
+            "extra_frames": args.frames,
+            "max_size": list(max_size),
+            "quality": config.FRAME_JPEG_QUALITY,
+            "opencv": cv2.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    output_dir = os.path.abspath(args.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    out_path = os.path.join(output_dir, f"frames_{ts}_{commit}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ 压测结果已保存：{out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Google Drive 上传的固定开销压测（对比每次新建上传器、进程内共享上传器与上传管理器并行上传）
+在进程内启动 replay_server.py 的回放服务充当 Drive（可注入延迟），用小视频文件上传：
+  - per_upload：每次上传都新建 GoogleDriveUploader（解析发现文档、查询文件夹）
+  - shared：get_drive_uploader() 共享上传器（发现文档、文件夹ID只取一次），依次上传
+  - parallel：DriveUploadManager 以 --concurrency 个线程同时上传不同文件，设置公开访问合并为批量请求
+统计每次上传的耗时（p50/p99）、总耗时与发往 Drive 的请求数，结果保存为 JSON（含 git commit）。
+离线时跳过 OAuth，真实环境中每次新建上传器还要读取 token 文件（必要时刷新令牌），实际差距更大。
+
+用法（项目根目录）：
+  python scripts/benchmarks/bench_gdrive_overhead.py
+  python scripts/benchmarks/bench_gdrive_overhead.py --uploads 50 --latency-ms 80 --file-kb 512 --concurrency 4
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import config
+from scripts.benchmarks.bench_api import get_git_commit, percentile
+from scripts.benchmarks.replay_server import ReplayServer, start_in_thread, synthetic_mp4
+
+DEFAULT_OUTPUT_DIR = "data/benchmarks"
+
+
+def _drive_requests(server: ReplayServer) -> int:
+    return sum(sum(s.values()) for path, s in server.stats.snapshot().items() if "drive" in path)
+
+
+def run_mode(name: str, get_uploader: Callable, video_path: str, uploads: int, server: ReplayServer) -> Dict:
+    """按指定方式获取上传器并上传 uploads 次"""
+    server.stats.reset()
+    durations: List[float] = []
+    failed = 0
+    for _ in range(uploads):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = get_uploader().upload_video(video_path, folder_name="Game Videos")
+        durations.append(time.perf_counter() - started)
+        failed += 0 if result else 1
+    durations.sort()
+    requests = _drive_requests(server)
+    row = {
+        "mode": name,
+        "uploads": uploads,
+        "failed": failed,
+        "total_seconds": round(sum(durations), 3),
+        "p50_ms": round(percentile(durations, 50) * 1000, 1),
+        "p99_ms": round(percentile(durations, 99) * 1000, 1),
+        "drive_requests": requests,
+        "requests_per_upload": round(requests / uploads, 2),
+    }
+    print(
+        f"  {name:<10} p50 {row['p50_ms']:>8.1f} ms  p99 {row['p99_ms']:>8.1f} ms  "
+        f"合计 {row['total_seconds']:.2f} 秒  每次上传请求 {row['requests_per_upload']:.2f} 个  失败 {failed}"
+    )
+    return row
+
+
+def run_parallel(video_paths: List[str], concurrency: int, server: ReplayServer) -> Dict:
+    """上传管理器并行上传（每个文件只传一次，同一路径会被合并为一个任务）"""
+    from modules.gdrive_upload_manager import DriveUploadManager
+
+    server.stats.reset()
+    manager = DriveUploadManager(workers=concurrency)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = manager.upload_many(video_paths, folder_name="Game Videos")
+    total = time.perf_counter() - started
+    manager.shutdown()
+    stats = manager.get_stats()
+    uploads = len(video_paths)
+    requests = _drive_requests(server)
+    per_upload = stats["seconds"] / uploads * 1000 if uploads else 0.0
+    row = {
+        "mode": "parallel",
+        "uploads": uploads,
+        "failed": sum(1 for r in results if not r),
+        "total_seconds": round(total, 3),
+        "avg_upload_ms": round(per_upload, 1),
+        "concurrency": concurrency,
+        "peak_running": stats["peak_running"],
+        "permission_requests": stats["permission_requests"],
+        "drive_requests": requests,
+        "requests_per_upload": round(requests / uploads, 2),
+    }
+    print(
+        f"  {'parallel':<10} 单个平均 {per_upload:>8.1f} ms  并发 {stats['peak_running']}/{concurrency}  "
+        f"合计 {total:.2f} 秒  每次上传请求 {row['requests_per_upload']:.2f} 个  失败 {row['failed']}"
+    )
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Google Drive 上传固定开销压测（回放服务充当 Drive）")
+    parser.add_argument("--uploads", type=int, default=20, help="每种方式的上传次数（默认 20）")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="回放服务每个请求的固定延迟（毫秒，默认 50）")
+    parser.add_argument("--file-kb", type=int, default=256, help="上传文件大小（KB，默认 256）")
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel 方式同时上传数（默认 4）")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help=f"结果 JSON 输出目录（默认 {DEFAULT_OUTPUT_DIR}）")
+    args = parser.parse_args()
+
+    server = ReplayServer(("127.0.0.1", 0), tempfile.mkdtemp(prefix="gdrive_bench_"), latency_ms=args.latency_ms)
+    start_in_thread(server)
+    # replay_server 已导入 config，直接改配置项（gdrive_uploader 每次构建服务时读取）
+    config.GDRIVE_API_ENDPOINT = f"{server.base_url}/drive/v3/"
+    from modules import gdrive_uploader
+
+    commit = get_git_commit()
+    print(f"Drive 上传开销压测（commit={commit}，回放服务 {server.base_url}，延迟 {args.latency_ms:.0f} ms，"
+          f"文件 {args.file_kb} KB × {args.uploads} 次）")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video_path = os.path.join(tmp, "bench.mp4")
+        with open(video_path, "wb") as f:
+            f.write(synthetic_mp4(args.file_kb * 1024))
+
+        def fresh_uploader():
+            gdrive_uploader._discovery_doc = None  # 旧行为：每个上传器各自解析发现文档
+            return gdrive_uploader.GoogleDriveUploader()
+
+        parallel_paths = []
+        for i in range(args.uploads):
+            path = os.path.join(tmp, f"bench_{i}.mp4")
+            os.link(video_path, path)
+            parallel_paths.append(path)
+
+        try:
+            results = [
+                run_mode("per_upload", fresh_uploader, video_path, args.uploads, server),
+                run_mode("shared", gdrive_uploader.get_drive_uploader, video_path, args.uploads, server),
+                run_parallel(parallel_paths, args.concurrency, server),
+            ]
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    before, after, parallel = results
+    if before["p50_ms"] > 0:
+        print(f"\n  每次上传节省 {before['p50_ms'] - after['p50_ms']:.1f} ms（p50），"
+              f"Drive 请求 {before['requests_per_upload']:.2f} → {after['requests_per_upload']:.2f} 个")
+    if parallel["total_seconds"] > 0:
+        print(f"  并行上传总耗时 {after['total_seconds']:.2f} → {parallel['total_seconds']:.2f} 秒"
+              f"（{after['total_seconds'] / parallel['total_seconds']:.1f} 倍）")
+
+    report = {
+        "meta": {
+            "git_commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "latency_ms": args.latency_ms,
+            "file_kb": args.file_kb,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    output_dir = os.path.abspath(args.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    out_path = os.path.join(output_dir, f"gdrive_overhead_{ts}_{commit}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ 压测结果已保存：{out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+工作流离线压测（步骤0~5，全部外部请求由本地回放服务应答）
+在进程内启动 replay_server.py 的回放服务，把 TikHub / RapidAPI / OpenRouter / 飞书 / 企业微信 / Google Drive
+的根地址指向它，再把最新一期 dy/wx 异动榜单按倍数放大（游戏名加 #序号 后缀），在临时工作目录中运行
+GameAnalysisWorkflow，统计各步骤耗时、处理量与回放命中情况，结果保存为 JSON（含 git commit）。
+
+说明：
+  - 步骤0（Playwright 爬取榜单）无法经 HTTP 回放，离线时跳过，直接使用放大后的 CSV
+  - 放大后的游戏在录制中没有精确匹配的搜索请求，由回放服务按路径复用录制的响应
+  - 回放服务返回的视频默认是合成数据，截图默认关闭；在 <cassette-dir>/media/default.mp4 放一个真实视频即可开启截图
+
+用法（项目根目录，先设置 HTTP_RECORD_DIR 正常运行一次工作流以积累录制）：
+  python scripts/benchmarks/bench_pipeline_offline.py
+  python scripts/benchmarks/bench_pipeline_offline.py --scale 10,100 --latency-ms 200 --jitter-ms 100
+  python scripts/benchmarks/bench_pipeline_offline.py --scale 10 --error-rate 0.05 --error-status 429,503 --keep-workspace
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.benchmarks.bench_api import get_git_commit
+from scripts.benchmarks.replay_server import DEFAULT_CASSETTE_DIR, ReplayServer, start_in_thread
+
+DEFAULT_OUTPUT_DIR = "data/benchmarks"
+RANKING_FILES = ("wx_anomalies.csv", "dy_anomalies.csv")
+TIMED_STEPS = (
+    "step1_extract_rankings",
+    "step2_search_videos",
+    "step3_analyze_videos",
+    "step4_generate_report",
+    "step5_send_report",
+)
+
+
+def offline_env(base_url: str, request_delay: float, retry_delay: float) -> Dict[str, str]:
+    """
+    指向回放服务的环境变量（必须在导入 config 之前设置；
+    显式设为空串的变量不会被 .env 覆盖，避免误用真实 Webhook / Sheets）
+    """
+    return {
+        "DOUYIN_API_BASE_URL": base_url,
+        "YOUTUBE_API_BASE_URL": base_url,
+        "OPENROUTER_BASE_URL": f"{base_url}/api/v1",
+        "RAPIDAPI_YOUTUBE_BASE_URL": base_url,
+        "FEISHU_OPEN_API_BASE_URL": f"{base_url}/open-apis",
+        "FEISHU_WEBHOOK_URL": f"{base_url}/open-apis/bot/v2/hook/replay",
+        "WECOM_WEBHOOK_URL": f"{base_url}/cgi-bin/webhook/send?key=replay",
+        "WECOM_WEBHOOK_URL_REAL": f"{base_url}/cgi-bin/webhook/send?key=replay",
+        "GDRIVE_API_ENDPOINT": f"{base_url}/drive/v3/",
+        "DOUYIN_API_TOKEN": "replay",
+        "OPENROUTER_API_KEY": "replay",
+        "RAPIDAPI_KEY": "replay",
+        "FEISHU_APP_ID": "replay",
+        "FEISHU_APP_SECRET": "replay",
+        "GOOGLE_SHEET_ID": "",
+        "SENSORTOWER_API_TOKEN": "",
+        "HTTP_RECORD_DIR": "",
+        "RANKINGS_CSV_PATH": "data/人气榜",
+        "API_RATE_LIMITS": "",
+        "API_REQUEST_DELAY": str(request_delay),
+        "API_RETRY_DELAY": str(retry_delay),
+    }
+
+
+def find_latest_rankings(base_dir: Path) -> Optional[Path]:
+    """最新一期（文件修改时间最新）含 dy/wx 异动 CSV 的目录"""
+    candidates = [p.parent for name in RANKING_FILES for p in base_dir.rglob(name)]
+    if not candidates:
+        return None
+    return max(set(candidates), key=lambda d: max((d / n).stat().st_mtime for n in RANKING_FILES if (d / n).exists()))
+
+
+def build_scaled_rankings(source_dir: Path, workspace: Path, scale: int) -> int:
+    """
+    将 source_dir 下的 dy/wx 异动 CSV 放大 scale 倍写入工作目录（第 k 份副本的游戏名追加 ' #k'）
+
+    Returns:
+        写入的总行数
+    """
+    target_dir = workspace / "data" / "人气榜" / source_dir.name
+    target_dir.mkdir(parents=True, exist_ok=True)
+    total = 0
+    for name in RANKING_FILES:
+        src = source_dir / name
+        if not src.exists():
+            continue
+        with open(src, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames
+            rows = list(reader)
+        with open(target_dir / name, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for k in range(scale):
+                for row in rows:
+                    row = dict(row)
+                    if k > 0 and row.get("游戏名称"):
+                        row["游戏名称"] = f"{row['游戏名称'].strip()} #{k}"
+                    writer.writerow(row)
+                    total += 1
+    return total
+
+
+def run_scale(scale: int, source_dir: Path, server: ReplayServer, args) -> Dict:
+    """在独立的临时工作目录中按 scale 倍榜单运行一次工作流"""
+    from main import GameAnalysisWorkflow
+    from modules import http_client
+
+    workspace = Path(tempfile.mkdtemp(prefix=f"offline_bench_x{scale}_"))
+    rows = build_scaled_rankings(source_dir, workspace, scale)
+    log_path = workspace / "workflow.log"
+    cwd = os.getcwd()
+    server.stats.reset()
+    step_stats: Dict[str, Dict] = {}
+
+    def _timed(name, fn):
+        def wrapper(*a, **kw):
+            started = time.perf_counter()
+            result = fn(*a, **kw)
+            step_stats[name] = {
+                "elapsed_s": round(time.perf_counter() - started, 3),
+                "items": len(result) if isinstance(result, list) else None,
+            }
+            return result
+        return wrapper
+
+    print(f"\n▶ 放大 {scale} 倍：榜单 {rows} 行，工作目录 {workspace}")
+    started = time.perf_counter()
+    try:
+        os.chdir(workspace)
+        with open(log_path, "w", encoding="utf-8") as log, \
+                (contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(log)):
+            workflow = GameAnalysisWorkflow(
+                skip_screenshots=not args.with_screenshots, send_to=args.send_to,
+                analysis_concurrency=args.analysis_concurrency,
+            )
+            for name in TIMED_STEPS:
+                setattr(workflow, name, _timed(name, getattr(workflow, name)))
+            workflow.run(skip_scrape=True, steps=[0, 1, 2, 3, 4, 5])
+            flight_stats = workflow.single_flight.get_stats()
+    finally:
+        os.chdir(cwd)
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "scale": scale,
+        "ranking_rows": rows,
+        "elapsed_s": round(elapsed, 3),
+        "steps": step_stats,
+        "replay": server.stats.snapshot(),
+        "http_connections": http_client.get_connection_stats(),
+        "single_flight": flight_stats,
+        "workspace": str(workspace) if args.keep_workspace else None,
+    }
+    for name, s in step_stats.items():
+        items = f"，产出 {s['items']} 条" if s["items"] is not None else ""
+        print(f"  {name:<24} {s['elapsed_s']:>9.2f}s{items}")
+    print(f"  合计 {elapsed:.2f}s（日志：{log_path if args.keep_workspace else '已随工作目录删除'}）")
+    misses = sum(s.get("miss", 0) for s in result["replay"].values())
+    if misses:
+        print(f"  ⚠ 回放未命中 {misses} 次（缺少对应路径的录制），详见结果 JSON 的 replay 字段")
+
+    if not args.keep_workspace:
+        shutil.rmtree(workspace, ignore_errors=True)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工作流离线压测（回放录制的外部请求）")
+    parser.add_argument("--cassette-dir", default=DEFAULT_CASSETTE_DIR, help=f"录制目录（默认 {DEFAULT_CASSETTE_DIR}）")
+    parser.add_argument("--rankings-dir", default=None, help="榜单来源目录（默认 data/人气榜 下最新一期）")
+    parser.add_argument("--scale", default="10,100", help="榜单放大倍数，逗号分隔（默认 10,100）")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="回放服务固定延迟（毫秒）")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="回放服务随机延迟上限（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="注入错误的概率（0~1）")
+    parser.add_argument("--error-status", default="503", help="注入错误的状态码，逗号分隔（默认 503）")
+    parser.add_argument("--media-size-kb", type=int, default=2048, help="合成视频大小（KB，默认 2048）")
+    parser.add_argument("--media-kbps", type=float, default=0.0, help="视频下载限速（KB/s，0 表示不限）")
+    parser.add_argument("--request-delay", type=float, default=0.0, help="API_REQUEST_DELAY（默认 0，不限流）")
+    parser.add_argument("--retry-delay", type=float, default=0.1, help="API_RETRY_DELAY（默认 0.1 秒）")
+    parser.add_argument("--analysis-concurrency", type=int, default=None,
+                        help="步骤3每个模型同时进行的分析请求数（默认 ANALYSIS_CONCURRENCY）")
+    parser.add_argument("--send-to", default="feishu", help="发送目标（默认 feishu，由回放服务应答）")
+    parser.add_argument("--with-screenshots", action="store_true", help="开启截图（需要 media/default.mp4 为真实视频）")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子（默认 42）")
+    parser.add_argument("--keep-workspace", action="store_true", help="保留临时工作目录（含数据库与运行日志）")
+    parser.add_argument("--verbose", action="store_true", help="直接输出工作流日志（默认写入工作目录的 workflow.log）")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help=f"结果 JSON 输出目录（默认 {DEFAULT_OUTPUT_DIR}）")
+    args = parser.parse_args()
+
+    source_dir = Path(args.rankings_dir) if args.rankings_dir else find_latest_rankings(PROJECT_ROOT / "data" / "人气榜")
+    if not source_dir or not source_dir.exists():
+        print("✗ 找不到 dy/wx 异动榜单 CSV，请用 --rankings-dir 指定")
+        sys.exit(1)
+    cassette_dir = os.path.abspath(args.cassette_dir)
+    output_dir = os.path.abspath(args.output_dir)
+
+    server = ReplayServer(
+        ("127.0.0.1", 0), cassette_dir,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        error_statuses=[int(x) for x in args.error_status.split(",") if x.strip()],
+        media_size_kb=args.media_size_kb, media_kbps=args.media_kbps, seed=args.seed,
+    )
+    start_in_thread(server)
+    # 必须在导入 config（及 main / modules）之前设置
+    os.environ.update(offline_env(server.base_url, args.request_delay, args.retry_delay))
+
+    commit = get_git_commit()
+    scales = [int(x) for x in args.scale.split(",") if x.strip()]
+    print(f"离线压测工作流（commit={commit}，回放服务 {server.base_url}，录制 {server.store.size} 条，榜单 {source_dir}）")
+    if server.store.size == 0:
+        print("⚠ 录制目录为空，搜索与分析请求都会返回 404；先设置 HTTP_RECORD_DIR 正常运行一次工作流")
+
+    results: List[Dict] = []
+    try:
+        for scale in scales:
+            results.append(run_scale(scale, source_dir, server, args))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    report = {
+        "meta": {
+            "git_commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "cassette_dir": cassette_dir,
+            "cassette_records": server.store.size,
+            "rankings_dir": str(source_dir),
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "error_status": args.error_status,
+            "media_size_kb": args.media_size_kb,
+            "media_kbps": args.media_kbps,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    out_path = os.path.join(output_dir, f"pipeline_offline_{ts}_{commit}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ 压测结果已保存：{out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+提示词构建压测（对比每次重建提示词与提示词注册表）
+为 --games 个游戏（新进榜 / 飙升 / 普通三种情形轮流）构建视频分析提示词：
+  - legacy：旧行为，每次调用都重新读取 data/GAME_TYPE.json、遍历分类树、格式化基线列表，再格式化整段模板
+  - registry：modules/prompt_registry.py，模板启动时编译一次，基线分类按文件修改时间缓存
+统计每个游戏的构建耗时（p50/p99）与提示词大小（字符数、估算 token 数），并给出周报趋势提示词的大小，
+结果保存为 JSON（含 git commit 与提示词版本）。
+
+用法（项目根目录）：
+  python scripts/benchmarks/bench_prompts.py
+  python scripts/benchmarks/bench_prompts.py --games 2000 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules import prompt_registry
+from modules.video_analyzer import VideoAnalyzer
+from scripts.benchmarks.bench_api import get_git_commit, percentile
+
+DEFAULT_OUTPUT_DIR = "data/benchmarks"
+RANK_CHANGES = ("新进榜", "↑12", "-3", "")
+
+
+def synthetic_games(count: int) -> List[Dict]:
+    return [
+        {"game_name": f"测试游戏{i}", "游戏类型": "益智" if i % 2 else "休闲", "排名变化": RANK_CHANGES[i % len(RANK_CHANGES)]}
+        for i in range(count)
+    ]
+
+
+def legacy_build(game: Dict) -> str:
+    """旧行为：每次读取并遍历 GAME_TYPE.json，再格式化整段模板"""
+    baseline_reference = ""
+    if os.path.exists(prompt_registry.GAME_TYPE_JSON_PATH):
+        with open(prompt_registry.GAME_TYPE_JSON_PATH, "r", encoding="utf-8") as f:
+            baseline_reference = prompt_registry._format_baseline(json.load(f), prompt_registry.BASELINE_LIMIT)
+    rank_change = game["排名变化"]
+    is_new_entry = VideoAnalyzer._is_new_entry(rank_change)
+    is_rank_up = VideoAnalyzer._is_rank_up(rank_change)
+    focus = "new_entry" if is_new_entry else ("rank_up" if is_rank_up else "normal")
+    return prompt_registry.VIDEO_ANALYSIS.text.format(
+        focus_instruction=prompt_registry.FOCUS_INSTRUCTIONS[focus],
+        game_name=game["game_name"],
+        game_type=game["游戏类型"],
+        rank_change=rank_change or "--",
+        baseline_reference=baseline_reference or prompt_registry.BASELINE_FALLBACK,
+    )
+
+
+def registry_build(game: Dict) -> str:
+    rank_change = game["排名变化"]
+    return prompt_registry.build_video_analysis_prompt(
+        game["game_name"],
+        game_type=game["游戏类型"],
+        rank_change=rank_change,
+        is_new_entry=VideoAnalyzer._is_new_entry(rank_change),
+        is_rank_up=VideoAnalyzer._is_rank_up(rank_change),
+    )
+
+
+def run_mode(name: str, build: Callable, games: List[Dict], repeat: int) -> Dict:
+    durations: List[float] = []
+    sizes: List[int] = []
+    tokens: List[int] = []
+    for _ in range(repeat):
+        for game in games:
+            started = time.perf_counter()
+            prompt = build(game)
+            durations.append(time.perf_counter() - started)
+            sizes.append(len(prompt))
+            tokens.append(prompt_registry.estimate_tokens(prompt))
+    durations.sort()
+    row = {
+        "mode": name,
+        "prompts": len(durations),
+        "total_ms": round(sum(durations) * 1000, 2),
+        "p50_us": round(percentile(durations, 50) * 1e6, 1),
+        "p99_us": round(percentile(durations, 99) * 1e6, 1),
+        "avg_chars": round(sum(sizes) / len(sizes), 1),
+        "avg_tokens": round(sum(tokens) / len(tokens), 1),
+        "max_tokens": max(tokens),
+    }
+    print(
+        f"  {name:<9} p50 {row['p50_us']:>8.1f} µs  p99 {row['p99_us']:>8.1f} µs  合计 {row['total_ms']:.1f} ms  "
+        f"平均 {row['avg_chars']:.0f} 字符 / 约 {row['avg_tokens']:.0f} token"
+    )
+    return row
+
+
+def weekly_trends_size(games: List[Dict]) -> Dict:
+    """周报趋势提示词大小（每个平台取前 20 个游戏，玩法分析用 Mock 文本）"""
+    analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+    analysis = analyzer._mock_analyze(None, "", {})["analysis"]
+    items = [{"game_name": g["game_name"], "gameplay_analysis": analysis, "rank_change": g["排名变化"]}
+             for g in games[:20]]
+    from modules.gameplay_trend_analyzer import _build_gameplay_text_for_platform
+    input_text = "\n\n---\n\n".join(_build_gameplay_text_for_platform(pk, items) for pk in ("wx", "dy"))
+    prompt = prompt_registry.build_weekly_trends_prompt(input_text)
+    return {"chars": len(prompt), "tokens": prompt_registry.estimate_tokens(prompt), "games_per_platform": len(items)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="提示词构建压测（每次重建 vs 提示词注册表）")
+    parser.add_argument("--games", type=int, default=500, help="游戏数（默认 500）")
+    parser.add_argument("--repeat", type=int, default=1, help="重复轮数（默认 1）")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help=f"结果 JSON 输出目录（默认 {DEFAULT_OUTPUT_DIR}）")
+    args = parser.parse_args()
+
+    commit = get_git_commit()
+    version = prompt_registry.video_analysis_version()
+    games = synthetic_games(args.games)
+    print(f"提示词构建压测（commit={commit}，提示词版本 {version}，{args.games} 个游戏 × {args.repeat} 轮）")
+
+    results = [
+        run_mode("legacy", legacy_build, games, args.repeat),
+        run_mode("registry", registry_build, games, args.repeat),
+    ]
+    legacy, registry = results
+    if registry["p50_us"] > 0:
+        print(f"\n  每个游戏构建耗时 {legacy['p50_us']:.1f} → {registry['p50_us']:.1f} µs（p50，"
+              f"{legacy['p50_us'] / registry['p50_us']:.1f} 倍）")
+    weekly = weekly_trends_size(games)
+    print(f"  周报趋势提示词：{weekly['chars']} 字符 / 约 {weekly['tokens']} token"
+          f"（每个平台 {weekly['games_per_platform']} 个游戏，2 个平台）")
+
+    report = {
+        "meta": {
+            "git_commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "prompt_version": version,
+            "games": args.games,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+        "weekly_trends": weekly,
+    }
+    output_dir = os.path.abspath(args.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    out_path = os.path.join(output_dir, f"prompts_{ts}_{commit}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ 压测结果已保存：{out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+生成合成数据库（用于 api.py 压测）
+按可配置规模填充 games、top20_ranking、rank_changes、weekly_report_simple、weekly_report_trends 五张表，
+表结构由 VideoDatabase 创建，与线上库一致。
+
+用法（项目根目录）：
+  python scripts/benchmarks/generate_synthetic_db.py
+  python scripts/benchmarks/generate_synthetic_db.py --games 50000 --weeks 104 --db data/benchmarks/synthetic.db
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules.database import VideoDatabase
+
+DEFAULT_DB_PATH = "data/benchmarks/synthetic.db"
+
+# 游戏名拼接用词，组合后再加序号保证唯一
+NAME_PREFIXES = [
+    "疯狂", "超级", "开心", "快乐", "无敌", "全民", "指尖", "躺平", "暴走", "梦幻",
+    "欢乐", "极限", "口袋", "萌宠", "勇者", "王者", "神奇", "奇妙", "传说", "点点",
+]
+NAME_CORES = [
+    "消除", "合成", "跑酷", "塔防", "割草", "捕鱼", "斗地主", "麻将", "方块", "弹球",
+    "射击", "修仙", "养成", "经营", "解谜", "找茬", "拼图", "钓鱼", "农场", "餐厅",
+]
+NAME_SUFFIXES = ["大作战", "传奇", "物语", "大师", "乐园", "王国", "英雄", "之旅", "日记", "小镇"]
+COMPANIES = [
+    "北京某某网络科技有限公司", "上海某某互动娱乐有限公司", "广州某某游戏有限公司",
+    "深圳某某科技有限公司", "杭州某某网络有限公司", "成都某某互娱有限公司",
+]
+GAME_TYPES = ["休闲", "益智", "消除", "模拟经营", "角色扮演", "动作", "射击", "棋牌"]
+PLATFORMS = {
+    "wx": ("微信小游戏", ["popularity", "bestseller", "casual_play"]),
+    "dy": ("抖音小游戏", ["popularity", "bestseller", "new_games"]),
+}
+BOARD_NAMES = {
+    "popularity": "人气榜",
+    "bestseller": "畅销榜",
+    "casual_play": "畅玩榜",
+    "new_games": "新游榜",
+}
+TREND_PLATFORMS = ["wx", "dy", "ios", "android"]
+
+
+def build_game_names(count: int, rng: random.Random) -> list[str]:
+    """生成 count 个不重复的游戏名"""
+    names = []
+    for i in range(count):
+        name = (
+            rng.choice(NAME_PREFIXES)
+            + rng.choice(NAME_CORES)
+            + rng.choice(NAME_SUFFIXES)
+            + str(i)
+        )
+        names.append(name)
+    return names
+
+
+def build_week_ranges(weeks: int, end_monday: date) -> list[tuple[str, str]]:
+    """生成 (week_range, monitor_date) 列表，由旧到新，week_range 与入库格式一致（零填充）"""
+    result = []
+    for i in range(weeks - 1, -1, -1):
+        start = end_monday - timedelta(weeks=i)
+        end = start + timedelta(days=6)
+        week_range = VideoDatabase.normalize_week_range(f"{start.isoformat()}~{end.isoformat()}")
+        result.append((week_range, (end + timedelta(days=1)).isoformat()))
+    return result
+
+
+def build_analysis_text(game_name: str, rng: random.Random, size: int) -> str:
+    """生成与线上体量相近的玩法分析 JSON 文本"""
+    filler = "核心循环围绕收集与升级展开，关卡节奏紧凑，付费点集中在体力与皮肤。"
+    body = (filler * (size // len(filler) + 1))[:size]
+    return json.dumps(
+        {
+            "game_name": game_name,
+            "core_gameplay": body,
+            "baseline_game": rng.choice(NAME_CORES),
+            "innovation_points": [filler[:20], filler[10:30]],
+        },
+        ensure_ascii=False,
+    )
+
+
+def insert_games(db: VideoDatabase, names: list[str], rng: random.Random,
+                 analyzed_ratio: float, analysis_size: int, monitor_date: str) -> int:
+    """批量写入 games 表（单连接 executemany，避免逐条 save_game 的开销）"""
+    columns = [
+        "game_name", "rank_wx", "rank_dy", "game_company", "gameplay_analysis", "analysis_model",
+        "analyzed_at", "game_rank", "rank_change", "platform", "source", "board_name",
+        "monitor_date", "aweme_id", "title", "video_url", "like_count", "play_count",
+        "gdrive_url", "gdrive_file_id", "downloaded", "search_keyword", "relevance_score",
+    ]
+    rows = []
+    for i, name in enumerate(names):
+        analyzed = rng.random() < analyzed_ratio
+        aweme_id = str(7000000000000000000 + i)
+        file_id = f"synthetic_{i:08d}"
+        rows.append((
+            name,
+            str(rng.randint(1, 200)) if rng.random() < 0.6 else None,
+            str(rng.randint(1, 200)) if rng.random() < 0.5 else None,
+            rng.choice(COMPANIES),
+            build_analysis_text(name, rng, analysis_size) if analyzed else None,
+            "qwen/qwen3-vl-8b-instruct" if analyzed else None,
+            f"{monitor_date} 10:00:00" if analyzed else None,
+            str(rng.randint(1, 200)),
+            rng.choice(["新进榜", "↑3", "↓2", "↑15", "-"]),
+            rng.choice(["微信小游戏", "抖音小游戏"]),
+            "引力引擎",
+            rng.choice(list(BOARD_NAMES.values())),
+            monitor_date,
+            aweme_id,
+            f"{name} 小游戏攻略",
+            f"https://example.invalid/video/{aweme_id}.mp4",
+            rng.randint(0, 500000),
+            rng.randint(0, 5000000),
+            f"https://drive.google.com/uc?export=download&id={file_id}" if analyzed else None,
+            file_id if analyzed else None,
+            1 if analyzed else 0,
+            f"{name} 小游戏攻略",
+            rng.randint(0, 100),
+        ))
+    conn = sqlite3.connect(db.db_path)
+    cursor = conn.cursor()
+    placeholders = ",".join(["?"] * len(columns))
+    cursor.executemany(
+        f"INSERT OR REPLACE INTO games ({', '.join(columns)}) VALUES ({placeholders})",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+    return len(rows)
+
+
+def pick_hot_games(names: list[str], count: int, rng: random.Random) -> list[str]:
+    """按近似 Zipf 分布抽取上榜游戏：头部游戏反复上榜，长尾偶尔出现"""
+    picked = []
+    seen = set()
+    total = len(names)
+    while len(picked) < count and len(seen) < total:
+        idx = min(int(rng.paretovariate(1.0)) - 1, total - 1)
+        if idx in seen:
+            idx = rng.randrange(total)
+            if idx in seen:
+                continue
+        seen.add(idx)
+        picked.append(names[idx])
+    return picked
+
+
+def ranking_rows(game_names: list[str], platform_name: str, board_name: str,
+                 monitor_date: str, rng: random.Random) -> list[dict]:
+    """生成与 CSV 11 列一致的榜单行"""
+    rows = []
+    for rank, name in enumerate(game_names, 1):
+        rows.append({
+            "rank": str(rank),
+            "game_name": name,
+            "game_type": rng.choice(GAME_TYPES),
+            "platform": platform_name,
+            "source": "引力引擎",
+            "board_name": board_name,
+            "monitor_date": monitor_date,
+            "publish_time": "",
+            "company": rng.choice(COMPANIES),
+            "rank_change": rng.choice(["新进榜", "↑3", "↓2", "↑15", "-"]),
+            "region": "中国",
+        })
+    return rows
+
+
+def generate(db_path: str, games: int, weeks: int, top_n: int, changes_n: int,
+             analyzed_ratio: float, analysis_size: int, seed: int, reset: bool) -> dict:
+    """
+    生成合成数据库
+
+    Returns:
+        各表写入行数统计
+    """
+    if reset and os.path.exists(db_path):
+        os.remove(db_path)
+
+    rng = random.Random(seed)
+    db = VideoDatabase(db_path)
+
+    today = date.today()
+    end_monday = today - timedelta(days=today.weekday() + 7)
+    week_list = build_week_ranges(weeks, end_monday)
+    names = build_game_names(games, rng)
+
+    stats = {"games": 0, "top20_ranking": 0, "rank_changes": 0,
+             "weekly_report_simple": 0, "weekly_report_trends": 0}
+
+    started = time.time()
+    stats["games"] = insert_games(db, names, rng, analyzed_ratio, analysis_size, week_list[-1][1])
+    print(f"✓ games：{stats['games']} 行")
+
+    for week_idx, (week_range, monitor_date) in enumerate(week_list, 1):
+        simple_records = []
+        for platform_key, (platform_name, charts) in PLATFORMS.items():
+            for chart_key in charts:
+                board_name = BOARD_NAMES[chart_key]
+                top_games = pick_hot_games(names, top_n, rng)
+                stats["top20_ranking"] += db.insert_top20_ranking(
+                    week_range, platform_key, chart_key,
+                    ranking_rows(top_games, platform_name, board_name, monitor_date, rng),
+                )
+                change_games = pick_hot_games(names, changes_n, rng)
+                change_rows = ranking_rows(change_games, platform_name, board_name, monitor_date, rng)
+                stats["rank_changes"] += db.insert_rank_changes(
+                    week_range, platform_key, chart_key, change_rows,
+                )
+                for row in change_rows:
+                    change_type = "新进榜" if row["rank_change"] == "新进榜" else "飙升"
+                    simple_records.append({
+                        "week_range": week_range,
+                        "platform": platform_key,
+                        "game_name": row["game_name"],
+                        "change_type": change_type,
+                        "rank": row["rank"],
+                        "rank_change": row["rank_change"],
+                        "summary": f"{row['game_name']} 本周{change_type}，{board_name}第{row['rank']}名",
+                    })
+        stats["weekly_report_simple"] += db.insert_weekly_report_simple(simple_records)
+        stats["weekly_report_trends"] += db.insert_weekly_report_trends([
+            {
+                "monitor_date": monitor_date,
+                "week_range": week_range,
+                "platform": p,
+                "source": "引力引擎" if p in ("wx", "dy") else "SensorTower",
+                "trend_analysis": f"{week_range} {p} 平台热点玩法：合成、割草、塔防类持续走高。" * 20,
+            }
+            for p in TREND_PLATFORMS
+        ])
+        if week_idx % 10 == 0 or week_idx == len(week_list):
+            print(f"  已生成 {week_idx}/{len(week_list)} 周")
+
+    elapsed = time.time() - started
+    print(f"✓ 合成数据库生成完成：{db_path}（耗时 {elapsed:.1f}s）")
+    for table, count in stats.items():
+        print(f"  {table}: {count} 行")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成用于 api.py 压测的合成数据库")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help=f"输出数据库路径（默认 {DEFAULT_DB_PATH}）")
+    parser.add_argument("--games", type=int, default=20000, help="games 表游戏数量（默认 20000）")
+    parser.add_argument("--weeks", type=int, default=104, help="周榜周数（默认 104，约两年）")
+    parser.add_argument("--top-n", type=int, default=20, help="每个榜单每周的 full 榜行数（默认 20）")
+    parser.add_argument("--changes-n", type=int, default=30, help="每个榜单每周的异动榜行数（默认 30）")
+    parser.add_argument("--analyzed-ratio", type=float, default=0.6, help="已有玩法分析的游戏占比（默认 0.6）")
+    parser.add_argument("--analysis-size", type=int, default=1500, help="单条玩法分析文本长度（字符，默认 1500）")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子（默认 42，保证多次生成结果一致）")
+    parser.add_argument("--keep", action="store_true", help="保留已存在的数据库并追加（默认先删除重建）")
+    args = parser.parse_args()
+
+    generate(
+        db_path=args.db,
+        games=args.games,
+        weeks=args.weeks,
+        top_n=args.top_n,
+        changes_n=args.changes_n,
+        analyzed_ratio=args.analyzed_ratio,
+        analysis_size=args.analysis_size,
+        seed=args.seed,
+        reset=not args.keep,
+    )
+
+
+if __name__ == "__main__":
+    main()
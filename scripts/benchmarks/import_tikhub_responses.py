@@ -0,0 +1,72 @@
+"""
+把已保存的 TikHub 响应（data/tikhub_response_<video_id>.json，由 scripts/tests/test_tikhub_youtube_download.py 生成）
+导入 cassette 目录，作为 YouTube 视频信息接口（/api/v1/youtube/web/get_video_info）的录制记录，供回放服务使用。
+
+用法（项目根目录）：
+  python scripts/benchmarks/import_tikhub_responses.py
+  python scripts/benchmarks/import_tikhub_responses.py --pattern "data/tikhub_response_*.json" --cassette-dir data/cassettes
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import config
+from modules import http_cassette
+
+DEFAULT_PATTERN = "data/tikhub_response_*.json"
+DEFAULT_CASSETTE_DIR = "data/cassettes"
+VIDEO_INFO_ENDPOINT = "/api/v1/youtube/web/get_video_info"
+
+
+def import_response(path: str, cassette_dir: str) -> bool:
+    """导入单个响应文件，video_id 取自响应 data.id，缺失时取文件名"""
+    with open(path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    video_id = (payload.get("data") or {}).get("id") or Path(path).stem[len("tikhub_response_"):]
+    if not video_id:
+        print(f"  ⚠ 跳过（无法确定 video_id）：{path}")
+        return False
+
+    # 与 YouTubeSearcher._download_with_tikhub 发出的请求一致
+    url = f"{config.YOUTUBE_API_BASE_URL}{VIDEO_INFO_ENDPOINT}?video_id={video_id}&lang=zh-CN"
+    request = http_cassette.normalize_request("GET", url)
+    response = {"status": 200, "headers": {"Content-Type": "application/json"}, "latency_ms": None}
+    response.update(http_cassette.encode_response_body(
+        json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json"
+    ))
+    out = http_cassette.write_interaction(cassette_dir, request, response)
+    print(f"  ✓ {video_id} → {out}")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导入已保存的 TikHub 响应为回放录制")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN, help=f"响应文件通配符（默认 {DEFAULT_PATTERN}）")
+    parser.add_argument("--cassette-dir", default=DEFAULT_CASSETTE_DIR, help=f"录制目录（默认 {DEFAULT_CASSETTE_DIR}）")
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(args.pattern))
+    if not files:
+        print(f"⚠ 没有匹配的响应文件：{args.pattern}")
+        return
+
+    imported = 0
+    for path in files:
+        try:
+            if import_response(path, args.cassette_dir):
+                imported += 1
+        except Exception as e:
+            print(f"  ✗ 导入失败 {path}：{str(e)}")
+    print(f"\n✓ 共导入 {imported}/{len(files)} 条到 {os.path.abspath(args.cassette_dir)}")
+
+
+if __name__ == "__main__":
+    main()
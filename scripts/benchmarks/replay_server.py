@@ -0,0 +1,573 @@
+"""
+HTTP 回放服务（离线压测用）
+读取 HTTP_RECORD_DIR 录制的 cassette（见 modules/http_cassette.py），在本地一个端口上同时扮演
+TikHub、RapidAPI、OpenRouter、飞书、企业微信与 Google Drive，工作流各服务根地址指向它即可完全离线运行：
+- 按请求键（方法 + 路径 + 查询参数 + 请求体）精确匹配录制的响应；未命中时按 方法 + 路径 轮流取录制的响应，
+  并把响应中录制时的搜索关键词替换为本次关键词（游戏数放大 10 倍/100 倍时复用少量录制数据）
+- 响应 JSON 中的外部链接（视频直链、封面等）改写为本服务的 /media/ 地址；/media/ 返回 cassette 目录下
+  media/<文件名> 或 media/default.mp4，都不存在时返回指定大小的合成 MP4（容器头有效，能通过视频完整性检查），
+  支持 Range 请求
+- 飞书令牌/图片上传、飞书与企业微信 Webhook、Google Drive（建文件夹、可续传上传、设置权限、批量设置权限）内置应答，不需要录制
+- 可注入延迟（--latency-ms/--jitter-ms）、错误（--error-rate，随机返回 --error-status 中的状态码，429 带 Retry-After）
+  与媒体下载限速（--media-kbps）
+
+用法（项目根目录）：
+  python scripts/benchmarks/replay_server.py --cassette-dir data/cassettes
+  python scripts/benchmarks/replay_server.py --port 8765 --latency-ms 300 --jitter-ms 200 --error-rate 0.05
+  python scripts/benchmarks/replay_server.py --media-size-kb 4096 --media-kbps 2048
+
+然后在 .env（或环境变量）中设置：
+  DOUYIN_API_BASE_URL=http://127.0.0.1:8765
+  OPENROUTER_BASE_URL=http://127.0.0.1:8765/api/v1
+  RAPIDAPI_YOUTUBE_BASE_URL=http://127.0.0.1:8765
+  FEISHU_OPEN_API_BASE_URL=http://127.0.0.1:8765/open-apis
+  FEISHU_WEBHOOK_URL=http://127.0.0.1:8765/open-apis/bot/v2/hook/replay
+  WECOM_WEBHOOK_URL=http://127.0.0.1:8765/cgi-bin/webhook/send?key=replay
+  GDRIVE_API_ENDPOINT=http://127.0.0.1:8765/drive/v3/
+"""
+
+import argparse
+import email.parser
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import struct
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules import http_cassette
+
+DEFAULT_CASSETTE_DIR = "data/cassettes"
+DEFAULT_PORT = 8765
+
+URL_PATTERN = re.compile(r"^https?://", re.IGNORECASE)
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def synthetic_mp4(size: int, duration_seconds: int = 10, width: int = 720, height: int = 1280) -> bytes:
+    """指定大小的合成 MP4：ftyp + moov（一条视频轨，时长与分辨率）+ 填充数据的 mdat（不可播放，只用于压测）"""
+    matrix = struct.pack(">9I", 0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+    mvhd = _box(b"mvhd", struct.pack(">IIIII", 0, 0, 0, 1000, duration_seconds * 1000)
+                + struct.pack(">IH10x", 0x10000, 0x100) + matrix + bytes(24) + struct.pack(">I", 2))
+    tkhd = _box(b"tkhd", struct.pack(">IIII4xI8xHHH2x", 3, 0, 0, 1, duration_seconds * 1000, 0, 0, 0)
+                + matrix + struct.pack(">II", width << 16, height << 16))
+    hdlr = _box(b"hdlr", bytes(8) + b"vide" + bytes(12) + b"VideoHandler\0")
+    stsd = _box(b"stsd", struct.pack(">II", 0, 1) + _box(b"avc1", bytes(8)))
+    mdia = _box(b"mdia", hdlr + _box(b"minf", _box(b"stbl", stsd)))
+    header = _box(b"ftyp", b"isom" + struct.pack(">I", 512) + b"isomiso2avc1mp41")
+    header += _box(b"moov", mvhd + _box(b"trak", tkhd + mdia))
+    filler_size = max(0, size - len(header) - 8)
+    block = hashlib.sha256(b"replay-media").digest() * 32
+    filler = (block * (filler_size // len(block) + 1))[:filler_size]
+    return header + struct.pack(">I4s", 8 + filler_size, b"mdat") + filler
+
+
+class ReplayStore:
+    """录制记录索引：按请求键与 方法 + 路径 两级查找，同一键的多条记录轮流返回"""
+
+    def __init__(self, records: List[Dict]):
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, List[Dict]] = {}
+        self._by_path: Dict[Tuple[str, str], List[Dict]] = {}
+        for record in records:
+            req = record["request"]
+            self._by_key.setdefault(record["key"], []).append(record)
+            self._by_path.setdefault((req["method"], req["path"]), []).append(record)
+        self._cursors: Dict = {}
+        self.size = len(records)
+
+    def _next(self, bucket_id, records: List[Dict]) -> Dict:
+        with self._lock:
+            cursor = self._cursors.get(bucket_id)
+            if cursor is None:
+                cursor = self._cursors[bucket_id] = itertools.cycle(records)
+            return next(cursor)
+
+    def lookup(self, request: Dict) -> Tuple[Optional[Dict], str]:
+        """
+        Returns:
+            (录制记录, 命中方式 exact/path)；未命中返回 (None, "miss")
+        """
+        key = http_cassette.request_key(request)
+        if key in self._by_key:
+            return self._next(key, self._by_key[key]), "exact"
+        path_id = (request["method"], request["path"])
+        if path_id in self._by_path:
+            return self._next(path_id, self._by_path[path_id]), "path"
+        return None, "miss"
+
+
+class ReplayStats:
+    """按路径统计回放结果（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def add(self, path: str, outcome: str):
+        label = "/media/*" if path.startswith("/media/") else re.sub(r"/files/[^/]+", "/files/*", path)
+        with self._lock:
+            stats = self._stats.setdefault(label, {})
+            stats[outcome] = stats.get(outcome, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {path: dict(s) for path, s in sorted(self._stats.items())}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+def _core_difference(recorded: str, requested: str) -> Tuple[str, str]:
+    """去掉两个关键词的公共前缀与后缀，返回不同的部分（如 'A 小游戏攻略' 与 'B 小游戏攻略' → ('A', 'B')）"""
+    prefix = 0
+    while prefix < min(len(recorded), len(requested)) and recorded[prefix] == requested[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < min(len(recorded), len(requested)) - prefix
+           and recorded[-1 - suffix] == requested[-1 - suffix]):
+        suffix += 1
+    return recorded[prefix:len(recorded) - suffix], requested[prefix:len(requested) - suffix]
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """回放服务：请求处理见 ReplayHandler，可在压测脚本中以线程方式启动"""
+
+    daemon_threads = True
+
+    def __init__(self, address, cassette_dir: str, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, error_statuses: List[int] = None, media_size_kb: int = 2048,
+                 media_kbps: float = 0.0, seed: int = None, quiet: bool = True):
+        super().__init__(address, ReplayHandler)
+        self.cassette_dir = cassette_dir
+        self.store = ReplayStore(http_cassette.load_cassettes(cassette_dir))
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses or [503]
+        self.media_size = max(1, media_size_kb) * 1024
+        self.media_kbps = media_kbps
+        self.quiet = quiet
+        self.stats = ReplayStats()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._synthetic_media: Optional[bytes] = None
+        self._drive_lock = threading.Lock()
+        self._drive_folders: Dict[str, str] = {}
+        self._drive_uploads: Dict[str, Dict] = {}
+        self._drive_files: Dict[str, Dict] = {}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def random(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def choice(self, values):
+        with self._rng_lock:
+            return self._rng.choice(values)
+
+    def media_bytes(self, name: str) -> bytes:
+        """/media/ 返回的内容：录制目录下的同名文件 > default.mp4 > 合成数据"""
+        media_dir = os.path.join(self.cassette_dir, "media")
+        for candidate in (os.path.join(media_dir, os.path.basename(name)), os.path.join(media_dir, "default.mp4")):
+            if os.path.isfile(candidate):
+                with open(candidate, "rb") as f:
+                    return f.read()
+        if self._synthetic_media is None:
+            self._synthetic_media = synthetic_mp4(self.media_size)
+        return self._synthetic_media
+
+    def rewrite_urls(self, value):
+        """把响应 JSON 中的外部链接改写为本服务的 /media/ 地址"""
+        if isinstance(value, dict):
+            return {k: self.rewrite_urls(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.rewrite_urls(v) for v in value]
+        if isinstance(value, str) and URL_PATTERN.match(value) and not value.startswith(self.base_url):
+            suffix = os.path.splitext(urlsplit(value).path)[1][:8] or ".mp4"
+            return f"{self.base_url}/media/{hashlib.sha1(value.encode('utf-8')).hexdigest()}{suffix}"
+        return value
+
+    def drive_folder_id(self, name: str, create: bool) -> Optional[str]:
+        with self._drive_lock:
+            if name not in self._drive_folders and create:
+                self._drive_folders[name] = f"folder_{uuid.uuid4().hex[:12]}"
+            return self._drive_folders.get(name)
+
+    def drive_upload(self, upload_id: str, metadata: Dict = None) -> Dict:
+        with self._drive_lock:
+            if metadata is not None:
+                self._drive_uploads[upload_id] = metadata
+            return self._drive_uploads.get(upload_id) or {}
+
+    def drive_file(self, file_id: str, update: Dict = None, delete: bool = False) -> Optional[Dict]:
+        """已上传文件的元数据（update 不为空时创建/更新，delete 为 True 时删除）"""
+        with self._drive_lock:
+            if delete:
+                return self._drive_files.pop(file_id, None)
+            if update is not None:
+                self._drive_files.setdefault(file_id, {"id": file_id, "trashed": False}).update(update)
+            resource = self._drive_files.get(file_id)
+            return dict(resource) if resource else None
+
+    def drive_children(self, folder_id: str) -> List[Dict]:
+        with self._drive_lock:
+            return [dict(f) for f in self._drive_files.values() if folder_id in f.get("parents", [])]
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    server: ReplayServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    # ---- 响应工具 ----
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json", headers: Dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _send_json(self, status: int, payload, headers: Dict = None):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), headers=headers)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length > 0 else b""
+
+    # ---- 请求分发 ----
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_HEAD(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def do_PUT(self):
+        self._dispatch()
+
+    def do_DELETE(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        server = self.server
+        body = self._read_body()
+        path = urlsplit(self.path).path
+
+        delay = server.latency_ms + (server.random() * server.jitter_ms if server.jitter_ms > 0 else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+        if server.error_rate > 0 and server.random() < server.error_rate:
+            status = server.choice(server.error_statuses)
+            server.stats.add(path, f"error_{status}")
+            headers = {"Retry-After": "1"} if status == 429 else None
+            self._send_json(status, {"code": status, "message": "injected error (replay server)"}, headers=headers)
+            return
+
+        try:
+            if path.startswith("/media/"):
+                self._serve_media(path)
+            elif path.startswith(("/drive/v3/", "/upload/drive/v3/", "/batch/drive/v3")):
+                self._serve_drive(path, body)
+            elif self._serve_builtin(path):
+                pass
+            else:
+                self._serve_recorded(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _serve_recorded(self, body: bytes):
+        server = self.server
+        json_body = None
+        if body:
+            try:
+                json_body = json.loads(body.decode("utf-8"))
+            except (UnicodeDecodeError, ValueError):
+                json_body = None
+        request = http_cassette.normalize_request(
+            self.command, self.path, json_body=json_body, data=None if json_body is not None else body
+        )
+        record, outcome = server.store.lookup(request)
+        server.stats.add(request["path"], outcome)
+        if record is None:
+            self._send_json(404, {"code": 404, "message": f"no recorded interaction for {self.command} {request['path']}"})
+            return
+
+        response = record["response"]
+        headers = {k: v for k, v in (response.get("headers") or {}).items() if k.lower() == "retry-after"}
+        content_type = (response.get("headers") or {}).get("Content-Type", "application/json")
+        if "json" not in response:
+            self._send(response.get("status", 200), http_cassette.decode_response_body(response), content_type, headers)
+            return
+
+        payload = server.rewrite_urls(response["json"])
+        if outcome == "path":
+            recorded_kw = http_cassette.search_keyword(record["request"])
+            requested_kw = http_cassette.search_keyword(request)
+            if recorded_kw and requested_kw:
+                old, new = _core_difference(recorded_kw, requested_kw)
+                if old and new:
+                    text = json.dumps(payload, ensure_ascii=False).replace(
+                        json.dumps(old, ensure_ascii=False)[1:-1], json.dumps(new, ensure_ascii=False)[1:-1]
+                    )
+                    payload = json.loads(text)
+        self._send_json(response.get("status", 200), payload, headers=headers)
+
+    def _serve_media(self, path: str):
+        server = self.server
+        data = server.media_bytes(path[len("/media/"):])
+        total = len(data)
+        start, end, status = 0, total - 1, 200
+        match = re.match(r"bytes=(\d*)-(\d*)", self.headers.get("Range") or "")
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), total - 1) if match.group(2) else total - 1
+            else:
+                start = max(0, total - int(match.group(2)))
+            if start >= total:
+                server.stats.add(path, "range_invalid")
+                self._send(416, b"", "video/mp4", {"Content-Range": f"bytes */{total}"})
+                return
+            status = 206
+        server.stats.add(path, "media")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{total}")
+        self.end_headers()
+        if self.command == "HEAD":
+            return
+        chunk = 64 * 1024
+        pos = start
+        while pos <= end:
+            piece = data[pos:min(pos + chunk, end + 1)]
+            self.wfile.write(piece)
+            pos += len(piece)
+            if server.media_kbps > 0:
+                time.sleep(len(piece) / (server.media_kbps * 1024.0))
+
+    def _serve_builtin(self, path: str) -> bool:
+        """飞书 / 企业微信的写入类接口：直接应答成功（不依赖录制）"""
+        server = self.server
+        path = path.rstrip("/")
+        if path.endswith("/auth/v3/tenant_access_token/internal"):
+            payload = {"code": 0, "msg": "ok", "tenant_access_token": "replay-token", "expire": 7200}
+        elif path.endswith("/im/v1/images"):
+            payload = {"code": 0, "msg": "success", "data": {"image_key": f"img_replay_{uuid.uuid4().hex[:12]}"}}
+        elif "/bot/v2/hook/" in path:
+            payload = {"code": 0, "msg": "success", "data": {}}
+        elif path.startswith("/cgi-bin/webhook/"):
+            payload = {"errcode": 0, "errmsg": "ok"}
+        else:
+            return False
+        server.stats.add(path, "builtin")
+        self._send_json(200, payload)
+        return True
+
+    def _serve_drive(self, path: str, body: bytes):
+        """Google Drive v3 的最小实现：files.list（按文件夹名/按所在文件夹分页）、files.get、files.create（文件夹/可续传上传，
+        记录 md5Checksum）、files.delete、permissions.create（含批量请求）"""
+        server = self.server
+        query = parse_qs(urlsplit(self.path).query)
+        server.stats.add(path, "drive")
+
+        if path.startswith("/batch/drive/v3"):
+            self._serve_drive_batch(body)
+            return
+
+        if path.startswith("/upload/drive/v3/files"):
+            if self.command == "POST":
+                metadata = json.loads(body.decode("utf-8")) if body else {}
+                upload_id = uuid.uuid4().hex
+                server.drive_upload(upload_id, metadata)
+                location = f"{server.base_url}/upload/drive/v3/files?uploadType=resumable&upload_id={upload_id}"
+                self._send_json(200, {}, headers={"Location": location})
+                return
+            metadata = server.drive_upload((query.get("upload_id") or [""])[0])
+            md5 = metadata.setdefault("md5", hashlib.md5())
+            # 分块上传：Content-Range 为 bytes a-b/* 或未到总大小时返回 308 与已接收范围
+            match = re.match(r"bytes (?:(\d+)-(\d+)|\*)/(\d+|\*)", self.headers.get("Content-Range") or "")
+            if match:
+                if match.group(1) is not None:
+                    # 重发的分块只计入新数据
+                    skip = metadata.get("received", 0) - int(match.group(1))
+                    if 0 <= skip < len(body):
+                        md5.update(body[skip:])
+                received = int(match.group(2)) + 1 if match.group(2) is not None else metadata.get("received", 0)
+                metadata["received"] = max(metadata.get("received", 0), received)
+                total = match.group(3)
+                if total == "*" or metadata["received"] < int(total):
+                    headers = {"Range": f"bytes=0-{metadata['received'] - 1}"} if metadata["received"] else {}
+                    self._send(308, b"", "text/plain", headers)
+                    return
+            file_id = metadata.get("file_id")
+            if not file_id:
+                file_id = metadata["file_id"] = f"file_{uuid.uuid4().hex[:16]}"
+                if not match:
+                    md5.update(body)
+                server.drive_file(file_id, {
+                    "name": metadata.get("name", file_id),
+                    "parents": metadata.get("parents") or [],
+                    "md5Checksum": md5.hexdigest(),
+                    "size": str(metadata.get("received") or len(body)),
+                })
+            resource = server.drive_file(file_id)
+            resource["webViewLink"] = f"https://drive.google.com/file/d/{file_id}/view"
+            self._send_json(200, resource)
+            return
+
+        file_match = re.match(r"/drive/v3/files/([^/]+)(/permissions)?$", path)
+        if self.command == "DELETE" and file_match:
+            server.drive_file(file_match.group(1), delete=True)
+            self._send(204, b"", "text/plain")
+            return
+
+        if path.endswith("/permissions"):
+            if file_match:
+                server.drive_file(file_match.group(1), {"permissionIds": ["anyoneWithLink"]})
+            self._send_json(200, {"kind": "drive#permission", "id": "anyoneWithLink", "type": "anyone", "role": "reader"})
+            return
+
+        if self.command == "GET" and file_match:
+            resource = server.drive_file(file_match.group(1))
+            if resource:
+                self._send_json(200, resource)
+            else:
+                self._send_json(404, {"error": {"code": 404, "message": f"File not found: {file_match.group(1)}"}})
+            return
+
+        if path == "/drive/v3/files" and self.command == "GET":
+            parent = re.search(r"'([^']*)' in parents", (query.get("q") or [""])[0])
+            if parent:
+                # 按文件夹列出文件（分页，pageToken 为偏移量）
+                files = server.drive_children(parent.group(1))
+                offset = int((query.get("pageToken") or ["0"])[0])
+                page_size = int((query.get("pageSize") or ["100"])[0])
+                payload = {"files": files[offset:offset + page_size]}
+                if offset + page_size < len(files):
+                    payload["nextPageToken"] = str(offset + page_size)
+                self._send_json(200, payload)
+                return
+            match = re.search(r"name='([^']*)'", (query.get("q") or [""])[0])
+            folder_id = server.drive_folder_id(match.group(1), create=False) if match else None
+            self._send_json(200, {"files": [{"id": folder_id, "name": match.group(1)}] if folder_id else []})
+            return
+
+        if path == "/drive/v3/files" and self.command == "POST":
+            metadata = json.loads(body.decode("utf-8")) if body else {}
+            if metadata.get("mimeType") == "application/vnd.google-apps.folder":
+                folder_id = server.drive_folder_id(metadata.get("name", ""), create=True)
+                self._send_json(200, {"id": folder_id, "name": metadata.get("name")})
+            else:
+                self._send_json(200, {"id": f"file_{uuid.uuid4().hex[:16]}", "name": metadata.get("name")})
+            return
+
+        self._send_json(404, {"error": {"code": 404, "message": f"unsupported drive call {self.command} {path}"}})
+
+    def _serve_drive_batch(self, body: bytes):
+        """Drive 批量请求（multipart/mixed，每个部分是一个 application/http 子请求）：只应答 permissions.create"""
+        content_type = self.headers.get("Content-Type") or ""
+        message = email.parser.BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+        boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+        for part in message.get_payload() if message.is_multipart() else []:
+            lines = (part.get_payload() or "").splitlines()
+            request_line = lines[0] if lines else ""
+            target = request_line.split(" ")[1] if request_line.count(" ") >= 2 else ""
+            file_match = re.match(r"/drive/v3/files/([^/]+)/permissions$", urlsplit(target).path)
+            if file_match:
+                self.server.drive_file(file_match.group(1), {"permissionIds": ["anyoneWithLink"]})
+                status = "200 OK"
+                payload = {"kind": "drive#permission", "id": "anyoneWithLink", "type": "anyone", "role": "reader"}
+            else:
+                status = "404 Not Found"
+                payload = {"error": {"code": 404, "message": f"unsupported batch call {request_line}"}}
+            content_id = (part.get("Content-ID") or "").strip("<>")
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n{json.dumps(payload)}\r\n"
+            )
+        parts.append(f"--{boundary}--\r\n")
+        self._send(200, "".join(parts).encode("utf-8"), f"multipart/mixed; boundary={boundary}")
+
+
+def start_in_thread(server: ReplayServer) -> threading.Thread:
+    """在后台线程中运行回放服务（压测脚本使用）"""
+    thread = threading.Thread(target=server.serve_forever, name="replay-server", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 HTTP 回放服务（离线压测用）")
+    parser.add_argument("--cassette-dir", default=DEFAULT_CASSETTE_DIR, help=f"录制目录（默认 {DEFAULT_CASSETTE_DIR}）")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址（默认 127.0.0.1）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"监听端口（默认 {DEFAULT_PORT}）")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="每个请求的固定延迟（毫秒）")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="额外的随机延迟上限（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="注入错误的概率（0~1）")
+    parser.add_argument("--error-status", default="503", help="注入错误的状态码，逗号分隔，如 429,502,503（默认 503）")
+    parser.add_argument("--media-size-kb", type=int, default=2048, help="无录制视频时合成媒体数据的大小（KB，默认 2048）")
+    parser.add_argument("--media-kbps", type=float, default=0.0, help="媒体下载限速（KB/s，0 表示不限）")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子（延迟抖动与错误注入可复现）")
+    parser.add_argument("--verbose", action="store_true", help="打印每个请求的访问日志")
+    args = parser.parse_args()
+
+    server = ReplayServer(
+        (args.host, args.port), args.cassette_dir,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        error_statuses=[int(x) for x in args.error_status.split(",") if x.strip()],
+        media_size_kb=args.media_size_kb, media_kbps=args.media_kbps, seed=args.seed, quiet=not args.verbose,
+    )
+    print(f"✓ 回放服务已启动：{server.base_url}（录制 {server.store.size} 条，目录 {args.cassette_dir}）")
+    if server.store.size == 0:
+        print("⚠ 录制目录为空：先设置 HTTP_RECORD_DIR 正常运行一次工作流，或运行 import_tikhub_responses.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("\n回放统计：")
+        for path, stats in server.stats.snapshot().items():
+            print(f"  {path}: {stats}")
+
+
+if __name__ == "__main__":
+    main()
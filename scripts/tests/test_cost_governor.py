@@ -0,0 +1,105 @@
+"""
+付费API预算（modules/cost_governor.py）的单元测试：
+- 并发调用方同时做预算检查时，通过的调用数不超过预算（can_spend 预占额度）
+- 记账结算预占；请求未拿到响应时 release() 释放预占，额度可再次使用
+- 当日预算同样计入预占
+
+用法（项目根目录）：
+  python scripts/tests/test_cost_governor.py
+  python -m pytest -q scripts/tests/test_cost_governor.py
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules.cost_governor import CostGovernor
+
+KEY = "openrouter.chat"
+PRICE = 0.01
+
+
+def _governor(tmp: str, run_budget: float = 0.0, day_budget: float = 0.0) -> CostGovernor:
+    governor = CostGovernor(os.path.join(tmp, "ledger.db"))
+    governor.prices[KEY] = PRICE
+    governor.run_budget = run_budget
+    governor.day_budget = day_budget
+    governor.start_run("test")
+    return governor
+
+
+def _concurrent_calls(governor: CostGovernor, callers: int):
+    """callers 个线程同时检查预算，通过的线程稍后记一笔账；返回通过的次数"""
+    barrier = threading.Barrier(callers)
+    allowed = []
+
+    def call():
+        barrier.wait()
+        if governor.can_spend(KEY):
+            allowed.append(1)
+            time.sleep(0.05)  # 模拟请求耗时：此期间其他线程也在做预算检查
+            governor.record(KEY, "/chat/completions", 0.05, 200)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return len(allowed)
+
+
+def test_concurrent_callers_respect_run_budget():
+    with tempfile.TemporaryDirectory() as tmp:
+        governor = _governor(tmp, run_budget=0.05)
+        assert _concurrent_calls(governor, 20) == 5
+        summary = governor.summary()
+        assert summary["run_spend"] <= 0.05 + 1e-9
+        assert summary["by_key"][KEY]["calls"] == 5
+        assert summary["denied"][KEY] == 15
+        assert governor._reserved_total() == 0
+
+
+def test_concurrent_callers_respect_day_budget():
+    with tempfile.TemporaryDirectory() as tmp:
+        governor = _governor(tmp, day_budget=0.03)
+        assert _concurrent_calls(governor, 12) == 3
+        assert governor.day_spend() <= 0.03 + 1e-9
+
+
+def test_release_frees_reservation():
+    with tempfile.TemporaryDirectory() as tmp:
+        governor = _governor(tmp, run_budget=0.02)
+        assert governor.can_spend(KEY) and governor.can_spend(KEY)
+        assert not governor.can_spend(KEY)
+        # 请求未拿到响应（网络异常）：释放后额度可再次使用，且未产生花费
+        governor.release(KEY)
+        assert governor.summary()["run_spend"] == 0
+        assert governor.can_spend(KEY)
+        governor.record(KEY, "/chat/completions", 0.1, 200)
+        governor.release(KEY)
+        assert governor.summary()["run_spend"] == PRICE
+        assert governor.can_spend(KEY)
+        assert not governor.can_spend(KEY)
+
+
+def test_failed_response_settles_reservation_at_zero_cost():
+    with tempfile.TemporaryDirectory() as tmp:
+        governor = _governor(tmp, run_budget=0.01)
+        assert governor.can_spend(KEY)
+        governor.record(KEY, "/chat/completions", 0.1, 500, cost=0.0)
+        assert governor._reserved_total() == 0
+        assert governor.can_spend(KEY)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
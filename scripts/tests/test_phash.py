@@ -0,0 +1,147 @@
+"""
+近似重复视频检测（modules/phash.py）的单元测试：
+- 静止画面（标题页、加载页）不能因为出现在另一个视频中就匹配（帧一对一、按时间顺序匹配）
+- 纯色/平坦画面的哈希（几乎全 0 或全 1）不参与索引与查询
+- 轻微变化（重新编码、亮度、水印）的同一视频仍能匹配
+- 安装了 opencv-python / numpy 时，另用合成视频走一遍真实的取帧与 dHash
+
+用法（项目根目录）：
+  python scripts/tests/test_phash.py
+  python -m pytest -q scripts/tests/test_phash.py
+"""
+
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import config
+from modules import phash
+
+MAX_DISTANCE = 10
+MIN_RATIO = 0.75
+
+
+def _random_hash(rng: random.Random) -> int:
+    """随机的有效帧哈希（1 的个数约一半）"""
+    while True:
+        value = rng.getrandbits(64)
+        if phash.is_informative(value):
+            return value
+
+
+def _flip(value: int, bits: int, rng: random.Random) -> int:
+    for pos in rng.sample(range(64), bits):
+        value ^= 1 << pos
+    return value
+
+
+def _hex(values):
+    return [f"{v:016x}" for v in values]
+
+
+def _index(videos):
+    index = phash.PhashIndex(None)
+    for key, values in videos.items():
+        index.add(key, _hex(values))
+    return index
+
+
+def test_static_video_does_not_match_video_containing_its_frame():
+    rng = random.Random(1)
+    title = _random_hash(rng)
+    gameplay = [title] + [_random_hash(rng) for _ in range(7)]
+    index = _index({"gameplay": gameplay})
+    # 整段都是同一张标题页：不同画面不足，不做检测
+    static = [_flip(title, 1, rng) for _ in range(8)]
+    assert index.find_similar("static", _hex(static), MAX_DISTANCE, MIN_RATIO) == []
+    # 大部分是标题页、另有几帧不同内容：标题页只能匹配一次
+    mostly_static = [title] * 5 + [_random_hash(rng) for _ in range(3)]
+    assert index.find_similar("mostly_static", _hex(mostly_static), MAX_DISTANCE, MIN_RATIO) == []
+
+
+def test_frames_are_matched_in_time_order():
+    rng = random.Random(2)
+    frames = [_random_hash(rng) for _ in range(8)]
+    index = _index({"original": frames})
+    assert index.find_similar("reversed", _hex(frames[::-1]), MAX_DISTANCE, MIN_RATIO) == []
+    assert phash.match_in_order(frames, frames[::-1], MAX_DISTANCE)[0] == 1
+
+
+def test_flat_frames_are_ignored():
+    rng = random.Random(3)
+    flat_a = [0, 1 << 63, (1 << 64) - 1, 0b111, 0, 1 << 20, 0, (1 << 64) - 2]
+    flat_b = [1 << 5, 0, 0b11 << 40, (1 << 64) - 1, 0, 0, 1 << 9, 0]
+    assert not any(phash.is_informative(v) for v in flat_a + flat_b)
+    index = _index({"dark": flat_a})
+    assert index.find_similar("other_dark", _hex(flat_b), MAX_DISTANCE, MIN_RATIO) == []
+    # 片头黑屏不影响其余画面的匹配
+    frames = [_random_hash(rng) for _ in range(8)]
+    index = _index({"original": [0, 0] + frames})
+    matches = index.find_similar("copy", _hex([(1 << 64) - 1] + frames), MAX_DISTANCE, MIN_RATIO)
+    assert [m["video_key"] for m in matches] == ["original"] and matches[0]["ratio"] == 1.0
+
+
+def test_slightly_changed_copy_matches():
+    rng = random.Random(4)
+    frames = [_random_hash(rng) for _ in range(8)]
+    others = {f"other{i}": [_random_hash(rng) for _ in range(8)] for i in range(50)}
+    index = _index({"original": frames, **others})
+    copy = [_flip(v, 3, rng) for v in frames]
+    copy[5] = _random_hash(rng)  # 换皮后有一帧画面不同
+    matches = index.find_similar("copy", _hex(copy), MAX_DISTANCE, MIN_RATIO)
+    assert [m["video_key"] for m in matches] == ["original"]
+    assert matches[0]["matched"] == 7 and matches[0]["ratio"] == 0.875
+
+
+def test_synthetic_videos():
+    if not phash.PHASH_AVAILABLE:
+        print("  ⚠ 未安装 opencv-python / numpy，跳过合成视频测试")
+        return
+    import cv2
+    import numpy as np
+
+    def make(path, seed, static=False, brightness=0):
+        rng = np.random.default_rng(seed)
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 30, (320, 240))
+        background = tuple(int(c) for c in rng.integers(0, 255, 3))
+        shapes = [(int(rng.integers(0, 320)), int(rng.integers(0, 240)), int(rng.integers(10, 60)),
+                   tuple(int(c) for c in rng.integers(0, 255, 3)), int(rng.integers(-4, 5)), int(rng.integers(-4, 5)))
+                  for _ in range(6)]
+        for t in range(120):
+            image = np.full((240, 320, 3), background, np.uint8)
+            step = 0 if static else t
+            for x, y, r, color, dx, dy in shapes:
+                cv2.circle(image, ((x + dx * step) % 320, (y + dy * step) % 240), r, color, -1)
+            writer.write(cv2.convertScaleAbs(image, alpha=1.0, beta=brightness))
+        writer.release()
+        return path
+
+    original_cache_dir = config.FRAME_CACHE_DIR
+    config.FRAME_CACHE_DIR = tempfile.mkdtemp()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            hashes = {}
+            for key, seed, kwargs in [("a", 0, {}), ("b", 5, {}), ("a_bright", 0, {"brightness": 15}),
+                                      ("c", 7, {}), ("static_a", 0, {"static": True})]:
+                hashes[key] = phash.video_hashes(make(os.path.join(tmp, f"{key}.mp4"), seed, **kwargs))
+            index = phash.PhashIndex(None)
+            index.add("a", hashes["a"])
+            index.add("b", hashes["b"])
+            assert [m["video_key"] for m in index.find_similar("a_bright", hashes["a_bright"])] == ["a"]
+            assert index.find_similar("c", hashes["c"]) == []
+            assert index.find_similar("static_a", hashes["static_a"]) == []
+    finally:
+        config.FRAME_CACHE_DIR = original_cache_dir
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✓ {name}")
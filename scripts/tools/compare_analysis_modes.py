@@ -0,0 +1,218 @@
+"""
+视频分析模式对比评估（完整视频 vs 关键帧）
+从数据库中抽取有本地视频与 Google Drive 链接的游戏，用同一模型分别以两种模式各分析一次（会调用付费API，
+不读写数据库缓存），统计每种模式的耗时、token 用量，以及两种模式输出的相似度：
+  - 基线分类：baseline_game 完全一致 / 一级分类一致的比例
+  - 核心玩法：core_gameplay 文本相似度（difflib）
+  - 创新点：innovation_points 两两文本相似度 ≥ 0.5 视为同一条，计算重合比例
+结果保存为 JSON（含 git commit、模型与关键帧参数）。
+
+用法（项目根目录）：
+  python scripts/tools/compare_analysis_modes.py --sample 5
+  python scripts/tools/compare_analysis_modes.py --sample 10 --model qwen/qwen3-vl-8b-instruct --keyframes 12
+  python scripts/tools/compare_analysis_modes.py --games 羊了个羊 抓大鹅
+"""
+
+import argparse
+import contextlib
+import difflib
+import io
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import config
+from modules import keyframes
+from modules.database import VideoDatabase
+from modules.video_analyzer import VideoAnalyzer
+from scripts.benchmarks.bench_api import get_git_commit, percentile
+
+DEFAULT_OUTPUT_DIR = "data/benchmarks"
+MODES = ("video", "keyframes")
+POINT_MATCH_RATIO = 0.5
+
+
+def text_ratio(a: Optional[str], b: Optional[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def point_overlap(a: List[str], b: List[str]) -> float:
+    """创新点重合比例：能在另一方找到相似条目（文本相似度 ≥ POINT_MATCH_RATIO）的条数 / 两方条数的平均值"""
+    a = [str(p) for p in a or []]
+    b = [str(p) for p in b or []]
+    if not a or not b:
+        return 0.0
+    matched_a = sum(1 for p in a if any(text_ratio(p, q) >= POINT_MATCH_RATIO for q in b))
+    matched_b = sum(1 for q in b if any(text_ratio(p, q) >= POINT_MATCH_RATIO for p in a))
+    return (matched_a + matched_b) / (len(a) + len(b))
+
+
+def compare_outputs(video: Dict, frames: Dict) -> Dict:
+    a = video.get("analysis_data") or {}
+    b = frames.get("analysis_data") or {}
+    base_a = (a.get("baseline_game") or "").replace(" ", "")
+    base_b = (b.get("baseline_game") or "").replace(" ", "")
+    return {
+        "parsed": bool(a) and bool(b),
+        "baseline_exact": bool(base_a) and base_a == base_b,
+        "baseline_top": bool(base_a) and base_a.split(">")[0] == base_b.split(">")[0],
+        "core_gameplay_ratio": round(text_ratio(a.get("core_gameplay"), b.get("core_gameplay")), 3),
+        "innovation_overlap": round(point_overlap(a.get("innovation_points"), b.get("innovation_points")), 3),
+    }
+
+
+def run_once(analyzer: VideoAnalyzer, row: Dict, mode: str, verbose: bool) -> Dict:
+    started = time.perf_counter()
+    out = io.StringIO()
+    with contextlib.redirect_stdout(sys.stdout if verbose else out):
+        result = analyzer.analyze_video(
+            video_path=row["local_path"],
+            game_name=row["game_name"],
+            video_url=row["gdrive_url"],
+            analysis_mode=mode,
+        ) or {}
+    usage = result.get("usage") or {}
+    return {
+        "mode": result.get("analysis_mode") or mode,
+        "status": result.get("status"),
+        "seconds": round(time.perf_counter() - started, 2),
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+        "total_tokens": usage.get("total_tokens"),
+        "cost": usage.get("cost"),
+        "frames": result.get("frames", 0),
+        "analysis_data": result.get("analysis_data"),
+    }
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    ok = [r for r in runs if r["status"] == "success"]
+    seconds = sorted(r["seconds"] for r in ok)
+    tokens = [r["total_tokens"] for r in ok if r["total_tokens"] is not None]
+    prompt_tokens = [r["prompt_tokens"] for r in ok if r["prompt_tokens"] is not None]
+    costs = [r["cost"] for r in ok if r["cost"] is not None]
+    return {
+        "runs": len(runs),
+        "success": len(ok),
+        "p50_seconds": round(percentile(seconds, 50), 2) if seconds else None,
+        "p90_seconds": round(percentile(seconds, 90), 2) if seconds else None,
+        "avg_prompt_tokens": round(sum(prompt_tokens) / len(prompt_tokens), 1) if prompt_tokens else None,
+        "avg_total_tokens": round(sum(tokens) / len(tokens), 1) if tokens else None,
+        "total_cost": round(sum(costs), 6) if costs else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="视频分析模式对比评估（完整视频 vs 关键帧）")
+    parser.add_argument("--sample", type=int, default=5, help="随机抽取的游戏数（默认 5）")
+    parser.add_argument("--games", nargs="*", default=None, help="指定游戏名（优先于 --sample）")
+    parser.add_argument("--model", default=None, help=f"分析模型（默认 {config.VIDEO_ANALYSIS_MODEL}）")
+    parser.add_argument("--keyframes", type=int, default=None, help=f"关键帧数（默认 {config.KEYFRAME_COUNT}）")
+    parser.add_argument("--method", choices=["scene", "uniform"], default=None,
+                        help=f"选帧方式（默认 {config.KEYFRAME_METHOD}）")
+    parser.add_argument("--seed", type=int, default=0, help="抽样随机种子（默认 0）")
+    parser.add_argument("--verbose", action="store_true", help="输出分析过程日志")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help=f"结果 JSON 输出目录（默认 {DEFAULT_OUTPUT_DIR}）")
+    args = parser.parse_args()
+
+    if not keyframes.KEYFRAMES_AVAILABLE:
+        print("✗ 未安装 opencv-python / numpy，无法抽取关键帧")
+        return
+    if not config.OPENROUTER_API_KEY:
+        print("✗ 未配置 OPENROUTER_API_KEY，无法对比（Mock 结果没有意义）")
+        return
+    if args.keyframes:
+        config.KEYFRAME_COUNT = args.keyframes
+    if args.method:
+        config.KEYFRAME_METHOD = args.method
+
+    db = VideoDatabase()
+    rows = [r for r in db.get_local_video_states()
+            if r.get("gdrive_url") and r.get("local_path") and os.path.exists(r["local_path"])]
+    if args.games:
+        wanted = set(args.games)
+        rows = [r for r in rows if r["game_name"] in wanted]
+    else:
+        random.Random(args.seed).shuffle(rows)
+        rows = rows[:args.sample]
+    if not rows:
+        print("✗ 没有同时具有本地视频与 Google Drive 链接的游戏")
+        return
+
+    # 不使用数据库：每种模式都实际请求一次，结果也不写回数据库
+    analyzer = VideoAnalyzer(model=args.model, use_database=False)
+    commit = get_git_commit()
+    print(f"分析模式对比（commit={commit}，模型 {analyzer.model}，{len(rows)} 个游戏，"
+          f"关键帧 {config.KEYFRAME_COUNT} 张 / {config.KEYFRAME_METHOD} / 长边 {config.KEYFRAME_MAX_SIDE}px）")
+
+    games = []
+    for i, row in enumerate(rows, 1):
+        print(f"\n[{i}/{len(rows)}] {row['game_name']}")
+        runs = {}
+        for mode in MODES:
+            runs[mode] = run_once(analyzer, row, mode, args.verbose)
+            r = runs[mode]
+            print(f"  {mode:<9} {r['status'] or '失败':<8} {r['seconds']:>6.1f}s  "
+                  f"token {r['total_tokens'] if r['total_tokens'] is not None else '-'}"
+                  + (f"（{r['frames']} 张关键帧）" if r["frames"] else ""))
+        similarity = compare_outputs(runs["video"], runs["keyframes"])
+        print(f"  相似度：基线分类{'一致' if similarity['baseline_exact'] else ('一级一致' if similarity['baseline_top'] else '不同')}，"
+              f"核心玩法 {similarity['core_gameplay_ratio']:.2f}，创新点重合 {similarity['innovation_overlap']:.2f}")
+        games.append({"game_name": row["game_name"], "runs": runs, "similarity": similarity})
+
+    summary = {mode: summarize([g["runs"][mode] for g in games]) for mode in MODES}
+    compared = [g["similarity"] for g in games if g["similarity"]["parsed"]]
+    if compared:
+        summary["similarity"] = {
+            "games": len(compared),
+            "baseline_exact_rate": round(sum(s["baseline_exact"] for s in compared) / len(compared), 3),
+            "baseline_top_rate": round(sum(s["baseline_top"] for s in compared) / len(compared), 3),
+            "avg_core_gameplay_ratio": round(sum(s["core_gameplay_ratio"] for s in compared) / len(compared), 3),
+            "avg_innovation_overlap": round(sum(s["innovation_overlap"] for s in compared) / len(compared), 3),
+        }
+
+    print("\n汇总：")
+    for mode in MODES:
+        s = summary[mode]
+        print(f"  {mode:<9} 成功 {s['success']}/{s['runs']}  p50 {s['p50_seconds']}s  p90 {s['p90_seconds']}s  "
+              f"平均输入 token {s['avg_prompt_tokens']}  平均总 token {s['avg_total_tokens']}  费用 {s['total_cost']}")
+    if compared:
+        s = summary["similarity"]
+        print(f"  相似度（{s['games']} 个游戏）：基线分类一致 {s['baseline_exact_rate']:.0%}（一级一致 {s['baseline_top_rate']:.0%}），"
+              f"核心玩法 {s['avg_core_gameplay_ratio']:.2f}，创新点重合 {s['avg_innovation_overlap']:.2f}")
+
+    report = {
+        "meta": {
+            "git_commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "model": analyzer.model,
+            "keyframe_count": config.KEYFRAME_COUNT,
+            "keyframe_method": config.KEYFRAME_METHOD,
+            "keyframe_max_side": config.KEYFRAME_MAX_SIDE,
+            "keyframe_jpeg_quality": config.KEYFRAME_JPEG_QUALITY,
+        },
+        "summary": summary,
+        "games": games,
+    }
+    output_dir = os.path.abspath(args.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    out_path = os.path.join(output_dir, f"analysis_modes_{ts}_{commit}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ 对比结果已保存：{out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+候选视频排序离线评估
+回放 search_response_cache 中缓存的抖音 / YouTube 搜索原始响应（不调用任何API、不写数据库），
+对比两种排序方式选出的第一名视频，统计选中视频发生变化的比例。
+
+基线（--baseline）：
+  legacy：旧版排序（抖音：关键词过滤后按 点赞*1000+播放；YouTube：短视频优先再按观看数）
+  config：当前 RANKER_WEIGHTS 配置的排序器
+候选：--weights 指定的权重（未指定时使用当前 RANKER_WEIGHTS 配置）
+
+用法（项目根目录）：
+  python scripts/tools/evaluate_video_ranker.py
+  python scripts/tools/evaluate_video_ranker.py --provider douyin --show 20
+  python scripts/tools/evaluate_video_ranker.py --baseline config --weights name=15,likes=1
+  python scripts/tools/evaluate_video_ranker.py --output data/ranker_eval.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import config
+from modules.database import VideoDatabase
+from modules.video_ranker import VideoRanker, parse_weights
+
+DOUYIN_QUERY_SUFFIX = " 小游戏攻略"
+YOUTUBE_QUERY_SUFFIX = " gameplay"
+
+# 旧版 _filter_and_score_videos 的过滤词表（仅用于 legacy 基线）
+LEGACY_RELEVANT = ["玩法", "演示", "教程", "怎么玩", "如何玩", "操作", "技巧", "攻略", "教学", "展示", "试玩", "体验"]
+LEGACY_IRRELEVANT = ["宣传", "广告", "推广", "下载", "安装", "注册", "充值", "氪金", "抽奖", "活动", "福利", "奖励"]
+
+
+def legacy_pick_douyin(videos: List[Dict]) -> Optional[Dict]:
+    """旧版抖音选片：排除只含不相关词的视频，再按 点赞*1000+播放 取最高"""
+    kept = []
+    for v in videos:
+        text = f"{v.get('title', '')} {v.get('description', '')}".lower()
+        if any(k in text for k in LEGACY_IRRELEVANT) and not any(k in text for k in LEGACY_RELEVANT):
+            continue
+        kept.append(v)
+    if not kept:
+        return None
+    return max(kept, key=lambda v: (v.get("like_count") or 0) * 1000 + (v.get("play_count") or 0))
+
+
+def legacy_pick_youtube(videos: List[Dict]) -> Optional[Dict]:
+    """旧版 YouTube 选片：短视频（<=60秒）优先，再按观看数"""
+    if not videos:
+        return None
+
+    def _score(v: Dict) -> tuple:
+        dur = v.get("duration") or 0
+        return (1 if (dur and dur <= 60) else 0, v.get("views") or 0)
+
+    return max(videos, key=_score)
+
+
+def video_key(video: Optional[Dict]) -> Optional[str]:
+    if not video:
+        return None
+    return video.get("aweme_id") or video.get("video_id")
+
+
+def load_cases(db: VideoDatabase, provider: str) -> List[Dict]:
+    """从搜索响应缓存中加载回放用例：[{provider, game_name, query, candidates}]"""
+    cases = []
+    if provider in ("douyin", "all"):
+        from modules.video_searcher import VideoSearcher
+        searcher = VideoSearcher()
+        for rec in db.get_search_responses(config.DOUYIN_SEARCH_ENDPOINT):
+            query = rec["request"].get("keyword", "")
+            game_name = query[:-len(DOUYIN_QUERY_SUFFIX)] if query.endswith(DOUYIN_QUERY_SUFFIX) else query
+            with contextlib.redirect_stdout(io.StringIO()):
+                candidates = searcher._parse_search_results(rec["response"], game_name, query, persist=False)
+            cases.append({"provider": "douyin", "game_name": game_name, "query": query, "candidates": candidates})
+    if provider in ("youtube", "all"):
+        from modules.youtube_searcher import YouTubeSearcher
+        searcher = YouTubeSearcher()
+        endpoint = f"{searcher.rapidapi_base_url}/search/"
+        for rec in db.get_search_responses(endpoint):
+            query = rec["request"].get("q", "")
+            game_name = query[:-len(YOUTUBE_QUERY_SUFFIX)] if query.endswith(YOUTUBE_QUERY_SUFFIX) else query
+            candidates = searcher._extract_candidates(rec["response"], game_name)
+            cases.append({"provider": "youtube", "game_name": game_name, "query": query, "candidates": candidates})
+    return cases
+
+
+def pick_with_ranker(ranker: VideoRanker, case: Dict) -> Optional[Dict]:
+    """用排序器选出第一名（抖音过滤不相关视频，YouTube 不过滤，与线上一致）"""
+    candidates = [dict(v) for v in case["candidates"]]
+    ranked = ranker.rank(candidates, case["game_name"], top_k=1,
+                         drop_irrelevant=case["provider"] == "douyin")
+    return ranked[0] if ranked else None
+
+
+def evaluate(cases: List[Dict], candidate: VideoRanker, baseline: str, baseline_ranker: VideoRanker) -> Dict:
+    """逐条回放并统计选中视频变化"""
+    changed = []
+    per_provider: Dict[str, Dict[str, int]] = {}
+    for case in cases:
+        stats = per_provider.setdefault(case["provider"], {"queries": 0, "changed": 0, "empty": 0})
+        stats["queries"] += 1
+        if baseline == "legacy":
+            base_pick = (legacy_pick_douyin if case["provider"] == "douyin" else legacy_pick_youtube)(
+                [dict(v) for v in case["candidates"]]
+            )
+        else:
+            base_pick = pick_with_ranker(baseline_ranker, case)
+        new_pick = pick_with_ranker(candidate, case)
+        if not case["candidates"]:
+            stats["empty"] += 1
+        if video_key(base_pick) != video_key(new_pick):
+            stats["changed"] += 1
+            changed.append({
+                "provider": case["provider"],
+                "game_name": case["game_name"],
+                "candidates": len(case["candidates"]),
+                "baseline": {"id": video_key(base_pick), "title": (base_pick or {}).get("title")},
+                "candidate": {
+                    "id": video_key(new_pick),
+                    "title": (new_pick or {}).get("title"),
+                    "score": (new_pick or {}).get("ranker_score"),
+                    "explanation": (new_pick or {}).get("score_explanation"),
+                },
+            })
+    return {"per_provider": per_provider, "changed": changed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回放缓存的搜索响应，离线评估候选视频排序")
+    parser.add_argument("--db", default=None, help="数据库路径（默认 data/wechatdouyin.db）")
+    parser.add_argument("--provider", choices=["douyin", "youtube", "all"], default="all", help="评估的搜索来源（默认 all）")
+    parser.add_argument("--baseline", choices=["legacy", "config"], default="legacy", help="对比基线（默认 legacy 旧版排序）")
+    parser.add_argument("--weights", default=None, help="候选权重，格式同 RANKER_WEIGHTS（默认使用当前配置）")
+    parser.add_argument("--show", type=int, default=10, help="打印前 N 条选中视频变化的明细（默认 10）")
+    parser.add_argument("--output", default=None, help="可选，将完整结果保存为 JSON")
+    args = parser.parse_args()
+
+    db = VideoDatabase(args.db)
+    cases = load_cases(db, args.provider)
+    if not cases:
+        print("⚠ 搜索响应缓存为空，无可回放的数据（先正常运行搜索以积累缓存）")
+        return
+
+    config_weights = parse_weights(config.RANKER_WEIGHTS)
+    candidate_weights = parse_weights(args.weights) if args.weights is not None else config_weights
+    result = evaluate(cases, VideoRanker(candidate_weights), args.baseline, VideoRanker(config_weights))
+
+    print("=" * 60)
+    print(f"候选视频排序离线评估（基线：{args.baseline}）")
+    print(f"候选权重：{candidate_weights}")
+    print("=" * 60)
+    total = sum(s["queries"] for s in result["per_provider"].values())
+    total_changed = sum(s["changed"] for s in result["per_provider"].values())
+    for provider, s in result["per_provider"].items():
+        rate = s["changed"] / s["queries"] * 100 if s["queries"] else 0.0
+        print(f"  {provider}: 查询 {s['queries']} 条，选中视频变化 {s['changed']} 条（{rate:.1f}%），无候选 {s['empty']} 条")
+    print(f"  合计：{total_changed}/{total}（{total_changed / total * 100:.1f}%）")
+
+    if args.show and result["changed"]:
+        print(f"\n选中视频变化明细（前 {args.show} 条）：")
+        for item in result["changed"][:args.show]:
+            print(f"  [{item['provider']}] {item['game_name']}（候选 {item['candidates']} 个）")
+            print(f"    基线：{str(item['baseline']['title'] or '无')[:50]}")
+            print(f"    新选：{str(item['candidate']['title'] or '无')[:50]}  得分 {item['candidate']['score']}")
+            if item["candidate"]["explanation"]:
+                print(f"          {', '.join(item['candidate']['explanation'])}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"baseline": args.baseline, "weights": candidate_weights, **result},
+                      f, ensure_ascii=False, indent=2)
+        print(f"\n✓ 评估结果已保存：{args.output}")
+
+
+if __name__ == "__main__":
+    main()
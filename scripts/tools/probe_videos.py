@@ -0,0 +1,52 @@
+"""
+检查数据库中已下载视频的完整性（只读取 MP4 容器头：moov、时长、分辨率）
+HTML错误页、被截断、没有视频轨的文件加 --quarantine 时移入隔离目录，并清除对应游戏的本地路径与
+Google Drive 链接，下次运行步骤2时重新下载。
+
+用法（项目根目录）：
+  python scripts/tools/probe_videos.py
+  python scripts/tools/probe_videos.py --quarantine
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules import video_probe
+from modules.database import VideoDatabase
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查已下载视频的完整性")
+    parser.add_argument("--quarantine", action="store_true", help="隔离坏文件并清除数据库中的路径与Drive链接")
+    args = parser.parse_args()
+
+    db = VideoDatabase()
+    rows = [r for r in db.get_local_video_states() if os.path.exists(r["local_path"])]
+    print(f"本地视频：{len(rows)} 个")
+    bad = 0
+    for row in rows:
+        path = row["local_path"]
+        result = video_probe.probe(path)
+        if result["ok"]:
+            duration = f"{result['duration']:.1f}s" if result["duration"] is not None else "未知时长"
+            print(f"  ✓ {row['game_name']}: {result['width']}x{result['height']} {duration} {result['codec'] or ''}")
+            continue
+        bad += 1
+        print(f"  ✗ {row['game_name']}: {result['reason']}（{result['size'] / 1024:.0f} KB）{path}")
+        if args.quarantine:
+            video_probe.check(db, path, game_name=row["game_name"])
+
+    if bad and not args.quarantine:
+        print(f"\n⚠ 发现 {bad} 个坏文件，加 --quarantine 隔离并在下次运行时重新下载")
+    else:
+        print(f"\n✓ 检查完成，坏文件 {bad} 个")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+按磁盘配额清理本地视频（data/videos 与本地视频存储目录）
+未上传 Google Drive、未完成玩法分析、还没有截图的视频会保留；其余按最近使用时间清理，
+并同步把对应游戏的 games.local_path 置空、downloaded 置 0。
+
+用法（项目根目录）：
+  python scripts/tools/prune_video_cache.py --dry-run
+  python scripts/tools/prune_video_cache.py --quota-mb 2048
+  python scripts/tools/prune_video_cache.py --max-age-days 14 --skip-screenshots
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import config
+from modules import video_cache
+from modules.database import VideoDatabase
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按磁盘配额清理本地视频")
+    parser.add_argument("--quota-mb", type=float, default=None,
+                        help=f"占用上限（MB），默认 VIDEO_CACHE_QUOTA_MB={config.VIDEO_CACHE_QUOTA_MB:.0f}")
+    parser.add_argument("--max-age-days", type=float, default=None,
+                        help=f"超过该天数未使用即清理，默认 VIDEO_CACHE_MAX_AGE_DAYS={config.VIDEO_CACHE_MAX_AGE_DAYS:.0f}")
+    parser.add_argument("--skip-screenshots", action="store_true", help="不再需要截图（缺截图的视频也可清理）")
+    parser.add_argument("--dry-run", action="store_true", help="只列出将被清理的视频，不删除")
+    args = parser.parse_args()
+
+    units = video_cache.scan_videos()
+    used = sum(u["size"] for u in units)
+    print(f"本地视频：{len(units)} 个，占用 {used / 1024 / 1024:.1f} MB")
+    quota_mb = config.VIDEO_CACHE_QUOTA_MB if args.quota_mb is None else args.quota_mb
+    max_age_days = config.VIDEO_CACHE_MAX_AGE_DAYS if args.max_age_days is None else args.max_age_days
+    if quota_mb <= 0 and max_age_days <= 0:
+        print("⚠ 未设置配额与过期天数（--quota-mb / --max-age-days 或 VIDEO_CACHE_QUOTA_MB / VIDEO_CACHE_MAX_AGE_DAYS），不清理")
+        return
+
+    result = video_cache.enforce_quota(
+        VideoDatabase(),
+        quota_mb=quota_mb,
+        max_age_days=max_age_days,
+        need_screenshots=not args.skip_screenshots,
+        dry_run=args.dry_run,
+    )
+    for path in result["evicted_paths"]:
+        print(f"  {'将清理' if args.dry_run else '已清理'}：{path}")
+    print(
+        f"\n{'（试运行）' if args.dry_run else '✓ '}清理 {result['evicted_files']} 个，"
+        f"释放 {result['evicted_bytes'] / 1024 / 1024:.1f} MB；"
+        f"清理后占用 {result['used_bytes'] / 1024 / 1024:.1f} MB，"
+        f"仍被需要的视频 {result['pinned_bytes'] / 1024 / 1024:.1f} MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
 """
 重新搜索并更新视频数据（提取原视频URL）
+
+用法：
+  python scripts/tools/re_search_videos.py [游戏名] [--force]
+  --force：忽略搜索无结果记录，对近期无结果的游戏也重新搜索
 """
 import sys
 from pathlib import Path
@@ -11,12 +15,13 @@ from modules.video_searcher import VideoSearcher
 from modules.database import VideoDatabase
 
 
-def re_search_and_update(game_name: str = None):
+def re_search_and_update(game_name: str = None, force: bool = False):
     """
     重新搜索视频并更新数据库中的原视频URL
     
     Args:
         game_name: 游戏名称，如果为None则更新所有游戏
+        force: 是否忽略搜索无结果记录（默认跳过仍在退避期内的游戏）
     """
     print("=" * 60)
     print("重新搜索视频并更新原视频URL")
@@ -43,7 +48,7 @@ def re_search_and_update(game_name: str = None):
         print("-" * 60)
         
         # 搜索视频
-        videos = searcher.search_videos(game_name=game, max_results=1)
+        videos = searcher.search_videos(game_name=game, max_results=1, ignore_negative_cache=force)
         
         if not videos:
             print(f"  ✗ 未找到视频\n")
@@ -94,8 +99,10 @@ def re_search_and_update(game_name: str = None):
 if __name__ == "__main__":
     import sys
     
+    force = "--force" in sys.argv[1:]
+    args = [a for a in sys.argv[1:] if a != "--force"]
     game_name = None
-    if len(sys.argv) > 1:
-        game_name = sys.argv[1]
+    if args:
+        game_name = args[0]
     
-    re_search_and_update(game_name)
\ No newline at end of file
+    re_search_and_update(game_name, force=force)
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""
+复核近似重复视频的分析复用（见 PHASH_REUSE_MODE 与 modules/phash.py）
+  - 默认列出待确认的草稿（draft 模式提供、尚未写入游戏的分析）
+  - --accept ID：确认草稿，把被复用的分析写入该游戏
+  - --reject ID：驳回；skip 模式已写入的分析会被删除，该游戏下次运行时重新分析，且不再与该视频匹配
+  - --backfill：为已有分析且有本地视频的游戏计算感知哈希，让之后的换皮视频能匹配到它们
+
+用法（项目根目录）：
+  python scripts/tools/review_analysis_links.py
+  python scripts/tools/review_analysis_links.py --status all
+  python scripts/tools/review_analysis_links.py --accept 3 --reject 5 7
+  python scripts/tools/review_analysis_links.py --backfill
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules import phash
+from modules.database import VideoDatabase
+
+STATUS_LABELS = {"pending": "草稿待确认", "auto": "已直接复用", "accepted": "已确认", "rejected": "已驳回"}
+
+
+def show_links(db: VideoDatabase, status: str):
+    links = db.get_analysis_links(None if status == "all" else status)
+    if not links:
+        print("没有分析复用记录" if status == "all" else f"没有{STATUS_LABELS.get(status, status)}的记录")
+        return
+    print(f"分析复用记录（{len(links)} 条）：")
+    for link in links:
+        print(
+            f"  #{link['id']:<5} {STATUS_LABELS.get(link['status'], link['status']):<6} "
+            f"{link['game_name']} ← {link['source_game_name'] or link['source_video_key']}"
+            f"（匹配 {link['match_ratio']:.0%}，平均距离 {link['avg_distance']}，{link['created_at']}）"
+        )
+
+
+def find_link(db: VideoDatabase, link_id: int):
+    for link in db.get_analysis_links():
+        if link["id"] == link_id:
+            return link
+    print(f"✗ 找不到记录 #{link_id}")
+    return None
+
+
+def accept(db: VideoDatabase, link_id: int):
+    link = find_link(db, link_id)
+    if not link:
+        return
+    if link["status"] != "pending":
+        print(f"⚠ #{link_id} 状态为 {STATUS_LABELS.get(link['status'], link['status'])}，无需确认")
+        return
+    source = db.get_analysis_by_id(link["source_analysis_id"])
+    if not source:
+        print(f"✗ #{link_id} 被复用的分析已不存在，请正常分析 {link['game_name']}")
+        return
+    if not db.save_gameplay_analysis(
+        link["game_name"], source["gameplay_analysis"], source["analysis_model"],
+        prompt_version=source["prompt_version"], video_key=link["video_key"],
+    ):
+        return
+    saved = db.get_analysis(link["video_key"], source["analysis_model"], source["prompt_version"])
+    db.set_analysis_link_status(link_id, "accepted", saved.get("analysis_id") if saved else None)
+    print(f"✓ #{link_id} 已确认：{link['game_name']} 使用 {link['source_game_name']} 的分析")
+
+
+def reject(db: VideoDatabase, link_id: int):
+    link = find_link(db, link_id)
+    if not link:
+        return
+    if link["status"] in ("auto", "accepted") and link["analysis_id"]:
+        db.delete_analysis(link["analysis_id"])
+    db.set_analysis_link_status(link_id, "rejected")
+    print(f"✓ #{link_id} 已驳回：{link['game_name']} 下次运行时重新分析")
+
+
+def backfill(db: VideoDatabase):
+    if not phash.PHASH_AVAILABLE:
+        print("✗ 未安装 opencv-python / numpy，无法计算感知哈希")
+        return
+    hashed = set(db.get_video_phashes())
+    index = phash.get_phash_index(db)
+    added = 0
+    for row in db.get_local_video_states():
+        if not row.get("gameplay_analysis") or not row.get("local_path") or not os.path.exists(row["local_path"]):
+            continue
+        video_key = (db.get_gameplay_analysis(row["game_name"]) or {}).get("video_key")
+        if not video_key or video_key in hashed:
+            continue
+        hashes = phash.video_hashes(row["local_path"])
+        if hashes:
+            index.add(video_key, hashes, row["game_name"])
+            hashed.add(video_key)
+            added += 1
+            print(f"  ✓ {row['game_name']}")
+    print(f"\n✓ 新计算 {added} 个视频的感知哈希（共 {len(hashed)} 个）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="复核近似重复视频的分析复用")
+    parser.add_argument("--status", choices=["pending", "auto", "accepted", "rejected", "all"], default="pending",
+                        help="列出的记录状态（默认 pending）")
+    parser.add_argument("--accept", type=int, nargs="*", default=[], help="确认草稿的记录ID")
+    parser.add_argument("--reject", type=int, nargs="*", default=[], help="驳回的记录ID")
+    parser.add_argument("--backfill", action="store_true", help="为已分析的本地视频计算感知哈希")
+    args = parser.parse_args()
+
+    db = VideoDatabase()
+    if args.backfill:
+        backfill(db)
+        return
+    for link_id in args.accept:
+        accept(db, link_id)
+    for link_id in args.reject:
+        reject(db, link_id)
+    if not args.accept and not args.reject:
+        show_links(db, args.status)
+
+
+if __name__ == "__main__":
+    main()
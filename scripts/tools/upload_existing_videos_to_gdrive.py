@@ -1,5 +1,6 @@
 """
-为数据库中已有的视频上传到Google Drive并更新URL
+为数据库中已有的视频上传到Google Drive并更新URL（多个视频并行上传，中断后再次运行从断点续传；
+内容已在Drive中的视频按 md5 索引直接复用，不重复上传）
 """
 import sys
 from pathlib import Path
@@ -8,7 +9,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from modules.database import VideoDatabase
-from modules.gdrive_uploader import GoogleDriveUploader
+from modules.gdrive_upload_manager import get_upload_manager
+from modules.gdrive_uploader import get_drive_uploader
 import os
 
 
@@ -52,14 +54,19 @@ def upload_existing_videos_to_gdrive(game_name: str = None):
     
     # 初始化Google Drive上传器
     try:
-        uploader = GoogleDriveUploader()
+        get_drive_uploader()
     except Exception as e:
         print(f"❌ 初始化Google Drive上传器失败：{str(e)}")
         return
     
-    # 上传视频
+    # 并行上传视频（GDRIVE_UPLOAD_CONCURRENCY 个同时进行，中断后再次运行从断点续传）
+    manager = get_upload_manager()
+    results = manager.upload_many([video.get("local_path") for video in videos_to_upload],
+                                  folder_name="Game Videos", db=db)
+    print()
+    
     success_count = 0
-    for idx, video in enumerate(videos_to_upload, 1):
+    for idx, (video, result) in enumerate(zip(videos_to_upload, results), 1):
         game_name = video.get("game_name", "未知")
         aweme_id = video.get("aweme_id", "")
         local_path = video.get("local_path")
@@ -67,26 +74,26 @@ def upload_existing_videos_to_gdrive(game_name: str = None):
         print(f"[{idx}/{len(videos_to_upload)}] {game_name} - {aweme_id}")
         print(f"  本地路径：{local_path}")
         
-        try:
-            result = uploader.upload_video(local_path, folder_name="Game Videos")
+        if result and result.get('public_url'):
+            gdrive_url = result['public_url']
+            gdrive_file_id = result.get('file_id')
+            
+            # 更新数据库
+            db.update_download_status(video.get("game_name"), local_path, gdrive_url, gdrive_file_id)
             
-            if result and result.get('public_url'):
-                gdrive_url = result['public_url']
-                gdrive_file_id = result.get('file_id')
-                
-                # 更新数据库
-                db.update_download_status(aweme_id, local_path, gdrive_url, gdrive_file_id)
-                
-                print(f"  ✓ 上传成功")
-                print(f"  Google Drive链接：{gdrive_url[:60]}...")
-                success_count += 1
-            else:
-                print(f"  ✗ 上传失败")
-        except Exception as e:
-            print(f"  ✗ 上传时出错：{str(e)}")
+            print(f"  ✓ 复用Drive中相同内容的文件" if result.get('deduped') else f"  ✓ 上传成功")
+            print(f"  Google Drive链接：{gdrive_url[:60]}...")
+            success_count += 1
+        else:
+            print(f"  ✗ 上传失败")
         
         print()
     
+    stats = manager.get_stats()
+    if stats["resumed"]:
+        print(f"断点续传 {stats['resumed']} 个，省下 {stats['resumed_bytes'] / 1024 / 1024:.1f} MB")
+    if stats["deduped"]:
+        print(f"相同内容已在Drive中（未重复上传）：{stats['deduped']} 个")
     print("=" * 60)
     print(f"完成！成功上传 {success_count}/{len(videos_to_upload)} 个视频")
     print("=" * 60)